@@ -8,6 +8,11 @@ EXIT_CODE=0
 EXPECTED_NUMBER_OF_PARAMS=2
 COMMON_LIB_FILE="common-lib.sh"
 SERVICES_ENVS_DIR="services/envs"
+DEPLOY_PLANNER="services/tools/deploy_planner.py"
+DEPLOY_PLAN_ACTIVE=0
+PLANNED_SERVICES=""
+DEPLOY_PLAN_FILE=""
+DEPLOYED_SERVICES_FILE=""
 
 #------------------------------------------------------------------------------
 # functions
@@ -20,6 +25,8 @@ PrintUsageAndExitWithCode() {
     echo "  2nd parameter Region: us-west-2 is supported at the moment"
     echo "  The AWS_ACCESS_KEY_ID environment variable needs to be setup"
     echo "  The AWS_SECRET_ACCESS_KEY environment variable needs to be setup"
+    echo "  Services unchanged since their last deployment are skipped,"
+    echo "  set ABK_DEPLOY_ALL=1 to deploy all services"
     echo
     echo "  $0 --help           - display this info"
     echo
@@ -27,6 +34,52 @@ PrintUsageAndExitWithCode() {
     exit "$1"
 }
 
+PlanDeployments() {
+    PrintTrace "$TRACE_FUNCTION" "-> ${FUNCNAME[0]} ($*)"
+    local LCL_DEPLOYMENT_BUCKET=""
+    local LCL_PLAN_ALL=""
+
+    if [ -z "${ABK_DEPLOY_MANIFEST:-}" ]; then
+        LCL_DEPLOYMENT_BUCKET=$(yq -r ".services.abk_deployment_bucket" "config.$ABK_DEPLOYMENT_ENV.yml" 2>/dev/null) || LCL_DEPLOYMENT_BUCKET=""
+        if [ -z "$LCL_DEPLOYMENT_BUCKET" ] || [ "$LCL_DEPLOYMENT_BUCKET" == "null" ]; then
+            PrintTrace "$TRACE_WARNING" "No deployment bucket in config.$ABK_DEPLOYMENT_ENV.yml, deploying all services"
+            PrintTrace "$TRACE_FUNCTION" "<- ${FUNCNAME[0]} (0)"
+            return 0
+        fi
+        ABK_DEPLOY_MANIFEST="s3://$LCL_DEPLOYMENT_BUCKET/abk-deploy-manifests/$ABK_DEPLOYMENT_ENV-$ABK_DEPLOYMENT_REGION.json"
+    fi
+    [ "${ABK_DEPLOY_ALL:-0}" == "1" ] && LCL_PLAN_ALL="--all"
+
+    DEPLOY_PLAN_FILE=$(mktemp)
+    DEPLOYED_SERVICES_FILE=$(mktemp)
+    # shellcheck disable=SC2086
+    if PLANNED_SERVICES=$(python3 "$DEPLOY_PLANNER" plan --env "$ABK_DEPLOYMENT_ENV" --region "$ABK_DEPLOYMENT_REGION" --manifest "$ABK_DEPLOY_MANIFEST" --services-dir "$SERVICES_ENVS_DIR" --output "$DEPLOY_PLAN_FILE" $LCL_PLAN_ALL); then
+        DEPLOY_PLAN_ACTIVE=1
+        PrintTrace "$TRACE_INFO" "Services to deploy:"
+        PrintTrace "$TRACE_INFO" "${PLANNED_SERVICES:-none}"
+    else
+        PrintTrace "$TRACE_WARNING" "Deployment planner failed, deploying all services"
+    fi
+
+    PrintTrace "$TRACE_FUNCTION" "<- ${FUNCNAME[0]} (0)"
+    return 0
+}
+
+RecordDeployments() {
+    PrintTrace "$TRACE_FUNCTION" "-> ${FUNCNAME[0]} ($*)"
+    local LCL_DEPLOYED_SERVICES=()
+
+    if [ "$DEPLOY_PLAN_ACTIVE" -eq 1 ] && [ -s "$DEPLOYED_SERVICES_FILE" ]; then
+        mapfile -t LCL_DEPLOYED_SERVICES < "$DEPLOYED_SERVICES_FILE"
+        python3 "$DEPLOY_PLANNER" record --plan "$DEPLOY_PLAN_FILE" --manifest "$ABK_DEPLOY_MANIFEST" "${LCL_DEPLOYED_SERVICES[@]}" \
+            || PrintTrace "$TRACE_WARNING" "Failed to record deployed services, they will be deployed again next time"
+    fi
+    rm -f "$DEPLOY_PLAN_FILE" "$DEPLOYED_SERVICES_FILE"
+
+    PrintTrace "$TRACE_FUNCTION" "<- ${FUNCNAME[0]} (0)"
+    return 0
+}
+
 DeployService() {
     PrintTrace "$TRACE_FUNCTION" "-> ${FUNCNAME[0]} ($*)"
     local LCL_SERVICE="$1"
@@ -41,6 +94,13 @@ DeployService() {
         return "$LCL_EXIT_CODE"
     fi
 
+    # Only deploy if service changed since its last deployment
+    if [ "$DEPLOY_PLAN_ACTIVE" -eq 1 ] && ! grep -qxF "$LCL_SERVICE" <<< "$PLANNED_SERVICES"; then
+        PrintTrace "$TRACE_INFO" "Skipping unchanged service: $LCL_SERVICE_NAME"
+        PrintTrace "$TRACE_FUNCTION" "<- ${FUNCNAME[0]} ($LCL_EXIT_CODE)"
+        return "$LCL_EXIT_CODE"
+    fi
+
     PrintTrace "$TRACE_INFO" "${YLW}Deploying service: $LCL_SERVICE_NAME${NC}"
     (
         cd "$LCL_SERVICE" || exit "$?"
@@ -50,6 +110,7 @@ DeployService() {
 
     if [ "$LCL_EXIT_CODE" -eq 0 ]; then
         PrintTrace "$TRACE_INFO" "${GRN}✅ Service deployed successfully: $LCL_SERVICE_NAME${NC}"
+        [ -n "$DEPLOYED_SERVICES_FILE" ] && echo "$LCL_SERVICE" >> "$DEPLOYED_SERVICES_FILE"
     else
         PrintTrace "$TRACE_ERROR" "${RED}❌ Service deployment failed: $LCL_SERVICE_NAME${NC}"
     fi
@@ -133,6 +194,7 @@ DeployParallelServices() {
         export TRACE_FUNCTION TRACE_INFO TRACE_ERROR TRACE_WARNING YLW NC GRN RED
         export TRACE_LEVEL TRACE_NONE TRACE_CRITICAL TRACE_ERROR TRACE_WARNING TRACE_FUNCTION TRACE_INFO TRACE_DEBUG TRACE_ALL
         export ABK_DEPLOYMENT_ENV ABK_DEPLOYMENT_REGION
+        export DEPLOY_PLAN_ACTIVE PLANNED_SERVICES DEPLOYED_SERVICES_FILE
         export AWS_ACCESS_KEY_ID AWS_SECRET_ACCESS_KEY AWS_DEFAULT_REGION
         export PATH NODE_PATH
 
@@ -176,6 +238,10 @@ IsPredefinedParameterValid "$2" "${REGION_ARRAY[@]}" || PrintUsageAndExitWithCod
 ABK_DEPLOYMENT_ENV="$1"
 ABK_DEPLOYMENT_REGION="$2"
 
+# Step 0: Plan which services changed since their last deployment
+PrintTrace "$TRACE_INFO" "Step 0: Planning deployments of changed services"
+PlanDeployments
+
 # Step 1: Deploy sequential services from common directory
 PrintTrace "$TRACE_INFO" "Step 1: Deploying sequential services from common directory"
 DeploySequentialServices "$SERVICES_ENVS_DIR" "common" || EXIT_CODE="$?"
@@ -198,6 +264,9 @@ if [ "$EXIT_CODE" -eq 0 ]; then
     DeployParallelServices "$SERVICES_ENVS_DIR" "$ABK_DEPLOYMENT_ENV" || EXIT_CODE="$?"
 fi
 
+# Step 5: Record the services deployed successfully, also after a failure
+RecordDeployments
+
 if [ "$EXIT_CODE" -eq 0 ]; then
     PrintTrace "$TRACE_INFO" "${GRN}🎉 All services deployed successfully!${NC}"
 else
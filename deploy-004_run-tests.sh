@@ -206,6 +206,13 @@ EOF
             LCL_TOTAL_FAILED=$((LCL_TOTAL_FAILED + FAILED))
             LCL_TOTAL_SKIPPED=$((LCL_TOTAL_SKIPPED + SKIPPED))
             LCL_TOTAL_TESTS=$((LCL_TOTAL_TESTS + TOTAL))
+
+            # load generator reports carry latency percentiles and error rates
+            local LOAD_ENTRY=""
+            if jq -e '.load' "$REPORT_FILE" >/dev/null 2>&1; then
+                LOAD_ENTRY=",
+        \"load\": $(jq -c '.load | {throughput_rps, latency_ms, errors, cold_start_outliers: {count: .cold_start_outliers.count}}' "$REPORT_FILE")"
+            fi
             
             cat >> "$LCL_SUMMARY_FILE" << EOF
       {
@@ -215,7 +222,7 @@ EOF
         "skipped": $SKIPPED,
         "total": $TOTAL,
         "result": "$([ "$FAILED" -eq 0 ] && echo "PASS" || echo "FAIL")",
-        "report_file": "$REPORT_FILE"
+        "report_file": "$REPORT_FILE"$LOAD_ENTRY
       }
 EOF
         else
@@ -311,35 +318,34 @@ fi
 # Discover API URLs for all services before running tests
 DiscoverServiceApiUrls() {
     PrintTrace "$TRACE_FUNCTION" "-> ${FUNCNAME[0]} ($*)"
-    
-    # For now, we'll focus on abk-hello service
-    # TODO: Make this dynamic for multiple services
-    if [ -z "${ABK_HELLO_API_URL:-}" ]; then
-        local service_name="${ABK_DEPLOYMENT_ENV}-abk-hello"
-        PrintTrace "$TRACE_INFO" "Discovering API Gateway URL for service: $service_name"
-        
-        local api_info
-        if api_info=$(aws apigateway get-rest-apis \
-            --region "$ABK_DEPLOYMENT_REGION" \
-            --query "items[?name=='$service_name'].{id:id,name:name}" \
-            --output json 2>/dev/null); then
-            
-            local api_id
-            if api_id=$(echo "$api_info" | jq -r '.[0].id // empty' 2>/dev/null) && [ -n "$api_id" ] && [ "$api_id" != "null" ]; then
-                ABK_HELLO_API_URL="https://${api_id}.execute-api.${ABK_DEPLOYMENT_REGION}.amazonaws.com/${ABK_DEPLOYMENT_ENV}"
-                PrintTrace "$TRACE_INFO" "Discovered ABK_HELLO_API_URL: $ABK_HELLO_API_URL"
-                export ABK_HELLO_API_URL
-            else
-                PrintTrace "$TRACE_WARNING" "Could not discover API Gateway URL for $service_name"
-                PrintTrace "$TRACE_WARNING" "Please set ABK_HELLO_API_URL environment variable manually"
-            fi
+
+    # one cached get-rest-apis call maps every ${ABK_DEPLOYMENT_ENV}-<service> to its URL
+    local api_urls
+    if ! api_urls=$(python3 "$INTEGRATION_TESTS_DIR/common/api_discovery.py" list \
+        --env "$ABK_DEPLOYMENT_ENV" \
+        --region "$ABK_DEPLOYMENT_REGION" \
+        --format env); then
+        PrintTrace "$TRACE_WARNING" "Failed to query API Gateway for $ABK_DEPLOYMENT_ENV services"
+        PrintTrace "$TRACE_FUNCTION" "<- ${FUNCNAME[0]} (0)"
+        return 0
+    fi
+
+    local url_var api_url
+    while IFS='=' read -r url_var api_url; do
+        [ -z "$url_var" ] && continue
+        if [ -n "${!url_var:-}" ]; then
+            PrintTrace "$TRACE_INFO" "Using existing $url_var: ${!url_var}"
         else
-            PrintTrace "$TRACE_WARNING" "Failed to query API Gateway for $service_name"
+            PrintTrace "$TRACE_INFO" "Discovered $url_var: $api_url"
+            export "$url_var=$api_url"
         fi
-    else
-        PrintTrace "$TRACE_INFO" "Using existing ABK_HELLO_API_URL: $ABK_HELLO_API_URL"
+    done <<< "$api_urls"
+
+    if [ -z "${ABK_HELLO_API_URL:-}" ]; then
+        PrintTrace "$TRACE_WARNING" "Could not discover API Gateway URL for ${ABK_DEPLOYMENT_ENV}-abk-hello"
+        PrintTrace "$TRACE_WARNING" "Please set ABK_HELLO_API_URL environment variable manually"
     fi
-    
+
     PrintTrace "$TRACE_FUNCTION" "<- ${FUNCNAME[0]} (0)"
 }
 
@@ -6,6 +6,7 @@
 set -eu
 
 COMMON_LIB_FILE="common-lib.sh"
+API_DISCOVERY="$(dirname "$0")/tests/integration/common/api_discovery.py"
 
 #------------------------------------------------------------------------------
 # functions
@@ -26,38 +27,12 @@ PrintUsage() {
     echo "  $0 prod us-west-2    # Discover URLs for prod environment"
     echo
     echo "Output:"
-    echo "  - Displays discovered URLs"
+    echo "  - Displays discovered URLs of all <ENVIRONMENT>-<service> APIs"
     echo "  - Provides export commands for your shell"
+    echo "  - Refreshes the URL cache used by the integration tests"
     echo
 }
 
-DiscoverApiUrl() {
-    local env="$1"
-    local region="$2" 
-    local service_base_name="$3"
-    local service_name="${env}-${service_base_name}"
-    
-    echo "🔍 Discovering API Gateway for: $service_name"
-    
-    # Try to get API Gateway info using AWS CLI
-    local api_info
-    if api_info=$(aws apigateway get-rest-apis \
-        --region "$region" \
-        --query "items[?name=='$service_name'].{id:id,name:name}" \
-        --output json 2>/dev/null); then
-        
-        local api_id
-        if api_id=$(echo "$api_info" | jq -r '.[0].id // empty' 2>/dev/null) && [ -n "$api_id" ] && [ "$api_id" != "null" ]; then
-            local api_url="https://${api_id}.execute-api.${region}.amazonaws.com/${env}"
-            echo "✅ Found: $api_url"
-            return 0
-        fi
-    fi
-    
-    echo "❌ Not found: $service_name"
-    return 1
-}
-
 #------------------------------------------------------------------------------
 # main
 #------------------------------------------------------------------------------
@@ -111,26 +86,24 @@ echo "  User/Role: $user_arn"
 echo "  Region: $REGION"
 echo
 
-# Discover known services
+# Discover all services: one get-rest-apis call maps every <env>-<service> to its URL
 DISCOVERED_URLS=()
 EXPORT_COMMANDS=()
 
 echo "🔍 Discovering API Gateway URLs..."
 echo
 
-# ABK Hello Service
-if DiscoverApiUrl "$ENVIRONMENT" "$REGION" "abk-hello"; then
-    api_url="https://$(aws apigateway get-rest-apis --region "$REGION" --query "items[?name=='${ENVIRONMENT}-abk-hello'].id" --output text).execute-api.${REGION}.amazonaws.com/${ENVIRONMENT}"
-    DISCOVERED_URLS+=("ABK_HELLO_API_URL=$api_url")
-    EXPORT_COMMANDS+=("export ABK_HELLO_API_URL=\"$api_url\"")
+if ! api_urls=$(python3 "$API_DISCOVERY" list --env "$ENVIRONMENT" --region "$REGION" --format env --refresh); then
+    echo "❌ ERROR: Failed to list API Gateway REST APIs in $REGION"
+    exit 1
 fi
 
-# Add more services here as needed
-# if DiscoverApiUrl "$ENVIRONMENT" "$REGION" "user-service"; then
-#     api_url="https://$(aws apigateway get-rest-apis --region "$REGION" --query "items[?name=='${ENVIRONMENT}-user-service'].id" --output text).execute-api.${REGION}.amazonaws.com/${ENVIRONMENT}"
-#     DISCOVERED_URLS+=("USER_SERVICE_API_URL=$api_url")
-#     EXPORT_COMMANDS+=("export USER_SERVICE_API_URL=\"$api_url\"")
-# fi
+while IFS='=' read -r url_var api_url; do
+    [ -z "$url_var" ] && continue
+    echo "✅ Found: $url_var=$api_url"
+    DISCOVERED_URLS+=("$url_var=$api_url")
+    EXPORT_COMMANDS+=("export $url_var=\"$api_url\"")
+done <<< "$api_urls"
 
 echo
 echo "=================================================================="
@@ -0,0 +1,102 @@
+"""Benchmark of the CPU time / transfer size trade-off of response compression.
+
+For JSON response bodies from 64 bytes to 64 KiB, shaped like AhLambdaResponseBody with a
+growing list of items, measures compression time and compressed size of gzip at levels 1,
+6 and 9 and of brotli when it is installed, plus base64 encoding the lambda needs for
+isBase64Encoded. The saved transfer time is estimated for a mobile link (default 1 Mbit/s),
+net_saving_us = transfer time saved - compression time: compression pays off where it is
+positive, which is what ABK_COMPRESSION_MIN_BYTES should be set from.
+
+Usage:
+    python benchmarks/bench_compression.py [--sizes 64,512,...] [--mbit-per-s N]
+"""
+
+# Standard imports
+import argparse
+import base64
+import json
+import sys
+import timeit
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from abk_hello.abk_hello_compression import _brotli_compress, gzip_compress  # noqa: E402
+
+
+DEFAULT_SIZES = "64,256,1024,4096,16384,65536"
+
+
+def per_call_ns(func, number: int) -> int:
+    """Returns the best of 5 repeats per call time in ns."""
+    return round(min(timeit.repeat(func, repeat=5, number=number)) / number * 1e9)
+
+
+def json_body(size: int) -> bytes:
+    """Returns JSON response body of at least size bytes."""
+    items = []
+    body = json.dumps({"msg": "ok", "txId": "bench-tx", "items": items})
+    index = 0
+    while len(body) < size:
+        items.append({"id": f"item-{index}", "deviceUuid": f"{index:08x}-eabe-abea-beab-abe"})
+        body = json.dumps({"msg": "ok", "txId": "bench-tx", "items": items})
+        index += 1
+    return body.encode()
+
+
+def main() -> int:
+    """Runs the benchmark and prints the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated body sizes")
+    parser.add_argument("--mbit-per-s", type=float, default=1.0, help="client link speed")
+    parser.add_argument("--number", type=int, default=200, help="compressions per repeat")
+    args = parser.parse_args()
+
+    codecs = {
+        f"gzip_{level}": lambda data, level=level: gzip_compress(data, level)
+        for level in (1, 6, 9)
+    }
+    brotli_compress = _brotli_compress()
+    if brotli_compress is not None:
+        for quality in (1, 4, 11):
+            codecs[f"br_{quality}"] = lambda data, quality=quality: brotli_compress(
+                data, quality=quality
+            )
+    bytes_per_us = args.mbit_per_s * 1e6 / 8 / 1e6
+
+    sizes = {}
+    for size in (int(value) for value in args.sizes.split(",")):
+        data = json_body(size)
+        results = {}
+        for name, compress in codecs.items():
+            compressed = compress(data)
+            compress_ns = per_call_ns(
+                lambda compress=compress, data=data: compress(data), args.number
+            )
+            base64_ns = per_call_ns(
+                lambda compressed=compressed: base64.b64encode(compressed), args.number
+            )
+            cpu_us = (compress_ns + base64_ns) / 1000
+            saved_us = (len(data) - len(compressed)) / bytes_per_us
+            results[name] = {
+                "bytes": len(compressed),
+                "ratio": round(len(compressed) / len(data), 3),
+                "compress_us": round(compress_ns / 1000, 1),
+                "base64_us": round(base64_ns / 1000, 1),
+                "transfer_saved_us": round(saved_us),
+                "net_saving_us": round(saved_us - cpu_us),
+            }
+        sizes[str(len(data))] = results
+
+    report = {
+        "mbit_per_s": args.mbit_per_s,
+        "brotli_installed": brotli_compress is not None,
+        "sizes": sizes,
+    }
+    print(json.dumps(report, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""Benchmark of the device registry with one million registered devices.
+
+Registers N devices (default 1000000) in the SQLite stand-in backend (or in memory with
+--backend memory) and measures per lookup: the backend round trip alone, one key and per key
+of a batch of 100, the registry answering a registered device from its LRU cache, looking up
+registered devices round robin through a cache smaller than the registry, rejecting a new
+unknown device with the backend round trip, from the negative cache and from the Bloom
+filter. It reports the memory of the cached entries and the Bloom filter, how long loading
+the filter takes and its false positive rate, and the handler with the registry disabled,
+answering a registered device and answering an unknown device with 403. The idempotency
+cache and the rate limiter are disabled, so every handler call runs the full path.
+
+Usage:
+    python benchmarks/bench_devices.py [--devices N] [--number N] [--backend sqlite|memory]
+"""
+
+# Standard imports
+import argparse
+import itertools
+import json
+import logging
+import sys
+import time
+import timeit
+import tracemalloc
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from abk_hello import abk_hello  # noqa: E402
+from abk_hello.abk_hello_clients import AhClientManager, sqlite_client_factory  # noqa: E402
+from abk_hello.abk_hello_devices import (  # noqa: E402
+    DEVICE_REGISTRY,
+    AhDeviceRegistry,
+    AhLocalDeviceBackend,
+    AhSqliteDeviceBackend,
+)
+from handler_setup import run_full_path  # noqa: E402
+
+
+REGISTER_BATCH = 10000
+LOOKUP_BATCH = 100
+# distinct unknown deviceUuids, also the probes of the Bloom filter's false positive rate
+PROBES = 100000
+# registered devices are UUID(int=index), unknown ones start above them
+UNKNOWN_OFFSET = 2**64
+
+
+def per_call_ns(func, number: int) -> int:
+    """Returns the best of 5 repeats per call time in ns."""
+    return round(min(timeit.repeat(func, repeat=5, number=number)) / number * 1e9)
+
+
+def unknown_uuids(count: int) -> Callable[[], str]:
+    """Returns function returning the next of count unknown deviceUuids, round robin."""
+    return itertools.cycle(
+        [str(uuid.UUID(int=UNKNOWN_OFFSET + index)) for index in range(count)]
+    ).__next__
+
+
+def main() -> int:
+    """Runs the benchmark and prints the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1000000, help="registered devices")
+    parser.add_argument("--number", type=int, default=20000, help="calls per repeat")
+    parser.add_argument("--backend", choices=("sqlite", "memory"), default="sqlite")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    if args.backend == "sqlite":
+        clients = AhClientManager()
+        clients.register("db", sqlite_client_factory())
+        backend = AhSqliteDeviceBackend(clients, "db")
+    else:
+        backend = AhLocalDeviceBackend()
+    keys = [uuid.UUID(int=index).bytes for index in range(args.devices)]
+    started = time.perf_counter()
+    for start in range(0, len(keys), REGISTER_BATCH):
+        backend.register(keys[start : start + REGISTER_BATCH])
+    register_s = time.perf_counter() - started
+    device_uuids = [str(uuid.UUID(bytes=key)) for key in keys]
+    round_robin_keys = itertools.cycle(keys).__next__
+    batches = itertools.cycle(
+        [keys[start : start + LOOKUP_BATCH] for start in range(0, len(keys), LOOKUP_BATCH)]
+    ).__next__
+    number = args.number
+
+    hot_uuid = device_uuids[0]
+    cached = AhDeviceRegistry(backend=backend)
+    cached.is_registered(hot_uuid)
+    cache_size = max(1, args.devices // 10)
+    small_cache = AhDeviceRegistry(backend=backend, max_entries=cache_size)
+    round_robin_uuids = itertools.cycle(device_uuids).__next__
+    uncached = AhDeviceRegistry(backend=backend, negative_max_entries=0)
+    negative = AhDeviceRegistry(backend=backend)
+    unknown_uuid = str(uuid.UUID(int=UNKNOWN_OFFSET - 1))
+    negative.is_registered(unknown_uuid)
+    # negative caches of the registries measuring unknown devices are disabled
+    new_unknown = unknown_uuids(PROBES)
+
+    lookup_ns = {
+        "backend_1_key": per_call_ns(lambda: backend.lookup([round_robin_keys()]), number),
+        f"backend_per_key_of_{LOOKUP_BATCH}": round(
+            per_call_ns(lambda: backend.lookup(batches()), max(1, number // LOOKUP_BATCH))
+            / LOOKUP_BATCH
+        ),
+        "registered_cached": per_call_ns(lambda: cached.is_registered(hot_uuid), number),
+        f"registered_round_robin_cache_{cache_size}": per_call_ns(
+            lambda: small_cache.is_registered(round_robin_uuids()), number
+        ),
+        "unknown_backend": per_call_ns(lambda: uncached.is_registered(new_unknown()), number),
+        "unknown_negative_cached": per_call_ns(
+            lambda: negative.is_registered(unknown_uuid), number
+        ),
+    }
+
+    bloom = AhDeviceRegistry(backend=backend, bloom=True, negative_max_entries=0)
+    started = time.perf_counter()
+    bloom.load_bloom_filter()
+    bloom_load_s = time.perf_counter() - started
+    lookup_ns["unknown_bloom_rejected"] = per_call_ns(
+        lambda: bloom.is_registered(new_unknown()), number
+    )
+    # unknown devices passing the filter are looked up in the backend
+    misses = bloom.stats().misses
+    for _ in range(PROBES):
+        bloom.is_registered(new_unknown())
+    bloom_stats = bloom.stats()
+    false_positives = bloom_stats.misses - misses
+
+    filled = AhDeviceRegistry(backend=backend, max_entries=cache_size)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    filled.lookup_many(device_uuids[:cache_size])
+    cache_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    run_full_path()
+    DEVICE_REGISTRY.configure(enabled=True, backend=backend)
+    registered_event = {
+        "httpMethod": "POST",
+        "body": json.dumps({"deviceUuid": hot_uuid, "txId": "t"}),
+    }
+    unknown_event = {
+        "httpMethod": "POST",
+        "body": json.dumps({"deviceUuid": unknown_uuid, "txId": "t"}),
+    }
+    handler_number = max(1, number // 5)
+    handler_ns = {
+        "registered_device": per_call_ns(
+            lambda: abk_hello.handler(registered_event, None), handler_number
+        ),
+        "unknown_device_403": per_call_ns(
+            lambda: abk_hello.handler(unknown_event, None), handler_number
+        ),
+    }
+    DEVICE_REGISTRY.configure(enabled=False)
+    handler_ns["registry_disabled"] = per_call_ns(
+        lambda: abk_hello.handler(registered_event, None), handler_number
+    )
+    handler_ns["registry_overhead"] = (
+        handler_ns["registered_device"] - handler_ns["registry_disabled"]
+    )
+
+    report = {
+        "devices": args.devices,
+        "backend": args.backend,
+        "register_s": round(register_s, 3),
+        "lookup_ns": lookup_ns,
+        # 16 byte keys, expiry floats and the OrderedDict links of the cached devices
+        "cache_bytes_per_entry": round(cache_bytes / cache_size),
+        "bloom": {
+            "load_s": round(bloom_load_s, 3),
+            "bytes": bloom_stats.bloom_bytes,
+            "bytes_per_device": round(bloom_stats.bloom_bytes / max(1, args.devices), 2),
+            "false_positive_rate": round(false_positives / PROBES, 4),
+        },
+        "handler_ns": handler_ns,
+    }
+    print(json.dumps(report, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""Microbenchmark suite of abk_hello.handler with a regression gate against stored baselines.
+
+Every scenario is one call: the handler with a valid GET, a valid POST, each invalid request
+of the unit tests, an oversized, a malformed and a too deeply nested body, and the helpers
+validate_input, class_to_dict and get_error_response_body on their own. Per scenario it
+reports the per call time (best of 5 repeats), the invocations per second that makes, the
+peak memory allocated by one call and the memory still allocated after it, both traced with
+tracemalloc. The idempotency cache and the rate limiter are disabled, so every call runs the
+full path.
+
+The results are compared with bench_handler_baseline.json: a scenario fails when its time
+exceeds the baseline by more than `tolerance` or its peak allocation by more than
+`alloc_tolerance`, or when calls keep memory allocated which the baseline did not. Times
+depend on the machine, record the baseline on the machine that runs the gate with
+--update-baseline. Allocations do not, they only change with the code and python version.
+
+Usage:
+    python benchmarks/bench_handler.py [--number N] [--scenario REGEX] [--update-baseline]
+"""
+
+# Standard imports
+import argparse
+import json
+import logging
+import re
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from abk_hello import abk_hello  # noqa: E402
+from abk_hello.abk_hello_request import MAX_BODY_SIZE, AhDecodedRequest  # noqa: E402
+from handler_setup import run_full_path  # noqa: E402
+
+
+BASELINE_FILE = Path(__file__).resolve().parent / "bench_handler_baseline.json"
+DEVICE_UUID = "abeabeab-eabe-abea-beab-abeabeabeabe"
+VALID_INPUT = {"deviceUuid": DEVICE_UUID, "txId": "bench-tx"}
+# invalid requests of tests/test_abk_hello.py: scenario suffix -> request body
+INVALID_INPUTS = {
+    "missing_device_uuid": {"txId": "bench-tx"},
+    "missing_tx_id": {"deviceUuid": DEVICE_UUID},
+    "additional_key": {**VALID_INPUT, "additional_parameter_value": "notAllowed"},
+    "device_uuid_too_long": {**VALID_INPUT, "deviceUuid": DEVICE_UUID + "0"},
+    "device_uuid_not_uuid": {**VALID_INPUT, "deviceUuid": "NotValid"},
+    "device_uuid_empty": {**VALID_INPUT, "deviceUuid": ""},
+    "device_uuid_bool": {**VALID_INPUT, "deviceUuid": True},
+    "device_uuid_int": {**VALID_INPUT, "deviceUuid": 89},
+    "device_uuid_float": {**VALID_INPUT, "deviceUuid": 3.14},
+    "device_uuid_object": {**VALID_INPUT, "deviceUuid": {}},
+    "device_uuid_array": {**VALID_INPUT, "deviceUuid": []},
+    "tx_id_empty": {**VALID_INPUT, "txId": ""},
+    "tx_id_too_long": {**VALID_INPUT, "txId": "X" * 37},
+    "tx_id_bool": {**VALID_INPUT, "txId": True},
+    "tx_id_int": {**VALID_INPUT, "txId": 89},
+    "tx_id_float": {**VALID_INPUT, "txId": 3.14},
+    "tx_id_object": {**VALID_INPUT, "txId": {}},
+    "tx_id_array": {**VALID_INPUT, "txId": []},
+}
+# raw bodies rejected while decoding
+BAD_BODIES = {
+    "oversized_body": json.dumps({**VALID_INPUT, "padding": "x" * MAX_BODY_SIZE}),
+    "malformed_body": '{"deviceUuid": "' + DEVICE_UUID + '", "txId": ',
+    "nested_body": "[" * 100 + "]" * 100,
+}
+# results compared with the baseline
+BASELINE_KEYS = ("per_call_ns", "alloc_peak_bytes", "retained_bytes_per_call")
+# bytes per call that may stay allocated before it counts as a leak, e.g. interned strings
+RETAINED_SLACK_BYTES = 8
+
+
+def post_event(body: str) -> dict:
+    """Returns API Gateway POST event of the abk-hello resource."""
+    return {"httpMethod": "POST", "resource": "/abk-hello", "body": body}
+
+
+def scenarios() -> dict:
+    """Returns scenario name -> function making one call."""
+    get_event = {
+        "httpMethod": "GET",
+        "resource": "/abk-hello",
+        "queryStringParameters": VALID_INPUT,
+    }
+    post_valid_event = post_event(json.dumps(VALID_INPUT))
+    calls = {
+        "handler_valid_get": lambda: abk_hello.handler(get_event, None),
+        "handler_valid_post": lambda: abk_hello.handler(post_valid_event, None),
+    }
+    for name, body in INVALID_INPUTS.items():
+        event = post_event(json.dumps(body))
+        calls[f"handler_invalid_{name}"] = lambda event=event: abk_hello.handler(event, None)
+    for name, body in BAD_BODIES.items():
+        event = post_event(body)
+        calls[f"handler_{name}"] = lambda event=event: abk_hello.handler(event, None)
+
+    response_body = abk_hello.say_hello(abk_hello.validate_input(VALID_INPUT))
+    error_request = AhDecodedRequest(payload=INVALID_INPUTS["tx_id_too_long"])
+    calls.update(
+        {
+            "validate_input": lambda: abk_hello.validate_input(VALID_INPUT),
+            "class_to_dict": lambda: abk_hello.class_to_dict(response_body),
+            "get_error_response_body": lambda: abk_hello.get_error_response_body(error_request),
+        }
+    )
+    return calls
+
+
+def per_call_ns(func, number: int) -> int:
+    """Returns the best of 5 repeats per call time in ns."""
+    return round(min(timeit.repeat(func, repeat=5, number=number)) / number * 1e9)
+
+
+def allocations(func, number: int) -> tuple[int, float]:
+    """Returns peak bytes allocated during one call and bytes still allocated per call.
+
+    The retained bytes are averaged over number calls after a first call, which fills the
+    caches a warm container has, so only memory every call keeps counts.
+    """
+    func()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        after_first, peak = tracemalloc.get_traced_memory()
+        for _ in range(number):
+            func()
+        retained = (tracemalloc.get_traced_memory()[0] - after_first) / number
+    finally:
+        tracemalloc.stop()
+    return peak - before, round(retained, 1)
+
+
+def measure(func, number: int) -> dict:
+    """Returns the report of one scenario."""
+    call_ns = per_call_ns(func, number)
+    peak_bytes, retained_bytes = allocations(func, number)
+    return {
+        "per_call_ns": call_ns,
+        "invocations_per_s": round(1e9 / call_ns),
+        "alloc_peak_bytes": peak_bytes,
+        "retained_bytes_per_call": retained_bytes,
+    }
+
+
+def regressions(results: dict, baseline: dict) -> list[str]:
+    """Returns a message per scenario exceeding its baseline by more than the tolerance."""
+    failures = []
+    for name, result in results.items():
+        expected = baseline["scenarios"].get(name)
+        if expected is None:
+            continue
+        max_ns = expected["per_call_ns"] * (1 + baseline["tolerance"])
+        if result["per_call_ns"] > max_ns:
+            failures.append(
+                f"{name} took {result['per_call_ns']}ns > {round(max_ns)}ns "
+                f"(baseline {expected['per_call_ns']}ns + {baseline['tolerance']:.0%})"
+            )
+        max_bytes = expected["alloc_peak_bytes"] * (1 + baseline["alloc_tolerance"])
+        if result["alloc_peak_bytes"] > max_bytes:
+            failures.append(
+                f"{name} allocated {result['alloc_peak_bytes']} bytes > {round(max_bytes)} "
+                f"(baseline {expected['alloc_peak_bytes']} + {baseline['alloc_tolerance']:.0%})"
+            )
+        max_retained = max(expected["retained_bytes_per_call"], 0) + RETAINED_SLACK_BYTES
+        if result["retained_bytes_per_call"] > max_retained:
+            failures.append(
+                f"{name} keeps {result['retained_bytes_per_call']} bytes allocated per call "
+                f"> {max_retained}"
+            )
+    return failures
+
+
+def main() -> int:
+    """Runs the benchmark, prints the report and returns the process exit code."""
+    baseline = json.loads(BASELINE_FILE.read_text())
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=baseline["number"], help="calls per repeat")
+    parser.add_argument("--scenario", default="", help="only scenarios matching this regex")
+    parser.add_argument("--tolerance", type=float, default=baseline["tolerance"])
+    parser.add_argument("--output", type=Path, help="write JSON report to this file")
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="store the results as new baseline"
+    )
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    run_full_path()
+
+    selected = {
+        name: func for name, func in scenarios().items() if re.search(args.scenario, name)
+    }
+    results = {name: measure(func, args.number) for name, func in selected.items()}
+    report = {
+        "python": sys.version.split()[0],
+        "number": args.number,
+        "scenarios": results,
+        "not_in_baseline": sorted(set(results) - set(baseline["scenarios"])),
+    }
+    print(json.dumps(report, indent=4))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=4))
+
+    if args.update_baseline:
+        baseline["python"] = report["python"]
+        baseline["scenarios"] = {
+            **baseline["scenarios"],
+            **{
+                name: {key: result[key] for key in BASELINE_KEYS}
+                for name, result in results.items()
+            },
+        }
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"baseline of {len(results)} scenarios written to {BASELINE_FILE.name}")
+        return 0
+
+    failures = regressions(results, {**baseline, "tolerance": args.tolerance})
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        return 1
+    print(f"PASS: {len(results)} scenarios within the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
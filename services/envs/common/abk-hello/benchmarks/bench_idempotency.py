@@ -0,0 +1,78 @@
+"""Benchmark of client retries answered from the idempotency cache.
+
+Compares the handler for a new request (cache disabled, full validate-and-encode path)
+with a retried request (response replayed from the cache), and the cache get / put cost
+with a full cache of max_entries responses.
+
+Usage:
+    python benchmarks/bench_idempotency.py [--number N] [--entries N]
+"""
+
+# Standard imports
+import argparse
+import json
+import logging
+import sys
+import timeit
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from abk_hello import abk_hello  # noqa: E402
+from abk_hello.abk_hello_idempotency import IDEMPOTENCY_CACHE, AhIdempotencyCache  # noqa: E402
+
+
+DEVICE_UUID = "15a73c3e-0c86-495a-aa2b-522691d93d60"
+POST_EVENT = {
+    "httpMethod": "POST",
+    "body": json.dumps({"deviceUuid": DEVICE_UUID, "txId": "bench-tx"}),
+}
+
+
+def per_call_ns(func, number: int) -> int:
+    """Returns the best of 5 repeats per call time in ns."""
+    return round(min(timeit.repeat(func, repeat=5, number=number)) / number * 1e9)
+
+
+def main() -> int:
+    """Runs the benchmark and prints the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=50000, help="calls per repeat")
+    parser.add_argument("--entries", type=int, default=10000, help="responses in the cache")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    max_entries = IDEMPOTENCY_CACHE.max_entries
+    IDEMPOTENCY_CACHE.max_entries = 0
+    new_request_ns = per_call_ns(lambda: abk_hello.handler(POST_EVENT, None), args.number)
+    IDEMPOTENCY_CACHE.max_entries = max_entries
+    abk_hello.handler(POST_EVENT, None)
+    retry_ns = per_call_ns(lambda: abk_hello.handler(POST_EVENT, None), args.number)
+
+    cache = AhIdempotencyCache(max_entries=args.entries)
+    response = abk_hello.handler(POST_EVENT, None)
+    keys = [(DEVICE_UUID, f"tx-{index}") for index in range(args.entries)]
+    for key in keys:
+        cache.put(key, response)
+    hot_key = keys[-1]
+    new_keys = iter([(DEVICE_UUID, f"new-{index}") for index in range(args.number * 5)])
+
+    report = {
+        "handler_ns": {"new_request": new_request_ns, "retried_request": retry_ns},
+        "retry_speedup": round(new_request_ns / retry_ns, 1),
+        "cache_ns": {
+            "get_hit": per_call_ns(lambda: cache.get(hot_key), args.number),
+            "get_miss": per_call_ns(lambda: cache.get((DEVICE_UUID, "missing")), args.number),
+            "put_with_eviction": per_call_ns(
+                lambda: cache.put(next(new_keys), response), args.number
+            ),
+        },
+        "cache_stats": cache.stats()._asdict(),
+    }
+    print(json.dumps(report, indent=4))
+    return 0 if retry_ns < new_request_ns else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Benchmark of response encoding and request decoding for every JSON backend.
+
+Encoding compares the original json.dumps(class_to_dict(body)) with the compiled
+NamedTuple encoder and the generic dumps of every installed backend (orjson / ujson
+output is compact and therefore not byte identical, it is shown for reference only).
+Decoding compares loads of a request body for every installed backend.
+
+Usage:
+    python benchmarks/bench_json.py [--number N]
+"""
+
+# Standard imports
+import argparse
+import importlib.util
+import json
+import sys
+import timeit
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from abk_hello.abk_hello_io import AhLambdaResponseBody  # noqa: E402
+from abk_hello.abk_hello_json import (  # noqa: E402
+    class_to_dict,
+    encode_named_tuple,
+    get_json_backend,
+)
+
+
+RESP_BODY = AhLambdaResponseBody(msg="ok", txId="test_txId_from_valid_lambda_req")
+REQ_BODY = '{"deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60", "txId": "bench-tx"}'
+
+
+def per_call_ns(func, number: int) -> int:
+    """Returns the best of 5 repeats per call time in ns."""
+    return round(min(timeit.repeat(func, repeat=5, number=number)) / number * 1e9)
+
+
+def main() -> int:
+    """Runs the benchmark and prints the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000, help="calls per repeat")
+    args = parser.parse_args()
+
+    backends = [
+        get_json_backend(name)
+        for name in ["json", "orjson", "ujson"]
+        if name == "json" or importlib.util.find_spec(name) is not None
+    ]
+    expected = json.dumps(class_to_dict(RESP_BODY))
+    report = {
+        "encode_ns": {
+            "json.dumps(class_to_dict)": per_call_ns(
+                lambda: json.dumps(class_to_dict(RESP_BODY)), args.number
+            ),
+            "compiled_encoder": per_call_ns(lambda: encode_named_tuple(RESP_BODY), args.number),
+            **{
+                f"{backend.name}.dumps(_asdict)": per_call_ns(
+                    lambda backend=backend: backend.dumps(RESP_BODY._asdict()), args.number
+                )
+                for backend in backends
+            },
+        },
+        "decode_ns": {
+            f"{backend.name}.loads": per_call_ns(
+                lambda backend=backend: backend.loads(REQ_BODY), args.number
+            )
+            for backend in backends
+        },
+        "byte_identical": {
+            "compiled_encoder": encode_named_tuple(RESP_BODY) == expected,
+            **{
+                backend.name: backend.dumps(RESP_BODY._asdict()) == expected
+                for backend in backends
+            },
+        },
+    }
+    print(json.dumps(report, indent=4))
+    return 0 if report["byte_identical"]["compiled_encoder"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Microbenchmark of suppressed log statements in the abk_hello handler warm path.
+
+Compares the handler with its logger at LOG_LEVEL=WARNING against the same handler
+where every logger method is replaced by a no-op. The difference is the whole cost of
+the suppressed log statements (noise level for the valid request). The invalid request
+still emits its ERROR record at WARNING level, so its difference is the cost of one
+emitted record. LazyJson must not serialize anything in either scenario.
+
+Usage:
+    python benchmarks/bench_logging.py [--number N]
+"""
+
+# Standard imports
+import argparse
+import json
+import logging
+import sys
+import timeit
+from pathlib import Path
+from unittest import mock
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from abk_hello import abk_hello, abk_hello_logging  # noqa: E402
+from handler_setup import run_full_path  # noqa: E402
+
+
+GET_EVENT = {
+    "httpMethod": "GET",
+    "path": "/abk-hello",
+    "headers": {"Accept": "application/json", "User-Agent": "bench"},
+    "queryStringParameters": {
+        "deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60",
+        "txId": "bench-tx",
+    },
+    "requestContext": {"requestId": "bench", "stage": "dev", "identity": {"sourceIp": "::1"}},
+    "body": None,
+}
+INVALID_POST_EVENT = {"httpMethod": "POST", "body": json.dumps({"txId": "bench-tx"})}
+LOG_METHODS = ("debug", "info", "warning", "error")
+
+
+class LambdaContext:
+    """Minimal lambda context object."""
+
+    function_name = "abk-hello-bench"
+    aws_request_id = "bench"
+
+
+def per_call_ns(event: dict, number: int) -> float:
+    """Returns the best of 7 repeats of the handler per call time in ns."""
+    context = LambdaContext()
+    timer = timeit.Timer(lambda: abk_hello.handler(event, context))
+    return min(timer.repeat(repeat=7, number=number)) / number * 1e9
+
+
+def main() -> int:
+    """Runs the benchmark and prints the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="handler calls per repeat")
+    args = parser.parse_args()
+
+    abk_hello.abk_logger.setLevel(logging.WARNING)
+    # the error path logs at ERROR level, which is emitted at WARNING, keep output quiet
+    abk_hello.abk_logger.addHandler(logging.NullHandler())
+    abk_hello.abk_logger.propagate = False
+    # every call repeats the same request, measure the full path and not the replay
+    run_full_path()
+
+    report = {}
+    serialize_calls = 0
+    original_str = abk_hello_logging.LazyJson.__str__
+
+    def counting_str(self):
+        nonlocal serialize_calls
+        serialize_calls += 1
+        return original_str(self)
+
+    for scenario, event in [("valid_get", GET_EVENT), ("invalid_post", INVALID_POST_EVENT)]:
+        with mock.patch.object(abk_hello_logging.LazyJson, "__str__", counting_str):
+            suppressed_ns = per_call_ns(event, args.number)
+        with mock.patch.multiple(
+            abk_hello.abk_logger, **{name: lambda *a, **kw: None for name in LOG_METHODS}
+        ):
+            no_logging_ns = per_call_ns(event, args.number)
+        report[scenario] = {
+            "handler_ns": round(suppressed_ns),
+            "handler_without_logging_ns": round(no_logging_ns),
+            "logging_overhead_ns": round(suppressed_ns - no_logging_ns),
+        }
+    report["lazy_json_serializations"] = serialize_calls
+    print(json.dumps(report, indent=4))
+    return 0 if serialize_calls == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
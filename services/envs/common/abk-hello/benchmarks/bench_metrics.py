@@ -0,0 +1,71 @@
+"""Benchmark of the overhead of the per-phase timing metrics in the handler.
+
+Measures the handler with metrics disabled against the handler with metrics enabled,
+writing one EMF log line per invocation and one per 100 invocations. The EMF lines are
+built but discarded instead of printed, so the report shows the instrumentation cost
+and not the cost of the terminal. The idempotency cache and the rate limiter are
+disabled, so every handler call runs the full path.
+
+Usage:
+    python benchmarks/bench_metrics.py [--number N]
+"""
+
+# Standard imports
+import argparse
+import json
+import logging
+import sys
+import timeit
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from abk_hello import abk_hello  # noqa: E402
+from abk_hello.abk_hello_metrics import METRICS, AhMetrics  # noqa: E402
+from handler_setup import run_full_path  # noqa: E402
+
+
+POST_EVENT = {
+    "httpMethod": "POST",
+    "resource": "/abk-hello",
+    "body": json.dumps({"deviceUuid": "abeabeab-eabe-abea-beab-abeabeabeabe", "txId": "t"}),
+}
+
+
+def per_call_ns(func, number: int) -> int:
+    """Returns the best of 5 repeats per call time in ns."""
+    return round(min(timeit.repeat(func, repeat=5, number=number)) / number * 1e9)
+
+
+def main() -> int:
+    """Runs the benchmark and prints the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="handler calls per repeat")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    run_full_path()
+
+    handler_ns = {}
+    for name, metrics in (
+        ("disabled", AhMetrics(enabled=False)),
+        ("flush_every_1", AhMetrics(enabled=True, flush_every=1, writer=lambda line: None)),
+        ("flush_every_100", AhMetrics(enabled=True, flush_every=100, writer=lambda line: None)),
+    ):
+        vars(METRICS).update(vars(metrics))
+        handler_ns[name] = per_call_ns(lambda: abk_hello.handler(POST_EVENT, None), args.number)
+
+    report = {
+        "handler_ns": handler_ns,
+        "overhead_ns": {
+            name: value_ns - handler_ns["disabled"]
+            for name, value_ns in handler_ns.items()
+            if name != "disabled"
+        },
+    }
+    print(json.dumps(report, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Benchmark of dispatching through the precompiled route table with hundreds of routes.
+
+Measures AhRouter.resolve() for the first, the last and an unknown route of tables with
+10 to N routes (default 500) against a linear scan over the same routes, as ad hoc
+branching on method and path does, and the handler with only the abk-hello routes
+against the handler with N extra routes in its table. The idempotency cache and the
+rate limiter are disabled, so every handler call runs the full path.
+
+Usage:
+    python benchmarks/bench_router.py [--routes N] [--number N]
+"""
+
+# Standard imports
+import argparse
+import json
+import logging
+import sys
+import timeit
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from abk_hello import abk_hello  # noqa: E402
+from abk_hello.abk_hello_io import AhLambdaRequestBody, AhLambdaResponseBody  # noqa: E402
+from abk_hello.abk_hello_router import AhRouter  # noqa: E402
+from handler_setup import run_full_path  # noqa: E402
+
+
+METHODS = ("GET", "POST", "PUT", "DELETE")
+POST_EVENT = {
+    "httpMethod": "POST",
+    "resource": "/abk-hello",
+    "body": json.dumps({"deviceUuid": "abeabeab-eabe-abea-beab-abeabeabeabe", "txId": "t"}),
+}
+
+
+def per_call_ns(func, number: int) -> int:
+    """Returns the best of 5 repeats per call time in ns."""
+    return round(min(timeit.repeat(func, repeat=5, number=number)) / number * 1e9)
+
+
+def add_routes(router: AhRouter, count: int) -> list[tuple[str, str]]:
+    """Adds count routes over count / 4 resources to router, returns their (method, resource)."""
+    keys = []
+    for index in range(count):
+        method = METHODS[index % len(METHODS)]
+        resource = f"/service-{index // len(METHODS)}/items/{{itemId}}"
+        router.add(
+            method,
+            resource,
+            abk_hello.say_hello,
+            AhLambdaRequestBody,
+            AhLambdaResponseBody,
+            abk_hello.LAMBDA_REQ_VALIDATOR,
+        )
+        keys.append((method, resource))
+    return keys
+
+
+def linear_scan(keys: list[tuple[str, str]], event: dict) -> int | None:
+    """Returns index of the first key matching event, like an if / elif chain."""
+    method = event.get("httpMethod")
+    resource = event.get("resource")
+    for index, (key_method, key_resource) in enumerate(keys):
+        if key_method == method and key_resource == resource:
+            return index
+    return None
+
+
+def resolve_report(count: int, number: int) -> dict:
+    """Returns resolve and linear scan times of a table with count routes."""
+    router = AhRouter()
+    keys = add_routes(router, count)
+    events = {
+        "first": {"httpMethod": keys[0][0], "resource": keys[0][1]},
+        "last": {"httpMethod": keys[-1][0], "resource": keys[-1][1]},
+        "unknown": {"httpMethod": "GET", "resource": "/unknown"},
+    }
+    return {
+        "resolve_ns": {
+            name: per_call_ns(lambda event=event: router.resolve(event), number)
+            for name, event in events.items()
+        },
+        "linear_scan_ns": {
+            name: per_call_ns(lambda event=event: linear_scan(keys, event), number)
+            for name, event in events.items()
+        },
+    }
+
+
+def main() -> int:
+    """Runs the benchmark and prints the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", type=int, default=500, help="routes of the largest table")
+    parser.add_argument("--number", type=int, default=100000, help="calls per repeat")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    sizes = sorted({size for size in (10, 100, args.routes) if size <= args.routes})
+    resolve = {f"{size}_routes": resolve_report(size, args.number) for size in sizes}
+
+    run_full_path()
+    number = max(1, args.number // 5)
+    hello_only_ns = per_call_ns(lambda: abk_hello.handler(POST_EVENT, None), number)
+    add_routes(abk_hello.ROUTER, args.routes)
+    all_routes_ns = per_call_ns(lambda: abk_hello.handler(POST_EVENT, None), number)
+
+    report = {
+        "routes": args.routes,
+        "resolve": resolve,
+        "handler_ns": {
+            "abk_hello_routes_only": hello_only_ns,
+            f"with_{args.routes}_extra_routes": all_routes_ns,
+            "overhead": all_routes_ns - hello_only_ns,
+        },
+    }
+    print(json.dumps(report, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
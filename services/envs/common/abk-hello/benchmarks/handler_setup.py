@@ -0,0 +1,20 @@
+"""Shared setup of the benchmarks calling abk_hello.handler.
+
+Imported by the benchmark scripts after they put src on sys.path.
+"""
+
+# local imports
+from abk_hello.abk_hello_devices import DEVICE_REGISTRY
+from abk_hello.abk_hello_idempotency import IDEMPOTENCY_CACHE
+from abk_hello.abk_hello_rate_limit import RATE_LIMITER
+
+
+def run_full_path() -> None:
+    """Lets every handler call run the full path, whatever the environment enables.
+
+    Benchmarks repeat the same requests: the idempotency cache would replay them, the rate
+    limiter reject them and the device registry reject the benchmark devices.
+    """
+    IDEMPOTENCY_CACHE.max_entries = 0
+    RATE_LIMITER.configure(rate_per_s=0)
+    DEVICE_REGISTRY.configure(enabled=False)
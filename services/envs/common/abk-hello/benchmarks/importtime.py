@@ -0,0 +1,113 @@
+"""Import time benchmark for the abk_hello lambda handler module.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters, reports the
+cumulative import time of the handler module and fails when the fastest run exceeds the
+budget from importtime_budget.json or when a module from the forbidden list gets imported.
+Noise of a busy machine only adds time, the fastest of N runs is stable where the median
+is not.
+
+Usage:
+    python benchmarks/importtime.py [--runs N] [--output report.json]
+"""
+
+# Standard imports
+import argparse
+import json
+import os
+import statistics
+import subprocess  # noqa: S404
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / "importtime_budget.json"
+
+
+class ImportTimeSample(NamedTuple):
+    """Import time of one fresh interpreter run."""
+
+    cumulative_us: int
+    modules: dict[str, int]  # module name -> self time in us
+
+
+def measure_import(module: str) -> ImportTimeSample:
+    """Imports module in a fresh interpreter and parses the -X importtime output.
+
+    Args:
+        module (str): module to import
+    Returns:
+        ImportTimeSample: cumulative time of module and self time of every imported module
+    """
+    env = dict(os.environ, PYTHONPATH=str(SERVICE_DIR / "src"))
+    # the own interpreter with fixed arguments, no shell and no untrusted input
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    modules = {}
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        modules[name] = int(self_us)
+        if name == module:
+            cumulative_us = int(cumulative)
+    return ImportTimeSample(cumulative_us=cumulative_us, modules=modules)
+
+
+def main() -> int:
+    """Runs the benchmark, prints the report and returns the process exit code."""
+    budget = json.loads(BUDGET_FILE.read_text())
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=budget["runs"], help="fresh interpreters")
+    parser.add_argument("--output", type=Path, help="write JSON report to this file")
+    args = parser.parse_args()
+
+    module = budget["module"]
+    # the first run also byte compiles the sources, it is not counted
+    measure_import(module)
+    samples = [measure_import(module) for _ in range(args.runs)]
+    imported = set().union(*(sample.modules for sample in samples))
+    forbidden = sorted(
+        name
+        for name in imported
+        for prefix in budget["forbidden_modules"]
+        if name == prefix or name.startswith(f"{prefix}.")
+    )
+    median_us = int(statistics.median(sample.cumulative_us for sample in samples))
+    min_us = min(sample.cumulative_us for sample in samples)
+    slowest = sorted(samples[-1].modules.items(), key=lambda item: item[1], reverse=True)[:10]
+    report = {
+        "module": module,
+        "runs": args.runs,
+        "median_cumulative_us": median_us,
+        "min_cumulative_us": min_us,
+        "max_cumulative_us": budget["max_cumulative_us"],
+        "forbidden_imported": forbidden,
+        "slowest_self_us": dict(slowest),
+    }
+    print(json.dumps(report, indent=4))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=4))
+
+    exit_code = 0
+    if forbidden:
+        print(f"FAIL: forbidden modules imported at cold start: {', '.join(forbidden)}")
+        exit_code = 1
+    if min_us > budget["max_cumulative_us"]:
+        print(f"FAIL: import of {module} took {min_us}us > {budget['max_cumulative_us']}us")
+        exit_code = 1
+    if exit_code == 0:
+        print(f"PASS: import of {module} took {min_us}us")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
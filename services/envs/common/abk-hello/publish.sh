@@ -55,6 +55,15 @@ PrepareRequirementsFiles() {
 }
 
 
+BuildArtifact() {
+    PrintTrace "$TRACE_FUNCTION" "-> ${FUNCNAME[0]} ()"
+    PrintTrace "$TRACE_INFO" "Building precompiled deployment artifact ..."
+    make artifact || return $?
+    PrintTrace "$TRACE_FUNCTION" "<- ${FUNCNAME[0]} (0)"
+    return 0
+}
+
+
 #------------------------------------------------------------------------------
 # main
 #------------------------------------------------------------------------------
@@ -86,6 +95,7 @@ ABK_DEPLOYMENT_REGION=$2
 
 RunUnitTests || PrintUsageAndExitWithCode $? "${RED}ERROR: Failed unit tests${NC}"
 PrepareRequirementsFiles || PrintUsageAndExitWithCode $? "${RED}ERROR: Failed to prepare requirements files${NC}"
+BuildArtifact || PrintUsageAndExitWithCode $? "${RED}ERROR: Failed to build deployment artifact${NC}"
 InstallRequiredServerlessPlugins || PrintUsageAndExitWithCode $? "${RED}ERROR: Failed to install Serverless plugin${NC}"
 
 PrintTrace "$TRACE_INFO" "Publishing service: ${YLW}$SERVICE_NAME${NC}"
@@ -1 +1,8 @@
 """Python Module init."""
+
+# Standard imports
+import time
+
+
+# start of the cold start initialization, abk_hello.py reports its duration
+INIT_STARTED_NS = time.perf_counter_ns()
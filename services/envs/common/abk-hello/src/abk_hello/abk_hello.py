@@ -1,26 +1,31 @@
 """Provides lambda functionality in ABK cloud infrastructure."""
 
 # Standard imports
-import json
-import logging
+import base64
 import os
+import time
 from enum import Enum
 
-# 3rd party imports
-from jsonschema import validate
-
 # local imports
+from abk_hello import INIT_STARTED_NS
+from abk_hello.abk_hello_compression import COMPRESSOR
+from abk_hello.abk_hello_devices import DEVICE_REGISTRY
+from abk_hello.abk_hello_idempotency import IDEMPOTENCY_CACHE, idempotency_key
 from abk_hello.abk_hello_io import AhLambdaRequestBody, AhLambdaResponseBody
+from abk_hello.abk_hello_json import class_to_dict, encode_named_tuple, json_backend  # noqa: F401
+from abk_hello.abk_hello_logging import LazyJson, get_logger, object_to_json
+from abk_hello.abk_hello_metrics import METRICS, AhInvocationTimer, server_timing_header
+from abk_hello.abk_hello_rate_limit import RATE_LIMITER, retry_after_header
+from abk_hello.abk_hello_request import AhDecodedRequest, decode_body, decode_request
+from abk_hello.abk_hello_router import AhRoute, AhRouter
+from abk_hello.abk_hello_validator import compile_validator
 
 # -----------------------------------------------------------------------------
 # variables definitions, file wide access, for lambda to load only once.
 # The values stay loaded in the memory, also some time after lambda execution
 # This will accelerate warm start of lambda
 # -----------------------------------------------------------------------------
-logging.basicConfig()
-abk_logger = logging.getLogger(__name__)
-log_level = os.environ.get("LOG_LEVEL", "WARNING").upper()
-abk_logger.setLevel(logging.getLevelName(log_level))
+abk_logger = get_logger(__name__)
 
 
 LAMBDA_RESP_HEADERS = {
@@ -48,6 +53,22 @@ LAMBDA_REQ_SCHEMA = {
     "required": ["deviceUuid", "txId"],
     "additionalProperties": False,
 }
+LAMBDA_REQ_VALIDATOR = compile_validator(LAMBDA_REQ_SCHEMA)
+
+ABK_HELLO_RESOURCE = "/abk-hello"
+
+# error response for requests without usable txId, the most common error, encoded once
+EMPTY_TX_ID_ERROR_RESP_BODY = AhLambdaResponseBody(msg="error", txId="")
+EMPTY_TX_ID_ERROR_BODY = encode_named_tuple(EMPTY_TX_ID_ERROR_RESP_BODY)
+COMPRESSOR.add_constant(EMPTY_TX_ID_ERROR_BODY)
+
+# keep-warm pings: serverless-plugin-warmup, tools/prewarm.py and scheduled rules
+WARMUP_SOURCES = frozenset({"serverless-plugin-warmup", "abk.warmup", "aws.events"})
+# a warm-up may hold its container this long, so concurrent warm-ups reach distinct containers
+MAX_WARMUP_DELAY_MS = 1000
+# identifies the container in warm-up responses, tools/prewarm.py counts distinct ones
+CONTAINER_ID = os.urandom(8).hex()
+CONTAINER_STARTED_S = time.time()
 
 
 class HttpStatusCode(Enum):
@@ -55,7 +76,10 @@ class HttpStatusCode(Enum):
 
     OK = 200
     FORBIDDEN = 403
+    NOT_FOUND = 404
+    METHOD_NOT_ALLOWED = 405
     CONFLICT = 409
+    TOO_MANY_REQUESTS = 429
 
 
 # -----------------------------------------------------------------------------
@@ -71,39 +95,214 @@ def validate_input(input_parameters: dict) -> AhLambdaRequestBody:
     Returns:
         LambdaRequest: converted input_parameters to LambdaRequest
     """
-    validate(input_parameters, LAMBDA_REQ_SCHEMA)
+    LAMBDA_REQ_VALIDATOR.validate(input_parameters)
     return AhLambdaRequestBody(**input_parameters)
 
 
-def get_error_response_body(event_body: dict) -> AhLambdaResponseBody:
+def get_error_response_body(request: AhDecodedRequest) -> AhLambdaResponseBody:
     """Constructs lambda response body in error case.
 
     Args:
-        event_body (dict): lambda event
+        request (AhDecodedRequest): decoded lambda request, txId is echoed if present
     Returns:
         LambdaResponseBody: body response
     """
     abk_logger.info("-> get_error_response_body()")
-    resp_body = AhLambdaResponseBody(msg="error", txId=event_body.get("txId", ""))
-    abk_logger.info(f"<- get_error_response_body({json.dumps(resp_body._asdict(), indent=4)})")
+    resp_body = AhLambdaResponseBody(msg="error", txId=request.tx_id())
+    abk_logger.info("<- get_error_response_body(%s)", LazyJson(resp_body, indent=4))
     return resp_body
 
 
-def class_to_dict(named_tuple) -> object:
-    """Converts data class or NamedTuple object to dict recursively.
+def get_rate_limited_response(device_uuid: str, tx_id: str, wait_s: float) -> dict:
+    """Constructs lambda response for a device above its rate limit.
+
+    Args:
+        device_uuid (str): rate limited deviceUuid
+        tx_id (str): txId of the request, echoed like in every other response
+        wait_s (float): seconds until the device gets its next token
+    Returns:
+        dict: 429 lambda response with Retry-After header
+    """
+    abk_logger.info("rate limited deviceUuid = %s, retry in %.3f s", device_uuid, wait_s)
+    return {
+        "statusCode": HttpStatusCode.TOO_MANY_REQUESTS.value,
+        "headers": {**LAMBDA_RESP_HEADERS, "Retry-After": retry_after_header(wait_s)},
+        "body": encode_named_tuple(AhLambdaResponseBody(msg="error", txId=tx_id)),
+    }
+
+
+def check_device(
+    route: AhRoute, device_uuid: str, tx_id: str, timer: AhInvocationTimer | None
+) -> dict | None:
+    """Checks the device against the registry of the route, then takes one of its tokens.
+
+    Unknown devices are answered before the rate limiter keeps state for them.
+
+    Args:
+        route (AhRoute): route of the request
+        device_uuid (str): validated deviceUuid
+        tx_id (str): txId of the request
+        timer (AhInvocationTimer | None): timer of the phases, None when metrics are disabled
+    Raises:
+        Exception: when the registry lookup fails, the device is not answered
+    Returns:
+        dict | None: 403 lambda response for unknown devices, 429 when the device is above
+            its limit, None when the request may be answered
+    """
+    registry = route.device_registry
+    if registry is not None and registry.enabled and not registry.is_registered(device_uuid):
+        if timer is not None:
+            timer.error = "unknown_device"
+        return get_unknown_device_response(device_uuid)
+    limiter = route.rate_limiter
+    if limiter is None or not limiter.enabled:
+        return None
+    wait_s = limiter.acquire(device_uuid)
+    if not wait_s:
+        return None
+    if timer is not None:
+        timer.error = "rate_limited"
+    return get_rate_limited_response(device_uuid, tx_id, wait_s)
+
+
+def get_unknown_device_response(device_uuid: str) -> dict:
+    """Constructs lambda response for a device which is not registered, nothing is encoded.
+
+    Args:
+        device_uuid (str): unregistered deviceUuid
+    Returns:
+        dict: 403 lambda response with the cached error body
+    """
+    abk_logger.info("unknown deviceUuid = %s", device_uuid)
+    return {
+        "statusCode": HttpStatusCode.FORBIDDEN.value,
+        "headers": LAMBDA_RESP_HEADERS,
+        "body": EMPTY_TX_ID_ERROR_BODY,
+    }
+
+
+def get_warmup_response(event: dict) -> dict:
+    """Answers keep-warm ping, nothing is validated, logged or encoded.
+
+    Args:
+        event (dict): warm-up event, optional delayMs holds the container that long
+    Returns:
+        dict: container id and age in ms, a container younger than the ping started cold
+    """
+    delay_ms = event.get("delayMs")
+    if type(delay_ms) in (int, float) and delay_ms > 0:
+        time.sleep(min(delay_ms, MAX_WARMUP_DELAY_MS) / 1000)
+    return {
+        "warmup": True,
+        "containerId": CONTAINER_ID,
+        "containerAgeMs": int((time.time() - CONTAINER_STARTED_S) * 1000),
+    }
+
+
+def get_no_route_response(event: dict) -> dict:
+    """Constructs lambda response for an event no route matches, nothing is encoded.
+
+    Args:
+        event (dict): API Gateway proxy event
+    Returns:
+        dict: 405 lambda response with Allow header for known resources, else 404
+    """
+    allowed_methods = ROUTER.allowed_methods(event)
+    abk_logger.error(
+        "no route for %s %s", ROUTER.event_method(event), ROUTER.event_resource(event)
+    )
+    if allowed_methods is None:
+        return {
+            "statusCode": HttpStatusCode.NOT_FOUND.value,
+            "headers": LAMBDA_RESP_HEADERS,
+            "body": EMPTY_TX_ID_ERROR_BODY,
+        }
+    return {
+        "statusCode": HttpStatusCode.METHOD_NOT_ALLOWED.value,
+        "headers": {**LAMBDA_RESP_HEADERS, "Allow": allowed_methods},
+        "body": EMPTY_TX_ID_ERROR_BODY,
+    }
+
+
+def with_server_timing(resp: dict, timer: AhInvocationTimer) -> dict:
+    """Returns copy of the lambda response with Server-Timing header.
+
+    The response is copied, not modified: it may be the cached response of a retry or
+    share the module-level LAMBDA_RESP_HEADERS.
+
+    Args:
+        resp (dict): lambda response
+        timer (AhInvocationTimer): timer of the invocation
+    Returns:
+        dict: lambda response with Server-Timing and Timing-Allow-Origin headers
+    """
+    headers = {
+        **(resp.get("headers") or {}),
+        "Server-Timing": server_timing_header(timer, INIT_DURATION_NS),
+        # lets browsers of other origins read the timings through the Performance API
+        "Timing-Allow-Origin": "*",
+    }
+    return {**resp, "headers": headers}
+
+
+def get_record_item_identifier(record: dict) -> str:
+    """Returns identifier of SQS or Kinesis record as expected in batchItemFailures.
+
+    Args:
+        record (dict): SQS or Kinesis event record
+    Returns:
+        str: SQS messageId or Kinesis sequenceNumber
+    """
+    if "kinesis" in record:
+        return record["kinesis"]["sequenceNumber"]
+    return record["messageId"]
+
+
+def get_record_input(record: dict) -> object:
+    """Decodes payload of SQS (JSON body) or Kinesis (base64 encoded JSON data) record.
+
+    Args:
+        record (dict): SQS or Kinesis event record
+    Raises:
+        ValueError: when the payload is oversized, too deeply nested or not valid JSON
+    Returns:
+        object: decoded record payload
+    """
+    if "kinesis" in record:
+        return decode_body(base64.b64decode(record["kinesis"]["data"]))
+    return decode_body(record["body"])
+
+
+# -----------------------------------------------------------------------------
+# route actions
+# -----------------------------------------------------------------------------
+def say_hello(lambda_req: AhLambdaRequestBody) -> AhLambdaResponseBody:
+    """Answers validated abk-hello request.
 
     Args:
-        named_tuple: named tuple
+        lambda_req (AhLambdaRequestBody): validated request
     Returns:
-        dict: named tuple as dict
+        AhLambdaResponseBody: ok response echoing txId
     """
-    if isinstance(named_tuple, tuple) and hasattr(named_tuple, "_asdict"):
-        return {k: class_to_dict(v) for k, v in named_tuple._asdict().items()}
-    if isinstance(named_tuple, list):
-        return [class_to_dict(v) for v in named_tuple]
-    if isinstance(named_tuple, dict):
-        return {k: class_to_dict(v) for k, v in named_tuple.items()}
-    return named_tuple
+    return AhLambdaResponseBody(msg="ok", txId=lambda_req.txId)
+
+
+# one warm container serves all routes, add endpoints here and as http events of the
+# abk-hello function in serverless.yml
+# direct invocations may send only a body, they are answered like a POST to abk-hello
+ROUTER = AhRouter(default_resource=ABK_HELLO_RESOURCE, default_method="POST")
+for _method in ("GET", "POST"):
+    ROUTER.add(
+        _method,
+        ABK_HELLO_RESOURCE,
+        say_hello,
+        request_model=AhLambdaRequestBody,
+        response_model=AhLambdaResponseBody,
+        validator=LAMBDA_REQ_VALIDATOR,
+        idempotency_cache=IDEMPOTENCY_CACHE,
+        rate_limiter=RATE_LIMITER,
+        device_registry=DEVICE_REGISTRY,
+    )
 
 
 # -----------------------------------------------------------------------------
@@ -118,42 +317,168 @@ def handler(event, context):
     Returns:
         http_resp dict: lambda response dictionary, where body is a string converted from dict
     """
+    # keep-warm pings return before routing, validation, logging and metrics, the cold start
+    # they took is not reported for the next request
+    if event.get("source") in WARMUP_SOURCES:
+        METRICS.mark_warm()
+        return get_warmup_response(event)
+    if not (METRICS.enabled or METRICS.server_timing):
+        return COMPRESSOR.compress_response(event, handle_event(event, context, None))
+    timer = METRICS.start()
+    resp = COMPRESSOR.compress_response(event, handle_event(event, context, timer))
+    timer.mark("compress")
+    if METRICS.server_timing:
+        resp = with_server_timing(resp, timer)
+    if METRICS.enabled:
+        METRICS.record(timer)
+    return resp
+
+
+def handle_event(event: dict, context: object, timer: AhInvocationTimer | None) -> dict:
+    """Dispatches API Gateway event to its route and builds the lambda response.
+
+    Args:
+        event (dict): event data dictionary
+        context (object): lambda context object
+        timer (AhInvocationTimer | None): timer of the phases, None when metrics are disabled
+    Returns:
+        dict: lambda response dictionary, where body is a string converted from dict
+    """
     status_code = HttpStatusCode.FORBIDDEN.value  # Assume error at the beginning, overwrite alter
-    abk_logger.info(f"event   = {json.dumps(event, indent=2)}")
-    abk_logger.debug(
-        f"context = {json.dumps(context, default=lambda o: getattr(o, '__dict__', str(o)))}"
-    )
-    resp_body: AhLambdaResponseBody
-
-    try:
-        # Handle both GET (query parameters) and POST (body) requests
-        if event.get("httpMethod") == "GET" and event.get("queryStringParameters"):
-            lambda_input = event.get("queryStringParameters")
-        elif event.get("body"):
-            lambda_input = json.loads(event.get("body"))
-        else:
-            lambda_input = {}
+    abk_logger.info("event   = %s", LazyJson(event, indent=2))
+    abk_logger.debug("context = %s", LazyJson(context, default=object_to_json))
+    resp_body: tuple  # response model of the route, AhLambdaResponseBody on errors
+
+    route = ROUTER.resolve(event)
+    if route is None:
+        if timer is not None:
+            timer.error = "no_route"
+        return get_no_route_response(event)
 
-        lambda_req = validate_input(lambda_input)
-        abk_logger.debug(f"req: {json.dumps(lambda_req._asdict(), indent=4)}")
+    # GET query parameters or POST body, decoded once and reused for the error response
+    # the decode error is not raised again: its traceback would reference this frame, which
+    # holds the request holding the error, a reference cycle per malformed request
+    request = decode_request(event)
+    if timer is not None:
+        timer.mark("decode")
 
-        resp_body = AhLambdaResponseBody(msg="ok", txId=lambda_req.txId)
+    # client retries of an answered request replay the response built the first time
+    cache = route.idempotency_cache
+    cache_key = idempotency_key(request.payload) if cache is not None and cache.enabled else None
+    cached_resp = cache.get(cache_key) if cache_key is not None else None
+    # the router adds registries and limiters only to request models with deviceUuid
+    checks_device = route.device_registry is not None or route.rate_limiter is not None
 
-        status_code = HttpStatusCode.OK.value
-    except Exception as exc:
-        abk_logger.error(f"{exc = }")
-        # Try to get txId from either query params or body for error response
+    if request.error is None:
         try:
-            if event.get("httpMethod") == "GET" and event.get("queryStringParameters"):
-                error_input = event.get("queryStringParameters") or {}
-            elif event.get("body"):
-                error_input = json.loads(event.get("body"))
+            if cached_resp is not None:
+                # validated when it was answered first, the device is checked again: a retry
+                # is not answered to a device which got unregistered or is above its limit
+                device_uuid, tx_id = cache_key
             else:
-                error_input = {}
-        except:
-            error_input = {}
-        resp_body = get_error_response_body(error_input)
-
-    body = json.dumps(class_to_dict(resp_body))
-    abk_logger.info(f"{status_code = }, {body = }")
-    return {"statusCode": status_code, "headers": LAMBDA_RESP_HEADERS, "body": body}
+                lambda_req = route.parse(request.payload)
+                abk_logger.debug("req: %s", LazyJson(lambda_req, indent=4))
+                if timer is not None:
+                    timer.mark("validate")
+                if checks_device:
+                    device_uuid = lambda_req.deviceUuid
+                    tx_id = getattr(lambda_req, "txId", "")
+
+            if checks_device:
+                rejected_resp = check_device(route, device_uuid, tx_id, timer)
+                if rejected_resp is not None:
+                    return rejected_resp
+
+            if cached_resp is not None:
+                abk_logger.info("replaying cached response of txId = %s", tx_id)
+                return cached_resp
+            resp_body = route.respond(lambda_req)
+
+            status_code = HttpStatusCode.OK.value
+        except Exception as exc:
+            abk_logger.error("exc = %r", exc)
+            if timer is not None:
+                validated = cached_resp is not None or "validate" in timer.phases
+                timer.error = "action" if validated else "validation"
+            resp_body = get_error_response_body(request)
+    else:
+        abk_logger.error("exc = %r", request.error)
+        if timer is not None:
+            timer.error = "decode"
+        resp_body = get_error_response_body(request)
+    if timer is not None:
+        timer.mark("respond")
+
+    # tuples compare equal across models, another model with the same values has other keys
+    if type(resp_body) is AhLambdaResponseBody and resp_body == EMPTY_TX_ID_ERROR_RESP_BODY:
+        body = EMPTY_TX_ID_ERROR_BODY
+    else:
+        body = encode_named_tuple(resp_body)
+    if timer is not None:
+        timer.mark("encode")
+    abk_logger.info("status_code = %s, body = %r", status_code, body)
+    resp = {"statusCode": status_code, "headers": LAMBDA_RESP_HEADERS, "body": body}
+    # only successful responses: unique invalid requests must not evict them
+    if cache_key is not None and status_code == HttpStatusCode.OK.value:
+        cache.put(cache_key, resp)
+    return resp
+
+
+def batch_handler(event, context):
+    """Handler for SQS or Kinesis batches of abk hello requests.
+
+    Every record is decoded and validated once. With the device registry enabled the
+    deviceUuids of all valid records are looked up together. Records which can never succeed
+    (malformed, invalid or of unknown devices) are logged and acknowledged, a retry would
+    only move them to the DLQ later. Only transient failures, a failed device lookup, are
+    reported back in batchItemFailures, so that only those are retried
+    (ReportBatchItemFailures).
+
+    Args:
+        event (dict): event data dictionary with "Records" list
+        context (object): lambda context object
+    Returns:
+        dict: partial batch response {"batchItemFailures": [{"itemIdentifier": id}, ...]}
+    """
+    records = event.get("Records") or []
+    batch_item_failures = []
+    # item identifier -> deviceUuid of the valid records
+    valid_records = {}
+    for record in records:
+        item_identifier = get_record_item_identifier(record)
+        try:
+            valid_records[item_identifier] = validate_input(get_record_input(record)).deviceUuid
+        except Exception as exc:
+            abk_logger.error("record %s rejected: %r", item_identifier, exc)
+    rejected = len(records) - len(valid_records)
+
+    if valid_records and DEVICE_REGISTRY.enabled:
+        try:
+            registered = DEVICE_REGISTRY.lookup_many(valid_records.values())
+        except Exception as exc:
+            # the backend may be back for the retry
+            abk_logger.error("device lookup failed: %r", exc)
+            batch_item_failures = [
+                {"itemIdentifier": item_identifier} for item_identifier in valid_records
+            ]
+        else:
+            for item_identifier, device_uuid in valid_records.items():
+                if not registered.get(device_uuid):
+                    abk_logger.error(
+                        "record %s rejected: unknown device %s", item_identifier, device_uuid
+                    )
+                    rejected += 1
+
+    abk_logger.info(
+        "processed %d records, %d rejected, %d failed",
+        len(records),
+        rejected,
+        len(batch_item_failures),
+    )
+    return {"batchItemFailures": batch_item_failures}
+
+
+# -----------------------------------------------------------------------------
+# end of the cold start initialization: imports, compiled validators and route table
+# -----------------------------------------------------------------------------
+INIT_DURATION_NS = time.perf_counter_ns() - INIT_STARTED_NS
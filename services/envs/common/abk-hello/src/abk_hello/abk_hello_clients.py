@@ -0,0 +1,368 @@
+"""Downstream clients of ABK hello lambda, created lazily and reused across warm invocations.
+
+Opening a database connection or creating an AWS SDK client costs more than a whole warm
+invocation of the handler. Clients are therefore created on first use, not at import (an
+invocation which never needs the database does not pay for it), and returned to a
+module-level pool afterwards, so the next invocation on the warm container reuses them.
+Lambda runs one invocation per container at a time and needs one client per downstream,
+local runs with threads (tools/local_api.py) get one client per concurrent request.
+
+A client idle for longer than max_idle_s is health checked before it is handed out again,
+downstreams close idle connections and a frozen container may have missed that. Clients
+older than max_age_s (e.g. expiring credentials) and clients failing the health check are
+closed and replaced by new ones. A client whose user raised is health checked before it
+goes back to the pool. Per downstream the pool counts created, reused and recycled clients.
+
+Without ABK_DB_HOST the "db" downstream is a local SQLite stand-in, in memory or a file, so
+the service runs and is tested offline. The service has no driver of a networked database
+yet, with ABK_DB_HOST set using "db" raises AhClientError.
+
+Environment variables:
+    ABK_DB_HOST: host of the database, unset uses the local SQLite stand-in
+    ABK_DB_NAME: SQLite database file of the stand-in, default in memory
+    ABK_CLIENT_MAX_IDLE: idle clients kept per downstream, default 4
+    ABK_CLIENT_MAX_IDLE_S: idle seconds after which a client is health checked, default 60
+    ABK_CLIENT_MAX_AGE_S: seconds after which a client is replaced, default 3600
+"""
+
+# Standard imports
+import itertools
+import os
+import threading
+import time
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from typing import NamedTuple
+
+# local imports
+from abk_hello.abk_hello_logging import get_logger
+
+
+# -----------------------------------------------------------------------------
+# variables definitions
+# -----------------------------------------------------------------------------
+abk_logger = get_logger(__name__)
+
+DEFAULT_MAX_IDLE = 4
+DEFAULT_MAX_IDLE_S = 60.0
+DEFAULT_MAX_AGE_S = 3600.0
+DATABASE_CLIENT = "db"
+# URI of the shared in-memory SQLite database, numbered per factory
+SQLITE_MEMORY_URI = "file:abk_hello_{}?mode=memory&cache=shared"
+_sqlite_memory_ids = itertools.count(1)
+
+
+class AhClientError(Exception):
+    """Downstream client could not be created."""
+
+
+class AhClientPoolStats(NamedTuple):
+    """Counters of one downstream's client pool since the container started."""
+
+    created: int
+    reused: int
+    recycled: int  # closed because too old or unhealthy
+    health_check_failures: int
+    create_errors: int
+    in_use: int
+    idle: int
+
+
+class _IdleClient(NamedTuple):
+    client: object
+    created_at: float
+    released_at: float
+
+
+# -----------------------------------------------------------------------------
+# client pool
+# -----------------------------------------------------------------------------
+class AhClientPool:
+    """Pool of the clients of one downstream, most recently used client handed out first."""
+
+    def __init__(
+        self,
+        create: Callable[[], object],
+        health_check: Callable[[object], object] | None = None,
+        close: Callable[[object], object] | None = None,
+        max_idle: int = DEFAULT_MAX_IDLE,
+        max_idle_s: float = DEFAULT_MAX_IDLE_S,
+        max_age_s: float = DEFAULT_MAX_AGE_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Creates empty pool.
+
+        Args:
+            create (Callable[[], object]): returns a new client
+            health_check (Callable[[object], object] | None): raises when the client is broken
+            close (Callable[[object], object] | None): closes a client, default client.close()
+            max_idle (int): idle clients kept, more are closed on release
+            max_idle_s (float): idle seconds after which a client is health checked
+            max_age_s (float): seconds after which a client is replaced
+            clock (Callable[[], float]): returns current time in seconds
+        """
+        self._create = create
+        self._health_check = health_check
+        self._close = close
+        self.max_idle = max_idle
+        self.max_idle_s = max_idle_s
+        self.max_age_s = max_age_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._idle: list[_IdleClient] = []
+        # id(client) -> created_at of the clients handed out
+        self._in_use: dict[int, float] = {}
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        self.health_check_failures = 0
+        self.create_errors = 0
+
+    def acquire(self) -> object:
+        """Returns an idle healthy client or a new one, raises AhClientError on failure."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                idle = self._idle.pop()
+            now = self._clock()
+            if now - idle.created_at >= self.max_age_s:
+                self._discard(idle.client, "max age reached")
+                continue
+            if now - idle.released_at >= self.max_idle_s and not self._healthy(idle.client):
+                continue
+            with self._lock:
+                self.reused += 1
+                self._in_use[id(idle.client)] = idle.created_at
+            return idle.client
+
+        try:
+            client = self._create()
+        except Exception as exc:
+            with self._lock:
+                self.create_errors += 1
+            raise AhClientError(f"creating client failed: {exc!r}") from exc
+        with self._lock:
+            self.created += 1
+            self._in_use[id(client)] = self._clock()
+        return client
+
+    def release(self, client: object, broken: bool = False) -> None:
+        """Returns client to the pool, broken clients and clients above max_idle are closed."""
+        with self._lock:
+            created_at = self._in_use.pop(id(client), None)
+            keep = not broken and created_at is not None and len(self._idle) < self.max_idle
+            if keep:
+                self._idle.append(_IdleClient(client, created_at, self._clock()))
+        if not keep:
+            self._discard(client, "broken" if broken else "pool full")
+
+    @contextmanager
+    def client(self) -> Generator[object]:
+        """Provides a client for the with block, health checks it when the block raised."""
+        client = self.acquire()
+        try:
+            yield client
+        except BaseException:
+            self.release(client, broken=not self._healthy(client, discard=False))
+            raise
+        self.release(client)
+
+    def close(self) -> None:
+        """Closes all idle clients, clients in use are closed when released."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._in_use.clear()
+        for entry in idle:
+            self._close_client(entry.client)
+
+    def stats(self) -> AhClientPoolStats:
+        """Returns counters and current pool size."""
+        with self._lock:
+            return AhClientPoolStats(
+                created=self.created,
+                reused=self.reused,
+                recycled=self.recycled,
+                health_check_failures=self.health_check_failures,
+                create_errors=self.create_errors,
+                in_use=len(self._in_use),
+                idle=len(self._idle),
+            )
+
+    def _healthy(self, client: object, discard: bool = True) -> bool:
+        if self._health_check is None:
+            return True
+        try:
+            self._health_check(client)
+        except Exception as exc:
+            with self._lock:
+                self.health_check_failures += 1
+            abk_logger.warning("client health check failed: %r", exc)
+            if discard:
+                self._discard(client, "unhealthy")
+            return False
+        return True
+
+    def _discard(self, client: object, reason: str) -> None:
+        with self._lock:
+            self.recycled += 1
+        abk_logger.info("closing client: %s", reason)
+        self._close_client(client)
+
+    def _close_client(self, client: object) -> None:
+        try:
+            if self._close is not None:
+                self._close(client)
+            elif hasattr(client, "close"):
+                client.close()
+        except Exception as exc:
+            abk_logger.warning("closing client failed: %r", exc)
+
+
+class AhClientManager:
+    """Client pools of the downstreams by name, pools are created on first use."""
+
+    def __init__(
+        self,
+        max_idle: int = DEFAULT_MAX_IDLE,
+        max_idle_s: float = DEFAULT_MAX_IDLE_S,
+        max_age_s: float = DEFAULT_MAX_AGE_S,
+    ):
+        """Creates manager without downstreams, the limits are the defaults of its pools."""
+        self.max_idle = max_idle
+        self.max_idle_s = max_idle_s
+        self.max_age_s = max_age_s
+        self._pools: dict[str, AhClientPool] = {}
+
+    def register(
+        self,
+        name: str,
+        create: Callable[[], object],
+        health_check: Callable[[object], object] | None = None,
+        close: Callable[[object], object] | None = None,
+        **limits: float,
+    ) -> AhClientPool:
+        """Registers downstream, replaces and closes the pool of an earlier registration.
+
+        Nothing is created yet, the first client is created by the first acquire.
+
+        Args:
+            name (str): downstream name, e.g. "db"
+            create (Callable[[], object]): returns a new client
+            health_check (Callable[[object], object] | None): raises when the client is broken
+            close (Callable[[object], object] | None): closes a client, default client.close()
+            limits (float): max_idle, max_idle_s or max_age_s overriding the defaults
+        Returns:
+            AhClientPool: pool of the downstream
+        """
+        pool = AhClientPool(
+            create,
+            health_check=health_check,
+            close=close,
+            max_idle=int(limits.get("max_idle", self.max_idle)),
+            max_idle_s=limits.get("max_idle_s", self.max_idle_s),
+            max_age_s=limits.get("max_age_s", self.max_age_s),
+        )
+        previous = self._pools.get(name)
+        self._pools[name] = pool
+        if previous is not None:
+            previous.close()
+        return pool
+
+    def pool(self, name: str) -> AhClientPool:
+        """Returns pool of the downstream, raises AhClientError when it is not registered."""
+        try:
+            return self._pools[name]
+        except KeyError:
+            raise AhClientError(f"no client registered as {name}") from None
+
+    def client(self, name: str):
+        """Returns context manager providing a client of the downstream for a with block."""
+        return self.pool(name).client()
+
+    def stats(self) -> dict[str, AhClientPoolStats]:
+        """Returns counters of every downstream by name."""
+        return {name: pool.stats() for name, pool in self._pools.items()}
+
+    def close(self) -> None:
+        """Closes the idle clients of all downstreams."""
+        for pool in self._pools.values():
+            pool.close()
+
+
+# -----------------------------------------------------------------------------
+# client factories
+# -----------------------------------------------------------------------------
+def sqlite_client_factory(database: str = ":memory:") -> Callable[[], object]:
+    """Returns factory of connections to the SQLite database file.
+
+    All connections of an in-memory database share one database, it lives as long as the
+    factory. sqlite3 is imported by the first connection.
+
+    Args:
+        database (str): database file or ":memory:"
+    Returns:
+        Callable[[], object]: returns a new sqlite3.Connection
+    """
+    uri = database == ":memory:"
+    if uri:
+        database = SQLITE_MEMORY_URI.format(next(_sqlite_memory_ids))
+    # keeps the shared in-memory database alive while the pool recycles its connections
+    anchor: list = []
+
+    def create():
+        import sqlite3
+
+        # the pool hands a connection to one thread at a time
+        connection = sqlite3.connect(database, uri=uri, check_same_thread=False)
+        if uri and not anchor:
+            anchor.append(sqlite3.connect(database, uri=True, check_same_thread=False))
+        return connection
+
+    return create
+
+
+def sqlite_health_check(connection: object) -> None:
+    """Raises when the SQLite connection is closed or broken."""
+    connection.execute("SELECT 1").fetchone()
+
+
+def aws_client_factory(service_name: str, **client_kwargs: object) -> Callable[[], object]:
+    """Returns factory of boto3 clients of the AWS service, boto3 is imported on first use.
+
+    boto3 clients keep their own HTTP connection pool, reusing the client reuses its
+    connections.
+
+    Args:
+        service_name (str): AWS service, e.g. "dynamodb"
+        client_kwargs (object): boto3.client arguments, e.g. region_name or config
+    Returns:
+        Callable[[], object]: returns a new boto3 client
+    """
+
+    def create():
+        import boto3
+
+        return boto3.client(service_name, **client_kwargs)
+
+    return create
+
+
+def database_client_factory() -> Callable[[], object]:
+    """Returns factory of the "db" downstream, the SQLite stand-in without ABK_DB_HOST."""
+    host = os.environ.get("ABK_DB_HOST")
+    if not host:
+        return sqlite_client_factory(os.environ.get("ABK_DB_NAME") or ":memory:")
+
+    def create():
+        raise AhClientError(f"no database driver installed for ABK_DB_HOST={host}")
+
+    return create
+
+
+CLIENTS = AhClientManager(
+    max_idle=int(os.environ.get("ABK_CLIENT_MAX_IDLE", DEFAULT_MAX_IDLE)),
+    max_idle_s=float(os.environ.get("ABK_CLIENT_MAX_IDLE_S", DEFAULT_MAX_IDLE_S)),
+    max_age_s=float(os.environ.get("ABK_CLIENT_MAX_AGE_S", DEFAULT_MAX_AGE_S)),
+)
+CLIENTS.register(DATABASE_CLIENT, database_client_factory(), health_check=sqlite_health_check)
@@ -0,0 +1,264 @@
+"""Accept-Encoding negotiation and response body compression of ABK hello lambda.
+
+Bodies shorter than ABK_COMPRESSION_MIN_BYTES are returned as they are: below about 1 KB
+the gzip header and the CPU time cost more than the saved bytes. Longer bodies are
+compressed with the best encoding the client accepts, brotli when the brotli package is
+installed, else gzip. Compressed bodies are returned base64 encoded with isBase64Encoded.
+API Gateway REST decodes them only when the first media type of the request's Accept
+header matches one of its binaryMediaTypes (serverless.yml), else the client would get the
+base64 text. Bodies are therefore compressed only for such requests, clients sending
+"Accept: */*" (curl, requests) get them uncompressed. Every response of an enabled
+compressor carries "Vary: Accept, Accept-Encoding", whether it is compressed or not.
+Compressed forms of the constant error bodies are cached, they are compressed once per
+container.
+
+Environment variables:
+    ABK_COMPRESSION_MIN_BYTES: shortest body which is compressed, default 1024, -1 disables
+    ABK_COMPRESSION_GZIP_LEVEL: zlib level 1 - 9, default 6
+    ABK_COMPRESSION_BROTLI_QUALITY: brotli quality 0 - 11, default 4
+    ABK_BINARY_MEDIA_TYPES: comma separated binaryMediaTypes of the API, default
+        application/json, must match serverless.yml
+"""
+
+# Standard imports
+import base64
+import importlib.util
+import os
+import zlib
+from collections.abc import Callable
+
+
+# -----------------------------------------------------------------------------
+# variables definitions
+# -----------------------------------------------------------------------------
+DEFAULT_MIN_BYTES = 1024
+DEFAULT_GZIP_LEVEL = 6
+# brotli quality 11 is its default but far too slow for a request path
+DEFAULT_BROTLI_QUALITY = 4
+# zlib wbits of the gzip container, header without file name and with mtime 0
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+DEFAULT_BINARY_MEDIA_TYPES = ("application/json",)
+# the body depends on Accept (base64 decoded by API Gateway or not) and Accept-Encoding
+VARY_HEADER = "Accept, Accept-Encoding"
+
+
+def _brotli_compress() -> Callable[..., bytes] | None:
+    """Returns brotli.compress when brotli is installed, else None.
+
+    brotli is imported by the first compression, not at the cold start: most responses are
+    shorter than min_bytes and most containers never compress with brotli.
+    """
+    if importlib.util.find_spec("brotli") is None:
+        return None
+
+    def compress(data: bytes, **kwargs) -> bytes:
+        import brotli
+
+        return brotli.compress(data, **kwargs)
+
+    return compress
+
+
+def gzip_compress(data: bytes, level: int = DEFAULT_GZIP_LEVEL) -> bytes:
+    """Returns data in gzip format, reproducible: the header carries no time stamp."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def parse_accept_encoding(accept_encoding: str) -> dict[str, float]:
+    """Parses Accept-Encoding header value into coding -> q-value.
+
+    Args:
+        accept_encoding (str): header value, e.g. "gzip, deflate, br;q=0.9"
+    Returns:
+        dict[str, float]: lower case codings, invalid q-values count as 0
+    """
+    codings = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q_value = 1.0
+        params = params.strip()
+        if params[:2].lower() == "q=":
+            try:
+                q_value = float(params[2:])
+            except ValueError:
+                q_value = 0.0
+        codings[coding] = q_value
+    return codings
+
+
+def media_type_matches(header_value: str | None, media_types: tuple[str, ...]) -> bool:
+    """True when the first media type of Accept / Content-Type matches one of media_types.
+
+    API Gateway compares only the first media type of the header, entries may be "type/*"
+    or "*/*" wildcards.
+
+    Args:
+        header_value (str | None): header value, e.g. "application/json, */*;q=0.8"
+        media_types (tuple[str, ...]): binaryMediaTypes of the API
+    Returns:
+        bool: True when API Gateway handles the body as binary
+    """
+    if not header_value:
+        return False
+    media_type = header_value.split(",", 1)[0].partition(";")[0].strip().lower()
+    main_type = media_type.partition("/")[0]
+    return any(
+        pattern in (media_type, "*/*") or pattern == f"{main_type}/*" for pattern in media_types
+    )
+
+
+def get_header(event: dict, name: str) -> str | None:
+    """Returns request header of the API Gateway event, names compared case insensitive."""
+    headers = event.get("headers")
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        lower_name = name.lower()
+        for header_name, header_value in headers.items():
+            if header_name.lower() == lower_name:
+                return header_value
+    return value
+
+
+class AhResponseCompressor:
+    """Compresses lambda responses for the encodings clients accept."""
+
+    def __init__(
+        self,
+        min_bytes: int = DEFAULT_MIN_BYTES,
+        gzip_level: int = DEFAULT_GZIP_LEVEL,
+        brotli_quality: int = DEFAULT_BROTLI_QUALITY,
+        brotli_compress: Callable[..., bytes] | None = None,
+        binary_media_types: tuple[str, ...] = DEFAULT_BINARY_MEDIA_TYPES,
+    ):
+        """Creates compressor, min_bytes -1 disables it, brotli only with brotli_compress.
+
+        binary_media_types are the binaryMediaTypes of the API, only requests whose Accept
+        header matches them get compressed responses.
+        """
+        self.min_bytes = min_bytes
+        self.binary_media_types = tuple(media_type.lower() for media_type in binary_media_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._compressors: dict[str, Callable[[bytes], bytes]] = {
+            "gzip": lambda data: gzip_compress(data, self.gzip_level)
+        }
+        if brotli_compress is not None:
+            self._compressors["br"] = lambda data: brotli_compress(
+                data, quality=self.brotli_quality
+            )
+        # (body, encoding) -> base64 compressed body of the constant bodies
+        self._constant_bodies: dict[tuple[str, str], str] = {}
+        self._constants: set[str] = set()
+        # headers -> copy with Vary, of the last headers: most responses share their headers
+        self._vary_headers: tuple[dict, dict] = ({}, {"Vary": VARY_HEADER})
+
+    @property
+    def enabled(self) -> bool:
+        """True when responses may be compressed."""
+        return self.min_bytes >= 0
+
+    @property
+    def encodings(self) -> tuple[str, ...]:
+        """Supported encodings, the preferred one first."""
+        return tuple(sorted(self._compressors, key=lambda encoding: encoding != "br"))
+
+    def add_constant(self, body: str) -> None:
+        """Marks body as constant, its compressed forms are cached."""
+        self._constants.add(body)
+
+    def negotiate(self, accept_encoding: str | None) -> str | None:
+        """Returns the supported encoding the client prefers, None for identity.
+
+        Args:
+            accept_encoding (str | None): Accept-Encoding header value
+        Returns:
+            str | None: "br" or "gzip", None when the client accepts neither
+        """
+        if not accept_encoding:
+            return None
+        codings = parse_accept_encoding(accept_encoding)
+        wildcard_q = codings.get("*", 0.0)
+        best_encoding, best_q = None, 0.0
+        for encoding in self.encodings:
+            q_value = codings.get(encoding, wildcard_q)
+            if q_value > best_q:
+                best_encoding, best_q = encoding, q_value
+        return best_encoding
+
+    def compress_body(self, body: str, encoding: str) -> str:
+        """Returns base64 encoded compressed body, cached for constant bodies."""
+        if body in self._constants:
+            key = (body, encoding)
+            compressed = self._constant_bodies.get(key)
+            if compressed is None:
+                compressed = self._constant_bodies[key] = self._compress(body, encoding)
+            return compressed
+        return self._compress(body, encoding)
+
+    def compress_response(self, event: dict, resp: dict) -> dict:
+        """Returns response compressed as negotiated with the event's Accept-Encoding.
+
+        A disabled compressor and already encoded bodies return the response as it is.
+        Otherwise a copy with the Vary header is returned, the response itself is not
+        modified: it may be the cached response of a retry. Its body is compressed when it
+        is long enough, the Accept header matches binary_media_types and the client accepts
+        a supported encoding.
+
+        Args:
+            event (dict): API Gateway proxy event
+            resp (dict): lambda response with str body
+        Returns:
+            dict: lambda response, compressed with Content-Encoding and isBase64Encoded
+        """
+        if self.min_bytes < 0 or resp.get("isBase64Encoded"):
+            return resp
+        headers = self._with_vary(resp.get("headers") or {})
+        body = resp.get("body")
+        encoding = None
+        if (
+            body
+            and len(body) >= self.min_bytes
+            and media_type_matches(get_header(event, "Accept"), self.binary_media_types)
+        ):
+            encoding = self.negotiate(get_header(event, "Accept-Encoding"))
+        if encoding is None:
+            return {**resp, "headers": headers}
+        return {
+            **resp,
+            "headers": {**headers, "Content-Encoding": encoding},
+            "body": self.compress_body(body, encoding),
+            "isBase64Encoded": True,
+        }
+
+    def _with_vary(self, headers: dict) -> dict:
+        """Returns copy of headers with Vary, shared by responses with the same headers."""
+        source, vary_headers = self._vary_headers
+        if source is not headers:
+            vary_headers = {**headers, "Vary": VARY_HEADER}
+            # one tuple, threads of the local API never see headers of other responses
+            self._vary_headers = (headers, vary_headers)
+        return vary_headers
+
+    def _compress(self, body: str, encoding: str) -> str:
+        return base64.b64encode(self._compressors[encoding](body.encode("utf-8"))).decode()
+
+
+COMPRESSOR = AhResponseCompressor(
+    min_bytes=int(os.environ.get("ABK_COMPRESSION_MIN_BYTES", DEFAULT_MIN_BYTES)),
+    gzip_level=int(os.environ.get("ABK_COMPRESSION_GZIP_LEVEL", DEFAULT_GZIP_LEVEL)),
+    brotli_quality=int(os.environ.get("ABK_COMPRESSION_BROTLI_QUALITY", DEFAULT_BROTLI_QUALITY)),
+    brotli_compress=_brotli_compress(),
+    binary_media_types=tuple(
+        media_type.strip()
+        for media_type in os.environ.get(
+            "ABK_BINARY_MEDIA_TYPES", ",".join(DEFAULT_BINARY_MEDIA_TYPES)
+        ).split(",")
+        if media_type.strip()
+    ),
+)
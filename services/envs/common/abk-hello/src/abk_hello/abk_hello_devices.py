@@ -0,0 +1,506 @@
+"""Device registry of ABK hello lambda: only registered devices get answers.
+
+A deviceUuid is stored and compared as its 16 bytes, not as the 36 character string. Its
+registration is looked up in a pluggable backend (AhDeviceBackend), a SQLite table of the
+"db" downstream by default, and cached per container in front of it:
+- registered devices in an LRU read-through cache, expiring after ttl_s, so a warm
+  container answers its devices without a backend round trip
+- unknown devices in a negative LRU cache with a shorter TTL, so a device hammering the
+  function with an unknown deviceUuid costs one backend round trip per negative_ttl_s
+- optionally a Bloom filter of all registered devices, loaded from the backend on first use
+  and reloaded every bloom_refresh_s: a deviceUuid not in the filter is rejected without any
+  round trip, also the first time. Devices registered in another container are rejected
+  until the next reload, enable it only when registrations may take that long.
+Lookups of several devices (batches of records) are one backend round trip.
+
+Backend errors are raised: the handler answers with its error response, a batch reports
+its records as failed, an unknown device must not pass because the registry is down.
+
+The registry is disabled by default, importing this module costs the handler's cold start
+no more than the cache classes: the "db" downstream (abk_hello_clients), uuid and hashlib
+are imported when a backend is created, a deviceUuid string is built or a Bloom filter is.
+
+Environment variables:
+    ABK_DEVICE_REGISTRY: "1" / "true" rejects unregistered devices with 403, default disabled,
+        needs ABK_DB_HOST or ABK_DB_NAME (abk_hello_clients)
+    ABK_DEVICE_CACHE_MAX_ENTRIES: registered devices cached, default 100000
+    ABK_DEVICE_CACHE_TTL_S: seconds a registered device is cached, default 300
+    ABK_DEVICE_NEGATIVE_MAX_ENTRIES: unknown devices cached, default 100000
+    ABK_DEVICE_NEGATIVE_TTL_S: seconds an unknown device is cached, default 30
+    ABK_DEVICE_BLOOM: "1" / "true" rejects devices not in a Bloom filter, default disabled
+    ABK_DEVICE_BLOOM_REFRESH_S: seconds after which the Bloom filter is reloaded, default 300
+"""
+
+# Standard imports
+import math
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, NamedTuple, Protocol
+
+# local imports
+from abk_hello.abk_hello_logging import get_logger
+
+
+if TYPE_CHECKING:
+    from abk_hello.abk_hello_clients import AhClientManager
+
+
+# -----------------------------------------------------------------------------
+# variables definitions
+# -----------------------------------------------------------------------------
+abk_logger = get_logger(__name__)
+
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_TTL_S = 300.0
+DEFAULT_NEGATIVE_MAX_ENTRIES = 100000
+DEFAULT_NEGATIVE_TTL_S = 30.0
+DEFAULT_BLOOM_REFRESH_S = 300.0
+DEFAULT_BLOOM_FALSE_POSITIVE_RATE = 0.01
+DEFAULT_TABLE = "abk_devices"
+# bound parameters per SQL statement, SQLite before 3.32 allows 999
+SQL_BATCH_SIZE = 500
+
+DeviceKey = bytes  # 16 bytes of the deviceUuid
+
+
+def device_key(device_uuid: str) -> DeviceKey:
+    """Returns the 16 bytes of a deviceUuid, raises ValueError when it is not a UUID."""
+    key = bytes.fromhex(device_uuid.replace("-", ""))
+    if len(key) != 16:
+        raise ValueError(f"deviceUuid is not a UUID: {device_uuid}")
+    return key
+
+
+def device_uuid(key: DeviceKey) -> str:
+    """Returns deviceUuid string of 16 bytes."""
+    import uuid
+
+    return str(uuid.UUID(bytes=key))
+
+
+class AhDeviceRegistryStats(NamedTuple):
+    """Counters of the device registry since the container started."""
+
+    hits: int  # registered devices answered by the cache
+    negative_hits: int  # unknown devices answered by the negative cache
+    bloom_rejects: int  # unknown devices answered by the Bloom filter
+    misses: int  # devices looked up in the backend
+    backend_lookups: int  # backend round trips
+    entries: int
+    negative_entries: int
+    bloom_bytes: int
+
+
+class AhDeviceBackend(Protocol):
+    """Store of the registered devices, shared by all containers."""
+
+    def lookup(self, keys: list[DeviceKey]) -> set[DeviceKey]:
+        """Returns the registered ones of the keys, in one round trip."""
+
+    def register(self, keys: Iterable[DeviceKey]) -> None:
+        """Registers the devices."""
+
+    def count(self) -> int:
+        """Returns number of registered devices."""
+
+    def scan(self) -> Iterator[DeviceKey]:
+        """Yields all registered devices."""
+
+
+class AhLocalDeviceBackend:
+    """In-memory stand-in for the backend, for tests and local runs."""
+
+    def __init__(self, keys: Iterable[DeviceKey] = ()):
+        """Creates store with the registered devices."""
+        self._keys: set[DeviceKey] = set(keys)
+
+    def lookup(self, keys: list[DeviceKey]) -> set[DeviceKey]:
+        """Returns the registered ones of the keys."""
+        return self._keys.intersection(keys)
+
+    def register(self, keys: Iterable[DeviceKey]) -> None:
+        """Registers the devices."""
+        self._keys.update(keys)
+
+    def count(self) -> int:
+        """Returns number of registered devices."""
+        return len(self._keys)
+
+    def scan(self) -> Iterator[DeviceKey]:
+        """Yields all registered devices."""
+        yield from list(self._keys)
+
+
+class AhSqliteDeviceBackend:
+    """Registered devices in a SQLite table of 16 byte keys, connections from the pool."""
+
+    def __init__(
+        self,
+        clients: "AhClientManager | None" = None,
+        client_name: str | None = None,
+        table: str = DEFAULT_TABLE,
+    ):
+        """Creates backend, the table is created by the first call.
+
+        Args:
+            clients (AhClientManager | None): pooled downstream clients, None uses CLIENTS
+            client_name (str | None): downstream of the table, None uses the "db" downstream
+            table (str): name of the table
+        """
+        if not table.isidentifier():
+            raise ValueError(f"invalid table name: {table}")
+        if clients is None or client_name is None:
+            from abk_hello.abk_hello_clients import CLIENTS, DATABASE_CLIENT
+
+            clients = CLIENTS if clients is None else clients
+            client_name = DATABASE_CLIENT if client_name is None else client_name
+        self.clients = clients
+        self.client_name = client_name
+        self.table = table
+        self._table_created = False
+        # the table name is an identifier, the keys are bound parameters
+        self._select_sql = f"SELECT device_uuid FROM {table} WHERE device_uuid IN "  # noqa: S608
+        self._insert_sql = f"INSERT OR IGNORE INTO {table} (device_uuid) VALUES (?)"  # noqa: S608
+        self._count_sql = f"SELECT COUNT(*) FROM {table}"  # noqa: S608
+        self._scan_sql = f"SELECT device_uuid FROM {table}"  # noqa: S608
+
+    def lookup(self, keys: list[DeviceKey]) -> set[DeviceKey]:
+        """Returns the registered ones of the keys, one query per 500 keys."""
+        found = set()
+        with self.clients.client(self.client_name) as connection:
+            self._create_table(connection)
+            for start in range(0, len(keys), SQL_BATCH_SIZE):
+                batch = keys[start : start + SQL_BATCH_SIZE]
+                # one bound parameter per key, only the placeholders are formatted in
+                sql = f"{self._select_sql}({','.join('?' * len(batch))})"  # noqa: S608
+                rows = connection.execute(sql, batch)
+                found.update(row[0] for row in rows)
+        return found
+
+    def register(self, keys: Iterable[DeviceKey]) -> None:
+        """Registers the devices in one transaction."""
+        with self.clients.client(self.client_name) as connection:
+            self._create_table(connection)
+            with connection:
+                connection.executemany(self._insert_sql, ((key,) for key in keys))
+
+    def count(self) -> int:
+        """Returns number of registered devices."""
+        with self.clients.client(self.client_name) as connection:
+            self._create_table(connection)
+            return connection.execute(self._count_sql).fetchone()[0]
+
+    def scan(self) -> Iterator[DeviceKey]:
+        """Yields all registered devices, reading them in batches."""
+        with self.clients.client(self.client_name) as connection:
+            self._create_table(connection)
+            cursor = connection.execute(self._scan_sql)
+            while rows := cursor.fetchmany(10000):
+                for row in rows:
+                    yield row[0]
+
+    def _create_table(self, connection) -> None:
+        if self._table_created:
+            return
+        with connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(device_uuid BLOB PRIMARY KEY) WITHOUT ROWID"
+            )
+        self._table_created = True
+
+
+# -----------------------------------------------------------------------------
+# Bloom filter
+# -----------------------------------------------------------------------------
+class AhBloomFilter:
+    """Bloom filter of 16 byte keys, no false negatives, false_positive_rate at capacity."""
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        """Creates empty filter sized for capacity keys."""
+        from hashlib import blake2b
+
+        self._blake2b = blake2b
+        capacity = max(1, capacity)
+        # optimal size and number of hashes for the false positive rate at capacity
+        bits_per_key = -math.log(false_positive_rate) / math.log(2) ** 2
+        self.bits = max(64, math.ceil(capacity * bits_per_key))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.keys = 0
+
+    @property
+    def size_bytes(self) -> int:
+        """Size of the bit array in bytes."""
+        return len(self._array)
+
+    def _hashes(self, key: DeviceKey) -> tuple[int, int]:
+        """Returns start and step of the key's bit positions, first + index * second."""
+        # double hashing of a digest, device UUIDs need not be random
+        digest = int.from_bytes(self._blake2b(key, digest_size=16).digest(), "little")
+        return digest & 0xFFFFFFFFFFFFFFFF, (digest >> 64) | 1
+
+    def add(self, key: DeviceKey) -> None:
+        """Adds key."""
+        self.update((key,))
+
+    def update(self, keys: Iterable[DeviceKey]) -> None:
+        """Adds keys."""
+        array, bits, hashes = self._array, self.bits, self.hashes
+        for key in keys:
+            position, step = self._hashes(key)
+            for _ in range(hashes):
+                position %= bits
+                array[position >> 3] |= 1 << (position & 7)
+                position += step
+            self.keys += 1
+
+    def __contains__(self, key: DeviceKey) -> bool:
+        """True when the key may have been added, False when it was not."""
+        array, bits = self._array, self.bits
+        position, step = self._hashes(key)
+        for _ in range(self.hashes):
+            position %= bits
+            if not array[position >> 3] & (1 << (position & 7)):
+                return False
+            position += step
+        return True
+
+
+# -----------------------------------------------------------------------------
+# device registry
+# -----------------------------------------------------------------------------
+class AhDeviceRegistry:
+    """Read-through cache of device registrations with negative cache and Bloom filter."""
+
+    def __init__(
+        self,
+        backend: AhDeviceBackend | None = None,
+        enabled: bool = True,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_s: float = DEFAULT_TTL_S,
+        negative_max_entries: int = DEFAULT_NEGATIVE_MAX_ENTRIES,
+        negative_ttl_s: float = DEFAULT_NEGATIVE_TTL_S,
+        bloom: bool = False,
+        bloom_refresh_s: float = DEFAULT_BLOOM_REFRESH_S,
+        bloom_false_positive_rate: float = DEFAULT_BLOOM_FALSE_POSITIVE_RATE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Creates registry with empty caches, the Bloom filter is loaded by the first lookup.
+
+        Args:
+            backend (AhDeviceBackend | None): store of the registered devices
+            enabled (bool): False lets all devices pass without lookups
+            max_entries (int): registered devices cached, 0 disables the cache
+            ttl_s (float): seconds a registered device is cached
+            negative_max_entries (int): unknown devices cached, 0 disables the negative cache
+            negative_ttl_s (float): seconds an unknown device is cached
+            bloom (bool): reject devices not in a Bloom filter of all registered devices
+            bloom_refresh_s (float): seconds after which the Bloom filter is reloaded
+            bloom_false_positive_rate (float): unknown devices the filter lets pass
+            clock (Callable[[], float]): returns current time in seconds
+        """
+        self.backend = backend
+        self._enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.negative_max_entries = negative_max_entries
+        self.negative_ttl_s = negative_ttl_s
+        self.bloom = bloom
+        self.bloom_refresh_s = bloom_refresh_s
+        self.bloom_false_positive_rate = bloom_false_positive_rate
+        self._clock = clock
+        # key -> expires_at, least recently used first
+        self._registered: OrderedDict[DeviceKey, float] = OrderedDict()
+        self._unknown: OrderedDict[DeviceKey, float] = OrderedDict()
+        self._bloom_filter: AhBloomFilter | None = None
+        self._bloom_expires_at = 0.0
+        self.hits = 0
+        self.negative_hits = 0
+        self.bloom_rejects = 0
+        self.misses = 0
+        self.backend_lookups = 0
+
+    @property
+    def enabled(self) -> bool:
+        """True when unregistered devices are rejected."""
+        return self._enabled and self.backend is not None
+
+    def configure(self, enabled: bool, backend: AhDeviceBackend | None = None) -> None:
+        """Enables or disables the registry, the caches start empty again.
+
+        Args:
+            enabled (bool): False lets all devices pass without lookups
+            backend (AhDeviceBackend | None): replaces the store of the registered devices,
+                None keeps the current one
+        """
+        if backend is not None:
+            self.backend = backend
+        self._enabled = enabled
+        self.clear()
+
+    def is_registered(self, device_uuid: str) -> bool:
+        """Returns True when the device is registered, looks it up in the backend on a miss.
+
+        Raises:
+            ValueError: when device_uuid is not a UUID
+        """
+        key = device_key(device_uuid)
+        now = self._clock()
+        registered = self._cached(key, now)
+        if registered is None:
+            self.misses += 1
+            self.backend_lookups += 1
+            registered = bool(self.backend.lookup([key]))
+            self._remember(key, registered, now)
+        return registered
+
+    def lookup_many(self, device_uuids: Iterable[str]) -> dict[str, bool]:
+        """Returns deviceUuid -> registered, all cache misses looked up in one round trip.
+
+        Raises:
+            ValueError: when a device_uuid is not a UUID
+        """
+        now = self._clock()
+        result: dict[str, bool] = {}
+        missing: dict[DeviceKey, list[str]] = {}
+        for value in device_uuids:
+            if value in result:
+                continue
+            key = device_key(value)
+            registered = self._cached(key, now)
+            if registered is None:
+                missing.setdefault(key, []).append(value)
+            else:
+                result[value] = registered
+        if missing:
+            self.misses += len(missing)
+            self.backend_lookups += 1
+            found = self.backend.lookup(list(missing))
+            for key, values in missing.items():
+                registered = key in found
+                self._remember(key, registered, now)
+                for value in values:
+                    result[value] = registered
+        return result
+
+    def register(self, device_uuids: Iterable[str]) -> None:
+        """Registers devices in the backend and caches them as registered."""
+        keys = [device_key(value) for value in device_uuids]
+        self.backend.register(keys)
+        now = self._clock()
+        for key in keys:
+            self._unknown.pop(key, None)
+            self._remember(key, True, now)
+            if self._bloom_filter is not None:
+                self._bloom_filter.add(key)
+
+    def load_bloom_filter(self) -> None:
+        """Loads Bloom filter of all registered devices from the backend."""
+        now = self._clock()
+        # a failing load is retried after the refresh interval, devices are looked up meanwhile
+        self._bloom_expires_at = now + self.bloom_refresh_s
+        self._bloom_filter = None
+        bloom_filter = AhBloomFilter(
+            int(self.backend.count() * 1.25), self.bloom_false_positive_rate
+        )
+        bloom_filter.update(self.backend.scan())
+        self._bloom_filter = bloom_filter
+        abk_logger.info(
+            "loaded Bloom filter of %d devices, %d bytes",
+            bloom_filter.keys,
+            bloom_filter.size_bytes,
+        )
+
+    def clear(self) -> None:
+        """Removes all cached devices and the Bloom filter, counters are kept."""
+        self._registered.clear()
+        self._unknown.clear()
+        self._bloom_filter = None
+        self._bloom_expires_at = 0.0
+
+    def stats(self) -> AhDeviceRegistryStats:
+        """Returns counters and current cache sizes."""
+        return AhDeviceRegistryStats(
+            hits=self.hits,
+            negative_hits=self.negative_hits,
+            bloom_rejects=self.bloom_rejects,
+            misses=self.misses,
+            backend_lookups=self.backend_lookups,
+            entries=len(self._registered),
+            negative_entries=len(self._unknown),
+            bloom_bytes=self._bloom_filter.size_bytes if self._bloom_filter else 0,
+        )
+
+    def _cached(self, key: DeviceKey, now: float) -> bool | None:
+        """Returns cached registration of the key, None when the backend must be asked."""
+        expires_at = self._registered.get(key)
+        if expires_at is not None:
+            if expires_at > now:
+                self._registered.move_to_end(key)
+                self.hits += 1
+                return True
+            del self._registered[key]
+        expires_at = self._unknown.get(key)
+        if expires_at is not None:
+            if expires_at > now:
+                self._unknown.move_to_end(key)
+                self.negative_hits += 1
+                return False
+            del self._unknown[key]
+        if self.bloom:
+            if now >= self._bloom_expires_at:
+                try:
+                    self.load_bloom_filter()
+                except Exception as exc:
+                    abk_logger.warning("loading Bloom filter failed: %r", exc)
+            if self._bloom_filter is not None and key not in self._bloom_filter:
+                self.bloom_rejects += 1
+                return False
+        return None
+
+    def _remember(self, key: DeviceKey, registered: bool, now: float) -> None:
+        if registered:
+            cache, max_entries, ttl_s = self._registered, self.max_entries, self.ttl_s
+        else:
+            cache = self._unknown
+            max_entries, ttl_s = self.negative_max_entries, self.negative_ttl_s
+        if max_entries <= 0 or ttl_s <= 0:
+            return
+        cache[key] = now + ttl_s
+        cache.move_to_end(key)
+        while len(cache) > max_entries:
+            cache.popitem(last=False)
+
+
+def device_backend_from_env() -> AhDeviceBackend | None:
+    """Returns backend of the registry enabled by ABK_DEVICE_REGISTRY, None when disabled.
+
+    Without the registry the handler does not import the "db" downstream.
+
+    Raises:
+        ValueError: when the "db" downstream is the in-memory SQLite stand-in, each container
+            would look devices up in its own empty database and reject all of them
+    """
+    if os.environ.get("ABK_DEVICE_REGISTRY", "").lower() not in ("1", "true"):
+        return None
+    if not (os.environ.get("ABK_DB_HOST") or os.environ.get("ABK_DB_NAME")):
+        raise ValueError("ABK_DEVICE_REGISTRY needs a database, set ABK_DB_HOST or ABK_DB_NAME")
+    return AhSqliteDeviceBackend()
+
+
+_device_backend = device_backend_from_env()
+DEVICE_REGISTRY = AhDeviceRegistry(
+    backend=_device_backend,
+    enabled=_device_backend is not None,
+    max_entries=int(os.environ.get("ABK_DEVICE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    ttl_s=float(os.environ.get("ABK_DEVICE_CACHE_TTL_S", DEFAULT_TTL_S)),
+    negative_max_entries=int(
+        os.environ.get("ABK_DEVICE_NEGATIVE_MAX_ENTRIES", DEFAULT_NEGATIVE_MAX_ENTRIES)
+    ),
+    negative_ttl_s=float(os.environ.get("ABK_DEVICE_NEGATIVE_TTL_S", DEFAULT_NEGATIVE_TTL_S)),
+    bloom=os.environ.get("ABK_DEVICE_BLOOM", "").lower() in ("1", "true"),
+    bloom_refresh_s=float(os.environ.get("ABK_DEVICE_BLOOM_REFRESH_S", DEFAULT_BLOOM_REFRESH_S)),
+)
@@ -0,0 +1,231 @@
+"""Idempotency cache of ABK hello lambda responses, kept across warm invocations.
+
+Clients retry with the same deviceUuid and txId after timeouts. The response built for
+the first request is stored in a module-level LRU cache keyed by (deviceUuid, txId), so
+a retry on a warm container skips validation and encoding. Entries expire after a TTL,
+the cache is bounded by number of entries and by approximate memory size.
+
+An optional shared backend (e.g. DynamoDB or Redis, which other containers see too) is
+consulted on local misses and written through on puts. Backend errors are counted and
+logged, never raised: the cache only saves work, it is not needed for correct answers.
+
+Environment variables:
+    ABK_IDEMPOTENCY_MAX_ENTRIES: maximum number of cached responses, default 10000, 0 disables
+    ABK_IDEMPOTENCY_TTL_S: seconds a response is replayed, default 300
+    ABK_IDEMPOTENCY_MAX_BYTES: approximate memory cap of the cache, default 8 MiB
+"""
+
+# Standard imports
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import NamedTuple, Protocol
+
+# local imports
+from abk_hello.abk_hello_logging import get_logger
+
+
+# -----------------------------------------------------------------------------
+# variables definitions
+# -----------------------------------------------------------------------------
+abk_logger = get_logger(__name__)
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL_S = 300.0
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+# dict, tuple key, OrderedDict link and entry tuple of one cached response, in bytes
+ENTRY_OVERHEAD_BYTES = 512
+
+IdempotencyKey = tuple[str, str]  # (deviceUuid, txId)
+
+
+class AhIdempotencyStats(NamedTuple):
+    """Counters of the idempotency cache since the container started."""
+
+    hits: int
+    misses: int
+    evictions: int  # removed to stay below max_entries / max_bytes
+    expirations: int  # removed because the TTL passed
+    backend_hits: int  # local misses answered by the shared backend
+    backend_errors: int
+    entries: int
+    size_bytes: int
+
+
+class AhIdempotencyBackend(Protocol):
+    """Shared store of responses, seen by all containers of the lambda."""
+
+    def get(self, key: IdempotencyKey) -> dict | None:
+        """Returns stored response or None when missing or expired."""
+
+    def put(self, key: IdempotencyKey, response: dict, ttl_s: float) -> None:
+        """Stores response for ttl_s seconds."""
+
+
+class AhLocalIdempotencyBackend:
+    """In-memory stand-in for a shared backend, for tests and local runs."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        """Creates empty store, clock returns current time in seconds."""
+        self._clock = clock
+        self._items: dict[IdempotencyKey, tuple[float, dict]] = {}
+
+    def get(self, key: IdempotencyKey) -> dict | None:
+        """Returns stored response or None when missing or expired."""
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if item[0] <= self._clock():
+            del self._items[key]
+            return None
+        return item[1]
+
+    def put(self, key: IdempotencyKey, response: dict, ttl_s: float) -> None:
+        """Stores response for ttl_s seconds."""
+        self._items[key] = (self._clock() + ttl_s, response)
+
+
+# -----------------------------------------------------------------------------
+# idempotency cache
+# -----------------------------------------------------------------------------
+def idempotency_key(payload: object) -> IdempotencyKey | None:
+    """Returns cache key of a decoded request, None when the request must not be cached.
+
+    Only payloads with exactly the deviceUuid and txId string fields are cached, so the
+    key determines the whole request and a replayed response is the one validation and
+    encoding would produce again.
+
+    Args:
+        payload (object): decoded request payload
+    Returns:
+        IdempotencyKey | None: (deviceUuid, txId) or None
+    """
+    if type(payload) is not dict or len(payload) != 2:
+        return None
+    device_uuid = payload.get("deviceUuid")
+    tx_id = payload.get("txId")
+    if type(device_uuid) is not str or type(tx_id) is not str:
+        return None
+    return (device_uuid, tx_id)
+
+
+def response_size(key: IdempotencyKey, response: dict) -> int:
+    """Returns approximate memory size of a cached response in bytes."""
+    return ENTRY_OVERHEAD_BYTES + len(key[0]) + len(key[1]) + len(response.get("body") or "")
+
+
+class AhIdempotencyCache:
+    """LRU cache of responses with TTL, entry and memory limits.
+
+    Responses are returned as stored, callers must not modify them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_s: float = DEFAULT_TTL_S,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backend: AhIdempotencyBackend | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Creates empty cache, max_entries 0 disables it."""
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self._clock = clock
+        # key -> (expires_at, response, size), least recently used first
+        self._entries: OrderedDict[IdempotencyKey, tuple[float, dict, int]] = OrderedDict()
+        self._size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.backend_hits = 0
+        self.backend_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        """True when responses are cached."""
+        return self.max_entries > 0 and self.ttl_s > 0
+
+    def get(self, key: IdempotencyKey) -> dict | None:
+        """Returns cached response of the key and marks it recently used, None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._remove(key)
+            self.expirations += 1
+        if self.backend is not None:
+            response = self._backend_get(key)
+            if response is not None:
+                self.backend_hits += 1
+                self._store(key, response)
+                return response
+        self.misses += 1
+        return None
+
+    def put(self, key: IdempotencyKey, response: dict) -> None:
+        """Caches response of the key, evicts least recently used entries above the limits."""
+        if not self.enabled:
+            return
+        self._store(key, response)
+        if self.backend is not None:
+            try:
+                self.backend.put(key, response, self.ttl_s)
+            except Exception as exc:
+                self.backend_errors += 1
+                abk_logger.warning("idempotency backend put failed: %r", exc)
+
+    def clear(self) -> None:
+        """Removes all local entries, counters are kept."""
+        self._entries.clear()
+        self._size_bytes = 0
+
+    def stats(self) -> AhIdempotencyStats:
+        """Returns counters and current size."""
+        return AhIdempotencyStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            backend_hits=self.backend_hits,
+            backend_errors=self.backend_errors,
+            entries=len(self._entries),
+            size_bytes=self._size_bytes,
+        )
+
+    def _backend_get(self, key: IdempotencyKey) -> dict | None:
+        try:
+            return self.backend.get(key)
+        except Exception as exc:
+            self.backend_errors += 1
+            abk_logger.warning("idempotency backend get failed: %r", exc)
+            return None
+
+    def _store(self, key: IdempotencyKey, response: dict) -> None:
+        size = response_size(key, response)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (self._clock() + self.ttl_s, response, size)
+        self._size_bytes += size
+        while len(self._entries) > self.max_entries or self._size_bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._size_bytes -= evicted_size
+            self.evictions += 1
+
+    def _remove(self, key: IdempotencyKey) -> None:
+        self._size_bytes -= self._entries.pop(key)[2]
+
+
+IDEMPOTENCY_CACHE = AhIdempotencyCache(
+    max_entries=int(os.environ.get("ABK_IDEMPOTENCY_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    ttl_s=float(os.environ.get("ABK_IDEMPOTENCY_TTL_S", DEFAULT_TTL_S)),
+    max_bytes=int(os.environ.get("ABK_IDEMPOTENCY_MAX_BYTES", DEFAULT_MAX_BYTES)),
+)
@@ -0,0 +1,151 @@
+"""JSON decoding backends and precompiled response encoding for ABK hello lambda.
+
+Responses are NamedTuples from abk_hello_io. Instead of converting them to dicts and
+running json.dumps, every NamedTuple class is compiled once into a template which only
+escapes the field values. The output is byte identical to json.dumps(class_to_dict(obj)).
+
+Request decoding uses a pluggable backend, selected with ABK_JSON_BACKEND:
+    json (default): stdlib json
+    orjson / ujson: this backend, ImportError if not installed
+    auto: orjson if installed, else ujson if installed, else stdlib json
+orjson and ujson are opt-in: they decode some bodies differently from stdlib json, e.g.
+integers above 64 bits become floats, lone surrogates and NaN are rejected, which changes
+the txId echoed in error responses.
+"""
+
+# Standard imports
+import json
+import os
+from collections.abc import Callable
+from json.encoder import encode_basestring_ascii
+from typing import NamedTuple
+
+
+# -----------------------------------------------------------------------------
+# JSON backends
+# -----------------------------------------------------------------------------
+class JsonBackend(NamedTuple):
+    """JSON library used to decode requests and for generic (compact) encoding."""
+
+    name: str
+    loads: Callable[[str | bytes], object]
+    dumps: Callable[[object], str]
+
+
+def _orjson_backend() -> JsonBackend:
+    import orjson
+
+    return JsonBackend(
+        name="orjson", loads=orjson.loads, dumps=lambda obj: orjson.dumps(obj).decode()
+    )
+
+
+def _ujson_backend() -> JsonBackend:
+    import ujson
+
+    return JsonBackend(name="ujson", loads=ujson.loads, dumps=ujson.dumps)
+
+
+def _json_backend() -> JsonBackend:
+    return JsonBackend(name="json", loads=json.loads, dumps=json.dumps)
+
+
+_JSON_BACKENDS = {"orjson": _orjson_backend, "ujson": _ujson_backend, "json": _json_backend}
+
+
+def get_json_backend(name: str = "auto") -> JsonBackend:
+    """Returns JSON backend by name, "auto" picks the fastest installed one.
+
+    Args:
+        name (str): auto, orjson, ujson or json
+    Raises:
+        ValueError: when the backend name is unknown
+        ImportError: when the requested backend is not installed
+    Returns:
+        JsonBackend: backend
+    """
+    if name == "auto":
+        for backend_factory in _JSON_BACKENDS.values():
+            try:
+                return backend_factory()
+            except ImportError:
+                continue
+    if name not in _JSON_BACKENDS:
+        raise ValueError(f"unknown JSON backend: {name}, expected one of {list(_JSON_BACKENDS)}")
+    return _JSON_BACKENDS[name]()
+
+
+json_backend = get_json_backend(os.environ.get("ABK_JSON_BACKEND", "json").lower())
+
+
+# -----------------------------------------------------------------------------
+# response encoding
+# -----------------------------------------------------------------------------
+def class_to_dict(named_tuple) -> object:
+    """Converts data class or NamedTuple object to dict recursively.
+
+    Args:
+        named_tuple: named tuple
+    Returns:
+        dict: named tuple as dict
+    """
+    if isinstance(named_tuple, tuple) and hasattr(named_tuple, "_asdict"):
+        return {k: class_to_dict(v) for k, v in named_tuple._asdict().items()}
+    if isinstance(named_tuple, list):
+        return [class_to_dict(v) for v in named_tuple]
+    if isinstance(named_tuple, dict):
+        return {k: class_to_dict(v) for k, v in named_tuple.items()}
+    return named_tuple
+
+
+def _encode_value(value: object) -> str:
+    """Encodes one field value exactly like json.dumps with default settings."""
+    if type(value) is str:
+        return encode_basestring_ascii(value)
+    if isinstance(value, tuple) and hasattr(value, "_asdict"):
+        return encode_named_tuple(value)
+    return json.dumps(class_to_dict(value))
+
+
+def compile_encoder(named_tuple_cls: type) -> Callable[[tuple], str]:
+    """Compiles NamedTuple class into JSON encoder function.
+
+    Field names are escaped once into a %-template, per call only the values are encoded.
+
+    Args:
+        named_tuple_cls (type): NamedTuple class
+    Returns:
+        Callable[[tuple], str]: encoder returning same string as json.dumps(class_to_dict(obj))
+    """
+    if not named_tuple_cls._fields:
+        return lambda obj: "{}"
+    template = (
+        "{"
+        + ", ".join(
+            f"{encode_basestring_ascii(field).replace('%', '%%')}: %s"
+            for field in named_tuple_cls._fields
+        )
+        + "}"
+    )
+
+    def encode(obj: tuple) -> str:
+        return template % tuple(map(_encode_value, obj))
+
+    return encode
+
+
+_ENCODERS: dict[type, Callable[[tuple], str]] = {}
+
+
+def encode_named_tuple(obj: tuple) -> str:
+    """Encodes NamedTuple with its compiled encoder, compiles it on first use.
+
+    Args:
+        obj (tuple): NamedTuple instance
+    Returns:
+        str: same string as json.dumps(class_to_dict(obj))
+    """
+    encoder = _ENCODERS.get(type(obj))
+    if encoder is None:
+        encoder = _ENCODERS[type(obj)] = compile_encoder(type(obj))
+    return encoder(obj)
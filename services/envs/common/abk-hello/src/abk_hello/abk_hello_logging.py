@@ -0,0 +1,96 @@
+"""Logging for ABK hello lambda with lazy formatting and sampled JSON log lines.
+
+Log arguments are passed %-style, so that nothing is formatted when a log level is
+suppressed. Expensive arguments (event / context dumps) are wrapped in LazyJson, which
+serializes only when a handler actually emits the record.
+
+Environment variables:
+    LOG_LEVEL: logging level name, default WARNING
+    LOG_FORMAT: "text" (default) or "json" for one JSON object per log line
+    LOG_SAMPLE_RATE: 0.0 - 1.0 fraction of records below WARNING to emit, default 1.0
+"""
+
+# Standard imports
+import json
+import logging
+import os
+import random
+import sys
+
+
+class LazyJson:
+    """Defers json.dumps of a log argument until the log record gets formatted."""
+
+    __slots__ = ("_obj", "_dumps_kwargs")
+
+    def __init__(self, obj: object, **dumps_kwargs):
+        """Stores object and json.dumps keyword arguments, does not serialize yet."""
+        self._obj = obj
+        self._dumps_kwargs = dumps_kwargs
+
+    def __str__(self) -> str:
+        """Serializes the object, NamedTuples as dict."""
+        obj = self._obj
+        if isinstance(obj, tuple) and hasattr(obj, "_asdict"):
+            obj = obj._asdict()
+        return json.dumps(obj, **self._dumps_kwargs)
+
+
+def object_to_json(obj: object) -> object:
+    """json.dumps default for objects like lambda context, uses __dict__ or str()."""
+    return getattr(obj, "__dict__", str(obj))
+
+
+class SamplingFilter(logging.Filter):
+    """Lets through a fraction of records below WARNING, WARNING and above always pass."""
+
+    def __init__(self, sample_rate: float):
+        """Sets fraction of sampled records, clamped to 0.0 - 1.0."""
+        super().__init__()
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Returns True when the record should be emitted."""
+        return record.levelno >= logging.WARNING or random.random() < self.sample_rate
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Formats log records as single line JSON objects for CloudWatch Logs Insights."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Returns JSON log line, the message is formatted only here."""
+        log_line = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "function": record.funcName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            log_line["exception"] = self.formatException(record.exc_info)
+        return json.dumps(log_line, default=str)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Returns logger configured from LOG_LEVEL, LOG_FORMAT and LOG_SAMPLE_RATE.
+
+    Args:
+        name (str): logger name
+    Returns:
+        logging.Logger: configured logger
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.getLevelName(os.environ.get("LOG_LEVEL", "WARNING").upper()))
+
+    if os.environ.get("LOG_FORMAT", "text").lower() == "json":
+        json_handler = logging.StreamHandler(sys.stdout)
+        json_handler.setFormatter(JsonLogFormatter())
+        logger.addHandler(json_handler)
+        logger.propagate = False
+    else:
+        logging.basicConfig()
+
+    sample_rate = float(os.environ.get("LOG_SAMPLE_RATE", "1.0"))
+    if sample_rate < 1.0:
+        logger.addFilter(SamplingFilter(sample_rate))
+    return logger
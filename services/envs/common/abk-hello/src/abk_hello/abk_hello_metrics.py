@@ -0,0 +1,196 @@
+"""Hot path timing metrics of ABK hello lambda in CloudWatch embedded metric format (EMF).
+
+When enabled, every invocation gets an AhInvocationTimer, which takes monotonic
+perf_counter_ns timestamps between the phases of the handler (decode, validate, respond,
+encode, compress), and records whether the invocation was the cold first one of the container and
+the cause of an error. Invocations are aggregated and written as one EMF log line per
+ABK_METRICS_FLUSH_EVERY invocations, CloudWatch extracts the metrics from the log line,
+no API call is made. Timings are written as EMF value arrays, so percentiles survive the
+batching.
+
+With server timing enabled the same timer is reported to the client in a Server-Timing
+response header, so callers can tell function time from network and gateway time and
+cold from warm invocations, e.g. for a cold invocation:
+    init;dur=85.210, decode;dur=0.021, validate;dur=0.012, respond;dur=0.004,
+    serialize;dur=0.006, compress;dur=0.001, handler;dur=0.062, cold
+
+Disabled (the default), the handler checks two attributes and creates no timer.
+Invocations aggregated since the last flush are lost when the container is shut down,
+a flush every invocation never loses any.
+
+Environment variables:
+    ABK_METRICS: "1" / "true" enables the metrics, default disabled
+    ABK_SERVER_TIMING: "1" / "true" adds the Server-Timing header, default disabled
+    ABK_METRICS_FLUSH_EVERY: invocations per EMF log line, 1 - 100, default 1
+    ABK_METRICS_NAMESPACE: CloudWatch metrics namespace, default "ABK/Lambda"
+"""
+
+# Standard imports
+import os
+import resource
+import time
+from collections.abc import Callable
+
+# local imports
+from abk_hello.abk_hello_json import json_backend
+
+# -----------------------------------------------------------------------------
+# variables definitions
+# -----------------------------------------------------------------------------
+DEFAULT_NAMESPACE = "ABK/Lambda"
+# EMF accepts at most 100 values per metric and log line
+MAX_FLUSH_EVERY = 100
+# Server-Timing metric names of the handler phases, "serialize" is what clients expect
+SERVER_TIMING_NAMES = {"encode": "serialize"}
+
+
+class AhInvocationTimer:
+    """Per-phase durations, cold flag and error cause of one invocation."""
+
+    __slots__ = ("cold", "error", "phases", "started_ns", "_last_ns")
+
+    def __init__(self, cold: bool):
+        """Starts timing now."""
+        self.cold = cold
+        self.error: str | None = None
+        self.phases: dict[str, int] = {}
+        self.started_ns = self._last_ns = time.perf_counter_ns()
+
+    def mark(self, phase: str) -> None:
+        """Ends phase now, its duration is the time since the previous mark or the start."""
+        now_ns = time.perf_counter_ns()
+        self.phases[phase] = now_ns - self._last_ns
+        self._last_ns = now_ns
+
+    def elapsed_ns(self) -> int:
+        """Returns time since the start in ns."""
+        return time.perf_counter_ns() - self.started_ns
+
+
+class AhMetrics:
+    """Aggregates invocation timers and writes them as EMF log lines."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        flush_every: int = 1,
+        namespace: str = DEFAULT_NAMESPACE,
+        function_name: str = "abk-hello",
+        writer: Callable[[str], object] = print,
+        server_timing: bool = False,
+    ):
+        """Creates metrics without recorded invocations, writer gets every EMF log line."""
+        self.enabled = enabled
+        self.server_timing = server_timing
+        self.flush_every = min(max(1, flush_every), MAX_FLUSH_EVERY)
+        self.namespace = namespace
+        self.function_name = function_name
+        self.writer = writer
+        self._cold = True
+        # metric declarations of the EMF directive by (name, unit) pairs, built once each
+        self._declarations: dict[tuple, list[dict]] = {}
+        self._timings_ms: dict[str, list[float]] = {}
+        self._errors: dict[str, int] = {}
+        self._invocations = 0
+        self._cold_starts = 0
+
+    def start(self) -> AhInvocationTimer:
+        """Returns timer of a new invocation, only the first one of the container is cold."""
+        timer = AhInvocationTimer(self._cold)
+        self._cold = False
+        return timer
+
+    def mark_warm(self) -> None:
+        """Marks the container warm without an invocation, a keep-warm ping took its start."""
+        self._cold = False
+
+    def record(self, timer: AhInvocationTimer) -> None:
+        """Adds finished invocation, flushes every flush_every invocations."""
+        timings_ms = self._timings_ms
+        for phase, duration_ns in timer.phases.items():
+            timings_ms.setdefault(phase, []).append(duration_ns / 1e6)
+        timings_ms.setdefault("total", []).append(timer.elapsed_ns() / 1e6)
+        if timer.cold:
+            self._cold_starts += 1
+        if timer.error is not None:
+            self._errors[timer.error] = self._errors.get(timer.error, 0) + 1
+        self._invocations += 1
+        if self._invocations >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes invocations recorded since the last flush as one EMF log line."""
+        if not self._invocations:
+            return
+        self.writer(self.emf_line())
+        self._timings_ms = {}
+        self._errors = {}
+        self._invocations = 0
+        self._cold_starts = 0
+
+    def emf_line(self) -> str:
+        """Returns EMF log line of the invocations recorded since the last flush."""
+        values: dict[str, object] = {
+            f"{name}_ms": timings_ms for name, timings_ms in self._timings_ms.items()
+        }
+        units = dict.fromkeys(values, "Milliseconds")
+        counts = {
+            "invocations": self._invocations,
+            "cold_starts": self._cold_starts,
+            "errors": sum(self._errors.values()),
+            **{f"errors_{cause}": count for cause, count in self._errors.items()},
+        }
+        values.update(counts)
+        units.update(dict.fromkeys(counts, "Count"))
+        # ru_maxrss is in KiB on Linux, the peak shows how much of the memory size is used
+        max_rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        values["max_rss_mb"] = round(max_rss_kib / 1024, 1)
+        units["max_rss_mb"] = "Megabytes"
+        units_key = tuple(units.items())
+        declarations = self._declarations.get(units_key)
+        if declarations is None:
+            declarations = self._declarations[units_key] = [
+                {"Name": name, "Unit": unit} for name, unit in units_key
+            ]
+        return json_backend.dumps(
+            {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": self.namespace,
+                            "Dimensions": [["function"]],
+                            "Metrics": declarations,
+                        }
+                    ],
+                },
+                "function": self.function_name,
+                **values,
+            }
+        )
+
+
+def server_timing_header(timer: AhInvocationTimer, init_ns: int) -> str:
+    """Returns Server-Timing header value of the invocation, durations in ms.
+
+    Args:
+        timer (AhInvocationTimer): timer of the invocation, all phases marked
+        init_ns (int): duration of the cold start initialization, reported on cold only
+    Returns:
+        str: phases, total handler duration and a cold / warm marker
+    """
+    entries = [f"init;dur={init_ns / 1e6:.3f}"] if timer.cold else []
+    for phase, duration_ns in timer.phases.items():
+        entries.append(f"{SERVER_TIMING_NAMES.get(phase, phase)};dur={duration_ns / 1e6:.3f}")
+    entries.append(f"handler;dur={timer.elapsed_ns() / 1e6:.3f}")
+    entries.append("cold" if timer.cold else "warm")
+    return ", ".join(entries)
+
+
+METRICS = AhMetrics(
+    enabled=os.environ.get("ABK_METRICS", "").lower() in ("1", "true"),
+    flush_every=int(os.environ.get("ABK_METRICS_FLUSH_EVERY", 1)),
+    namespace=os.environ.get("ABK_METRICS_NAMESPACE", DEFAULT_NAMESPACE),
+    function_name=os.environ.get("AWS_LAMBDA_FUNCTION_NAME", "abk-hello"),
+    server_timing=os.environ.get("ABK_SERVER_TIMING", "").lower() in ("1", "true"),
+)
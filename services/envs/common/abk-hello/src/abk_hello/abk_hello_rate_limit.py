@@ -0,0 +1,156 @@
+"""Per-device token bucket rate limiter of ABK hello lambda.
+
+The limiter keeps one float per deviceUuid: the theoretical arrival time (TAT) of the
+generic cell rate algorithm, which is a token bucket stored as a single timestamp. A
+request is allowed while the TAT is at most burst / rate seconds ahead of now, every
+allowed request moves the TAT 1 / rate seconds forward.
+
+A key whose TAT is in the past has a full bucket and behaves exactly like an unknown
+key, so it can be dropped at any time. Idle keys are swept whenever the number of keys
+doubled since the last sweep, which keeps cleanup amortized O(1) per request.
+
+The state is per container: the limit applies per warm lambda instance, it protects the
+function from one device hammering it, it is not a global quota.
+
+The limiter is opt-in, it changes which requests get answered: a stage enables it by
+setting ABK_RATE_LIMIT_RPS.
+
+Environment variables:
+    ABK_RATE_LIMIT_RPS: sustained requests per second per device, e.g. 10, default 0 disables
+    ABK_RATE_LIMIT_BURST: requests a device may send at once, default 20
+"""
+
+# Standard imports
+import math
+import os
+import time
+from collections.abc import Callable
+from typing import NamedTuple
+
+
+# -----------------------------------------------------------------------------
+# variables definitions
+# -----------------------------------------------------------------------------
+DEFAULT_RATE_PER_S = 10.0
+DEFAULT_BURST = 20
+# no sweep below this many keys, sweeping a small dict often is not worth it
+MIN_SWEEP_KEYS = 1024
+
+
+class AhRateLimitStats(NamedTuple):
+    """Counters of the rate limiter since the container started."""
+
+    allowed: int
+    rejected: int
+    keys: int
+    sweeps: int
+    swept_keys: int
+
+
+class AhRateLimiter:
+    """Token bucket per key with burst capacity and refill rate."""
+
+    def __init__(
+        self,
+        rate_per_s: float = DEFAULT_RATE_PER_S,
+        burst: int = DEFAULT_BURST,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Creates limiter without keys, rate_per_s 0 disables it."""
+        self._clock = clock
+        self._tats: dict[str, float] = {}
+        self._sweep_at = MIN_SWEEP_KEYS
+        self.allowed = 0
+        self.rejected = 0
+        self.sweeps = 0
+        self.swept_keys = 0
+        self.configure(rate_per_s, burst)
+
+    @property
+    def enabled(self) -> bool:
+        """True when requests are limited."""
+        return self.rate_per_s > 0
+
+    def configure(self, rate_per_s: float, burst: int | None = None) -> None:
+        """Sets rate and burst, all keys start with a full bucket again.
+
+        Args:
+            rate_per_s (float): sustained requests per second per key, 0 disables the limiter
+            burst (int | None): requests a key may send at once, None keeps the current burst
+        """
+        self.rate_per_s = rate_per_s
+        if burst is not None:
+            self.burst = max(1, burst)
+        self._interval = 1.0 / rate_per_s if rate_per_s > 0 else 0.0
+        # how far the TAT may be ahead of now for one more request, the epsilon absorbs
+        # rounding of TATs summed up from intervals
+        self._max_ahead_s = self._interval * (self.burst - 1) + 1e-9
+        self.clear()
+
+    def acquire(self, key: str) -> float:
+        """Takes one token of the key.
+
+        Args:
+            key (str): rate limited identity, the deviceUuid
+        Returns:
+            float: 0.0 when the request is allowed, else seconds until the next token
+        """
+        now = self._clock()
+        tats = self._tats
+        tat = tats.get(key, now)
+        if tat < now:
+            tat = now
+        ahead_s = tat - now
+        if ahead_s > self._max_ahead_s:
+            self.rejected += 1
+            return ahead_s - self._max_ahead_s
+        tats[key] = tat + self._interval
+        self.allowed += 1
+        if len(tats) > self._sweep_at:
+            self.sweep(now)
+        return 0.0
+
+    def sweep(self, now: float | None = None) -> int:
+        """Removes keys with a full bucket, they behave like unknown keys.
+
+        Args:
+            now (float | None): current clock value, read from the clock when None
+        Returns:
+            int: number of removed keys
+        """
+        if now is None:
+            now = self._clock()
+        # copy of items: the local API emulator runs the handler in several threads
+        idle_keys = [key for key, tat in list(self._tats.items()) if tat <= now]
+        for key in idle_keys:
+            self._tats.pop(key, None)
+        self._sweep_at = max(MIN_SWEEP_KEYS, 2 * len(self._tats))
+        self.sweeps += 1
+        self.swept_keys += len(idle_keys)
+        return len(idle_keys)
+
+    def clear(self) -> None:
+        """Removes all keys, counters are kept."""
+        self._tats.clear()
+        self._sweep_at = MIN_SWEEP_KEYS
+
+    def stats(self) -> AhRateLimitStats:
+        """Returns counters and current number of keys."""
+        return AhRateLimitStats(
+            allowed=self.allowed,
+            rejected=self.rejected,
+            keys=len(self._tats),
+            sweeps=self.sweeps,
+            swept_keys=self.swept_keys,
+        )
+
+
+def retry_after_header(wait_s: float) -> str:
+    """Returns Retry-After header value, whole seconds rounded up, at least 1."""
+    return str(max(1, math.ceil(wait_s)))
+
+
+RATE_LIMITER = AhRateLimiter(
+    rate_per_s=float(os.environ.get("ABK_RATE_LIMIT_RPS", 0)),
+    burst=int(os.environ.get("ABK_RATE_LIMIT_BURST", DEFAULT_BURST)),
+)
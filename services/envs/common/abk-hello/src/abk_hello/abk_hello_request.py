@@ -0,0 +1,152 @@
+"""Single-pass request decoding with size and nesting guards for ABK hello lambda.
+
+The query parameters or the body of an API Gateway event are decoded exactly once into
+AhDecodedRequest, which carries the decoded payload or the decode error through validation
+and error response building. Oversized and too deeply nested bodies are rejected with cheap
+checks before the JSON parser runs, so malformed input floods cost no more than valid traffic.
+
+application/json is a binaryMediaType of the API (serverless.yml): API Gateway passes JSON
+bodies base64 encoded with isBase64Encoded, they are decoded here before the JSON parser.
+"""
+
+# Standard imports
+import base64
+import binascii
+import re
+from typing import NamedTuple
+
+# local imports
+from abk_hello.abk_hello_json import json_backend
+
+
+# -----------------------------------------------------------------------------
+# variables definitions
+# -----------------------------------------------------------------------------
+# a valid request body is below 100 bytes, API Gateway would accept up to 10 MB
+MAX_BODY_SIZE = 4096
+# a valid request is a flat object, deeper nesting only costs parser recursion
+MAX_NESTING_DEPTH = 32
+
+# strings are matched as a whole, so brackets inside of them are not counted
+_STR_NESTING_RE = re.compile(r'"(?:[^"\\]|\\.)*"|([\[{])|[\]}]', re.DOTALL)
+_BYTES_NESTING_RE = re.compile(rb'"(?:[^"\\]|\\.)*"|([\[{])|[\]}]', re.DOTALL)
+
+
+class AhRequestDecodeError(ValueError):
+    """Raised when the request payload is oversized, too deeply nested or not valid JSON."""
+
+
+class AhDecodedRequest(NamedTuple):
+    """Decoded request payload, or the error which prevented decoding it.
+
+    payload is the decoded JSON value (usually a dict, but any JSON value is possible) and
+    {} when decoding failed, so error handling can read txId without decoding again.
+    """
+
+    payload: object
+    error: AhRequestDecodeError | None = None
+
+    def tx_id(self) -> object:
+        """Returns txId of the payload for error responses, "" when there is none."""
+        if isinstance(self.payload, dict):
+            return self.payload.get("txId", "")
+        return ""
+
+
+EMPTY_REQUEST = AhDecodedRequest(payload={})
+
+
+# -----------------------------------------------------------------------------
+# local functions
+# -----------------------------------------------------------------------------
+def exceeds_nesting_depth(body: str | bytes, max_depth: int = MAX_NESTING_DEPTH) -> bool:
+    """Checks whether arrays / objects in the JSON text are nested deeper than max_depth.
+
+    Counting the brackets is enough for almost every body. Only when there are more
+    brackets than max_depth the structure is scanned, skipping over strings.
+
+    Args:
+        body (str | bytes): JSON text, not necessarily valid
+        max_depth (int): maximum allowed depth, 1 for a flat object
+    Returns:
+        bool: True when the nesting is deeper than max_depth
+    """
+    if isinstance(body, str):
+        open_brackets, nesting_re = ("{", "["), _STR_NESTING_RE
+    else:
+        open_brackets, nesting_re = (b"{", b"["), _BYTES_NESTING_RE
+    if body.count(open_brackets[0]) + body.count(open_brackets[1]) <= max_depth:
+        return False
+    depth = 0
+    for match in nesting_re.finditer(body):
+        if match.lastindex:
+            depth += 1
+            if depth > max_depth:
+                return True
+        elif match.group()[:1] not in (b'"', '"'):
+            depth -= 1
+    return False
+
+
+def _b64decode(body: str) -> bytes:
+    """Decodes base64 body, raises AhRequestDecodeError without exception context."""
+    try:
+        return base64.b64decode(body, validate=True)
+    except (binascii.Error, ValueError) as exc:
+        error_msg = f"body is not valid base64: {exc}"
+    raise AhRequestDecodeError(error_msg)
+
+
+def decode_body(
+    body: str | bytes, max_size: int = MAX_BODY_SIZE, max_depth: int = MAX_NESTING_DEPTH
+) -> object:
+    """Decodes JSON body after checking its size and nesting depth.
+
+    Args:
+        body (str | bytes): JSON text
+        max_size (int): maximum body length in characters (bytes for bytes bodies)
+        max_depth (int): maximum array / object nesting depth
+    Raises:
+        AhRequestDecodeError: when the body is oversized, too deeply nested or invalid JSON
+    Returns:
+        object: decoded JSON value
+    """
+    if len(body) > max_size:
+        raise AhRequestDecodeError(f"body of {len(body)} exceeds maximum size of {max_size}")
+    if exceeds_nesting_depth(body, max_depth):
+        raise AhRequestDecodeError(f"body exceeds maximum nesting depth of {max_depth}")
+    try:
+        return json_backend.loads(body)
+    except (ValueError, RecursionError) as exc:
+        error_msg = f"body is not valid JSON: {exc}"
+    raise AhRequestDecodeError(error_msg)  # outside except: no __context__ keeping frames
+
+
+def decode_request(
+    event: dict, max_size: int = MAX_BODY_SIZE, max_depth: int = MAX_NESTING_DEPTH
+) -> AhDecodedRequest:
+    """Decodes query parameters of GET requests, else the (base64 encoded) JSON body, once.
+
+    Args:
+        event (dict): API Gateway proxy event
+        max_size (int): maximum body length, checked before base64 and JSON decoding
+        max_depth (int): maximum array / object nesting depth of the body
+    Returns:
+        AhDecodedRequest: decoded payload, or {} and the error when decoding failed
+    """
+    if event.get("httpMethod") == "GET" and event.get("queryStringParameters"):
+        return AhDecodedRequest(payload=event["queryStringParameters"])
+    body = event.get("body")
+    if not body:
+        return EMPTY_REQUEST
+    try:
+        if event.get("isBase64Encoded"):
+            # 4 base64 characters encode 3 bytes, reject before decoding
+            if len(body) * 3 // 4 > max_size:
+                raise AhRequestDecodeError(f"body exceeds maximum size of {max_size}")
+            body = _b64decode(body)
+        return AhDecodedRequest(payload=decode_body(body, max_size, max_depth))
+    except AhRequestDecodeError as exc:
+        # the traceback references this frame and through f_back the caller frame, which
+        # holds the returned request: without dropping it every error is a reference cycle
+        return AhDecodedRequest(payload={}, error=exc.with_traceback(None))
@@ -0,0 +1,187 @@
+"""Precompiled route table, so one ABK lambda serves several API Gateway endpoints.
+
+A route binds (httpMethod, resource) of an API Gateway REST proxy event to an action,
+the request model and validator the payload is checked against, and the response model
+the action has to return. Everything which does not depend on the request, compiling the
+validator and normalizing the resource path, happens when the route is added at import,
+dispatching is one dict lookup.
+
+The resource is the route template of the event ("/devices/{deviceUuid}"), so requests
+with path parameters match their route without parsing the path. Events without a
+resource (direct invocations, tests) fall back to the path and then to the default
+resource of the router, events without httpMethod to its default method.
+"""
+
+# Standard imports
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+# local imports
+from abk_hello.abk_hello_devices import AhDeviceRegistry
+from abk_hello.abk_hello_idempotency import AhIdempotencyCache
+from abk_hello.abk_hello_rate_limit import AhRateLimiter
+from abk_hello.abk_hello_validator import AhJsonSchemaValidator, AhRequestValidator
+
+
+# -----------------------------------------------------------------------------
+# variables definitions
+# -----------------------------------------------------------------------------
+RouteKey = tuple[str, str]  # (httpMethod, resource)
+
+
+class AhRouteError(ValueError):
+    """Raised when a route can not be added to the route table."""
+
+
+class AhRoute(NamedTuple):
+    """Endpoint of the lambda with its precompiled request handling.
+
+    idempotency_cache: retries with the same deviceUuid and txId are replayed from it,
+        routes sharing a cache must answer the same request with the same response
+    rate_limiter: limits requests per deviceUuid of the request model
+    device_registry: rejects requests whose deviceUuid is not registered
+    """
+
+    method: str
+    resource: str
+    action: Callable[[Any], tuple]  # request model instance -> response model instance
+    request_model: type[tuple]
+    response_model: type[tuple]
+    validator: AhRequestValidator | AhJsonSchemaValidator
+    idempotency_cache: AhIdempotencyCache | None = None
+    rate_limiter: AhRateLimiter | None = None
+    device_registry: AhDeviceRegistry | None = None
+
+    def parse(self, payload: object) -> tuple:
+        """Validates decoded payload and converts it to the request model.
+
+        Args:
+            payload (object): decoded request payload
+        Raises:
+            ValueError: when the payload does not match the request schema
+        Returns:
+            tuple: request model instance
+        """
+        self.validator.validate(payload)
+        return self.request_model(**payload)
+
+    def respond(self, request: tuple) -> tuple:
+        """Runs the action and checks it returned the response model.
+
+        Args:
+            request (tuple): request model instance
+        Raises:
+            TypeError: when the action returns another type, it would be encoded with the
+                keys of that type
+        Returns:
+            tuple: response model instance
+        """
+        response = self.action(request)
+        if type(response) is not self.response_model:
+            raise TypeError(
+                f"{self.method} {self.resource} returned {type(response).__name__}, "
+                f"not {self.response_model.__name__}"
+            )
+        return response
+
+
+# -----------------------------------------------------------------------------
+# route table
+# -----------------------------------------------------------------------------
+def normalize_resource(resource: str) -> str:
+    """Returns resource path with one leading and without trailing slash."""
+    return "/" + resource.strip("/")
+
+
+class AhRouter:
+    """Route table keyed by (httpMethod, resource)."""
+
+    def __init__(self, default_resource: str | None = None, default_method: str | None = None):
+        """Creates empty table, the defaults apply to events without resource / httpMethod."""
+        self.default_resource = (
+            normalize_resource(default_resource) if default_resource is not None else None
+        )
+        self.default_method = default_method.upper() if default_method is not None else None
+        self._routes: dict[RouteKey, AhRoute] = {}
+        # resource -> value of the Allow header, for 405 responses
+        self._allowed_methods: dict[str, str] = {}
+
+    def add(
+        self,
+        method: str,
+        resource: str,
+        action: Callable[[Any], tuple],
+        request_model: type[tuple],
+        response_model: type[tuple],
+        validator: AhRequestValidator | AhJsonSchemaValidator,
+        idempotency_cache: AhIdempotencyCache | None = None,
+        rate_limiter: AhRateLimiter | None = None,
+        device_registry: AhDeviceRegistry | None = None,
+    ) -> AhRoute:
+        """Adds route to the table.
+
+        Args:
+            method (str): HTTP method, e.g. "GET"
+            resource (str): API Gateway resource path, e.g. "/abk-hello" or "/devices/{id}"
+            action (Callable): builds the response model instance from the request model
+            request_model (type[tuple]): NamedTuple the validated payload is converted to
+            response_model (type[tuple]): NamedTuple returned by the action
+            validator: precompiled validator of the request schema
+            idempotency_cache (AhIdempotencyCache | None): cache replaying retries
+            rate_limiter (AhRateLimiter | None): per deviceUuid limiter
+            device_registry (AhDeviceRegistry | None): registry of the allowed deviceUuids
+        Raises:
+            AhRouteError: when the route exists or the request model has no deviceUuid to
+                limit or look up
+        Returns:
+            AhRoute: added route
+        """
+        method = method.upper()
+        resource = normalize_resource(resource)
+        if (method, resource) in self._routes:
+            raise AhRouteError(f"route already exists: {method} {resource}")
+        if rate_limiter is not None and "deviceUuid" not in request_model._fields:
+            raise AhRouteError(f"rate limited route without deviceUuid: {method} {resource}")
+        if device_registry is not None and "deviceUuid" not in request_model._fields:
+            raise AhRouteError(f"device checked route without deviceUuid: {method} {resource}")
+        route = AhRoute(
+            method=method,
+            resource=resource,
+            action=action,
+            request_model=request_model,
+            response_model=response_model,
+            validator=validator,
+            idempotency_cache=idempotency_cache,
+            rate_limiter=rate_limiter,
+            device_registry=device_registry,
+        )
+        self._routes[(method, resource)] = route
+        # the path of direct invocations may end with a slash, resources never do
+        if resource != "/":
+            self._routes[(method, resource + "/")] = route
+        allowed = self._allowed_methods.get(resource)
+        allowed = f"{allowed}, {method}" if allowed else method
+        self._allowed_methods[resource] = allowed
+        if resource != "/":
+            self._allowed_methods[resource + "/"] = allowed
+        return route
+
+    def event_method(self, event: dict) -> str | None:
+        """Returns httpMethod of the event or the default method."""
+        return event.get("httpMethod") or self.default_method
+
+    def event_resource(self, event: dict) -> str | None:
+        """Returns resource of the event, its path or the default resource."""
+        return event.get("resource") or event.get("path") or self.default_resource
+
+    def resolve(self, event: dict) -> AhRoute | None:
+        """Returns route of the API Gateway event, None when no route matches."""
+        return self._routes.get((self.event_method(event), self.event_resource(event)))
+
+    def allowed_methods(self, event: dict) -> str | None:
+        """Returns Allow header value of the event's resource, None for unknown resources."""
+        return self._allowed_methods.get(self.event_resource(event))
+
+    def routes(self) -> list[AhRoute]:
+        """Returns added routes in the order they were added."""
+        return list({id(route): route for route in self._routes.values()}.values())
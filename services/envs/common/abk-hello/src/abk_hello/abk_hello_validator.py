@@ -0,0 +1,190 @@
+"""Precompiled JSON schema validation for ABK hello lambda requests."""
+
+# Standard imports
+import re
+from collections.abc import Callable
+
+
+# -----------------------------------------------------------------------------
+# variables definitions
+# -----------------------------------------------------------------------------
+# keywords which carry no validation semantics and are ignored when compiling
+_ANNOTATION_KEYWORDS = frozenset({"title", "description", "$comment", "examples"})
+_OBJECT_KEYWORDS = (
+    frozenset({"type", "properties", "required", "additionalProperties", "$defs"})
+    | _ANNOTATION_KEYWORDS
+)
+_STRING_KEYWORDS = frozenset({"type", "pattern", "minLength", "maxLength"}) | _ANNOTATION_KEYWORDS
+
+
+class AhValidationError(ValueError):
+    """Raised when lambda input does not match the request schema.
+
+    The message is the same message jsonschema reports for the best matching error.
+    """
+
+
+class _UnsupportedSchemaError(Exception):
+    """Raised internally when a schema can not be compiled to the fast validator."""
+
+
+# -----------------------------------------------------------------------------
+# local functions
+# -----------------------------------------------------------------------------
+def _resolve_ref(root_schema: dict, sub_schema: dict) -> dict:
+    """Resolves a local "#/$defs/<name>" reference, the only kind the compiler supports."""
+    ref = sub_schema.get("$ref")
+    if ref is None:
+        return sub_schema
+    if len(sub_schema) != 1 or not ref.startswith("#/$defs/"):
+        raise _UnsupportedSchemaError(f"unsupported $ref: {ref}")
+    try:
+        return root_schema["$defs"][ref[len("#/$defs/") :]]
+    except KeyError as exc:
+        raise _UnsupportedSchemaError(f"unresolvable $ref: {ref}") from exc
+
+
+def _compile_string_checks(schema: dict) -> tuple[Callable[[object], str | None], ...]:
+    """Compiles a string property schema to checks returning an error message or None.
+
+    The checks are kept in schema keyword order, so the first failing check is the same
+    error jsonschema reports as best match for that property.
+    """
+    if not schema.keys() <= _STRING_KEYWORDS or schema.get("type") != "string":
+        raise _UnsupportedSchemaError(f"unsupported property schema: {schema}")
+
+    checks = []
+    for keyword, value in schema.items():
+        if keyword == "type":
+            checks.append(
+                lambda instance: (
+                    None if isinstance(instance, str) else f"{instance!r} is not of type 'string'"
+                )
+            )
+        elif keyword == "pattern":
+            search = re.compile(value).search
+            checks.append(
+                lambda instance, search=search, pattern=value: (
+                    None
+                    if not isinstance(instance, str) or search(instance)
+                    else f"{instance!r} does not match {pattern!r}"
+                )
+            )
+        elif keyword == "minLength":
+            checks.append(
+                lambda instance, limit=value: (
+                    None
+                    if not isinstance(instance, str) or len(instance) >= limit
+                    else f"{instance!r} is too short"
+                )
+            )
+        elif keyword == "maxLength":
+            checks.append(
+                lambda instance, limit=value: (
+                    None
+                    if not isinstance(instance, str) or len(instance) <= limit
+                    else f"{instance!r} is too long"
+                )
+            )
+    return tuple(checks)
+
+
+class AhRequestValidator:
+    """Validator compiled once from a flat object schema with string properties.
+
+    Supports the subset of JSON schema (draft 2020-12) used by the lambda request schemas:
+    an object with required keys, no additional properties and string properties
+    constrained by pattern / minLength / maxLength, optionally referenced from "$defs".
+    Accepts and rejects exactly the same instances as jsonschema does.
+    """
+
+    def __init__(self, schema: dict):
+        """Compiles the schema, raises _UnsupportedSchemaError for unsupported keywords."""
+        if not schema.keys() <= _OBJECT_KEYWORDS or schema.get("type") != "object":
+            raise _UnsupportedSchemaError(f"unsupported schema keywords: {list(schema)}")
+        if schema.get("additionalProperties", True) not in (True, False):
+            raise _UnsupportedSchemaError("only boolean additionalProperties is supported")
+
+        properties = schema.get("properties", {})
+        self._required = tuple(schema.get("required", ()))
+        self._required_keys = frozenset(self._required)
+        self._allowed_keys = (
+            None if schema.get("additionalProperties", True) else frozenset(properties)
+        )
+        self._properties = tuple(
+            (name, _compile_string_checks(_resolve_ref(schema, sub_schema)))
+            for name, sub_schema in properties.items()
+        )
+
+    def validate(self, instance: object) -> None:
+        """Validates instance against the compiled schema.
+
+        Args:
+            instance (object): decoded lambda input
+        Raises:
+            AhValidationError: when instance does not match the schema
+        """
+        if not isinstance(instance, dict):
+            raise AhValidationError(f"{instance!r} is not of type 'object'")
+        keys = instance.keys()
+        if not self._required_keys <= keys:
+            missing = next(name for name in self._required if name not in instance)
+            raise AhValidationError(f"{missing!r} is a required property")
+        if self._allowed_keys is not None and not keys <= self._allowed_keys:
+            extras = [key for key in instance if key not in self._allowed_keys]
+            verb = "was" if len(extras) == 1 else "were"
+            extras_msg = ", ".join(repr(extra) for extra in extras)
+            raise AhValidationError(
+                f"Additional properties are not allowed ({extras_msg} {verb} unexpected)"
+            )
+        for name, checks in self._properties:
+            if name in instance:
+                value = instance[name]
+                for check in checks:
+                    error_msg = check(value)
+                    if error_msg is not None:
+                        raise AhValidationError(error_msg)
+
+
+class AhJsonSchemaValidator:
+    """Fallback validator for schemas the fast compiler does not support.
+
+    The jsonschema validator and its meta schema check are built once, not per call.
+    jsonschema is imported here and not at module level: it is the most expensive import
+    of the lambda and must not be paid on cold start when the fast validator is used.
+    """
+
+    def __init__(self, schema: dict):
+        """Checks the schema once and builds the jsonschema validator."""
+        from jsonschema import Draft202012Validator
+        from jsonschema.exceptions import best_match
+
+        Draft202012Validator.check_schema(schema)
+        self._validator = Draft202012Validator(schema)
+        self._best_match = best_match
+
+    def validate(self, instance: object) -> None:
+        """Validates instance against the schema.
+
+        Args:
+            instance (object): decoded lambda input
+        Raises:
+            AhValidationError: when instance does not match the schema
+        """
+        error = self._best_match(self._validator.iter_errors(instance))
+        if error is not None:
+            raise AhValidationError(error.message) from error
+
+
+def compile_validator(schema: dict) -> AhRequestValidator | AhJsonSchemaValidator:
+    """Compiles schema to the fast validator, falls back to jsonschema if not supported.
+
+    Args:
+        schema (dict): JSON schema of the lambda request
+    Returns:
+        validator: object with validate(instance) method
+    """
+    try:
+        return AhRequestValidator(schema)
+    except _UnsupportedSchemaError:
+        return AhJsonSchemaValidator(schema)
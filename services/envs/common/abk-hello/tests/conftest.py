@@ -0,0 +1,31 @@
+"""Shared fixtures of abk_hello unit tests."""
+
+# Own modules imports
+from abk_hello.abk_hello_idempotency import IDEMPOTENCY_CACHE
+from abk_hello.abk_hello_rate_limit import RATE_LIMITER
+
+# Third party imports
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_warm_container_state():
+    """Starts every test like a fresh container: no cached responses, no rate limit state.
+
+    Tests call the handler with the same deviceUuid many times, without the reset they
+    would depend on each other through the module-level cache and limiter.
+    """
+    IDEMPOTENCY_CACHE.clear()
+    RATE_LIMITER.clear()
+    yield
+    IDEMPOTENCY_CACHE.clear()
+    RATE_LIMITER.clear()
+
+
+@pytest.fixture(scope="module")
+def disabled_rate_limiter():
+    """Disables the module-level rate limiter for a module, whatever ABK_RATE_LIMIT_RPS says."""
+    lcl_rate_per_s, lcl_burst = RATE_LIMITER.rate_per_s, RATE_LIMITER.burst
+    RATE_LIMITER.configure(rate_per_s=0)
+    yield RATE_LIMITER
+    RATE_LIMITER.configure(lcl_rate_per_s, lcl_burst)
@@ -1,6 +1,8 @@
 """Unit tests for abk_hello.py."""
 
 # Standard library imports
+import base64
+import json
 import logging
 import os
 
@@ -155,6 +157,99 @@ def test_convert_and_validate_input__throws_given_invalid_input(
     assert ex_msg in str(exception_message.value)
 
 
+# -----------------------------------------------------------------------------
+# Tests for batch_handler
+# -----------------------------------------------------------------------------
+def test_batch_handler__acknowledges_invalid_sqs_records(valid_input) -> None:
+    """Validates that invalid SQS records are not retried."""
+    lcl_invalid_input = {**valid_input, "txId": ""}
+    lcl_event = {
+        "Records": [
+            sqs_record("msg-1", json.dumps(valid_input)),
+            sqs_record("msg-2", json.dumps(lcl_invalid_input)),
+            sqs_record("msg-3", "{not json"),
+            sqs_record("msg-4", json.dumps(valid_input)),
+        ]
+    }
+
+    actual_resp = abk_hello.batch_handler(lcl_event, None)
+
+    assert actual_resp == {"batchItemFailures": []}
+
+
+def test_batch_handler__acknowledges_invalid_kinesis_records(valid_input) -> None:
+    """Validates that invalid Kinesis records are not retried."""
+    lcl_event = {
+        "Records": [
+            kinesis_record("seq-1", json.dumps(valid_input)),
+            kinesis_record("seq-2", json.dumps({"txId": valid_input["txId"]})),
+        ]
+    }
+
+    actual_resp = abk_hello.batch_handler(lcl_event, None)
+
+    assert actual_resp == {"batchItemFailures": []}
+
+
+@pytest.mark.parametrize("event", [{}, {"Records": []}, {"Records": None}])
+def test_batch_handler__returns_no_failures_given_no_records(event: dict) -> None:
+    """Validates that an empty batch returns an empty batchItemFailures list."""
+    assert abk_hello.batch_handler(event, None) == {"batchItemFailures": []}
+
+
+# -----------------------------------------------------------------------------
+# Tests for warm-up events
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "event",
+    [
+        {"source": "abk.warmup"},
+        {"source": "serverless-plugin-warmup"},
+        {"source": "aws.events", "detail-type": "Scheduled Event"},
+    ],
+)
+def test_handler__answers_warmup_without_routing(event, monkeypatch) -> None:
+    """Validates that warm-ups return the container id before any request handling."""
+
+    def fail_handling(*_):
+        raise AssertionError("warm-up handled as request")
+
+    monkeypatch.setattr(abk_hello, "handle_event", fail_handling)
+    monkeypatch.setattr(abk_hello.abk_logger, "error", fail_handling)
+
+    actual_resp = abk_hello.handler(event, None)
+
+    assert actual_resp["warmup"] is True
+    assert actual_resp["containerId"] == abk_hello.CONTAINER_ID
+    assert actual_resp["containerAgeMs"] >= 0
+
+
+def test_handler__warmup_delay_is_capped(monkeypatch) -> None:
+    """Validates that a warm-up holds its container at most MAX_WARMUP_DELAY_MS."""
+    lcl_sleeps = []
+    monkeypatch.setattr(abk_hello.time, "sleep", lcl_sleeps.append)
+
+    abk_hello.handler({"source": "abk.warmup", "delayMs": 50}, None)
+    abk_hello.handler({"source": "abk.warmup", "delayMs": 10**6}, None)
+    abk_hello.handler({"source": "abk.warmup", "delayMs": "50"}, None)
+
+    assert lcl_sleeps == [0.05, abk_hello.MAX_WARMUP_DELAY_MS / 1000]
+
+
 # -----------------------------------------------------------------------------
 # Helper functions
 # -----------------------------------------------------------------------------
+def sqs_record(message_id: str, body: str) -> dict:
+    """Returns SQS event record."""
+    return {"messageId": message_id, "body": body, "eventSource": "aws:sqs"}
+
+
+def kinesis_record(sequence_number: str, data: str) -> dict:
+    """Returns Kinesis event record with base64 encoded data."""
+    return {
+        "kinesis": {
+            "sequenceNumber": sequence_number,
+            "data": base64.b64encode(data.encode()).decode(),
+        },
+        "eventSource": "aws:kinesis",
+    }
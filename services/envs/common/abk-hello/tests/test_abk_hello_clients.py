@@ -0,0 +1,244 @@
+"""Unit tests for abk_hello_clients.py."""
+
+# Standard library imports
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+# Own modules imports
+from abk_hello import abk_hello_clients
+from abk_hello.abk_hello_clients import (
+    CLIENTS,
+    AhClientError,
+    AhClientManager,
+    AhClientPool,
+    AhClientPoolStats,
+    database_client_factory,
+    sqlite_client_factory,
+    sqlite_health_check,
+)
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# help classes
+# -----------------------------------------------------------------------------
+class FakeClock:
+    """Clock which only moves when told to."""
+
+    def __init__(self, now: float = 1000.0):
+        """Starts at now seconds."""
+        self.now = now
+
+    def __call__(self) -> float:
+        """Returns current fake time."""
+        return self.now
+
+
+class FakeClient:
+    """Client which records being closed and can break."""
+
+    def __init__(self, number: int):
+        """Creates open, healthy client."""
+        self.number = number
+        self.closed = False
+        self.broken = False
+
+    def ping(self) -> None:
+        """Raises like a dropped connection."""
+        if self.closed or self.broken:
+            raise ConnectionError(f"client {self.number} broken")
+
+    def close(self) -> None:
+        """Closes the client."""
+        self.closed = True
+
+
+# -----------------------------------------------------------------------------
+# pytest fixtures and setup
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope="module", autouse=True)
+def setup_logging():
+    """Suppresses health check warnings."""
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Provide fake clock."""
+    return FakeClock()
+
+
+@pytest.fixture
+def created() -> list:
+    """Provide list of the clients the pool created."""
+    return []
+
+
+@pytest.fixture
+def pool(clock, created) -> AhClientPool:
+    """Provide pool of fake clients, health checked after 60 s idle, replaced after 3600 s."""
+
+    def create():
+        created.append(FakeClient(len(created) + 1))
+        return created[-1]
+
+    return AhClientPool(
+        create, health_check=FakeClient.ping, max_idle=2, max_idle_s=60, clock=clock
+    )
+
+
+# -----------------------------------------------------------------------------
+# AhClientPool tests
+# -----------------------------------------------------------------------------
+def test_pool__creates_lazily_and_reuses_client(pool, created):
+    """Validates the pool creates a client on first use and reuses it afterwards."""
+    assert created == []
+    for _ in range(3):
+        with pool.client() as lcl_client:
+            assert lcl_client is created[0]
+    assert pool.stats() == AhClientPoolStats(
+        created=1,
+        reused=2,
+        recycled=0,
+        health_check_failures=0,
+        create_errors=0,
+        in_use=0,
+        idle=1,
+    )
+
+
+def test_pool__concurrent_users_get_own_clients_and_max_idle_kept(pool, created):
+    """Validates concurrent users get own clients and at most max_idle are kept."""
+    lcl_clients = [pool.acquire() for _ in range(3)]
+    assert len({lcl_client.number for lcl_client in lcl_clients}) == 3
+    assert pool.stats().in_use == 3
+    for lcl_client in lcl_clients:
+        pool.release(lcl_client)
+    assert pool.stats().idle == 2
+    assert created[2].closed
+
+
+def test_pool__stale_idle_client_health_checked_and_replaced(pool, clock, created):
+    """Validates a stale idle client is health checked and replaced when broken."""
+    with pool.client():
+        pass
+    created[0].broken = True
+    clock.now += 30
+    # idle for less than max_idle_s, not checked
+    with pool.client() as lcl_client:
+        assert lcl_client is created[0]
+    clock.now += 61
+    with pool.client() as lcl_client:
+        assert lcl_client is created[1]
+    assert created[0].closed
+    lcl_stats = pool.stats()
+    assert (lcl_stats.health_check_failures, lcl_stats.recycled) == (1, 1)
+
+
+def test_pool__old_client_replaced(pool, clock, created):
+    """Validates a client older than max_age_s is replaced."""
+    with pool.client():
+        pass
+    clock.now += 3600
+    with pool.client() as lcl_client:
+        assert lcl_client is created[1]
+    assert created[0].closed
+    assert pool.stats().recycled == 1
+
+
+def test_pool__client_broken_in_with_block_not_reused(pool, created):
+    """Validates a client broken inside the with block is closed, not reused."""
+    with pytest.raises(ConnectionError), pool.client() as lcl_client:
+        lcl_client.broken = True
+        lcl_client.ping()
+    with pytest.raises(ValueError), pool.client() as lcl_client:
+        raise ValueError("healthy client, failing query")
+    assert created[0].closed
+    assert not created[1].closed
+    assert pool.stats().idle == 1
+
+
+def test_pool__create_error_raises_client_error():
+    """Validates a failing factory raises AhClientError and counts the error."""
+
+    def create():
+        raise ConnectionRefusedError("db down")
+
+    lcl_pool = AhClientPool(create)
+    with pytest.raises(AhClientError, match="db down"):
+        lcl_pool.acquire()
+    assert lcl_pool.stats().create_errors == 1
+
+
+# -----------------------------------------------------------------------------
+# AhClientManager tests
+# -----------------------------------------------------------------------------
+def test_manager__registered_downstreams_and_stats():
+    """Validates the manager hands out registered clients and reports stats."""
+    lcl_manager = AhClientManager()
+    lcl_manager.register("fake", lambda: FakeClient(1), max_idle=0)
+    with lcl_manager.client("fake") as lcl_client:
+        assert lcl_client.number == 1
+    assert lcl_client.closed
+    assert lcl_manager.stats()["fake"].created == 1
+    with pytest.raises(AhClientError, match="no client registered as other"):
+        lcl_manager.client("other")
+
+
+def test_manager__sqlite_stand_in_shared_across_threads():
+    """Validates the sqlite stand-in is shared across threads through the pool."""
+    lcl_manager = AhClientManager()
+    lcl_manager.register("db", sqlite_client_factory(), health_check=sqlite_health_check)
+    with lcl_manager.client("db") as lcl_connection:
+        lcl_connection.execute("CREATE TABLE devices (uuid TEXT PRIMARY KEY)")
+        lcl_connection.commit()
+
+    def insert(number: int) -> None:
+        with lcl_manager.client("db") as lcl_connection:
+            lcl_connection.execute("INSERT INTO devices VALUES (?)", (f"device-{number}",))
+            lcl_connection.commit()
+
+    with ThreadPoolExecutor(max_workers=4) as lcl_executor:
+        list(lcl_executor.map(insert, range(20)))
+    # recycled connections see the same in-memory database
+    lcl_manager.close()
+    with lcl_manager.client("db") as lcl_connection:
+        assert lcl_connection.execute("SELECT COUNT(*) FROM devices").fetchone() == (20,)
+    assert lcl_manager.stats()["db"].created <= 5
+
+
+def test_manager__closed_sqlite_connection_fails_health_check():
+    """Validates a closed sqlite connection fails the health check."""
+    lcl_connection = sqlite_client_factory()()
+    lcl_connection.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        sqlite_health_check(lcl_connection)
+
+
+# -----------------------------------------------------------------------------
+# module configuration tests
+# -----------------------------------------------------------------------------
+def test_database_client_factory__without_host_uses_sqlite_file(tmp_path, monkeypatch):
+    """Validates the factory uses a sqlite file when ABK_DB_HOST is not set."""
+    monkeypatch.delenv("ABK_DB_HOST", raising=False)
+    monkeypatch.setenv("ABK_DB_NAME", str(tmp_path / "abk.db"))
+    database_client_factory()().close()
+    assert (tmp_path / "abk.db").exists()
+
+
+def test_database_client_factory__host_without_driver_raises(monkeypatch):
+    """Validates a database host without an installed driver raises AhClientError."""
+    monkeypatch.setenv("ABK_DB_HOST", "db.example.com")
+    lcl_pool = AhClientPool(database_client_factory())
+    with pytest.raises(AhClientError, match="no database driver"):
+        lcl_pool.acquire()
+
+
+def test_clients__db_registered():
+    """Validates the database client is registered on the module manager."""
+    assert abk_hello_clients.DATABASE_CLIENT in CLIENTS.stats()
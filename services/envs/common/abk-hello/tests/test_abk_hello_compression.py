@@ -0,0 +1,292 @@
+"""Unit tests for abk_hello_compression.py."""
+
+# Standard library imports
+import base64
+import gzip
+import json
+import logging
+import zlib
+
+# Own modules imports
+from abk_hello import abk_hello
+from abk_hello.abk_hello_compression import (
+    COMPRESSOR,
+    AhResponseCompressor,
+    get_header,
+    gzip_compress,
+    media_type_matches,
+    parse_accept_encoding,
+)
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# local constants
+# -----------------------------------------------------------------------------
+LONG_BODY = json.dumps({"msg": "ok", "items": [f"item-{lcl_i}" for lcl_i in range(200)]})
+VALID_INPUT = {"deviceUuid": "abeabeab-eabe-abea-beab-abeabeabeabe", "txId": "test_txId"}
+
+
+def fake_brotli(data: bytes, quality: int) -> bytes:
+    """Stand-in for brotli.compress, the brotli package is optional."""
+    return b"br:" + zlib.compress(data, 1)
+
+
+def response(body: str) -> dict:
+    """Returns lambda response with body."""
+    return {"statusCode": 200, "headers": {"Content-Type": "application/json"}, "body": body}
+
+
+def accept_event(accept_encoding: str, accept: str = "application/json") -> dict:
+    """Returns event with Accept-Encoding header, Accept of a binary media type by default."""
+    return {
+        "httpMethod": "GET",
+        "headers": {"Accept": accept, "Accept-Encoding": accept_encoding},
+    }
+
+
+def decoded_body(resp: dict) -> str:
+    """Returns body of a gzip compressed response as the client sees it."""
+    return gzip.decompress(base64.b64decode(resp["body"])).decode()
+
+
+# -----------------------------------------------------------------------------
+# pytest fixtures and setup
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope="module", autouse=True)
+def setup_logging():
+    """Setup logging for tests."""
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def compressor() -> AhResponseCompressor:
+    """Provide compressor of gzip and fake brotli compressing bodies of 100 bytes and more."""
+    return AhResponseCompressor(min_bytes=100, brotli_compress=fake_brotli)
+
+
+@pytest.fixture
+def module_compressor():
+    """Provide module-level compressor compressing every body, restored after the test."""
+    lcl_min_bytes = COMPRESSOR.min_bytes
+    COMPRESSOR.min_bytes = 0
+    yield COMPRESSOR
+    COMPRESSOR.min_bytes = lcl_min_bytes
+
+
+# -----------------------------------------------------------------------------
+# Tests for helpers
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "accept_encoding,expected",
+    [
+        ("gzip", {"gzip": 1.0}),
+        ("GZIP, deflate, br;q=0.9", {"gzip": 1.0, "deflate": 1.0, "br": 0.9}),
+        ("gzip;q=0, *;q=0.5", {"gzip": 0.0, "*": 0.5}),
+        ("gzip;q=x, ,", {"gzip": 0.0}),
+        ("", {}),
+    ],
+)
+def test_parse_accept_encoding__returns_q_values(accept_encoding: str, expected: dict) -> None:
+    """Validates header parsing including invalid q-values."""
+    assert parse_accept_encoding(accept_encoding) == expected
+
+
+def test_get_header__is_case_insensitive() -> None:
+    """Validates lookup of headers as clients send them."""
+    assert get_header({"headers": {"accept-encoding": "gzip"}}, "Accept-Encoding") == "gzip"
+    assert get_header({"headers": None}, "Accept-Encoding") is None
+
+
+@pytest.mark.parametrize(
+    "header_value,expected",
+    [
+        ("application/json", True),
+        ("Application/JSON; charset=utf-8", True),
+        ("application/json, */*;q=0.8", True),
+        ("*/*", False),
+        ("text/html, application/json", False),
+        ("application/*", False),
+        (None, False),
+    ],
+)
+def test_media_type_matches__compares_first_media_type(header_value: str, expected: bool) -> None:
+    """Validates matching like API Gateway binaryMediaTypes, only the first media type."""
+    assert media_type_matches(header_value, ("application/json",)) is expected
+
+
+def test_media_type_matches__supports_wildcard_media_types() -> None:
+    """Validates "type/*" and "*/*" entries of binaryMediaTypes."""
+    assert media_type_matches("image/png", ("image/*",))
+    assert media_type_matches("text/plain", ("*/*",))
+    assert not media_type_matches("text/plain", ("image/*",))
+
+
+def test_gzip_compress__is_reproducible() -> None:
+    """Validates that the gzip header carries no time stamp."""
+    lcl_data = LONG_BODY.encode()
+    assert gzip_compress(lcl_data) == gzip_compress(lcl_data)
+    assert gzip.decompress(gzip_compress(lcl_data)) == lcl_data
+
+
+# -----------------------------------------------------------------------------
+# Tests for AhResponseCompressor
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "accept_encoding,expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip, br;q=0.5", "gzip"),
+        ("deflate", None),
+        ("*", "br"),
+        ("br;q=0, *", "gzip"),
+        ("gzip;q=0", None),
+        (None, None),
+    ],
+)
+def test_negotiate__picks_preferred_supported_encoding(
+    compressor: AhResponseCompressor, accept_encoding: str, expected: str
+) -> None:
+    """Validates q-values, wildcard and the brotli preference on equal q-values."""
+    assert compressor.negotiate(accept_encoding) == expected
+
+
+def test_negotiate__without_brotli_offers_gzip_only() -> None:
+    """Validates that br is not negotiated when brotli is not installed."""
+    lcl_compressor = AhResponseCompressor(brotli_compress=None)
+    assert lcl_compressor.negotiate("br, gzip;q=0.1") == "gzip"
+    assert lcl_compressor.negotiate("br") is None
+
+
+def test_compress_response__compresses_long_body(compressor: AhResponseCompressor) -> None:
+    """Validates body, isBase64Encoded and headers of a compressed response."""
+    lcl_resp = response(LONG_BODY)
+    lcl_compressed = compressor.compress_response(accept_event("gzip"), lcl_resp)
+
+    assert lcl_compressed["isBase64Encoded"] is True
+    assert lcl_compressed["headers"]["Content-Encoding"] == "gzip"
+    assert lcl_compressed["headers"]["Vary"] == "Accept, Accept-Encoding"
+    assert lcl_compressed["headers"]["Content-Type"] == "application/json"
+    assert decoded_body(lcl_compressed) == LONG_BODY
+    assert lcl_resp == response(LONG_BODY)
+
+
+def test_compress_response__skips_body_below_threshold(compressor: AhResponseCompressor) -> None:
+    """Validates that short bodies are not compressed but get the Vary header."""
+    lcl_resp = response('{"msg": "ok"}')
+    lcl_result = compressor.compress_response(accept_event("gzip"), lcl_resp)
+
+    assert lcl_result["body"] == lcl_resp["body"]
+    assert lcl_result["headers"]["Vary"] == "Accept, Accept-Encoding"
+    assert "isBase64Encoded" not in lcl_result
+    assert lcl_resp == response('{"msg": "ok"}')
+
+
+def test_compress_response__identity_gets_vary_header(compressor: AhResponseCompressor) -> None:
+    """Validates that caches see the response depends on Accept and Accept-Encoding."""
+    lcl_resp = compressor.compress_response({"httpMethod": "GET"}, response(LONG_BODY))
+
+    assert lcl_resp["body"] == LONG_BODY
+    assert lcl_resp["headers"]["Vary"] == "Accept, Accept-Encoding"
+    assert "isBase64Encoded" not in lcl_resp
+
+
+@pytest.mark.parametrize("accept", ["*/*", "text/html", None])
+def test_compress_response__skips_accept_not_binary(
+    compressor: AhResponseCompressor, accept: str
+) -> None:
+    """Validates that API Gateway would not decode the body, so it is not compressed."""
+    lcl_event = accept_event("gzip, br", accept)
+    if accept is None:
+        del lcl_event["headers"]["Accept"]
+
+    lcl_resp = compressor.compress_response(lcl_event, response(LONG_BODY))
+
+    assert lcl_resp["body"] == LONG_BODY
+    assert "Content-Encoding" not in lcl_resp["headers"]
+    assert "isBase64Encoded" not in lcl_resp
+    assert lcl_resp["headers"]["Vary"] == "Accept, Accept-Encoding"
+
+
+def test_compress_response__shares_vary_headers(compressor: AhResponseCompressor) -> None:
+    """Validates that responses with the same headers share one copy with Vary."""
+    lcl_headers = {"Content-Type": "application/json"}
+    lcl_first = compressor.compress_response({}, {"statusCode": 200, "headers": lcl_headers})
+    lcl_second = compressor.compress_response({}, {"statusCode": 200, "headers": lcl_headers})
+    lcl_other = compressor.compress_response({}, {"statusCode": 200, "headers": {"Allow": "GET"}})
+
+    assert lcl_first["headers"] is lcl_second["headers"]
+    assert lcl_other["headers"] == {"Allow": "GET", "Vary": "Accept, Accept-Encoding"}
+    assert lcl_headers == {"Content-Type": "application/json"}
+
+
+def test_compress_response__disabled_returns_response(compressor: AhResponseCompressor) -> None:
+    """Validates that min_bytes -1 disables compression."""
+    compressor.min_bytes = -1
+    lcl_resp = response(LONG_BODY)
+
+    assert not compressor.enabled
+    assert compressor.compress_response(accept_event("gzip"), lcl_resp) is lcl_resp
+
+
+def test_compress_body__caches_constant_bodies(compressor: AhResponseCompressor) -> None:
+    """Validates that constant bodies are compressed once per encoding."""
+    lcl_calls = []
+    compressor._compressors["gzip"] = lambda data: lcl_calls.append(data) or gzip_compress(data)
+    compressor.add_constant(LONG_BODY)
+
+    lcl_first = compressor.compress_body(LONG_BODY, "gzip")
+    lcl_second = compressor.compress_body(LONG_BODY, "gzip")
+    compressor.compress_body(LONG_BODY + " ", "gzip")
+
+    assert lcl_first is lcl_second
+    assert len(lcl_calls) == 2
+
+
+# -----------------------------------------------------------------------------
+# Tests for handler compression
+# -----------------------------------------------------------------------------
+def test_handler__compresses_when_accepted(module_compressor) -> None:
+    """Validates end to end negotiation of the handler."""
+    lcl_event = {
+        "httpMethod": "POST",
+        "headers": {"accept": "application/json", "accept-encoding": "gzip"},
+        "body": json.dumps(VALID_INPUT),
+    }
+    lcl_resp = abk_hello.handler(lcl_event, None)
+
+    assert lcl_resp["headers"]["Content-Encoding"] == "gzip"
+    assert json.loads(decoded_body(lcl_resp)) == {"msg": "ok", "txId": "test_txId"}
+    assert "Content-Encoding" not in abk_hello.LAMBDA_RESP_HEADERS
+
+
+def test_handler__replayed_response_is_compressed_per_client(module_compressor) -> None:
+    """Validates that the cached response stays uncompressed for other clients."""
+    lcl_event = {"httpMethod": "POST", "body": json.dumps(VALID_INPUT)}
+    lcl_gzip_headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
+    lcl_gzip_resp = abk_hello.handler({**lcl_event, "headers": lcl_gzip_headers}, None)
+    lcl_plain_resp = abk_hello.handler(lcl_event, None)
+
+    assert lcl_gzip_resp["isBase64Encoded"] is True
+    assert lcl_plain_resp["body"] == decoded_body(lcl_gzip_resp)
+    assert "isBase64Encoded" not in lcl_plain_resp
+
+
+def test_handler__error_body_compressed_once(module_compressor, monkeypatch) -> None:
+    """Validates that the constant error body is served from the compressed body cache."""
+    lcl_headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
+    lcl_event = {"httpMethod": "POST", "headers": lcl_headers, "body": "{"}
+    lcl_first = abk_hello.handler(lcl_event, None)
+
+    def fail_compress(body, encoding):
+        raise AssertionError("compressed again")
+
+    monkeypatch.setattr(module_compressor, "_compress", fail_compress)
+    lcl_second = abk_hello.handler(lcl_event, None)
+
+    assert lcl_second["body"] == lcl_first["body"]
+    assert json.loads(decoded_body(lcl_second)) == {"msg": "error", "txId": ""}
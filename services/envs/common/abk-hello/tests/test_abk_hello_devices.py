@@ -0,0 +1,352 @@
+"""Unit tests for abk_hello_devices.py."""
+
+# Standard library imports
+import json
+import logging
+import subprocess  # noqa: S404
+import sys
+import uuid
+from pathlib import Path
+
+# Own modules imports
+from abk_hello import abk_hello
+from abk_hello.abk_hello_clients import AhClientManager, sqlite_client_factory
+from abk_hello.abk_hello_devices import (
+    DEVICE_REGISTRY,
+    AhBloomFilter,
+    AhDeviceRegistry,
+    AhLocalDeviceBackend,
+    AhSqliteDeviceBackend,
+    device_backend_from_env,
+    device_key,
+    device_uuid,
+)
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# help classes
+# -----------------------------------------------------------------------------
+class FakeClock:
+    """Clock which only moves when told to."""
+
+    def __init__(self, now: float = 1000.0):
+        """Starts at now seconds."""
+        self.now = now
+
+    def __call__(self) -> float:
+        """Returns current fake time."""
+        return self.now
+
+
+class CountingBackend(AhLocalDeviceBackend):
+    """In-memory backend counting its round trips."""
+
+    def __init__(self, keys=()):
+        """Creates store with the registered devices."""
+        super().__init__(keys)
+        self.lookups: list[list[bytes]] = []
+
+    def lookup(self, keys):
+        """Records the looked up keys."""
+        self.lookups.append(list(keys))
+        return super().lookup(keys)
+
+
+class FailingBackend(AhLocalDeviceBackend):
+    """Backend which is down."""
+
+    def lookup(self, keys):
+        """Raises like a timed out network call."""
+        raise TimeoutError("backend down")
+
+
+# -----------------------------------------------------------------------------
+# local constants
+# -----------------------------------------------------------------------------
+DEVICE_UUID = "abeabeab-eabe-abea-beab-abeabeabeabe"
+UNKNOWN_DEVICE_UUID = "15a73c3e-0c86-495a-aa2b-522691d93d60"
+OTHER_DEVICE_UUID = "00000000-0000-0000-0000-000000000001"
+
+
+# -----------------------------------------------------------------------------
+# pytest fixtures and setup
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope="module", autouse=True)
+def setup_logging():
+    """Setup logging for tests."""
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Provide fake clock."""
+    return FakeClock()
+
+
+@pytest.fixture
+def backend() -> CountingBackend:
+    """Provide backend with DEVICE_UUID and OTHER_DEVICE_UUID registered."""
+    return CountingBackend([device_key(DEVICE_UUID), device_key(OTHER_DEVICE_UUID)])
+
+
+@pytest.fixture
+def registry(backend: CountingBackend, clock: FakeClock) -> AhDeviceRegistry:
+    """Provide registry caching registered devices 300 s, unknown devices 30 s."""
+    return AhDeviceRegistry(backend=backend, ttl_s=300, negative_ttl_s=30, clock=clock)
+
+
+@pytest.fixture
+def module_registry(registry: AhDeviceRegistry):
+    """Provide enabled module-level registry using the registry fixture's state."""
+    lcl_state = dict(vars(DEVICE_REGISTRY))
+    vars(DEVICE_REGISTRY).update(vars(registry))
+    yield DEVICE_REGISTRY
+    vars(DEVICE_REGISTRY).update(lcl_state)
+
+
+def post_event(device_uuid: str, tx_id: str) -> dict:
+    """Returns POST event of a valid request."""
+    return {"httpMethod": "POST", "body": json.dumps({"deviceUuid": device_uuid, "txId": tx_id})}
+
+
+# -----------------------------------------------------------------------------
+# Tests for device keys and the Bloom filter
+# -----------------------------------------------------------------------------
+def test_device_key__16_bytes_round_trip() -> None:
+    """Validates that deviceUuids are stored as their 16 bytes."""
+    lcl_key = device_key(DEVICE_UUID)
+    assert lcl_key == uuid.UUID(DEVICE_UUID).bytes
+    assert device_uuid(lcl_key) == DEVICE_UUID
+    with pytest.raises(ValueError):
+        device_key("NotValid")
+
+
+def test_bloom_filter__no_false_negatives_and_few_false_positives() -> None:
+    """Validates that added keys are found and unknown keys rarely pass."""
+    lcl_bloom = AhBloomFilter(capacity=10000, false_positive_rate=0.01)
+    lcl_keys = [uuid.UUID(int=lcl_index).bytes for lcl_index in range(10000)]
+    for lcl_key in lcl_keys:
+        lcl_bloom.add(lcl_key)
+
+    assert all(lcl_key in lcl_bloom for lcl_key in lcl_keys)
+    lcl_false_positives = sum(
+        uuid.UUID(int=lcl_index).bytes in lcl_bloom for lcl_index in range(10000, 20000)
+    )
+    assert lcl_false_positives < 200
+    assert lcl_bloom.size_bytes < 10000 * 10 // 8 * 1.1
+
+
+# -----------------------------------------------------------------------------
+# Tests for AhDeviceRegistry
+# -----------------------------------------------------------------------------
+def test_is_registered__read_through_cache(registry, backend, clock) -> None:
+    """Validates that a registered device is looked up once per TTL."""
+    assert registry.is_registered(DEVICE_UUID)
+    assert registry.is_registered(DEVICE_UUID)
+    assert len(backend.lookups) == 1
+
+    clock.now += 300
+    assert registry.is_registered(DEVICE_UUID)
+    assert len(backend.lookups) == 2
+    assert registry.stats().hits == 1
+
+
+def test_is_registered__negative_cache(registry, backend, clock) -> None:
+    """Validates that an unknown device is looked up once per negative TTL."""
+    for _ in range(5):
+        assert not registry.is_registered(UNKNOWN_DEVICE_UUID)
+    assert len(backend.lookups) == 1
+    assert registry.stats().negative_hits == 4
+
+    clock.now += 30
+    assert not registry.is_registered(UNKNOWN_DEVICE_UUID)
+    assert len(backend.lookups) == 2
+
+
+def test_is_registered__lru_evicts_least_recently_used(backend, clock) -> None:
+    """Validates that the cache is bounded by max_entries."""
+    lcl_registry = AhDeviceRegistry(backend=backend, max_entries=1, clock=clock)
+    lcl_registry.is_registered(DEVICE_UUID)
+    lcl_registry.is_registered(OTHER_DEVICE_UUID)
+    lcl_registry.is_registered(DEVICE_UUID)
+
+    assert len(backend.lookups) == 3
+    assert lcl_registry.stats().entries == 1
+
+
+def test_lookup_many__one_round_trip_for_all_misses(registry, backend) -> None:
+    """Validates that cache misses of a batch are looked up together, once per device."""
+    registry.is_registered(DEVICE_UUID)
+    lcl_result = registry.lookup_many(
+        [DEVICE_UUID, UNKNOWN_DEVICE_UUID, OTHER_DEVICE_UUID, UNKNOWN_DEVICE_UUID]
+    )
+
+    assert lcl_result == {DEVICE_UUID: True, UNKNOWN_DEVICE_UUID: False, OTHER_DEVICE_UUID: True}
+    assert backend.lookups[1:] == [
+        [device_key(UNKNOWN_DEVICE_UUID), device_key(OTHER_DEVICE_UUID)]
+    ]
+
+
+def test_register__replaces_negative_entry(registry, backend) -> None:
+    """Validates that a registered device is not rejected from the negative cache."""
+    assert not registry.is_registered(UNKNOWN_DEVICE_UUID)
+    registry.register([UNKNOWN_DEVICE_UUID])
+
+    assert registry.is_registered(UNKNOWN_DEVICE_UUID)
+    assert len(backend.lookups) == 1
+
+
+def test_bloom__rejects_unknown_devices_without_lookup(backend, clock) -> None:
+    """Validates that devices not in the Bloom filter never reach the backend."""
+    lcl_registry = AhDeviceRegistry(backend=backend, bloom=True, bloom_refresh_s=60, clock=clock)
+    lcl_unknown = [str(uuid.UUID(int=lcl_index + 2**64)) for lcl_index in range(100)]
+    lcl_rejected = sum(not lcl_registry.is_registered(lcl_value) for lcl_value in lcl_unknown)
+
+    assert lcl_rejected == 100
+    assert lcl_registry.stats().bloom_rejects >= 95
+    assert lcl_registry.is_registered(DEVICE_UUID)
+
+    backend.register([device_key(UNKNOWN_DEVICE_UUID)])
+    assert not lcl_registry.is_registered(UNKNOWN_DEVICE_UUID)
+    clock.now += 60
+    assert lcl_registry.is_registered(UNKNOWN_DEVICE_UUID)
+
+
+def test_sqlite_backend__stores_16_byte_keys() -> None:
+    """Validates the SQLite stand-in with lookups above the statement parameter limit."""
+    lcl_clients = AhClientManager()
+    lcl_clients.register("db", sqlite_client_factory())
+    lcl_backend = AhSqliteDeviceBackend(lcl_clients, "db")
+    lcl_keys = [uuid.UUID(int=lcl_index).bytes for lcl_index in range(1200)]
+    lcl_backend.register(lcl_keys[:1000])
+
+    assert lcl_backend.lookup(lcl_keys) == set(lcl_keys[:1000])
+    assert lcl_backend.count() == 1000
+    assert sorted(lcl_backend.scan()) == sorted(lcl_keys[:1000])
+    with lcl_clients.client("db") as lcl_connection:
+        lcl_row = lcl_connection.execute("SELECT device_uuid FROM abk_devices").fetchone()
+    assert len(lcl_row[0]) == 16
+
+
+def test_device_backend_from_env__none_when_disabled(monkeypatch) -> None:
+    """Validates that the registry is disabled without ABK_DEVICE_REGISTRY."""
+    monkeypatch.delenv("ABK_DEVICE_REGISTRY", raising=False)
+
+    assert device_backend_from_env() is None
+
+
+def test_device_backend_from_env__sqlite_file(monkeypatch, tmp_path) -> None:
+    """Validates that the enabled registry uses the "db" downstream."""
+    monkeypatch.setenv("ABK_DEVICE_REGISTRY", "1")
+    monkeypatch.delenv("ABK_DB_HOST", raising=False)
+    monkeypatch.setenv("ABK_DB_NAME", str(tmp_path / "abk.db"))
+
+    assert isinstance(device_backend_from_env(), AhSqliteDeviceBackend)
+
+
+def test_device_backend_from_env__rejects_in_memory_database(monkeypatch) -> None:
+    """Validates that the registry fails at init instead of rejecting every device."""
+    monkeypatch.setenv("ABK_DEVICE_REGISTRY", "true")
+    monkeypatch.delenv("ABK_DB_HOST", raising=False)
+    monkeypatch.delenv("ABK_DB_NAME", raising=False)
+
+    with pytest.raises(ValueError, match="ABK_DB_HOST or ABK_DB_NAME"):
+        device_backend_from_env()
+
+
+def test_abk_hello_import__does_not_import_disabled_registry_backend() -> None:
+    """Validates that the cold start import without the registry does not load the "db"."""
+    lcl_src_dir = Path(__file__).resolve().parent.parent / "src"
+    lcl_script = (
+        f"import sys; sys.path.insert(0, {str(lcl_src_dir)!r}); import abk_hello.abk_hello; "
+        "print('abk_hello.abk_hello_clients' in sys.modules)"
+    )
+
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", lcl_script], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == "False"
+
+
+# -----------------------------------------------------------------------------
+# Tests for handler device checks
+# -----------------------------------------------------------------------------
+def test_handler__unknown_device_gets_403(module_registry, backend, monkeypatch) -> None:
+    """Validates that unknown devices get 403 without response encoding."""
+    assert abk_hello.handler(post_event(DEVICE_UUID, "tx-0"), None)["statusCode"] == 200
+
+    def fail_encoding(_):
+        raise AssertionError("response encoded")
+
+    monkeypatch.setattr(abk_hello, "encode_named_tuple", fail_encoding)
+    for _ in range(3):
+        lcl_resp = abk_hello.handler(post_event(UNKNOWN_DEVICE_UUID, "tx-1"), None)
+        assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.FORBIDDEN.value
+        assert json.loads(lcl_resp["body"]) == {"msg": "error", "txId": ""}
+    assert len(backend.lookups) == 2
+
+
+def test_handler__backend_error_is_not_ok(module_registry) -> None:
+    """Validates that devices do not pass while the backend is down."""
+    module_registry.backend = FailingBackend()
+    lcl_resp = abk_hello.handler(post_event(DEVICE_UUID, "tx-backend-down"), None)
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.FORBIDDEN.value
+    assert json.loads(lcl_resp["body"]) == {"msg": "error", "txId": "tx-backend-down"}
+
+
+def test_handler__replayed_retry_checks_device_again(module_registry, backend) -> None:
+    """Validates that a cached response is not replayed to a device no longer registered."""
+    lcl_event = post_event(DEVICE_UUID, "tx-replay")
+    assert abk_hello.handler(lcl_event, None)["statusCode"] == 200
+    assert abk_hello.handler(lcl_event, None)["statusCode"] == 200
+
+    module_registry.backend = CountingBackend()
+    module_registry.clear()
+    lcl_resp = abk_hello.handler(lcl_event, None)
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.FORBIDDEN.value
+    assert abk_hello.IDEMPOTENCY_CACHE.stats().entries == 1
+
+
+def test_handler__disabled_registry_is_not_consulted(module_registry, backend) -> None:
+    """Validates that the registry is skipped when disabled, the default."""
+    module_registry._enabled = False
+    assert abk_hello.handler(post_event(UNKNOWN_DEVICE_UUID, "tx-2"), None)["statusCode"] == 200
+    assert backend.lookups == []
+
+
+def test_batch_handler__unknown_devices_rejected_in_one_lookup(module_registry, backend) -> None:
+    """Validates that records of unknown devices are acknowledged and looked up together."""
+    lcl_bodies = [
+        json.dumps({"deviceUuid": lcl_value, "txId": "t"})
+        for lcl_value in (DEVICE_UUID, UNKNOWN_DEVICE_UUID, DEVICE_UUID)
+    ]
+    lcl_records = [
+        {"messageId": f"msg-{lcl_index}", "body": lcl_body}
+        for lcl_index, lcl_body in enumerate(lcl_bodies)
+    ]
+
+    lcl_resp = abk_hello.batch_handler({"Records": lcl_records}, None)
+
+    assert lcl_resp == {"batchItemFailures": []}
+    assert len(backend.lookups) == 1
+
+
+def test_batch_handler__backend_error_retries_valid_records(module_registry) -> None:
+    """Validates that valid records are retried while the backend is down."""
+    module_registry.backend = FailingBackend()
+    lcl_records = [
+        {"messageId": "msg-0", "body": json.dumps({"deviceUuid": DEVICE_UUID, "txId": "t"})},
+        {"messageId": "msg-1", "body": "{not json"},
+    ]
+
+    lcl_resp = abk_hello.batch_handler({"Records": lcl_records}, None)
+
+    assert lcl_resp == {"batchItemFailures": [{"itemIdentifier": "msg-0"}]}
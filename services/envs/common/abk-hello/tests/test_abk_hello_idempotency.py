@@ -0,0 +1,280 @@
+"""Unit tests for abk_hello_idempotency.py."""
+
+# Standard library imports
+import json
+import logging
+
+# Own modules imports
+from abk_hello import abk_hello
+from abk_hello.abk_hello_idempotency import (
+    ENTRY_OVERHEAD_BYTES,
+    IDEMPOTENCY_CACHE,
+    AhIdempotencyCache,
+    AhLocalIdempotencyBackend,
+    idempotency_key,
+    response_size,
+)
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# help classes
+# -----------------------------------------------------------------------------
+class FakeClock:
+    """Clock which only moves when told to."""
+
+    def __init__(self, now: float = 1000.0):
+        """Starts at now seconds."""
+        self.now = now
+
+    def __call__(self) -> float:
+        """Returns current fake time."""
+        return self.now
+
+
+class FailingBackend:
+    """Shared backend which is down."""
+
+    def get(self, key):
+        """Raises like a timed out network call."""
+        raise TimeoutError("backend down")
+
+    def put(self, key, response, ttl_s):
+        """Raises like a timed out network call."""
+        raise TimeoutError("backend down")
+
+
+# -----------------------------------------------------------------------------
+# local constants
+# -----------------------------------------------------------------------------
+DEVICE_UUID = "abeabeab-eabe-abea-beab-abeabeabeabe"
+KEY_1 = (DEVICE_UUID, "tx-1")
+KEY_2 = (DEVICE_UUID, "tx-2")
+KEY_3 = (DEVICE_UUID, "tx-3")
+
+
+def response(tx_id: str) -> dict:
+    """Returns lambda response of txId."""
+    return {"statusCode": 200, "headers": {}, "body": json.dumps({"msg": "ok", "txId": tx_id})}
+
+
+# -----------------------------------------------------------------------------
+# pytest fixtures and setup
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope="module", autouse=True)
+def setup_logging():
+    """Suppresses backend warnings."""
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Provide fake clock."""
+    return FakeClock()
+
+
+@pytest.fixture
+def module_cache():
+    """Provide empty module-level cache with zero counters, restored after the test."""
+    lcl_cache = IDEMPOTENCY_CACHE
+    lcl_state = (lcl_cache.max_entries, lcl_cache.ttl_s, lcl_cache.backend)
+    lcl_cache.clear()
+    lcl_cache.hits = lcl_cache.misses = lcl_cache.evictions = lcl_cache.expirations = 0
+    lcl_cache.backend_hits = lcl_cache.backend_errors = 0
+    lcl_cache.max_entries, lcl_cache.ttl_s = 100, 60.0
+    yield lcl_cache
+    lcl_cache.clear()
+    lcl_cache.max_entries, lcl_cache.ttl_s, lcl_cache.backend = lcl_state
+
+
+# -----------------------------------------------------------------------------
+# Tests for idempotency_key
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "payload,expected",
+    [
+        ({"deviceUuid": DEVICE_UUID, "txId": "tx-1"}, KEY_1),
+        ({"txId": "tx-1", "deviceUuid": DEVICE_UUID}, KEY_1),
+        ({"deviceUuid": DEVICE_UUID, "txId": "tx-1", "extra": "x"}, None),
+        ({"deviceUuid": DEVICE_UUID, "other": "tx-1"}, None),
+        ({"deviceUuid": DEVICE_UUID, "txId": 1}, None),
+        ({}, None),
+        ([DEVICE_UUID, "tx-1"], None),
+    ],
+)
+def test_idempotency_key__only_for_payloads_fully_defined_by_key(payload, expected) -> None:
+    """Validates that payloads with other fields or types are never cached."""
+    assert idempotency_key(payload) == expected
+
+
+# -----------------------------------------------------------------------------
+# Tests for AhIdempotencyCache
+# -----------------------------------------------------------------------------
+def test_cache__returns_stored_response_and_counts(clock: FakeClock) -> None:
+    """Validates hits and misses are counted and the stored dict is returned."""
+    lcl_cache = AhIdempotencyCache(max_entries=10, ttl_s=60, clock=clock)
+    lcl_resp = response("tx-1")
+
+    assert lcl_cache.get(KEY_1) is None
+    lcl_cache.put(KEY_1, lcl_resp)
+    assert lcl_cache.get(KEY_1) is lcl_resp
+
+    lcl_stats = lcl_cache.stats()
+    assert (lcl_stats.hits, lcl_stats.misses, lcl_stats.entries) == (1, 1, 1)
+    assert lcl_stats.size_bytes == response_size(KEY_1, lcl_resp)
+
+
+def test_cache__evicts_least_recently_used_entry(clock: FakeClock) -> None:
+    """Validates that the entry not read for the longest time is evicted."""
+    lcl_cache = AhIdempotencyCache(max_entries=2, ttl_s=60, clock=clock)
+    lcl_cache.put(KEY_1, response("tx-1"))
+    lcl_cache.put(KEY_2, response("tx-2"))
+    lcl_cache.get(KEY_1)
+    lcl_cache.put(KEY_3, response("tx-3"))
+
+    assert lcl_cache.get(KEY_2) is None
+    assert lcl_cache.get(KEY_1) is not None
+    assert lcl_cache.get(KEY_3) is not None
+    assert lcl_cache.stats().evictions == 1
+
+
+def test_cache__expires_entries_after_ttl(clock: FakeClock) -> None:
+    """Validates that entries are not returned after the TTL."""
+    lcl_cache = AhIdempotencyCache(max_entries=10, ttl_s=60, clock=clock)
+    lcl_cache.put(KEY_1, response("tx-1"))
+    clock.now += 59
+    assert lcl_cache.get(KEY_1) is not None
+    clock.now += 1
+    assert lcl_cache.get(KEY_1) is None
+
+    lcl_stats = lcl_cache.stats()
+    assert (lcl_stats.expirations, lcl_stats.entries, lcl_stats.size_bytes) == (1, 0, 0)
+
+
+def test_cache__evicts_to_stay_below_memory_cap(clock: FakeClock) -> None:
+    """Validates that max_bytes bounds the cache independent of max_entries."""
+    lcl_entry_size = response_size(KEY_1, response("tx-1"))
+    lcl_cache = AhIdempotencyCache(
+        max_entries=100, ttl_s=60, max_bytes=2 * lcl_entry_size, clock=clock
+    )
+    for lcl_key in (KEY_1, KEY_2, KEY_3):
+        lcl_cache.put(lcl_key, response(lcl_key[1]))
+
+    lcl_stats = lcl_cache.stats()
+    assert (lcl_stats.entries, lcl_stats.evictions) == (2, 1)
+    assert lcl_stats.size_bytes <= 2 * lcl_entry_size
+
+
+def test_cache__skips_response_larger_than_memory_cap(clock: FakeClock) -> None:
+    """Validates that a single oversized response does not flush the cache."""
+    lcl_cache = AhIdempotencyCache(
+        max_entries=10, ttl_s=60, max_bytes=ENTRY_OVERHEAD_BYTES + 200, clock=clock
+    )
+    lcl_cache.put(KEY_1, response("tx-1"))
+    lcl_cache.put(KEY_2, {"statusCode": 200, "body": "x" * 1000})
+
+    assert lcl_cache.get(KEY_1) is not None
+    assert lcl_cache.get(KEY_2) is None
+
+
+def test_cache__put_again_replaces_entry(clock: FakeClock) -> None:
+    """Validates that size accounting stays exact when a key is stored twice."""
+    lcl_cache = AhIdempotencyCache(max_entries=10, ttl_s=60, clock=clock)
+    lcl_cache.put(KEY_1, response("tx-1"))
+    lcl_cache.put(KEY_1, response("tx-1-again"))
+
+    assert lcl_cache.stats().entries == 1
+    assert lcl_cache.stats().size_bytes == response_size(KEY_1, response("tx-1-again"))
+
+
+@pytest.mark.parametrize("max_entries,ttl_s", [(0, 60), (10, 0)])
+def test_cache__disabled_stores_nothing(clock: FakeClock, max_entries: int, ttl_s: float) -> None:
+    """Validates that max_entries 0 or TTL 0 disables the cache."""
+    lcl_cache = AhIdempotencyCache(max_entries=max_entries, ttl_s=ttl_s, clock=clock)
+    lcl_cache.put(KEY_1, response("tx-1"))
+    assert not lcl_cache.enabled
+    assert lcl_cache.stats().entries == 0
+
+
+def test_cache__shared_backend_answers_local_miss(clock: FakeClock) -> None:
+    """Validates write-through to and read-through from the shared backend."""
+    lcl_backend = AhLocalIdempotencyBackend(clock=clock)
+    lcl_writer = AhIdempotencyCache(max_entries=10, ttl_s=60, backend=lcl_backend, clock=clock)
+    lcl_reader = AhIdempotencyCache(max_entries=10, ttl_s=60, backend=lcl_backend, clock=clock)
+    lcl_resp = response("tx-1")
+
+    lcl_writer.put(KEY_1, lcl_resp)
+    assert lcl_reader.get(KEY_1) == lcl_resp
+    assert lcl_reader.get(KEY_1) == lcl_resp
+
+    lcl_stats = lcl_reader.stats()
+    assert (lcl_stats.backend_hits, lcl_stats.hits, lcl_stats.misses) == (1, 1, 0)
+
+
+def test_local_backend__expires_entries(clock: FakeClock) -> None:
+    """Validates that the local stand-in honors the TTL like a shared store."""
+    lcl_backend = AhLocalIdempotencyBackend(clock=clock)
+    lcl_backend.put(KEY_1, response("tx-1"), ttl_s=10)
+    clock.now += 10
+    assert lcl_backend.get(KEY_1) is None
+
+
+def test_cache__backend_errors_are_counted_not_raised(clock: FakeClock) -> None:
+    """Validates that an unavailable backend degrades to the local cache."""
+    lcl_cache = AhIdempotencyCache(
+        max_entries=10, ttl_s=60, backend=FailingBackend(), clock=clock
+    )
+    assert lcl_cache.get(KEY_1) is None
+    lcl_cache.put(KEY_1, response("tx-1"))
+    assert lcl_cache.get(KEY_1) is not None
+    assert lcl_cache.stats().backend_errors == 2
+
+
+# -----------------------------------------------------------------------------
+# Tests for handler replay
+# -----------------------------------------------------------------------------
+def test_handler__replays_response_of_retried_request(module_cache, monkeypatch) -> None:
+    """Validates that a retry returns the cached response without validating again."""
+    lcl_payload = {"deviceUuid": DEVICE_UUID, "txId": "tx-1"}
+    lcl_event = {"httpMethod": "POST", "body": json.dumps(lcl_payload)}
+    lcl_first = abk_hello.handler(lcl_event, None)
+
+    def fail_validation(_):
+        raise AssertionError("validated again")
+
+    monkeypatch.setattr(abk_hello, "validate_input", fail_validation)
+    lcl_retry = abk_hello.handler(lcl_event, None)
+
+    assert lcl_retry == lcl_first
+    assert lcl_first["statusCode"] == abk_hello.HttpStatusCode.OK.value
+    assert module_cache.stats().hits == 1
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"deviceUuid": "NotValid", "txId": "tx-1"},
+        {"deviceUuid": DEVICE_UUID, "txId": "tx-1", "extra": "x"},
+    ],
+)
+def test_handler__does_not_cache_rejected_requests(module_cache, payload: dict) -> None:
+    """Validates that only successful responses are cached."""
+    lcl_resp = abk_hello.handler({"httpMethod": "POST", "body": json.dumps(payload)}, None)
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.FORBIDDEN.value
+    assert module_cache.stats().entries == 0
+
+
+def test_handler__extra_field_is_not_answered_from_cache(module_cache) -> None:
+    """Validates that a cached key does not hide validation errors of other fields."""
+    lcl_payload = {"deviceUuid": DEVICE_UUID, "txId": "tx-1"}
+    abk_hello.handler({"httpMethod": "POST", "body": json.dumps(lcl_payload)}, None)
+    lcl_resp = abk_hello.handler(
+        {"httpMethod": "POST", "body": json.dumps({**lcl_payload, "extra": "x"})}, None
+    )
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.FORBIDDEN.value
@@ -0,0 +1,170 @@
+"""Unit tests for abk_hello_json.py."""
+
+# Standard library imports
+import importlib.util
+import json
+from typing import NamedTuple
+
+# Own modules imports
+from abk_hello import abk_hello
+from abk_hello.abk_hello_io import AhLambdaRequestBody, AhLambdaResponseBody
+from abk_hello.abk_hello_json import (
+    class_to_dict,
+    compile_encoder,
+    encode_named_tuple,
+    get_json_backend,
+    json_backend,
+)
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# help classes
+# -----------------------------------------------------------------------------
+class NestedBody(NamedTuple):
+    """NamedTuple with nested NamedTuple, list and dict fields."""
+
+    body: AhLambdaResponseBody
+    items: list
+    extra: dict
+    count: int
+
+
+class PercentBody(NamedTuple):
+    """NamedTuple with field name which needs escaping in %-templates."""
+
+    rate_in_percent: str
+
+
+# -----------------------------------------------------------------------------
+# local constants
+# -----------------------------------------------------------------------------
+TX_IDS = [
+    "",
+    "test_txId_from_valid_lambda_req",
+    "X" * 36,
+    'quote"backslash\\slash/',
+    "new\nline\ttab\rreturn\x00null\x1f",
+    "ümlaut ßtraße",
+    "emoji \U0001f600",
+    "lone surrogate \ud800",
+    "percent %s %d %%",
+    89,
+    3.14,
+    True,
+    None,
+    {},
+    [],
+    {"nested": ["list", 1, None]},
+]
+
+DEVICE_UUID = "15a73c3e-0c86-495a-aa2b-522691d93d60"
+# bodies stdlib json decodes differently from orjson / ujson, with the responses of the
+# handler before pluggable backends
+STDLIB_ONLY_BODIES = [
+    (
+        f'{{"deviceUuid": "{DEVICE_UUID}", "txId": 12345678901234567890123}}',
+        403,
+        '{"msg": "error", "txId": 12345678901234567890123}',
+    ),
+    (
+        f'{{"deviceUuid": "{DEVICE_UUID}", "txId": "\\ud800"}}',
+        200,
+        '{"msg": "ok", "txId": "\\ud800"}',
+    ),
+    (f'{{"deviceUuid": "{DEVICE_UUID}", "txId": NaN}}', 403, '{"msg": "error", "txId": NaN}'),
+]
+
+INSTALLED_BACKENDS = [
+    name for name in ["orjson", "ujson"] if importlib.util.find_spec(name) is not None
+] + ["json"]
+
+
+# -----------------------------------------------------------------------------
+# Tests for response encoding
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("msg", ["ok", "error"])
+@pytest.mark.parametrize("tx_id", TX_IDS)
+def test_encode_named_tuple__is_byte_identical_to_json_dumps(msg: str, tx_id) -> None:
+    """Validates that the compiled encoder output equals json.dumps(class_to_dict(obj))."""
+    lcl_body = AhLambdaResponseBody(msg=msg, txId=tx_id)
+
+    assert encode_named_tuple(lcl_body) == json.dumps(class_to_dict(lcl_body))
+
+
+def test_encode_named_tuple__is_byte_identical_given_nested_values() -> None:
+    """Validates nested NamedTuples, lists and dicts are encoded same as json.dumps."""
+    lcl_body = NestedBody(
+        body=AhLambdaResponseBody(msg="ok", txId="tx"),
+        items=[AhLambdaRequestBody(deviceUuid="uuid", txId="tx"), 1, "two"],
+        extra={"key": AhLambdaResponseBody(msg="error", txId="")},
+        count=3,
+    )
+
+    assert encode_named_tuple(lcl_body) == json.dumps(class_to_dict(lcl_body))
+
+
+def test_compile_encoder__escapes_percent_in_field_names() -> None:
+    """Validates that field names are not interpreted as %-format placeholders."""
+    lcl_encode = compile_encoder(PercentBody)
+
+    assert lcl_encode(PercentBody("%s")) == json.dumps({"rate_in_percent": "%s"})
+
+
+def test_handler__error_body_without_tx_id_is_cached_constant() -> None:
+    """Validates that the cached error body equals the encoded error response."""
+    lcl_resp = abk_hello.handler({"httpMethod": "GET"}, None)
+
+    assert lcl_resp["body"] is abk_hello.EMPTY_TX_ID_ERROR_BODY
+    assert lcl_resp["body"] == json.dumps({"msg": "error", "txId": ""})
+
+
+# -----------------------------------------------------------------------------
+# Tests for JSON backends
+# -----------------------------------------------------------------------------
+def test_json_backend__stdlib_by_default() -> None:
+    """Validates that requests are decoded with stdlib json unless a backend is chosen."""
+    assert json_backend.name == "json"
+
+
+@pytest.mark.parametrize("body, status_code, resp_body", STDLIB_ONLY_BODIES)
+def test_handler__responses_identical_to_stdlib_json(body, status_code, resp_body) -> None:
+    """Validates responses to bodies the opt-in backends decode differently."""
+    lcl_resp = abk_hello.handler({"httpMethod": "POST", "body": body}, None)
+
+    assert (lcl_resp["statusCode"], lcl_resp["body"]) == (status_code, resp_body)
+
+
+def test_get_json_backend__auto_picks_installed_backend() -> None:
+    """Validates that auto selects the first installed backend."""
+    assert get_json_backend("auto").name == INSTALLED_BACKENDS[0]
+
+
+def test_get_json_backend__raises_given_unknown_backend() -> None:
+    """Validates that unknown backend names are rejected."""
+    with pytest.raises(ValueError, match="unknown JSON backend"):
+        get_json_backend("simplejson")
+
+
+@pytest.mark.parametrize("backend_name", INSTALLED_BACKENDS)
+@pytest.mark.parametrize(
+    "body",
+    [
+        '{"deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60", "txId": "tx"}',
+        b'{"txId": "\\u00fcml\\u00e4ut"}',
+        "[1, 2.5, null, true]",
+    ],
+)
+def test_json_backend__loads_same_as_stdlib(backend_name: str, body) -> None:
+    """Validates that every installed backend decodes requests same as stdlib json."""
+    assert get_json_backend(backend_name).loads(body) == json.loads(body)
+
+
+@pytest.mark.parametrize("backend_name", INSTALLED_BACKENDS)
+@pytest.mark.parametrize("body", ["{not json", "", '{"txId": "tx"'])
+def test_json_backend__raises_value_error_given_invalid_json(backend_name: str, body) -> None:
+    """Validates that every installed backend raises ValueError for malformed bodies."""
+    with pytest.raises(ValueError):
+        get_json_backend(backend_name).loads(body)
@@ -0,0 +1,169 @@
+"""Unit tests for abk_hello_logging.py."""
+
+# Standard library imports
+import io
+import json
+import logging
+
+# Own modules imports
+from abk_hello.abk_hello_io import AhLambdaResponseBody
+from abk_hello.abk_hello_logging import (
+    JsonLogFormatter,
+    LazyJson,
+    SamplingFilter,
+    get_logger,
+    object_to_json,
+)
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# help classes
+# -----------------------------------------------------------------------------
+class CountingObject:
+    """Object counting how often it got serialized."""
+
+    def __init__(self):
+        """CountingObject class init."""
+        self.serialized = 0
+
+    def to_json(self) -> dict:
+        """json.dumps default hook, counts the calls."""
+        self.serialized += 1
+        return {"serialized": self.serialized}
+
+
+# -----------------------------------------------------------------------------
+# pytest fixtures and setup
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def test_logger():
+    """Provide logger which is removed after the test, logging is enabled during the test."""
+    lcl_disabled_level = logging.root.manager.disable
+    logging.disable(logging.NOTSET)
+    lcl_logger = logging.getLogger("test_abk_hello_logging")
+    yield lcl_logger
+    logging.disable(lcl_disabled_level)
+    lcl_logger.handlers.clear()
+    lcl_logger.filters.clear()
+    lcl_logger.propagate = True
+
+
+def make_record(level: int, msg: str = "msg %s", args: tuple = ("arg",)) -> logging.LogRecord:
+    """Returns log record."""
+    return logging.LogRecord("abk", level, __file__, 1, msg, args, None, func="handler")
+
+
+# -----------------------------------------------------------------------------
+# Tests for LazyJson
+# -----------------------------------------------------------------------------
+def test_lazy_json__does_not_serialize_given_suppressed_level(test_logger) -> None:
+    """Validates that suppressed log statements do not serialize their arguments."""
+    test_logger.setLevel(logging.WARNING)
+    lcl_obj = CountingObject()
+
+    test_logger.info("event = %s", LazyJson(lcl_obj, default=CountingObject.to_json))
+
+    assert lcl_obj.serialized == 0
+
+
+def test_lazy_json__serializes_given_emitted_record(test_logger) -> None:
+    """Validates that emitted log statements serialize their arguments once."""
+    lcl_stream = io.StringIO()
+    test_logger.addHandler(logging.StreamHandler(lcl_stream))
+    test_logger.propagate = False
+    test_logger.setLevel(logging.INFO)
+    lcl_obj = CountingObject()
+
+    test_logger.info("event = %s", LazyJson(lcl_obj, default=CountingObject.to_json))
+
+    assert lcl_stream.getvalue() == 'event = {"serialized": 1}\n'
+    assert lcl_obj.serialized == 1
+
+
+def test_lazy_json__serializes_named_tuple_as_dict() -> None:
+    """Validates that NamedTuples are serialized same as their _asdict()."""
+    lcl_body = AhLambdaResponseBody(msg="ok", txId="tx")
+
+    assert str(LazyJson(lcl_body, indent=4)) == json.dumps(lcl_body._asdict(), indent=4)
+
+
+def test_object_to_json__uses_object_dict_or_str() -> None:
+    """Validates that objects are converted to their __dict__ and others to str."""
+    lcl_obj = CountingObject()
+
+    assert object_to_json(lcl_obj) == {"serialized": 0}
+    assert object_to_json(3) == "3"
+
+
+# -----------------------------------------------------------------------------
+# Tests for SamplingFilter
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "sample_rate,level,expected",
+    [
+        (0.0, logging.DEBUG, False),
+        (0.0, logging.INFO, False),
+        (0.0, logging.WARNING, True),
+        (0.0, logging.ERROR, True),
+        (1.0, logging.DEBUG, True),
+        (1.0, logging.INFO, True),
+    ],
+)
+def test_sampling_filter__filters_only_records_below_warning(
+    sample_rate: float, level: int, expected: bool
+) -> None:
+    """Validates that sampling applies to records below WARNING only."""
+    assert SamplingFilter(sample_rate).filter(make_record(level)) is expected
+
+
+def test_sampling_filter__clamps_sample_rate() -> None:
+    """Validates that sample rate is clamped to 0.0 - 1.0."""
+    assert SamplingFilter(-1.0).sample_rate == 0.0
+    assert SamplingFilter(7.0).sample_rate == 1.0
+
+
+# -----------------------------------------------------------------------------
+# Tests for JsonLogFormatter
+# -----------------------------------------------------------------------------
+def test_json_log_formatter__formats_record_as_json_line() -> None:
+    """Validates that the record is formatted as single line JSON object."""
+    lcl_line = JsonLogFormatter().format(make_record(logging.INFO))
+
+    assert "\n" not in lcl_line
+    lcl_log = json.loads(lcl_line)
+    assert lcl_log["level"] == "INFO"
+    assert lcl_log["logger"] == "abk"
+    assert lcl_log["function"] == "handler"
+    assert lcl_log["message"] == "msg arg"
+
+
+# -----------------------------------------------------------------------------
+# Tests for get_logger
+# -----------------------------------------------------------------------------
+def test_get_logger__configures_json_format_and_sampling(monkeypatch, test_logger) -> None:
+    """Validates that LOG_LEVEL, LOG_FORMAT and LOG_SAMPLE_RATE configure the logger."""
+    monkeypatch.setenv("LOG_LEVEL", "debug")
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    monkeypatch.setenv("LOG_SAMPLE_RATE", "0.25")
+
+    lcl_logger = get_logger(test_logger.name)
+
+    assert lcl_logger.level == logging.DEBUG
+    assert lcl_logger.propagate is False
+    assert isinstance(lcl_logger.handlers[0].formatter, JsonLogFormatter)
+    assert lcl_logger.filters[0].sample_rate == 0.25
+
+
+def test_get_logger__defaults_to_warning_without_sampling(monkeypatch, test_logger) -> None:
+    """Validates logger defaults: WARNING level, text format and no sampling."""
+    for lcl_env_var in ["LOG_LEVEL", "LOG_FORMAT", "LOG_SAMPLE_RATE"]:
+        monkeypatch.delenv(lcl_env_var, raising=False)
+
+    lcl_logger = get_logger(test_logger.name)
+
+    assert lcl_logger.level == logging.WARNING
+    assert lcl_logger.handlers == []
+    assert lcl_logger.filters == []
@@ -0,0 +1,267 @@
+"""Unit tests for abk_hello_metrics.py."""
+
+# Standard library imports
+import json
+import logging
+
+# Own modules imports
+from abk_hello import abk_hello
+from abk_hello.abk_hello_metrics import MAX_FLUSH_EVERY, METRICS, AhMetrics, server_timing_header
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# local constants
+# -----------------------------------------------------------------------------
+VALID_INPUT = {"deviceUuid": "abeabeab-eabe-abea-beab-abeabeabeabe", "txId": "test_txId"}
+PHASE_METRICS = ["decode_ms", "validate_ms", "respond_ms", "encode_ms", "compress_ms", "total_ms"]
+
+
+def post_event(body: str) -> dict:
+    """Returns POST event with body."""
+    return {"httpMethod": "POST", "resource": "/abk-hello", "body": body}
+
+
+# -----------------------------------------------------------------------------
+# pytest fixtures and setup
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope="module", autouse=True)
+def setup_logging():
+    """Setup logging for tests."""
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def emf_lines() -> list:
+    """Provide list collecting EMF log lines of module_metrics."""
+    return []
+
+
+@pytest.fixture
+def module_metrics(emf_lines: list):
+    """Provide enabled module-level metrics of a cold container writing to emf_lines."""
+    lcl_state = dict(vars(METRICS))
+    vars(METRICS).update(vars(AhMetrics(enabled=True, writer=emf_lines.append)))
+    yield METRICS
+    vars(METRICS).update(lcl_state)
+
+
+@pytest.fixture
+def server_timing():
+    """Provide module-level metrics of a cold container with only server timing enabled."""
+    lcl_state = dict(vars(METRICS))
+    vars(METRICS).update(vars(AhMetrics(server_timing=True)))
+    yield METRICS
+    vars(METRICS).update(lcl_state)
+
+
+def server_timing_names(header: str) -> list:
+    """Returns metric names of Server-Timing header value."""
+    return [lcl_entry.split(";")[0].strip() for lcl_entry in header.split(",")]
+
+
+def metric_names(emf: dict) -> list:
+    """Returns names of the metrics declared in the EMF log line."""
+    return [lcl_metric["Name"] for lcl_metric in emf["_aws"]["CloudWatchMetrics"][0]["Metrics"]]
+
+
+# -----------------------------------------------------------------------------
+# Tests for AhMetrics
+# -----------------------------------------------------------------------------
+def test_metrics__first_invocation_is_cold() -> None:
+    """Validates that only the first timer of the container is cold."""
+    lcl_metrics = AhMetrics(enabled=True)
+    assert [lcl_metrics.start().cold for _ in range(3)] == [True, False, False]
+
+
+def test_metrics__mark_warm_makes_first_invocation_warm() -> None:
+    """Validates that a container marked warm starts no cold timer."""
+    lcl_metrics = AhMetrics(enabled=True)
+
+    lcl_metrics.mark_warm()
+
+    assert not lcl_metrics.start().cold
+
+
+def test_timer__mark_measures_time_since_previous_mark() -> None:
+    """Validates that phases do not overlap and add up to at most the elapsed time."""
+    lcl_timer = AhMetrics().start()
+    lcl_timer.mark("decode")
+    lcl_timer.mark("validate")
+
+    assert list(lcl_timer.phases) == ["decode", "validate"]
+    assert all(lcl_ns >= 0 for lcl_ns in lcl_timer.phases.values())
+    assert sum(lcl_timer.phases.values()) <= lcl_timer.elapsed_ns()
+
+
+def test_record__flushes_every_n_invocations() -> None:
+    """Validates batching of N invocations into one EMF log line with value arrays."""
+    lcl_lines = []
+    lcl_metrics = AhMetrics(enabled=True, flush_every=3, writer=lcl_lines.append)
+    for lcl_error in (None, "decode", "decode", None):
+        lcl_timer = lcl_metrics.start()
+        lcl_timer.mark("decode")
+        lcl_timer.error = lcl_error
+        lcl_metrics.record(lcl_timer)
+
+    assert len(lcl_lines) == 1
+    lcl_emf = json.loads(lcl_lines[0])
+    assert len(lcl_emf["decode_ms"]) == len(lcl_emf["total_ms"]) == 3
+    assert (lcl_emf["invocations"], lcl_emf["cold_starts"]) == (3, 1)
+    assert (lcl_emf["errors"], lcl_emf["errors_decode"]) == (2, 2)
+
+    lcl_metrics.flush()
+    assert json.loads(lcl_lines[1])["invocations"] == 1
+    assert json.loads(lcl_lines[1])["cold_starts"] == 0
+
+
+def test_flush__writes_nothing_without_invocations() -> None:
+    """Validates that empty batches are not written."""
+    lcl_lines = []
+    AhMetrics(enabled=True, writer=lcl_lines.append).flush()
+    assert lcl_lines == []
+
+
+def test_emf_line__declares_every_metric_of_the_line() -> None:
+    """Validates the EMF structure CloudWatch extracts the metrics from."""
+    lcl_metrics = AhMetrics(enabled=True, namespace="ABK/Test", function_name="abk-hello-dev")
+    lcl_timer = lcl_metrics.start()
+    lcl_timer.mark("decode")
+    lcl_timer.error = "no_route"
+    lcl_metrics.record(lcl_timer)
+
+    lcl_emf = json.loads(lcl_metrics.emf_line())
+    lcl_directive = lcl_emf["_aws"]["CloudWatchMetrics"][0]
+    assert lcl_directive["Namespace"] == "ABK/Test"
+    assert lcl_directive["Dimensions"] == [["function"]]
+    assert lcl_emf["function"] == "abk-hello-dev"
+    assert isinstance(lcl_emf["_aws"]["Timestamp"], int)
+    assert all(lcl_name in lcl_emf for lcl_name in metric_names(lcl_emf))
+    assert lcl_emf["max_rss_mb"] > 0
+
+
+@pytest.mark.parametrize("flush_every,expected", [(0, 1), (10, 10), (1000, MAX_FLUSH_EVERY)])
+def test_metrics__flush_every_is_clamped_to_emf_limits(flush_every: int, expected: int) -> None:
+    """Validates that a batch never has more values than EMF accepts."""
+    assert AhMetrics(flush_every=flush_every).flush_every == expected
+
+
+# -----------------------------------------------------------------------------
+# Tests for handler instrumentation
+# -----------------------------------------------------------------------------
+def test_handler__writes_phase_timings_per_invocation(module_metrics, emf_lines: list) -> None:
+    """Validates one EMF log line with all phases and the cold flag per invocation."""
+    abk_hello.handler(post_event(json.dumps(VALID_INPUT)), None)
+    abk_hello.handler(post_event(json.dumps({**VALID_INPUT, "txId": "tx-2"})), None)
+
+    lcl_cold, lcl_warm = (json.loads(lcl_line) for lcl_line in emf_lines)
+    assert [lcl_name for lcl_name in metric_names(lcl_cold) if lcl_name.endswith("_ms")] == (
+        PHASE_METRICS
+    )
+    assert (lcl_cold["cold_starts"], lcl_warm["cold_starts"]) == (1, 0)
+    assert lcl_cold["errors"] == 0
+
+
+@pytest.mark.parametrize(
+    "event,expected_cause",
+    [
+        (post_event("{"), "decode"),
+        (post_event(json.dumps({**VALID_INPUT, "extra": "x"})), "validation"),
+        ({"httpMethod": "POST", "resource": "/unknown"}, "no_route"),
+    ],
+)
+def test_handler__counts_errors_by_cause(
+    module_metrics, emf_lines: list, event: dict, expected_cause: str
+) -> None:
+    """Validates that each error path records its cause."""
+    abk_hello.handler(event, None)
+
+    lcl_emf = json.loads(emf_lines[0])
+    assert (lcl_emf["errors"], lcl_emf[f"errors_{expected_cause}"]) == (1, 1)
+
+
+def test_handler__request_after_warmup_is_warm(module_metrics, emf_lines: list) -> None:
+    """Validates that the cold start taken by a keep-warm ping is not reported by a request."""
+    abk_hello.handler({"source": "abk.warmup"}, None)
+    abk_hello.handler(post_event(json.dumps(VALID_INPUT)), None)
+
+    assert [json.loads(lcl_line)["cold_starts"] for lcl_line in emf_lines] == [0]
+
+
+def test_handler__disabled_metrics_create_no_timer(monkeypatch) -> None:
+    """Validates that disabled metrics do not touch the timer."""
+
+    def fail_start():
+        raise AssertionError("timer created")
+
+    monkeypatch.setattr(METRICS, "start", fail_start)
+    assert abk_hello.handler(post_event(json.dumps(VALID_INPUT)), None)["statusCode"] == 200
+
+
+# -----------------------------------------------------------------------------
+# Tests for Server-Timing
+# -----------------------------------------------------------------------------
+def test_server_timing_header__reports_init_only_when_cold() -> None:
+    """Validates phases, handler duration and the cold / warm marker."""
+    lcl_metrics = AhMetrics()
+    lcl_cold = lcl_metrics.start()
+    lcl_cold.mark("decode")
+    lcl_cold.mark("encode")
+    lcl_warm = lcl_metrics.start()
+
+    lcl_cold_header = server_timing_header(lcl_cold, init_ns=85_210_000)
+    assert lcl_cold_header.startswith("init;dur=85.210, decode;dur=")
+    assert server_timing_names(lcl_cold_header) == [
+        "init",
+        "decode",
+        "serialize",
+        "handler",
+        "cold",
+    ]
+    assert server_timing_names(server_timing_header(lcl_warm, init_ns=1)) == ["handler", "warm"]
+
+
+def test_handler__adds_server_timing_header(server_timing) -> None:
+    """Validates the header of a cold and a warm invocation."""
+    lcl_cold = abk_hello.handler(post_event(json.dumps(VALID_INPUT)), None)
+    lcl_warm = abk_hello.handler(post_event(json.dumps({**VALID_INPUT, "txId": "tx-2"})), None)
+
+    assert server_timing_names(lcl_cold["headers"]["Server-Timing"]) == [
+        "init",
+        "decode",
+        "validate",
+        "respond",
+        "serialize",
+        "compress",
+        "handler",
+        "cold",
+    ]
+    assert server_timing_names(lcl_warm["headers"]["Server-Timing"])[-1] == "warm"
+    assert lcl_warm["headers"]["Timing-Allow-Origin"] == "*"
+    assert "Server-Timing" not in abk_hello.LAMBDA_RESP_HEADERS
+
+
+def test_handler__server_timing_does_not_modify_cached_response(server_timing) -> None:
+    """Validates that a replayed response gets the timing of the retry, not the first call."""
+    lcl_event = post_event(json.dumps(VALID_INPUT))
+    lcl_first = abk_hello.handler(lcl_event, None)
+    lcl_retry = abk_hello.handler(lcl_event, None)
+
+    assert server_timing_names(lcl_retry["headers"]["Server-Timing"]) == [
+        "decode",
+        "compress",
+        "handler",
+        "warm",
+    ]
+    assert lcl_first["headers"]["Server-Timing"].endswith("cold")
+    assert lcl_retry["body"] == lcl_first["body"]
+
+
+def test_handler__no_server_timing_by_default() -> None:
+    """Validates that the header is opt-in."""
+    lcl_resp = abk_hello.handler(post_event(json.dumps(VALID_INPUT)), None)
+    assert "Server-Timing" not in lcl_resp["headers"]
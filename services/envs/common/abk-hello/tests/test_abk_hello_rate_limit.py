@@ -0,0 +1,204 @@
+"""Unit tests for abk_hello_rate_limit.py."""
+
+# Standard library imports
+import json
+import logging
+
+# Own modules imports
+from abk_hello import abk_hello
+from abk_hello.abk_hello_rate_limit import (
+    MIN_SWEEP_KEYS,
+    RATE_LIMITER,
+    AhRateLimiter,
+    retry_after_header,
+)
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# help classes
+# -----------------------------------------------------------------------------
+class FakeClock:
+    """Clock which only moves when told to."""
+
+    def __init__(self, now: float = 1000.0):
+        """Starts at now seconds."""
+        self.now = now
+
+    def __call__(self) -> float:
+        """Returns current fake time."""
+        return self.now
+
+
+# -----------------------------------------------------------------------------
+# local constants
+# -----------------------------------------------------------------------------
+DEVICE_UUID = "abeabeab-eabe-abea-beab-abeabeabeabe"
+OTHER_DEVICE_UUID = "15a73c3e-0c86-495a-aa2b-522691d93d60"
+
+
+# -----------------------------------------------------------------------------
+# pytest fixtures and setup
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope="module", autouse=True)
+def setup_logging():
+    """Setup logging for tests."""
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Provide fake clock."""
+    return FakeClock()
+
+
+@pytest.fixture
+def module_limiter(clock: FakeClock):
+    """Provide module-level limiter with 1 request per second and burst 2 on a fake clock."""
+    lcl_limiter = AhRateLimiter(rate_per_s=1.0, burst=2, clock=clock)
+    lcl_state = dict(vars(RATE_LIMITER))
+    vars(RATE_LIMITER).update(vars(lcl_limiter))
+    yield RATE_LIMITER
+    vars(RATE_LIMITER).update(lcl_state)
+
+
+def post_event(device_uuid: str, tx_id: str) -> dict:
+    """Returns POST event of a valid request."""
+    return {"httpMethod": "POST", "body": json.dumps({"deviceUuid": device_uuid, "txId": tx_id})}
+
+
+# -----------------------------------------------------------------------------
+# Tests for AhRateLimiter
+# -----------------------------------------------------------------------------
+def test_acquire__allows_burst_then_rejects(clock: FakeClock) -> None:
+    """Validates that burst requests pass at once and the next one has to wait."""
+    lcl_limiter = AhRateLimiter(rate_per_s=10.0, burst=3, clock=clock)
+
+    assert [lcl_limiter.acquire(DEVICE_UUID) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert lcl_limiter.acquire(DEVICE_UUID) == pytest.approx(0.1)
+    assert (lcl_limiter.stats().allowed, lcl_limiter.stats().rejected) == (3, 1)
+
+
+def test_acquire__refills_at_rate(clock: FakeClock) -> None:
+    """Validates that one token is added every 1 / rate seconds."""
+    lcl_limiter = AhRateLimiter(rate_per_s=10.0, burst=1, clock=clock)
+    assert lcl_limiter.acquire(DEVICE_UUID) == 0.0
+    assert lcl_limiter.acquire(DEVICE_UUID) > 0.0
+
+    clock.now += 0.1
+    assert lcl_limiter.acquire(DEVICE_UUID) == 0.0
+    clock.now += 0.05
+    assert lcl_limiter.acquire(DEVICE_UUID) == pytest.approx(0.05)
+
+
+def test_acquire__rejected_requests_do_not_consume_tokens(clock: FakeClock) -> None:
+    """Validates that a device hammering while limited is not locked out longer."""
+    lcl_limiter = AhRateLimiter(rate_per_s=1.0, burst=1, clock=clock)
+    lcl_limiter.acquire(DEVICE_UUID)
+    for _ in range(100):
+        lcl_limiter.acquire(DEVICE_UUID)
+
+    clock.now += 1.0
+    assert lcl_limiter.acquire(DEVICE_UUID) == 0.0
+
+
+def test_acquire__keys_are_limited_independently(clock: FakeClock) -> None:
+    """Validates that one device at its limit does not limit others."""
+    lcl_limiter = AhRateLimiter(rate_per_s=1.0, burst=1, clock=clock)
+    lcl_limiter.acquire(DEVICE_UUID)
+
+    assert lcl_limiter.acquire(DEVICE_UUID) > 0.0
+    assert lcl_limiter.acquire(OTHER_DEVICE_UUID) == 0.0
+
+
+def test_sweep__removes_only_keys_with_full_bucket(clock: FakeClock) -> None:
+    """Validates that idle keys are dropped and active keys keep their state."""
+    lcl_limiter = AhRateLimiter(rate_per_s=1.0, burst=2, clock=clock)
+    lcl_limiter.acquire(DEVICE_UUID)
+    clock.now += 0.5
+    lcl_limiter.acquire(OTHER_DEVICE_UUID)
+    lcl_limiter.acquire(OTHER_DEVICE_UUID)
+    clock.now += 0.5
+
+    assert lcl_limiter.sweep() == 1
+    assert lcl_limiter.stats().keys == 1
+    assert lcl_limiter.acquire(OTHER_DEVICE_UUID) > 0.0
+
+
+def test_acquire__sweeps_when_keys_doubled(clock: FakeClock) -> None:
+    """Validates amortized cleanup: idle keys do not accumulate without bound."""
+    lcl_limiter = AhRateLimiter(rate_per_s=100.0, burst=1, clock=clock)
+    for lcl_index in range(10 * MIN_SWEEP_KEYS):
+        lcl_limiter.acquire(f"device-{lcl_index}")
+        clock.now += 0.001
+
+    lcl_stats = lcl_limiter.stats()
+    assert lcl_stats.sweeps >= 1
+    assert lcl_stats.keys <= 2 * MIN_SWEEP_KEYS
+    assert lcl_stats.allowed == 10 * MIN_SWEEP_KEYS
+
+
+def test_rate_limiter__zero_rate_is_disabled() -> None:
+    """Validates that ABK_RATE_LIMIT_RPS=0 disables limiting."""
+    assert not AhRateLimiter(rate_per_s=0).enabled
+
+
+@pytest.mark.parametrize("wait_s,expected", [(0.001, "1"), (1.0, "1"), (1.2, "2"), (30.5, "31")])
+def test_retry_after_header__rounds_up_to_whole_seconds(wait_s: float, expected: str) -> None:
+    """Validates Retry-After header values."""
+    assert retry_after_header(wait_s) == expected
+
+
+# -----------------------------------------------------------------------------
+# Tests for handler rate limiting
+# -----------------------------------------------------------------------------
+def test_handler__returns_429_above_device_limit(module_limiter) -> None:
+    """Validates that requests above the limit get 429 echoing their txId."""
+    lcl_responses = [
+        abk_hello.handler(post_event(DEVICE_UUID, f"tx-{lcl_index}"), None)
+        for lcl_index in range(2)
+    ]
+
+    lcl_limited = abk_hello.handler(post_event(DEVICE_UUID, "tx-2"), None)
+
+    assert [lcl_resp["statusCode"] for lcl_resp in lcl_responses] == [200, 200]
+    assert lcl_limited["statusCode"] == abk_hello.HttpStatusCode.TOO_MANY_REQUESTS.value
+    assert lcl_limited["headers"]["Retry-After"] == "1"
+    assert lcl_limited["headers"]["Content-Type"] == "application/json"
+    assert json.loads(lcl_limited["body"]) == {"msg": "error", "txId": "tx-2"}
+
+
+def test_handler__invalid_requests_are_not_counted(module_limiter) -> None:
+    """Validates that the limiter is keyed by the validated deviceUuid only."""
+    for _ in range(5):
+        abk_hello.handler({"httpMethod": "POST", "body": json.dumps({"txId": "tx"})}, None)
+
+    assert module_limiter.stats().keys == 0
+    assert abk_hello.handler(post_event(DEVICE_UUID, "tx"), None)["statusCode"] == 200
+
+
+def test_handler__limited_response_is_not_cached(module_limiter, clock: FakeClock) -> None:
+    """Validates that a 429 is not replayed to the retry after the device waited."""
+    abk_hello.handler(post_event(DEVICE_UUID, "tx-0"), None)
+    abk_hello.handler(post_event(DEVICE_UUID, "tx-1"), None)
+    assert abk_hello.handler(post_event(DEVICE_UUID, "tx-2"), None)["statusCode"] == 429
+
+    clock.now += 1.0
+    assert abk_hello.handler(post_event(DEVICE_UUID, "tx-2"), None)["statusCode"] == 200
+
+
+def test_handler__replayed_retries_are_limited(module_limiter, clock: FakeClock) -> None:
+    """Validates that resending the same txId does not bypass the limit."""
+    lcl_hits = abk_hello.IDEMPOTENCY_CACHE.stats().hits
+    assert abk_hello.handler(post_event(DEVICE_UUID, "tx-0"), None)["statusCode"] == 200
+    assert abk_hello.handler(post_event(DEVICE_UUID, "tx-0"), None)["statusCode"] == 200
+    lcl_limited = abk_hello.handler(post_event(DEVICE_UUID, "tx-0"), None)
+
+    assert lcl_limited["statusCode"] == 429
+    assert json.loads(lcl_limited["body"]) == {"msg": "error", "txId": "tx-0"}
+    # both retries were found in the cache, the second one is over the limit
+    assert abk_hello.IDEMPOTENCY_CACHE.stats().hits - lcl_hits == 2
@@ -0,0 +1,230 @@
+"""Unit tests for abk_hello_request.py."""
+
+# Standard library imports
+import base64
+import gc
+import json
+
+# Own modules imports
+from abk_hello import abk_hello, abk_hello_request
+from abk_hello.abk_hello_json import JsonBackend
+from abk_hello.abk_hello_request import (
+    MAX_BODY_SIZE,
+    MAX_NESTING_DEPTH,
+    AhDecodedRequest,
+    AhRequestDecodeError,
+    decode_body,
+    decode_request,
+    exceeds_nesting_depth,
+)
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# local constants
+# -----------------------------------------------------------------------------
+VALID_INPUT = {"deviceUuid": "abeabeab-eabe-abea-beab-abeabeabeabe", "txId": "test_txId"}
+
+
+# -----------------------------------------------------------------------------
+# pytest fixtures and setup
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def loads_calls(monkeypatch) -> list:
+    """Counts JSON decoder calls of the request decoding stage."""
+    lcl_calls = []
+    lcl_backend = abk_hello_request.json_backend
+
+    def counting_loads(body):
+        lcl_calls.append(body)
+        return lcl_backend.loads(body)
+
+    monkeypatch.setattr(
+        abk_hello_request, "json_backend", JsonBackend("counting", counting_loads, json.dumps)
+    )
+    return lcl_calls
+
+
+# -----------------------------------------------------------------------------
+# Tests for exceeds_nesting_depth
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "body,max_depth,expected",
+    [
+        # body,                             max_depth   expected
+        ('{"a": 1}', 1, False),
+        ('{"a": {"b": 1}}', 1, True),
+        ('{"a": [1, [2]]}', 3, False),
+        ('{"a": [1, [2]]}', 2, True),
+        ("[{}, {}, {}, {}]", 2, False),
+        ('{"a": "[[[[{{{{"}', 1, False),
+        ('{"a": "\\"[[[[", "b": 1}', 1, False),
+        (b'{"a": [[[1]]]}', 2, True),
+        (b'{"a": "[[[["}', 1, False),
+        ("[" * 10_000, MAX_NESTING_DEPTH, True),
+    ],
+)
+def test_exceeds_nesting_depth__counts_brackets_outside_of_strings(
+    body, max_depth: int, expected: bool
+) -> None:
+    """Validates that brackets inside of JSON strings are not counted."""
+    assert exceeds_nesting_depth(body, max_depth) is expected
+
+
+# -----------------------------------------------------------------------------
+# Tests for decode_body
+# -----------------------------------------------------------------------------
+def test_decode_body__decodes_valid_body() -> None:
+    """Validates that valid bodies are decoded as str and bytes."""
+    assert decode_body(json.dumps(VALID_INPUT)) == VALID_INPUT
+    assert decode_body(json.dumps(VALID_INPUT).encode()) == VALID_INPUT
+
+
+@pytest.mark.parametrize(
+    "body,ex_msg",
+    [
+        ("{not json", "not valid JSON"),
+        (" " * (MAX_BODY_SIZE + 1), "exceeds maximum size"),
+        ("[" * (MAX_NESTING_DEPTH + 1), "exceeds maximum nesting depth"),
+    ],
+)
+def test_decode_body__raises_given_invalid_body(
+    loads_calls: list, body: str, ex_msg: str
+) -> None:
+    """Validates that oversized and too deep bodies are rejected without parsing them."""
+    with pytest.raises(AhRequestDecodeError) as exception_message:
+        decode_body(body)
+    assert ex_msg in str(exception_message.value)
+    assert isinstance(exception_message.value, ValueError)
+    assert len(loads_calls) == (1 if ex_msg == "not valid JSON" else 0)
+
+
+# -----------------------------------------------------------------------------
+# Tests for decode_request
+# -----------------------------------------------------------------------------
+def test_decode_request__returns_query_parameters_of_get_request(loads_calls: list) -> None:
+    """Validates that GET query parameters are used without JSON decoding."""
+    lcl_event = {"httpMethod": "GET", "queryStringParameters": VALID_INPUT, "body": "{"}
+    assert decode_request(lcl_event) == AhDecodedRequest(payload=VALID_INPUT)
+    assert loads_calls == []
+
+
+@pytest.mark.parametrize(
+    "event",
+    [
+        {"httpMethod": "POST", "body": json.dumps(VALID_INPUT)},
+        {
+            "httpMethod": "POST",
+            "body": base64.b64encode(json.dumps(VALID_INPUT).encode()).decode(),
+            "isBase64Encoded": True,
+        },
+    ],
+)
+def test_decode_request__decodes_body_once(loads_calls: list, event: dict) -> None:
+    """Validates that plain and base64 encoded bodies are decoded with one parser call."""
+    assert decode_request(event) == AhDecodedRequest(payload=VALID_INPUT)
+    assert len(loads_calls) == 1
+
+
+@pytest.mark.parametrize("event", [{}, {"httpMethod": "GET"}, {"body": ""}, {"body": None}])
+def test_decode_request__returns_empty_payload_given_no_input(event: dict) -> None:
+    """Validates that requests without input decode to an empty payload."""
+    assert decode_request(event) == AhDecodedRequest(payload={})
+
+
+@pytest.mark.parametrize(
+    "event,ex_msg",
+    [
+        ({"body": '{"txId": "abc", '}, "not valid JSON"),
+        ({"body": "!!!", "isBase64Encoded": True}, "not valid base64"),
+        ({"body": "A" * (MAX_BODY_SIZE * 2), "isBase64Encoded": True}, "exceeds maximum size"),
+    ],
+)
+def test_decode_request__carries_decode_error(event: dict, ex_msg: str) -> None:
+    """Validates that decode errors are returned with an empty payload, not raised."""
+    lcl_request = decode_request(event)
+    assert lcl_request.payload == {}
+    assert ex_msg in str(lcl_request.error)
+    assert lcl_request.tx_id() == ""
+
+
+@pytest.mark.parametrize(
+    "payload,expected",
+    [({"txId": "abc"}, "abc"), ({"txId": 89}, 89), ({}, ""), ([1, 2], ""), ("txId", "")],
+)
+def test_decoded_request__tx_id_is_read_from_dict_payload_only(payload, expected) -> None:
+    """Validates that txId for error responses is only taken from object payloads."""
+    assert AhDecodedRequest(payload=payload).tx_id() == expected
+
+
+# -----------------------------------------------------------------------------
+# Tests for handler decoding
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "body,expected_tx_id",
+    [
+        (json.dumps({"txId": "echo-me", "deviceUuid": "NotValid"}), "echo-me"),
+        (json.dumps(["not", "an", "object"]), ""),
+        ("{not json", ""),
+    ],
+)
+def test_handler__decodes_invalid_body_once(
+    loads_calls: list, body: str, expected_tx_id: str
+) -> None:
+    """Validates that the error response reuses the decoded body instead of decoding again."""
+    lcl_resp = abk_hello.handler({"httpMethod": "POST", "body": body}, None)
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.FORBIDDEN.value
+    assert json.loads(lcl_resp["body"]) == {"msg": "error", "txId": expected_tx_id}
+    assert len(loads_calls) == 1
+
+
+def test_handler__rejects_oversized_body_without_parsing(loads_calls: list) -> None:
+    """Validates that oversized bodies are answered with an error before JSON decoding."""
+    lcl_body = json.dumps({**VALID_INPUT, "pad": "x" * MAX_BODY_SIZE})
+    lcl_resp = abk_hello.handler({"httpMethod": "POST", "body": lcl_body}, None)
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.FORBIDDEN.value
+    assert lcl_resp["body"] == abk_hello.EMPTY_TX_ID_ERROR_BODY
+    assert loads_calls == []
+
+
+def test_handler__accepts_valid_post_body(loads_calls: list) -> None:
+    """Validates the happy path decodes the body once."""
+    lcl_resp = abk_hello.handler({"httpMethod": "POST", "body": json.dumps(VALID_INPUT)}, None)
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.OK.value
+    assert json.loads(lcl_resp["body"]) == {"msg": "ok", "txId": VALID_INPUT["txId"]}
+    assert len(loads_calls) == 1
+
+
+@pytest.mark.parametrize(
+    "event",
+    [
+        {"httpMethod": "POST", "body": "{not json"},
+        {"httpMethod": "POST", "body": "!!!", "isBase64Encoded": True},
+        {"httpMethod": "POST", "body": "[" * 10_000},
+        {"httpMethod": "POST", "body": json.dumps({"txId": "echo-me"})},
+    ],
+)
+def test_handler__error_path_leaves_no_reference_cycles(event: dict) -> None:
+    """Validates that stored decode errors do not keep handler frames in reference cycles."""
+    gc.collect()
+    gc.set_debug(gc.DEBUG_SAVEALL)
+    try:
+        abk_hello.handler(event, None)
+        gc.collect()
+        lcl_garbage = list(gc.garbage)
+    finally:
+        gc.set_debug(0)
+        gc.garbage.clear()
+    assert lcl_garbage == []
+
+
+def test_batch_handler__rejects_too_deeply_nested_record(caplog) -> None:
+    """Validates that batch records pass the same nesting guard."""
+    lcl_event = {"Records": [{"messageId": "msg-1", "body": "[" * 10_000}]}
+    assert abk_hello.batch_handler(lcl_event, None) == {"batchItemFailures": []}
+    assert "record msg-1 rejected" in caplog.text
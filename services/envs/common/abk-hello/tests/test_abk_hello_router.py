@@ -0,0 +1,312 @@
+"""Unit tests for abk_hello_router.py."""
+
+# Standard library imports
+import json
+import logging
+from typing import NamedTuple
+
+# Own modules imports
+from abk_hello import abk_hello
+from abk_hello.abk_hello_devices import AhDeviceRegistry
+from abk_hello.abk_hello_io import AhLambdaRequestBody, AhLambdaResponseBody
+from abk_hello.abk_hello_rate_limit import AhRateLimiter
+from abk_hello.abk_hello_router import AhRouteError, AhRouter, normalize_resource
+from abk_hello.abk_hello_validator import compile_validator
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# help classes
+# -----------------------------------------------------------------------------
+class CountRequestBody(NamedTuple):
+    """Request of the test count route."""
+
+    count: str
+
+
+class CountResponseBody(NamedTuple):
+    """Response of the test count route."""
+
+    msg: str
+    txId: str
+    doubled: str
+
+
+class StatusResponseBody(NamedTuple):
+    """Response of the test status route, with the values of the empty txId error body."""
+
+    status: str
+    code: str
+
+
+# -----------------------------------------------------------------------------
+# local constants
+# -----------------------------------------------------------------------------
+VALID_INPUT = {"deviceUuid": "abeabeab-eabe-abea-beab-abeabeabeabe", "txId": "test_txId"}
+COUNT_VALIDATOR = compile_validator(
+    {
+        "type": "object",
+        "properties": {"count": {"type": "string", "pattern": "^[0-9]+$"}},
+        "required": ["count"],
+        "additionalProperties": False,
+    }
+)
+
+
+def double_count(lambda_req: CountRequestBody) -> CountResponseBody:
+    """Test route action."""
+    return CountResponseBody(msg="ok", txId="", doubled=str(2 * int(lambda_req.count)))
+
+
+# -----------------------------------------------------------------------------
+# pytest fixtures and setup
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope="module", autouse=True)
+def setup_logging():
+    """Setup logging for tests."""
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def router() -> AhRouter:
+    """Provide router with the hello and count routes."""
+    lcl_router = AhRouter(default_resource="/hello")
+    lcl_router.add(
+        "get",
+        "hello",
+        abk_hello.say_hello,
+        AhLambdaRequestBody,
+        AhLambdaResponseBody,
+        abk_hello.LAMBDA_REQ_VALIDATOR,
+    )
+    lcl_router.add(
+        "POST", "/counts/{id}", double_count, CountRequestBody, CountResponseBody, COUNT_VALIDATOR
+    )
+    return lcl_router
+
+
+@pytest.fixture
+def module_router(router: AhRouter, monkeypatch) -> AhRouter:
+    """Provide module-level router with the abk-hello and count routes."""
+    for lcl_route in abk_hello.ROUTER.routes():
+        router.add(*lcl_route)
+    monkeypatch.setattr(abk_hello, "ROUTER", router)
+    return router
+
+
+# -----------------------------------------------------------------------------
+# Tests for AhRouter
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "resource,expected", [("abk-hello", "/abk-hello"), ("/a/b/", "/a/b"), ("/", "/"), ("", "/")]
+)
+def test_normalize_resource__one_leading_no_trailing_slash(resource: str, expected: str) -> None:
+    """Validates resource normalization."""
+    assert normalize_resource(resource) == expected
+
+
+@pytest.mark.parametrize(
+    "event,expected_resource",
+    [
+        ({"httpMethod": "GET", "resource": "/hello", "path": "/other"}, "/hello"),
+        ({"httpMethod": "GET", "path": "/hello/"}, "/hello"),
+        ({"httpMethod": "GET"}, "/hello"),
+        ({"httpMethod": "POST", "resource": "/counts/{id}", "path": "/counts/7"}, "/counts/{id}"),
+    ],
+)
+def test_resolve__matches_resource_path_or_default(
+    router: AhRouter, event: dict, expected_resource: str
+) -> None:
+    """Validates that resource, then path, then the default resource is matched."""
+    lcl_route = router.resolve(event)
+    assert (lcl_route.method, lcl_route.resource) == (event["httpMethod"], expected_resource)
+
+
+@pytest.mark.parametrize(
+    "event",
+    [
+        {"httpMethod": "GET", "resource": "/unknown"},
+        {"httpMethod": "PUT", "resource": "/hello"},
+        {"httpMethod": "get", "resource": "/hello"},
+        {"resource": "/hello"},
+    ],
+)
+def test_resolve__returns_none_without_matching_route(router: AhRouter, event: dict) -> None:
+    """Validates that unknown resources and methods do not match."""
+    assert router.resolve(event) is None
+
+
+def test_resolve__matches_default_method_without_http_method(router: AhRouter) -> None:
+    """Validates that events without httpMethod match the route of the default method."""
+    router.default_method = "GET"
+
+    lcl_route = router.resolve({"resource": "/hello"})
+
+    assert (lcl_route.method, lcl_route.resource) == ("GET", "/hello")
+
+
+def test_add__rejects_duplicate_route(router: AhRouter) -> None:
+    """Validates that a route can not be replaced by accident."""
+    with pytest.raises(AhRouteError):
+        router.add(
+            "POST", "counts/{id}/", double_count, CountRequestBody, CountResponseBody, None
+        )
+
+
+def test_add__rejects_rate_limit_without_device_uuid(router: AhRouter) -> None:
+    """Validates that rate limited routes have a deviceUuid to limit by."""
+    with pytest.raises(AhRouteError):
+        router.add(
+            "PUT",
+            "/counts/{id}",
+            double_count,
+            CountRequestBody,
+            CountResponseBody,
+            COUNT_VALIDATOR,
+            rate_limiter=AhRateLimiter(),
+        )
+
+
+def test_add__rejects_device_registry_without_device_uuid(router: AhRouter) -> None:
+    """Validates that device checked routes have a deviceUuid to look up."""
+    with pytest.raises(AhRouteError):
+        router.add(
+            "PUT",
+            "/counts/{id}",
+            double_count,
+            CountRequestBody,
+            CountResponseBody,
+            COUNT_VALIDATOR,
+            device_registry=AhDeviceRegistry(),
+        )
+
+
+def test_allowed_methods__lists_methods_of_resource(router: AhRouter) -> None:
+    """Validates Allow header values."""
+    router.add(
+        "PUT", "/counts/{id}", double_count, CountRequestBody, CountResponseBody, COUNT_VALIDATOR
+    )
+    assert router.allowed_methods({"resource": "/counts/{id}"}) == "POST, PUT"
+    assert router.allowed_methods({"resource": "/unknown"}) is None
+
+
+def test_routes__lists_each_route_once(router: AhRouter) -> None:
+    """Validates that the trailing slash aliases are not listed."""
+    assert [(lcl_r.method, lcl_r.resource) for lcl_r in router.routes()] == [
+        ("GET", "/hello"),
+        ("POST", "/counts/{id}"),
+    ]
+
+
+def test_route_parse__validates_and_converts_to_request_model(router: AhRouter) -> None:
+    """Validates that each route uses its own validator and request model."""
+    lcl_route = router.resolve({"httpMethod": "POST", "resource": "/counts/{id}"})
+
+    assert lcl_route.parse({"count": "21"}) == CountRequestBody(count="21")
+    with pytest.raises(ValueError):
+        lcl_route.parse(VALID_INPUT)
+
+
+def test_route_respond__checks_response_model(router: AhRouter) -> None:
+    """Validates that an action returning another type than the response model raises."""
+    lcl_route = router.resolve({"httpMethod": "POST", "resource": "/counts/{id}"})
+
+    assert lcl_route.respond(CountRequestBody(count="21")).doubled == "42"
+    with pytest.raises(TypeError, match="returned StatusResponseBody, not CountResponseBody"):
+        lcl_route._replace(action=lambda _: StatusResponseBody(status="ok", code="")).respond(
+            CountRequestBody(count="21")
+        )
+
+
+# -----------------------------------------------------------------------------
+# Tests for handler dispatching
+# -----------------------------------------------------------------------------
+def test_handler__dispatches_to_route_action(module_router: AhRouter) -> None:
+    """Validates that several endpoints are served by the one handler."""
+    lcl_count_resp = abk_hello.handler(
+        {"httpMethod": "POST", "resource": "/counts/{id}", "body": '{"count": "21"}'}, None
+    )
+    lcl_hello_resp = abk_hello.handler(
+        {"httpMethod": "POST", "resource": "/abk-hello", "body": json.dumps(VALID_INPUT)}, None
+    )
+
+    assert lcl_count_resp["statusCode"] == 200
+    assert json.loads(lcl_count_resp["body"]) == {"msg": "ok", "txId": "", "doubled": "42"}
+    assert json.loads(lcl_hello_resp["body"]) == {"msg": "ok", "txId": "test_txId"}
+
+
+def test_handler__validates_with_route_validator(module_router: AhRouter) -> None:
+    """Validates that a payload valid for another route is rejected."""
+    lcl_resp = abk_hello.handler(
+        {"httpMethod": "POST", "resource": "/counts/{id}", "body": json.dumps(VALID_INPUT)}, None
+    )
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.FORBIDDEN.value
+    assert json.loads(lcl_resp["body"]) == {"msg": "error", "txId": "test_txId"}
+
+
+def test_handler__encodes_response_model_equal_to_error_body(module_router: AhRouter) -> None:
+    """Validates that a response equal to the empty txId error tuple keeps its own keys."""
+    module_router.add(
+        "POST",
+        "/status",
+        lambda _: StatusResponseBody(status="error", code=""),
+        CountRequestBody,
+        StatusResponseBody,
+        COUNT_VALIDATOR,
+    )
+
+    lcl_resp = abk_hello.handler(
+        {"httpMethod": "POST", "resource": "/status", "body": '{"count": "1"}'}, None
+    )
+
+    assert lcl_resp["statusCode"] == 200
+    assert json.loads(lcl_resp["body"]) == {"status": "error", "code": ""}
+
+
+def test_handler__returns_error_for_other_response_model(module_router: AhRouter) -> None:
+    """Validates that an action returning another model is answered as a failed action."""
+    module_router.add(
+        "POST",
+        "/status",
+        lambda _: StatusResponseBody(status="ok", code=""),
+        CountRequestBody,
+        CountResponseBody,
+        COUNT_VALIDATOR,
+    )
+
+    lcl_resp = abk_hello.handler(
+        {"httpMethod": "POST", "resource": "/status", "body": '{"count": "1"}'}, None
+    )
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.FORBIDDEN.value
+    assert json.loads(lcl_resp["body"]) == {"msg": "error", "txId": ""}
+
+
+def test_handler__returns_404_for_unknown_resource(module_router: AhRouter) -> None:
+    """Validates that unknown resources are not decoded and get 404."""
+    lcl_resp = abk_hello.handler({"httpMethod": "GET", "resource": "/unknown", "body": "{"}, None)
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.NOT_FOUND.value
+    assert json.loads(lcl_resp["body"]) == {"msg": "error", "txId": ""}
+
+
+def test_handler__answers_direct_invocation_without_http_method() -> None:
+    """Validates that an event with only a body is answered like a POST to abk-hello."""
+    lcl_resp = abk_hello.handler({"body": json.dumps(VALID_INPUT)}, None)
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.OK.value
+    assert json.loads(lcl_resp["body"]) == {"msg": "ok", "txId": "test_txId"}
+
+
+def test_handler__returns_405_with_allow_header(module_router: AhRouter) -> None:
+    """Validates that known resources with another method get 405 and the Allow header."""
+    lcl_resp = abk_hello.handler({"httpMethod": "DELETE", "resource": "/abk-hello"}, None)
+
+    assert lcl_resp["statusCode"] == abk_hello.HttpStatusCode.METHOD_NOT_ALLOWED.value
+    assert lcl_resp["headers"]["Allow"] == "GET, POST"
+    assert lcl_resp["headers"]["Content-Type"] == "application/json"
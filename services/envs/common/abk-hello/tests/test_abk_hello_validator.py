@@ -0,0 +1,202 @@
+"""Unit tests for abk_hello_validator.py."""
+
+# Standard library imports
+import copy
+import subprocess  # noqa: S404
+import sys
+from pathlib import Path
+
+# Own modules imports
+from abk_hello import abk_hello
+from abk_hello.abk_hello_validator import (
+    AhJsonSchemaValidator,
+    AhRequestValidator,
+    AhValidationError,
+    compile_validator,
+)
+
+# Third party imports
+import jsonschema
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# local constants
+# -----------------------------------------------------------------------------
+TEST_DEVICE_UUID = "abeabeab-eabe-abea-beab-abeabeabeabe"
+TEST_TX_ID = "test_txId_from_valid_lambda_req"
+
+# inputs from the unit tests in test_abk_hello.py
+UNIT_TEST_INPUTS = [
+    {"deviceUuid": TEST_DEVICE_UUID, "txId": TEST_TX_ID},
+    {"txId": TEST_TX_ID},
+    {"deviceUuid": TEST_DEVICE_UUID},
+    {"deviceUuid": TEST_DEVICE_UUID, "txId": TEST_TX_ID, "additional_parameter_value": "x"},
+    *[
+        {"deviceUuid": TEST_DEVICE_UUID, "txId": TEST_TX_ID, key: value}
+        for key, value in [
+            ("deviceUuid", "aec4f817-0729-442e-bf6b-588b2a2011b60"),
+            ("deviceUuid", "NotValid"),
+            ("deviceUuid", ""),
+            ("deviceUuid", True),
+            ("deviceUuid", 89),
+            ("deviceUuid", 3.14),
+            ("deviceUuid", {}),
+            ("deviceUuid", []),
+            ("txId", ""),
+            ("txId", "X" * 37),
+            ("txId", True),
+            ("txId", 89),
+            ("txId", 3.14),
+            ("txId", {}),
+            ("txId", []),
+        ]
+    ],
+]
+
+# request inputs from the Tavern suites (test_abk_hello_tavern.yaml, advanced_scenarios.yaml)
+TAVERN_INPUTS = [
+    {"deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60", "txId": "tavern-test-12345"},
+    {"txId": "tavern-test-12345"},
+    {"deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60"},
+    {"deviceUuid": "invalid-uuid-format", "txId": "tavern-test-12345"},
+    {"deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60", "txId": ""},
+    {"deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60", "txId": "x" * 37},
+    {"deviceUuid": "not-a-valid-uuid", "txId": "tavern-test-12345"},
+    {
+        "deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60",
+        "txId": "tavern-test-12345",
+        "extraField": "should-be-rejected",
+    },
+    {},
+    {"deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60", "txId": "1" * 36},
+    {"deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60", "txId": "1"},
+    {"deviceUuid": "550E8400-E29B-41D4-A716-446655440000", "txId": "uppercase-uuid-test"},
+    {"deviceUuid": "550e8400-e29b-41d4-a716-446655440000", "txId": "lowercase-uuid-test"},
+    {"deviceUuid": "550E8400-e29b-41D4-a716-446655440000", "txId": "mixed-case-uuid-test"},
+    {"deviceUuid": "invalid-format", "txId": "error-consistency-test"},
+    {
+        "deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60",
+        "txId": "test-with-dashes_and_underscores",
+    },
+    {"deviceUuid": "15a73c3e-0c86-495a-aa2b-522691d93d60", "txId": "1234567890"},
+]
+
+# corner cases where a hand written validator could easily diverge from jsonschema
+EDGE_CASE_INPUTS = [
+    None,
+    [],
+    "deviceUuid",
+    42,
+    {"deviceUuid": TEST_DEVICE_UUID + "\n", "txId": TEST_TX_ID},
+    {"deviceUuid": TEST_DEVICE_UUID[:-1] + "\n", "txId": TEST_TX_ID},
+    {"deviceUuid": " " + TEST_DEVICE_UUID, "txId": TEST_TX_ID},
+    {"deviceUuid": TEST_DEVICE_UUID, "txId": "ü" * 36},
+    {"deviceUuid": TEST_DEVICE_UUID, "txId": "ü" * 37},
+    {"deviceUuid": TEST_DEVICE_UUID, "txId": None},
+    {"deviceUuid": None, "txId": None},
+    {"deviceUuid": "", "txId": ""},
+    {"extra1": 1, "extra2": 2},
+    {"deviceUuid": TEST_DEVICE_UUID, "txId": TEST_TX_ID, "extra1": 1, "extra2": 2},
+    {"deviceUuid": 1, "txId": TEST_TX_ID, "extra": 1},
+]
+
+ALL_INPUTS = UNIT_TEST_INPUTS + TAVERN_INPUTS + EDGE_CASE_INPUTS
+
+
+# -----------------------------------------------------------------------------
+# Helper functions
+# -----------------------------------------------------------------------------
+def jsonschema_error_message(instance: object) -> str | None:
+    """Returns the jsonschema.validate error message or None for a valid instance."""
+    try:
+        jsonschema.validate(instance, abk_hello.LAMBDA_REQ_SCHEMA)
+    except jsonschema.ValidationError as exc:
+        return exc.message
+    return None
+
+
+def validator_error_message(validator, instance: object) -> str | None:
+    """Returns the validator error message or None for a valid instance."""
+    try:
+        validator.validate(instance)
+    except AhValidationError as exc:
+        return str(exc)
+    return None
+
+
+# -----------------------------------------------------------------------------
+# Tests for compile_validator
+# -----------------------------------------------------------------------------
+def test_compile_validator__returns_fast_validator_for_lambda_request_schema() -> None:
+    """Validates that the lambda request schema is compiled to the fast validator."""
+    assert isinstance(abk_hello.LAMBDA_REQ_VALIDATOR, AhRequestValidator)
+
+
+@pytest.mark.parametrize(
+    "schema_change",
+    [
+        {"minProperties": 1},
+        {"additionalProperties": {"type": "string"}},
+        {"properties": {"txId": {"type": "integer"}}},
+        {"properties": {"txId": {"$ref": "https://example.com/schema"}}},
+        {"properties": {"txId": {"type": "string", "format": "uuid"}}},
+    ],
+)
+def test_compile_validator__falls_back_to_jsonschema_given_unsupported_keyword(
+    schema_change: dict,
+) -> None:
+    """Validates that unsupported schema keywords fall back to jsonschema validation."""
+    lcl_schema = copy.deepcopy(abk_hello.LAMBDA_REQ_SCHEMA)
+    lcl_schema.update(schema_change)
+
+    assert isinstance(compile_validator(lcl_schema), AhJsonSchemaValidator)
+
+
+def test_abk_hello_import__does_not_import_jsonschema() -> None:
+    """Validates that the cold start import of the handler module does not load jsonschema."""
+    lcl_src_dir = Path(__file__).resolve().parent.parent / "src"
+    lcl_script = (
+        f"import sys; sys.path.insert(0, {str(lcl_src_dir)!r}); import abk_hello.abk_hello; "
+        "print(sorted(m for m in sys.modules if m.split('.')[0] in ('jsonschema', 'attr')))"
+    )
+
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", lcl_script], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == "[]"
+
+
+# -----------------------------------------------------------------------------
+# Equivalence tests against jsonschema
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("instance", ALL_INPUTS)
+def test_request_validator__matches_jsonschema(instance) -> None:
+    """Validates that the fast validator accepts, rejects and reports same as jsonschema."""
+    expected_msg = jsonschema_error_message(instance)
+
+    actual_msg = validator_error_message(abk_hello.LAMBDA_REQ_VALIDATOR, instance)
+
+    assert actual_msg == expected_msg
+
+
+@pytest.mark.parametrize("instance", ALL_INPUTS)
+def test_jsonschema_validator__matches_jsonschema(instance) -> None:
+    """Validates that the fallback validator accepts and rejects same as jsonschema."""
+    lcl_validator = AhJsonSchemaValidator(abk_hello.LAMBDA_REQ_SCHEMA)
+    expected_msg = jsonschema_error_message(instance)
+
+    actual_msg = validator_error_message(lcl_validator, instance)
+
+    assert actual_msg == expected_msg
+
+
+def test_request_validator__does_not_modify_input() -> None:
+    """Validates that validation does not change the validated input."""
+    lcl_input = {"deviceUuid": TEST_DEVICE_UUID, "txId": TEST_TX_ID, "extra": "x"}
+    lcl_expected = dict(lcl_input)
+
+    with pytest.raises(AhValidationError):
+        abk_hello.LAMBDA_REQ_VALIDATOR.validate(lcl_input)
+    assert lcl_input == lcl_expected
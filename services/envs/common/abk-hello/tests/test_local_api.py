@@ -0,0 +1,336 @@
+"""Unit tests for tools/local_api.py."""
+
+# Standard library imports
+import base64
+import gzip
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Own modules imports
+from abk_hello.abk_hello_compression import COMPRESSOR
+from local_api import (
+    LocalApiGateway,
+    Route,
+    build_proxy_event,
+    proxy_response_to_http,
+    start_local_api,
+)
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# local constants
+# -----------------------------------------------------------------------------
+TEST_DEVICE_UUID = "15a73c3e-0c86-495a-aa2b-522691d93d60"
+TEST_TX_ID = "test_txId_from_local_api"
+
+
+# -----------------------------------------------------------------------------
+# test handlers, referenced by routes as test_local_api.<name>
+# -----------------------------------------------------------------------------
+def echo_handler(event: dict, context) -> dict:
+    """Returns the received event as body."""
+    return {
+        "statusCode": 200,
+        "headers": {"X-Function-Name": context.function_name},
+        "body": json.dumps(event),
+    }
+
+
+def raising_handler(event: dict, context) -> dict:
+    """Raises like an unhandled lambda error."""
+    raise RuntimeError("boom")
+
+
+def slow_handler(event: dict, context) -> dict:
+    """Runs longer than the test timeout."""
+    time.sleep(0.5)
+    return {"statusCode": 200, "body": ""}
+
+
+# -----------------------------------------------------------------------------
+# pytest fixtures and setup
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope="module")
+def local_api():
+    """Provide local API with the serverless.yml routes and test routes."""
+    lcl_gateway = LocalApiGateway(
+        routes=[
+            Route("GET", "/abk-hello", "abk_hello.abk_hello.handler"),
+            Route("POST", "/abk-hello", "abk_hello.abk_hello.handler"),
+            Route("POST", "/echo", "test_local_api.echo_handler"),
+            Route("GET", "/raise", "test_local_api.raising_handler"),
+            Route("GET", "/slow", "test_local_api.slow_handler"),
+        ],
+        stage="dev",
+        workers=4,
+        timeout_s=0.2,
+    )
+    lcl_server = start_local_api(gateway=lcl_gateway)
+    yield lcl_server
+    lcl_server.shutdown()
+    lcl_server.server_close()
+
+
+def request(
+    url: str, method: str = "GET", body: bytes | None = None, headers: dict | None = None
+) -> tuple[int, dict, bytes]:
+    """Sends HTTP request, returns status, headers and body also for error statuses."""
+    # the URLs are http URLs of the local API started by the tests, no file: or custom schemes
+    lcl_req = urllib.request.Request(  # noqa: S310
+        url, data=body, method=method, headers=headers or {}
+    )
+    try:
+        with urllib.request.urlopen(lcl_req, timeout=5) as lcl_resp:  # noqa: S310
+            return lcl_resp.status, dict(lcl_resp.headers), lcl_resp.read()
+    except urllib.error.HTTPError as lcl_error:
+        return lcl_error.code, dict(lcl_error.headers), lcl_error.read()
+
+
+# -----------------------------------------------------------------------------
+# Tests for event and response conversion
+# -----------------------------------------------------------------------------
+def test_build_proxy_event__converts_query_headers_and_body() -> None:
+    """Validates query strings, repeated headers and text body in the proxy event."""
+    lcl_event = build_proxy_event(
+        method="POST",
+        path="/abk-hello",
+        resource="/abk-hello",
+        stage="qa",
+        query="txId=a&txId=b&deviceUuid=d%20e&empty=",
+        headers=[("Accept", "text/plain"), ("Accept", "application/json")],
+        body=b'{"txId": "tx"}',
+        source_ip="10.0.0.1",
+    )
+
+    assert lcl_event["httpMethod"] == "POST"
+    assert lcl_event["queryStringParameters"] == {"txId": "b", "deviceUuid": "d e", "empty": ""}
+    assert lcl_event["multiValueQueryStringParameters"]["txId"] == ["a", "b"]
+    assert lcl_event["headers"] == {"Accept": "application/json"}
+    assert lcl_event["multiValueHeaders"] == {"Accept": ["text/plain", "application/json"]}
+    assert lcl_event["body"] == '{"txId": "tx"}'
+    assert lcl_event["isBase64Encoded"] is False
+    assert lcl_event["requestContext"]["path"] == "/qa/abk-hello"
+    assert lcl_event["requestContext"]["identity"]["sourceIp"] == "10.0.0.1"
+
+
+def test_build_proxy_event__uses_none_given_no_query_and_body() -> None:
+    """Validates that missing query strings and body are None like in API Gateway."""
+    lcl_event = build_proxy_event("GET", "/abk-hello", "/abk-hello", "dev", "", [], b"", "::1")
+
+    assert lcl_event["queryStringParameters"] is None
+    assert lcl_event["multiValueQueryStringParameters"] is None
+    assert lcl_event["body"] is None
+
+
+def test_build_proxy_event__base64_encodes_binary_body() -> None:
+    """Validates that non UTF-8 bodies are passed base64 encoded."""
+    lcl_event = build_proxy_event("POST", "/a", "/a", "dev", "", [], b"\xff\xfe", "::1")
+
+    assert lcl_event["isBase64Encoded"] is True
+    assert base64.b64decode(lcl_event["body"]) == b"\xff\xfe"
+
+
+def test_build_proxy_event__base64_encodes_binary_media_type_body() -> None:
+    """Validates that bodies of binaryMediaTypes are passed base64 encoded like API Gateway."""
+    lcl_event = build_proxy_event(
+        "POST",
+        "/a",
+        "/a",
+        "dev",
+        "",
+        [("content-type", "application/json; charset=utf-8")],
+        b'{"txId": "tx"}',
+        "::1",
+        binary_media_types=("application/json",),
+    )
+
+    assert lcl_event["isBase64Encoded"] is True
+    assert base64.b64decode(lcl_event["body"]) == b'{"txId": "tx"}'
+
+
+def test_proxy_response_to_http__converts_headers_and_base64_body() -> None:
+    """Validates header value conversion and base64 decoding of the lambda response."""
+    lcl_resp = proxy_response_to_http(
+        {
+            "statusCode": 201,
+            "headers": {"Access-Control-Allow-Credentials": True, "X-Count": 3},
+            "multiValueHeaders": {"Set-Cookie": ["a=1", "b=2"]},
+            "body": base64.b64encode(b"\x00bin").decode(),
+            "isBase64Encoded": True,
+        },
+        accept="application/octet-stream",
+        binary_media_types=("application/*",),
+    )
+
+    assert lcl_resp.status == 201
+    assert lcl_resp.headers == [
+        ("Access-Control-Allow-Credentials", "true"),
+        ("X-Count", "3"),
+        ("Set-Cookie", "a=1"),
+        ("Set-Cookie", "b=2"),
+    ]
+    assert lcl_resp.body == b"\x00bin"
+
+
+@pytest.mark.parametrize("accept", ["*/*", "text/html, application/json", None])
+def test_proxy_response_to_http__keeps_base64_given_accept_not_binary(accept: str) -> None:
+    """Validates that API Gateway returns the base64 text when Accept does not match."""
+    lcl_body = base64.b64encode(b"\x00bin").decode()
+    lcl_resp = proxy_response_to_http(
+        {"statusCode": 200, "body": lcl_body, "isBase64Encoded": True},
+        accept=accept,
+        binary_media_types=("application/json",),
+    )
+
+    assert lcl_resp.body == lcl_body.encode()
+
+
+@pytest.mark.parametrize("response", [None, {}, {"statusCode": "200"}, "ok"])
+def test_proxy_response_to_http__returns_502_given_malformed_response(response) -> None:
+    """Validates that malformed lambda responses become 502 like in API Gateway."""
+    assert proxy_response_to_http(response).status == 502
+
+
+# -----------------------------------------------------------------------------
+# Tests for the local API server
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("path", ["/dev/abk-hello", "/abk-hello"])
+def test_local_api__get_returns_handler_response(local_api, path: str) -> None:
+    """Validates GET with query strings with and without stage prefix."""
+    lcl_base = local_api.url.rsplit("/", 1)[0]
+    lcl_status, lcl_headers, lcl_body = request(
+        f"{lcl_base}{path}?deviceUuid={TEST_DEVICE_UUID}&txId={TEST_TX_ID}"
+    )
+
+    assert lcl_status == 200
+    assert lcl_headers["Access-Control-Allow-Origin"] == "*"
+    assert lcl_headers["Access-Control-Allow-Credentials"] == "true"
+    assert json.loads(lcl_body) == {"msg": "ok", "txId": TEST_TX_ID}
+
+
+def test_local_api__post_passes_body(local_api) -> None:
+    """Validates POST body is passed to the handler."""
+    lcl_status, _, lcl_body = request(
+        f"{local_api.url}/abk-hello",
+        method="POST",
+        body=json.dumps({"deviceUuid": TEST_DEVICE_UUID, "txId": TEST_TX_ID}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert lcl_status == 200
+    assert json.loads(lcl_body) == {"msg": "ok", "txId": TEST_TX_ID}
+
+
+def test_local_api__passes_json_body_base64_encoded(local_api) -> None:
+    """Validates that application/json bodies reach the handler base64 encoded."""
+    _, _, lcl_body = request(
+        f"{local_api.url}/echo",
+        method="POST",
+        body=b'{"key": "value"}',
+        headers={"Content-Type": "application/json"},
+    )
+
+    lcl_event = json.loads(lcl_body)
+    assert lcl_event["isBase64Encoded"] is True
+    assert base64.b64decode(lcl_event["body"]) == b'{"key": "value"}'
+
+
+@pytest.mark.parametrize(
+    "accept,compressed", [("application/json", True), ("*/*", False), (None, False)]
+)
+def test_local_api__compressed_only_for_binary_accept(
+    local_api, monkeypatch, accept: str, compressed: bool
+) -> None:
+    """Validates that clients get gzip only when API Gateway would decode the body."""
+    monkeypatch.setattr(COMPRESSOR, "min_bytes", 0)
+    lcl_headers = {"Accept-Encoding": "gzip"}
+    if accept is not None:
+        lcl_headers["Accept"] = accept
+    lcl_status, lcl_resp_headers, lcl_body = request(
+        f"{local_api.url}/abk-hello?deviceUuid={TEST_DEVICE_UUID}&txId={TEST_TX_ID}",
+        headers=lcl_headers,
+    )
+
+    assert lcl_status == 200
+    assert (lcl_resp_headers.get("Content-Encoding") == "gzip") is compressed
+    if compressed:
+        lcl_body = gzip.decompress(lcl_body)
+    assert json.loads(lcl_body) == {"msg": "ok", "txId": TEST_TX_ID}
+
+
+def test_local_api__post_invalid_body_returns_handler_error(local_api) -> None:
+    """Validates handler error responses are passed through unchanged."""
+    lcl_status, _, lcl_body = request(
+        f"{local_api.url}/abk-hello", method="POST", body=b'{"txId": "tx"}'
+    )
+
+    assert lcl_status == 403
+    assert json.loads(lcl_body) == {"msg": "error", "txId": "tx"}
+
+
+def test_local_api__passes_event_and_context_to_handler(local_api) -> None:
+    """Validates the proxy event and lambda context the handler receives."""
+    lcl_status, lcl_headers, lcl_body = request(
+        f"{local_api.url}/echo?key=value", method="POST", body=b"payload"
+    )
+
+    lcl_event = json.loads(lcl_body)
+    assert lcl_status == 200
+    assert lcl_headers["X-Function-Name"] == "dev-echo_handler"
+    assert lcl_event["resource"] == "/echo"
+    assert lcl_event["path"] == "/echo"
+    assert lcl_event["queryStringParameters"] == {"key": "value"}
+    assert lcl_event["body"] == "payload"
+    assert lcl_event["requestContext"]["stage"] == "dev"
+
+
+def test_local_api__options_returns_cors_preflight(local_api) -> None:
+    """Validates CORS preflight response for known paths."""
+    lcl_status, lcl_headers, _ = request(f"{local_api.url}/abk-hello", method="OPTIONS")
+
+    assert lcl_status == 200
+    assert lcl_headers["Access-Control-Allow-Origin"] == "*"
+    assert lcl_headers["Access-Control-Allow-Methods"] == "OPTIONS,GET,POST"
+
+
+@pytest.mark.parametrize(
+    "method,path", [("PUT", "/abk-hello"), ("DELETE", "/abk-hello"), ("GET", "/unknown")]
+)
+def test_local_api__returns_403_given_unknown_route(local_api, method: str, path: str) -> None:
+    """Validates API Gateway response for unknown methods and paths."""
+    lcl_status, _, lcl_body = request(f"{local_api.url}{path}", method=method)
+
+    assert lcl_status == 403
+    assert json.loads(lcl_body) == {"message": "Missing Authentication Token"}
+
+
+def test_local_api__returns_502_given_handler_exception(local_api) -> None:
+    """Validates API Gateway response for unhandled lambda errors."""
+    lcl_status, _, lcl_body = request(f"{local_api.url}/raise")
+
+    assert lcl_status == 502
+    assert json.loads(lcl_body) == {"message": "Internal server error"}
+
+
+def test_local_api__returns_504_given_handler_timeout(local_api) -> None:
+    """Validates API Gateway response for lambdas running longer than the timeout."""
+    lcl_status, _, lcl_body = request(f"{local_api.url}/slow")
+
+    assert lcl_status == 504
+    assert json.loads(lcl_body) == {"message": "Endpoint request timed out"}
+
+
+def test_local_api__handles_concurrent_requests(local_api) -> None:
+    """Validates concurrent requests are all answered by the worker pool."""
+    lcl_url = f"{local_api.url}/abk-hello?deviceUuid={TEST_DEVICE_UUID}&txId={TEST_TX_ID}"
+
+    with ThreadPoolExecutor(max_workers=16) as lcl_executor:
+        lcl_results = list(lcl_executor.map(lambda _: request(lcl_url), range(64)))
+
+    assert [lcl_status for lcl_status, _, _ in lcl_results] == [200] * 64
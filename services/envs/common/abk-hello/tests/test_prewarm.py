@@ -0,0 +1,87 @@
+"""Unit tests for tools/prewarm.py."""
+
+# Standard library imports
+import threading
+import time
+
+# Own modules imports
+from prewarm import local_invoker, prewarm, warm_up
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# help classes
+# -----------------------------------------------------------------------------
+class FakeLambda:
+    """Lambda service starting a container for every invocation while all are busy."""
+
+    def __init__(self):
+        """Starts without containers."""
+        self._lock = threading.Lock()
+        self._free: list[tuple[str, float]] = []
+        self.started = 0
+
+    def invoke(self, event: dict) -> dict:
+        """Runs the warm-up on a free or a new container."""
+        with self._lock:
+            if self._free:
+                container_id, started_at = self._free.pop()
+            else:
+                self.started += 1
+                container_id, started_at = f"container-{self.started}", time.time()
+        time.sleep(event["delayMs"] / 1000)
+        lcl_resp = {
+            "warmup": True,
+            "containerId": container_id,
+            "containerAgeMs": int((time.time() - started_at) * 1000),
+        }
+        with self._lock:
+            self._free.append((container_id, started_at))
+        return lcl_resp
+
+
+# -----------------------------------------------------------------------------
+# prewarm tests
+# -----------------------------------------------------------------------------
+def test_prewarm__concurrent_warmups_reach_distinct_containers():
+    """Validates concurrent warm-ups reach distinct containers, cold once, warm afterwards."""
+    lcl_lambda = FakeLambda()
+    lcl_report = prewarm(lcl_lambda.invoke, concurrency=8, delay_ms=50)
+    assert (lcl_report["answered"], lcl_report["containers"]) == (8, 8)
+    assert lcl_report["cold_containers"] == 8
+    assert lcl_report["errors"] == 0
+
+    # a second warm-up finds the containers warm
+    time.sleep(0.01)
+    lcl_report = prewarm(lcl_lambda.invoke, concurrency=8, delay_ms=50)
+    assert lcl_report["containers"] == 8
+    assert (lcl_report["cold_containers"], lcl_report["warm_containers"]) == (0, 8)
+    assert lcl_lambda.started == 8
+
+
+def test_prewarm__failed_invocations_reported():
+    """Validates failed warm-up invocations are counted and reported."""
+
+    def invoke(event: dict) -> dict:
+        raise TimeoutError("throttled")
+
+    lcl_report = prewarm(invoke, concurrency=3, delay_ms=0)
+    assert (lcl_report["errors"], lcl_report["containers"]) == (3, 0)
+    assert lcl_report["error_examples"][0] == "TimeoutError('throttled')"
+
+
+def test_warm_up__non_warmup_response_is_error():
+    """Validates a response without the warm-up marker is an error."""
+    lcl_result = warm_up(lambda event: {"statusCode": 403}, {"source": "abk.warmup"})
+    assert lcl_result.error.startswith("not a warm-up response")
+
+
+@pytest.mark.parametrize("delay_ms", [0, 20])
+def test_prewarm__local_handler_is_one_container(delay_ms):
+    """Validates the local handler answers all warm-ups as one container."""
+    lcl_report = prewarm(local_invoker(), concurrency=4, delay_ms=delay_ms)
+    assert (lcl_report["answered"], lcl_report["containers"]) == (4, 1)
+    # cold when the handler module was imported by this test moments ago
+    assert lcl_report["cold_containers"] + lcl_report["warm_containers"] == 1
@@ -0,0 +1,178 @@
+"""Unit tests for tools/replay.py."""
+
+# Standard library imports
+import gzip
+import json
+import subprocess  # noqa: S404
+import sys
+from pathlib import Path
+
+# Own modules imports
+import replay
+from abk_hello import abk_hello
+from replay import ReplayContext, diff_response, read_chunks
+
+# Third party imports
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# local constants
+# -----------------------------------------------------------------------------
+TEST_DEVICE_UUID = "15a73c3e-0c86-495a-aa2b-522691d93d60"
+TEST_EVENT_COUNT = 30
+
+
+# -----------------------------------------------------------------------------
+# pytest fixtures and setup
+# -----------------------------------------------------------------------------
+def make_event(index: int) -> dict:
+    """Returns valid POST event for even, invalid for odd indexes."""
+    lcl_body = {"deviceUuid": TEST_DEVICE_UUID, "txId": f"replay_tx_{index}"}
+    if index % 2:
+        lcl_body["txId"] = ""
+    return {"httpMethod": "POST", "resource": "/abk-hello", "body": json.dumps(lcl_body)}
+
+
+@pytest.fixture(scope="module")
+def recorded_records(disabled_rate_limiter):
+    """Provide events with the responses of the handler, recorded with the limiter disabled."""
+    lcl_records = []
+    for lcl_index in range(TEST_EVENT_COUNT):
+        lcl_event = make_event(lcl_index)
+        lcl_response = abk_hello.handler(lcl_event, ReplayContext("abk-hello"))
+        lcl_records.append({"event": lcl_event, "response": lcl_response})
+    return lcl_records
+
+
+def write_jsonl(path: Path, records: list, compress: bool = False) -> Path:
+    """Writes records as JSONL file, gzip compressed if requested."""
+    lcl_text = "".join(f"{json.dumps(record)}\n" for record in records)
+    if compress:
+        path.write_bytes(gzip.compress(lcl_text.encode()))
+    else:
+        path.write_text(lcl_text)
+    return path
+
+
+# -----------------------------------------------------------------------------
+# read_chunks tests
+# -----------------------------------------------------------------------------
+def test_read_chunks__chunks_skip_empty_lines_and_stop_at_limit(tmp_path):
+    """Validates chunking with line numbers, skipped empty lines and the event limit."""
+    lcl_path = tmp_path / "events.jsonl"
+    lcl_path.write_text("a\n\nb\nc\nd\ne\n")
+    assert list(read_chunks(lcl_path, 2)) == [
+        [(1, "a\n"), (3, "b\n")],
+        [(4, "c\n"), (5, "d\n")],
+        [(6, "e\n")],
+    ]
+    assert list(read_chunks(lcl_path, 2, limit=3)) == [[(1, "a\n"), (3, "b\n")], [(4, "c\n")]]
+
+
+def test_read_chunks__reads_lazily(tmp_path):
+    """Validates that chunks of a gzip file are read on demand."""
+    lcl_path = tmp_path / "events.jsonl.gz"
+    with gzip.open(lcl_path, "wt") as f:
+        for lcl_index in range(100_000):
+            f.write(f"{lcl_index}\n")
+    lcl_chunks = read_chunks(lcl_path, 10)
+    assert next(lcl_chunks)[0] == (1, "0\n")
+    assert next(lcl_chunks)[0] == (11, "10\n")
+    lcl_chunks.close()
+
+
+# -----------------------------------------------------------------------------
+# diff_response tests
+# -----------------------------------------------------------------------------
+def test_diff_response__json_bodies_compared_as_values():
+    """Validates that JSON bodies match regardless of key order and whitespace."""
+    lcl_expected = {"statusCode": 200, "body": '{"a": 1, "b": 2}', "headers": {"X-A": "1"}}
+    lcl_actual = {"statusCode": 200, "body": '{"b":2,"a":1}', "headers": {"X-A": "1", "X-B": "2"}}
+    assert diff_response(lcl_expected, lcl_actual, frozenset()) == {}
+
+
+def test_diff_response__reports_changed_fields_without_ignored_headers():
+    """Validates reported differences, ignored headers are not compared."""
+    lcl_expected = {
+        "statusCode": 200,
+        "body": "{}",
+        "headers": {"Server-Timing": "1", "X-A": "1"},
+    }
+    lcl_actual = {"statusCode": 400, "body": "{}", "headers": {"Server-Timing": "2"}}
+    assert diff_response(lcl_expected, lcl_actual, frozenset({"Server-Timing"})) == {
+        "statusCode": {"expected": 200, "actual": 400},
+        "headers.X-A": {"expected": "1", "actual": None},
+    }
+
+
+# -----------------------------------------------------------------------------
+# replay tests
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("compress", [False, True])
+def test_replay__recorded_responses_match(tmp_path, recorded_records, compress):
+    """Validates that plain and gzip compressed recordings replay without mismatches."""
+    lcl_path = write_jsonl(tmp_path / "events.jsonl", recorded_records, compress)
+    lcl_report = replay.replay(lcl_path, workers=2, chunk_size=4)
+    assert lcl_report["events"] == TEST_EVENT_COUNT
+    assert lcl_report["compared"] == TEST_EVENT_COUNT
+    assert lcl_report["mismatches"] == 0, lcl_report["mismatch_examples"]
+    assert lcl_report["errors"] == 0
+    assert lcl_report["events_per_s_per_core"] > 0
+    assert lcl_report["handler_latency_us"]["p99_max"] is not None
+
+
+def test_replay__changed_response_and_invalid_line_reported(tmp_path, recorded_records):
+    """Validates that a changed response and an invalid line are reported."""
+    lcl_records = [dict(record) for record in recorded_records]
+    lcl_records[3] = {**lcl_records[3], "response": {**lcl_records[3]["response"]}}
+    lcl_records[3]["response"]["statusCode"] = 200
+    lcl_path = write_jsonl(tmp_path / "events.jsonl", lcl_records)
+    with open(lcl_path, "a") as f:
+        f.write("{not json\n")
+        f.write(json.dumps(make_event(0)) + "\n")
+    lcl_report = replay.replay(lcl_path, workers=2, chunk_size=7)
+    assert lcl_report["events"] == TEST_EVENT_COUNT + 1
+    assert lcl_report["compared"] == TEST_EVENT_COUNT
+    assert lcl_report["invalid_lines"] == 1
+    assert lcl_report["mismatches"] == 1
+    assert lcl_report["mismatch_examples"] == [
+        {"line": 4, "differences": {"statusCode": {"expected": 200, "actual": 403}}}
+    ]
+
+
+def test_replay__env_reaches_workers(tmp_path, recorded_records):
+    """Validates that environment overrides apply to the worker processes."""
+    lcl_path = write_jsonl(tmp_path / "events.jsonl", recorded_records[:8:2])
+    lcl_report = replay.replay(
+        lcl_path, workers=1, env={"ABK_RATE_LIMIT_RPS": "1", "ABK_RATE_LIMIT_BURST": "1"}
+    )
+    # the same device sends 4 valid requests at once, only the first passes the limiter
+    assert lcl_report["mismatches"] == 3
+
+
+# -----------------------------------------------------------------------------
+# command line tests
+# -----------------------------------------------------------------------------
+def run_replay(*args: str) -> subprocess.CompletedProcess:
+    """Runs tools/replay.py with the arguments."""
+    # the own interpreter and tool, arguments of the tests
+    return subprocess.run(  # noqa: S603
+        [sys.executable, replay.__file__, *args], capture_output=True, text=True, timeout=60
+    )
+
+
+def test_main__exits_1_on_mismatch(tmp_path, recorded_records):
+    """Validates exit code and summary of the command line on a mismatch."""
+    lcl_records = [{**recorded_records[0], "response": {"statusCode": 500, "body": ""}}]
+    lcl_path = write_jsonl(tmp_path / "events.jsonl", lcl_records)
+    lcl_result = run_replay(str(lcl_path), "--workers", "1")
+    assert lcl_result.returncode == 1, lcl_result.stderr
+    assert "FAIL: 1 mismatches" in lcl_result.stdout
+
+
+def test_main__missing_file_exits_2(tmp_path):
+    """Validates exit code and error of the command line given a missing file."""
+    lcl_result = run_replay(str(tmp_path / "missing.jsonl"))
+    assert lcl_result.returncode == 2
+    assert lcl_result.stderr.startswith("ERROR: cannot read")
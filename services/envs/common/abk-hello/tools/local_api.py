@@ -0,0 +1,477 @@
+"""Local in-process Lambda + API Gateway emulator for the abk-hello service.
+
+Turns HTTP requests into API Gateway REST (lambda proxy) events, invokes the handler
+in-process on a worker pool and turns the lambda response back into an HTTP response.
+Routes mirror the http events in serverless.yml, the stage prefix is optional, so both
+http://127.0.0.1:3000/dev/abk-hello and http://127.0.0.1:3000/abk-hello reach the handler.
+Behaves like the deployed API Gateway for:
+    CORS: OPTIONS preflight for every known path (cors: true in serverless.yml)
+    unknown path or method: 403 {"message": "Missing Authentication Token"}
+    handler exception or malformed lambda response: 502 {"message": "Internal server error"}
+    handler running longer than the timeout: 504 {"message": "Endpoint request timed out"}
+    binaryMediaTypes: request bodies whose Content-Type matches one are passed base64 encoded,
+        isBase64Encoded responses are decoded only when the first media type of the
+        request's Accept header matches one, else the client gets the base64 text
+
+Usage:
+    python tools/local_api.py [--port 3000] [--stage dev] [--workers 8]
+    export ABK_HELLO_API_URL=http://127.0.0.1:3000/dev
+"""
+
+# Standard imports
+import argparse
+import base64
+import importlib
+import json
+import sys
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+from typing import NamedTuple
+from urllib.parse import parse_qsl, urlsplit
+
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+CORS_ALLOW_HEADERS = (
+    "Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,X-Amz-User-Agent"
+)
+MISSING_AUTH_TOKEN_BODY = b'{"message": "Missing Authentication Token"}'
+INTERNAL_SERVER_ERROR_BODY = b'{"message": "Internal server error"}'
+TIMEOUT_BODY = b'{"message": "Endpoint request timed out"}'
+JSON_HEADERS = [("Content-Type", "application/json")]
+# binaryMediaTypes of the apiGateway in serverless.yml
+DEFAULT_BINARY_MEDIA_TYPES = ("application/json",)
+
+
+class Route(NamedTuple):
+    """Lambda proxy integration of one API Gateway method."""
+
+    method: str
+    path: str
+    handler: str  # module.function, same as the handler in serverless.yml
+
+
+class HttpResponse(NamedTuple):
+    """HTTP response sent back to the client."""
+
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+DEFAULT_ROUTES = [
+    Route(method="GET", path="/abk-hello", handler="abk_hello.abk_hello.handler"),
+    Route(method="POST", path="/abk-hello", handler="abk_hello.abk_hello.handler"),
+]
+
+
+# -----------------------------------------------------------------------------
+# lambda invocation
+# -----------------------------------------------------------------------------
+class LambdaContext:
+    """Lambda context object passed to the handler."""
+
+    def __init__(self, function_name: str, timeout_s: float):
+        """LambdaContext class init."""
+        self.function_name = function_name
+        self.function_version = "$LATEST"
+        self.invoked_function_arn = f"arn:aws:lambda:local:000000000000:function:{function_name}"
+        self.memory_limit_in_mb = 1024
+        self.aws_request_id = str(uuid.uuid4())
+        self.log_group_name = f"/aws/lambda/{function_name}"
+        self.log_stream_name = "local"
+        self._deadline = time.monotonic() + timeout_s
+
+    def get_remaining_time_in_millis(self) -> int:
+        """Returns remaining execution time in ms."""
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def load_handler(handler: str) -> Callable[[dict, object], dict]:
+    """Imports the handler function.
+
+    Args:
+        handler (str): module.function
+    Returns:
+        Callable[[dict, object], dict]: lambda handler
+    """
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+    module_name, _, function_name = handler.rpartition(".")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def first_header(headers: list[tuple[str, str]], name: str) -> str | None:
+    """Returns value of the first header with name, compared case insensitive."""
+    name = name.lower()
+    return next((value for header, value in headers if header.lower() == name), None)
+
+
+def is_binary_media_type(header_value: str | None, binary_media_types: tuple[str, ...]) -> bool:
+    """True when the first media type of Accept / Content-Type matches a binaryMediaType.
+
+    Like API Gateway only the first media type counts, "type/*" and "*/*" are wildcards.
+    """
+    if not header_value:
+        return False
+    media_type = header_value.split(",", 1)[0].partition(";")[0].strip().lower()
+    return any(
+        pattern in (media_type, "*/*") or pattern == f"{media_type.partition('/')[0]}/*"
+        for pattern in binary_media_types
+    )
+
+
+def build_proxy_event(
+    method: str,
+    path: str,
+    resource: str,
+    stage: str,
+    query: str,
+    headers: list[tuple[str, str]],
+    body: bytes,
+    source_ip: str,
+    binary_media_types: tuple[str, ...] = (),
+) -> dict:
+    """Builds API Gateway REST lambda proxy event.
+
+    Args:
+        method (str): HTTP method
+        path (str): request path without stage
+        resource (str): path of the matched route
+        stage (str): API Gateway stage
+        query (str): raw query string
+        headers (list[tuple[str, str]]): request headers in received order
+        body (bytes): request body
+        source_ip (str): client IP
+        binary_media_types (tuple[str, ...]): bodies of these Content-Types are base64 encoded
+    Returns:
+        dict: lambda proxy event
+    """
+    multi_value_headers: dict[str, list[str]] = {}
+    for name, value in headers:
+        multi_value_headers.setdefault(name, []).append(value)
+    multi_value_query: dict[str, list[str]] = {}
+    for name, value in parse_qsl(query, keep_blank_values=True):
+        multi_value_query.setdefault(name, []).append(value)
+
+    is_base64_encoded = False
+    event_body = None
+    if body:
+        if is_binary_media_type(first_header(headers, "Content-Type"), binary_media_types):
+            is_base64_encoded = True
+        else:
+            try:
+                event_body = body.decode("utf-8")
+            except UnicodeDecodeError:
+                is_base64_encoded = True
+        if is_base64_encoded:
+            event_body = base64.b64encode(body).decode("ascii")
+
+    return {
+        "resource": resource,
+        "path": path,
+        "httpMethod": method,
+        "headers": {name: values[-1] for name, values in multi_value_headers.items()} or None,
+        "multiValueHeaders": multi_value_headers or None,
+        "queryStringParameters": {name: values[-1] for name, values in multi_value_query.items()}
+        or None,
+        "multiValueQueryStringParameters": multi_value_query or None,
+        "pathParameters": None,
+        "stageVariables": None,
+        "requestContext": {
+            "resourcePath": resource,
+            "httpMethod": method,
+            "path": f"/{stage}{path}",
+            "stage": stage,
+            "requestId": str(uuid.uuid4()),
+            "requestTimeEpoch": int(time.time() * 1000),
+            "protocol": "HTTP/1.1",
+            "identity": {"sourceIp": source_ip, "userAgent": dict(headers).get("User-Agent")},
+        },
+        "body": event_body,
+        "isBase64Encoded": is_base64_encoded,
+    }
+
+
+def _header_value(value: object) -> str:
+    """Converts lambda response header value the way API Gateway does (True -> "true")."""
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def proxy_response_to_http(
+    response: object, accept: str | None = None, binary_media_types: tuple[str, ...] = ()
+) -> HttpResponse:
+    """Converts lambda proxy response into HTTP response.
+
+    Args:
+        response (object): value returned by the handler
+        accept (str | None): Accept header of the request
+        binary_media_types (tuple[str, ...]): isBase64Encoded bodies are decoded when the
+            Accept header matches one of them
+    Returns:
+        HttpResponse: HTTP response, 502 when the lambda response is malformed
+    """
+    if not isinstance(response, dict) or not isinstance(response.get("statusCode"), int):
+        return HttpResponse(502, list(JSON_HEADERS), INTERNAL_SERVER_ERROR_BODY)
+    headers = [
+        (name, _header_value(value)) for name, value in (response.get("headers") or {}).items()
+    ]
+    for name, values in (response.get("multiValueHeaders") or {}).items():
+        headers.extend((name, _header_value(value)) for value in values)
+    body = response.get("body") or ""
+    if response.get("isBase64Encoded") and is_binary_media_type(accept, binary_media_types):
+        body_bytes = base64.b64decode(body)
+    else:
+        body_bytes = body.encode("utf-8")
+    return HttpResponse(response["statusCode"], headers, body_bytes)
+
+
+# -----------------------------------------------------------------------------
+# API Gateway
+# -----------------------------------------------------------------------------
+class LocalApiGateway:
+    """Routes HTTP requests to lambda handlers invoked on a worker pool."""
+
+    def __init__(
+        self,
+        routes: list[Route] | None = None,
+        stage: str = "dev",
+        workers: int = 8,
+        timeout_s: float = 29.0,
+        binary_media_types: tuple[str, ...] = DEFAULT_BINARY_MEDIA_TYPES,
+    ):
+        """LocalApiGateway class init.
+
+        Args:
+            routes (list[Route]): routes, default: http events of serverless.yml
+            stage (str): API Gateway stage, optional prefix of every path
+            workers (int): max concurrent lambda invocations
+            timeout_s (float): lambda timeout, same as timeout in serverless.yml
+            binary_media_types (tuple[str, ...]): binaryMediaTypes, default: serverless.yml
+        """
+        self.stage = stage
+        self.timeout_s = timeout_s
+        self.binary_media_types = tuple(media_type.lower() for media_type in binary_media_types)
+        self.routes: dict[tuple[str, str], Callable[[dict, object], dict]] = {}
+        self.function_names: dict[tuple[str, str], str] = {}
+        for route in routes or DEFAULT_ROUTES:
+            key = (route.method.upper(), "/" + route.path.strip("/"))
+            self.routes[key] = load_handler(route.handler)
+            self.function_names[key] = f"{stage}-{route.handler.rpartition('.')[2]}"
+        self.allowed_methods: dict[str, list[str]] = {}
+        for method, path in self.routes:
+            self.allowed_methods.setdefault(path, ["OPTIONS"]).append(method)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lambda")
+
+    def strip_stage(self, path: str) -> str:
+        """Returns path without the optional stage prefix."""
+        stage_prefix = f"/{self.stage}"
+        if path == stage_prefix or path.startswith(stage_prefix + "/"):
+            path = path[len(stage_prefix) :]
+        return "/" + path.strip("/")
+
+    def invoke(
+        self,
+        method: str,
+        raw_path: str,
+        headers: list[tuple[str, str]],
+        body: bytes,
+        source_ip: str = "127.0.0.1",
+    ) -> HttpResponse:
+        """Handles one HTTP request.
+
+        Args:
+            method (str): HTTP method
+            raw_path (str): path including query string
+            headers (list[tuple[str, str]]): request headers
+            body (bytes): request body
+            source_ip (str): client IP
+        Returns:
+            HttpResponse: HTTP response
+        """
+        url = urlsplit(raw_path)
+        path = self.strip_stage(url.path)
+        if method == "OPTIONS" and path in self.allowed_methods:
+            return HttpResponse(
+                200,
+                [
+                    ("Access-Control-Allow-Origin", "*"),
+                    ("Access-Control-Allow-Headers", CORS_ALLOW_HEADERS),
+                    ("Access-Control-Allow-Methods", ",".join(self.allowed_methods[path])),
+                    ("Access-Control-Allow-Credentials", "false"),
+                    ("Content-Type", "application/json"),
+                ],
+                b"",
+            )
+        handler = self.routes.get((method, path))
+        if handler is None:
+            return HttpResponse(403, list(JSON_HEADERS), MISSING_AUTH_TOKEN_BODY)
+
+        event = build_proxy_event(
+            method,
+            path,
+            path,
+            self.stage,
+            url.query,
+            headers,
+            body,
+            source_ip,
+            self.binary_media_types,
+        )
+        context = LambdaContext(self.function_names[(method, path)], self.timeout_s)
+        future = self.executor.submit(handler, event, context)
+        try:
+            return proxy_response_to_http(
+                future.result(timeout=self.timeout_s),
+                first_header(headers, "Accept"),
+                self.binary_media_types,
+            )
+        except FutureTimeoutError:
+            return HttpResponse(504, list(JSON_HEADERS), TIMEOUT_BODY)
+        except Exception:
+            return HttpResponse(502, list(JSON_HEADERS), INTERNAL_SERVER_ERROR_BODY)
+
+    def shutdown(self) -> None:
+        """Stops the worker pool."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# -----------------------------------------------------------------------------
+# HTTP server
+# -----------------------------------------------------------------------------
+class LocalApiRequestHandler(BaseHTTPRequestHandler):
+    """Forwards every HTTP request to the LocalApiGateway of the server."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, every response has Content-Length
+    # headers and body leave in one segment, otherwise delayed ACKs add ~40ms per request
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    server: "LocalApiServer"
+
+    def _dispatch(self) -> None:
+        content_length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(content_length) if content_length else b""
+        response = self.server.gateway.invoke(
+            self.command, self.path, list(self.headers.items()), body, self.client_address[0]
+        )
+        self.send_response(response.status)
+        for name, value in response.headers:
+            if name.lower() != "content-length":
+                self.send_header(name, value)
+        self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(response.body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = _dispatch
+
+    def log_message(self, format: str, *args) -> None:
+        """Logs requests only when the server is verbose."""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class LocalApiServer(ThreadingHTTPServer):
+    """HTTP server of the local API Gateway."""
+
+    daemon_threads = True
+    request_queue_size = 128  # listen backlog, default 5 drops SYNs of concurrent clients
+
+    def __init__(self, address: tuple[str, int], gateway: LocalApiGateway, verbose: bool = False):
+        """LocalApiServer class init."""
+        super().__init__(address, LocalApiRequestHandler)
+        self.gateway = gateway
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        """Base URL including stage, value for ABK_HELLO_API_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/{self.gateway.stage}"
+
+    def server_close(self) -> None:
+        """Closes the socket and stops the worker pool."""
+        super().server_close()
+        self.gateway.shutdown()
+
+
+def start_local_api(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    gateway: LocalApiGateway | None = None,
+    verbose: bool = False,
+) -> LocalApiServer:
+    """Starts the local API in a background thread.
+
+    Args:
+        host (str): interface to listen on
+        port (int): port, 0 picks a free port
+        gateway (LocalApiGateway): gateway, default: serverless.yml routes on stage dev
+        verbose (bool): log every request
+    Returns:
+        LocalApiServer: running server, stop it with shutdown() and server_close()
+    """
+    server = LocalApiServer((host, port), gateway or LocalApiGateway(), verbose)
+    Thread(target=server.serve_forever, name="local-api", daemon=True).start()
+    return server
+
+
+def parse_route(value: str) -> Route:
+    """Parses METHOD:/path=module.function command line route."""
+    method_path, _, handler = value.partition("=")
+    method, _, path = method_path.partition(":")
+    if not (method and path and handler):
+        raise argparse.ArgumentTypeError(f"expected METHOD:/path=module.function, got {value}")
+    return Route(method=method.upper(), path=path, handler=handler)
+
+
+def main() -> int:
+    """Runs the local API until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=3000, help="port to listen on")
+    parser.add_argument("--stage", default="dev", help="API Gateway stage")
+    parser.add_argument("--workers", type=int, default=8, help="max concurrent invocations")
+    parser.add_argument("--timeout", type=float, default=29.0, help="lambda timeout in s")
+    parser.add_argument(
+        "--route",
+        type=parse_route,
+        action="append",
+        help="METHOD:/path=module.function, repeatable, default: serverless.yml http events",
+    )
+    parser.add_argument(
+        "--binary-media-type",
+        action="append",
+        help="binaryMediaTypes entry, repeatable, default: serverless.yml application/json",
+    )
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    gateway = LocalApiGateway(
+        args.route,
+        args.stage,
+        args.workers,
+        args.timeout,
+        tuple(args.binary_media_type or DEFAULT_BINARY_MEDIA_TYPES),
+    )
+    server = LocalApiServer((args.host, args.port), gateway, args.verbose)
+    print(json.dumps({"ABK_HELLO_API_URL": server.url}), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""Pre-warmer of the abk-hello lambda: N concurrent warm-up invocations keep N containers hot.
+
+Lambda starts a new container for every invocation arriving while all of its containers are
+busy. The pre-warmer releases N warm-up invocations at once, each holds its container for
+--delay-ms, so they overlap and reach N distinct containers, which are then warm for the
+following traffic. Run it shortly before an expected traffic spike (e.g. the morning
+ramp-up) with N about the expected concurrency, or on a schedule.
+
+The handler answers warm-ups ({"source": "abk.warmup"}) without validation, logging or
+encoding, with its container id and age. The report counts the distinct containers which
+answered and how many of them were started by this warm-up (cold), plus failed invocations.
+Invocations are synchronous (RequestResponse) through boto3 with the default credentials,
+--local invokes the handler in-process instead, one container.
+
+Usage:
+    python tools/prewarm.py [--stage dev] [--concurrency 10] [--delay-ms 100] [--local]
+"""
+
+# Standard imports
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+# local imports
+from local_api import LambdaContext, load_handler
+
+
+DEFAULT_CONCURRENCY = 10
+DEFAULT_DELAY_MS = 100
+WARMUP_SOURCE = "abk.warmup"
+# the handler holds a container at most this long, see abk_hello.MAX_WARMUP_DELAY_MS
+MAX_DELAY_MS = 1000
+MAX_ERROR_EXAMPLES = 10
+
+Invoker = Callable[[dict], dict]  # warm-up event -> decoded response of the function
+
+
+class WarmupResult(NamedTuple):
+    """Response of one warm-up invocation."""
+
+    container_id: str | None
+    cold: bool
+    duration_ms: float
+    error: str | None
+
+
+# -----------------------------------------------------------------------------
+# invokers
+# -----------------------------------------------------------------------------
+def function_name(stage: str) -> str:
+    """Returns name of the deployed abk-hello function, see name in serverless.yml."""
+    return f"abk-hello-{stage}-abkHello"
+
+
+def lambda_invoker(
+    name: str, concurrency: int, region: str | None = None, qualifier: str | None = None
+) -> Invoker:
+    """Returns invoker of the deployed function, one boto3 client shared by all threads.
+
+    Args:
+        name (str): function name or ARN
+        concurrency (int): concurrent invocations, size of the HTTP connection pool
+        region (str | None): AWS region, default of the boto3 session when None
+        qualifier (str | None): version or alias
+    """
+    import boto3
+    from botocore.config import Config
+
+    client = boto3.client(
+        "lambda",
+        region_name=region,
+        config=Config(max_pool_connections=concurrency, retries={"max_attempts": 0}),
+    )
+    extra_args = {"Qualifier": qualifier} if qualifier else {}
+
+    def invoke(event: dict) -> dict:
+        response = client.invoke(
+            FunctionName=name,
+            InvocationType="RequestResponse",
+            Payload=json.dumps(event).encode(),
+            **extra_args,
+        )
+        payload = json.loads(response["Payload"].read() or b"null")
+        if "FunctionError" in response:
+            raise RuntimeError(f"{response['FunctionError']}: {payload}")
+        return payload
+
+    return invoke
+
+
+def local_invoker(handler: str = "abk_hello.abk_hello.handler") -> Invoker:
+    """Returns invoker of the handler in this process."""
+    function = load_handler(handler)
+    return lambda event: function(event, LambdaContext(function_name("local"), timeout_s=29))
+
+
+# -----------------------------------------------------------------------------
+# pre-warming
+# -----------------------------------------------------------------------------
+def warm_up(invoke: Invoker, event: dict) -> WarmupResult:
+    """Invokes one warm-up, returns the answering container."""
+    started = time.perf_counter()
+    try:
+        response = invoke(event)
+    except Exception as exc:
+        return WarmupResult(None, False, (time.perf_counter() - started) * 1000, repr(exc))
+    duration_ms = (time.perf_counter() - started) * 1000
+    if not isinstance(response, dict) or not response.get("warmup"):
+        return WarmupResult(None, False, duration_ms, f"not a warm-up response: {response!r}")
+    # a container younger than the invocation was started by it, ages are whole ms
+    cold = response.get("containerAgeMs", 0) < duration_ms + 1
+    return WarmupResult(response.get("containerId"), cold, duration_ms, None)
+
+
+def prewarm(
+    invoke: Invoker, concurrency: int = DEFAULT_CONCURRENCY, delay_ms: int = DEFAULT_DELAY_MS
+) -> dict:
+    """Sends concurrency warm-up invocations at once, returns the report.
+
+    Args:
+        invoke (Invoker): sends a warm-up event to the function, returns its response
+        concurrency (int): warm-ups released at the same time, containers to keep warm
+        delay_ms (int): ms every warm-up holds its container, so the warm-ups overlap
+    Returns:
+        dict: invocations, distinct and cold containers, errors and durations
+    """
+    event = {"source": WARMUP_SOURCE, "delayMs": min(max(0, delay_ms), MAX_DELAY_MS)}
+    # releases all threads at once, a thread started late would find a container free again
+    barrier = threading.Barrier(concurrency)
+
+    def send() -> WarmupResult:
+        with contextlib.suppress(threading.BrokenBarrierError):
+            barrier.wait(timeout=10)
+        return warm_up(invoke, event)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: send(), range(concurrency)))
+    wall_s = time.perf_counter() - started
+
+    answered = [result for result in results if result.error is None]
+    containers = {result.container_id for result in answered}
+    cold_containers = {result.container_id for result in answered if result.cold}
+    durations = sorted(result.duration_ms for result in answered)
+    errors = [result.error for result in results if result.error is not None]
+    return {
+        "invocations": concurrency,
+        "delay_ms": event["delayMs"],
+        "answered": len(answered),
+        "containers": len(containers),
+        "cold_containers": len(cold_containers),
+        "warm_containers": len(containers - cold_containers),
+        "errors": len(errors),
+        "error_examples": errors[:MAX_ERROR_EXAMPLES],
+        "wall_s": round(wall_s, 3),
+        "duration_ms": {
+            "min": round(durations[0], 1) if durations else None,
+            "p50": round(durations[len(durations) // 2], 1) if durations else None,
+            "max": round(durations[-1], 1) if durations else None,
+        },
+    }
+
+
+def main() -> int:
+    """Pre-warms the function, prints the report, exits 1 when invocations failed."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stage", default=os.environ.get("ABK_DEPLOYMENT_ENV", "dev"))
+    parser.add_argument("--function", help="function name or ARN, default of the stage")
+    parser.add_argument("--region", default=os.environ.get("AWS_REGION"))
+    parser.add_argument("--qualifier", help="version or alias to warm up")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--delay-ms", type=int, default=DEFAULT_DELAY_MS)
+    parser.add_argument("--local", action="store_true", help="invoke the handler in-process")
+    parser.add_argument("--output", help="write JSON report to this file")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        print("ERROR: --concurrency must be at least 1", file=sys.stderr)
+        return 2
+
+    if args.local:
+        invoke = local_invoker()
+    else:
+        name = args.function or function_name(args.stage)
+        try:
+            invoke = lambda_invoker(name, args.concurrency, args.region, args.qualifier)
+        except ImportError as exc:
+            print(f"ERROR: boto3 is needed to invoke {name}: {exc}", file=sys.stderr)
+            return 2
+    report = prewarm(invoke, args.concurrency, args.delay_ms)
+    print(json.dumps(report, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    if report["errors"]:
+        print(f"FAIL: {report['errors']} of {report['invocations']} warm-ups failed")
+        return 1
+    print(
+        f"PASS: {report['containers']} containers warm, {report['cold_containers']} started "
+        f"by {report['invocations']} concurrent warm-ups"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,423 @@
+"""Multi-process replay of recorded API Gateway events through the abk-hello handler.
+
+Streams lambda proxy events from a JSONL file, optionally gzip compressed (.gz), through
+the handler on a pool of worker processes and compares every response with the recorded one.
+Each line is either an event or {"event": {...}, "response": {...}}, the lambda response that
+was returned for it; lines without a response are only replayed, for throughput. Reports the
+replayed events per second over all workers and per busy core, handler latency percentiles,
+handler exceptions and the first mismatching responses with their line numbers.
+
+Memory stays bounded for files of any size: lines are read lazily, sent in chunks of raw lines
+(decoded by the workers) and only 2 chunks per worker are in flight. Workers are spawned fresh
+and import the handler like a cold container, environment overrides (--env) apply to them. The
+per-device rate limiter is disabled by default, a replay runs much faster than the recorded
+traffic did. Every worker passes one reused, cheap context object to the handler.
+
+Usage:
+    python tools/replay.py events.jsonl.gz [--workers N] [--chunk-size 1000] [--limit N]
+"""
+
+# Standard imports
+import argparse
+import base64
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import NamedTuple
+
+# local imports
+from local_api import load_handler
+
+
+DEFAULT_HANDLER = "abk_hello.abk_hello.handler"
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_MAX_MISMATCHES = 20
+# a replay runs faster than the recorded traffic, the limiter would answer 429
+DEFAULT_ENV = {"ABK_RATE_LIMIT_RPS": "0"}
+# headers whose values differ between invocations
+DEFAULT_IGNORED_HEADERS = ("Server-Timing",)
+CHUNKS_PER_WORKER = 2
+# handler latency histogram buckets: < 2 ** index us
+LATENCY_BUCKETS = 32
+MAX_DIFF_CHARS = 200
+
+
+class ReplayContext:
+    """Lambda context object, one per worker, reused for every event."""
+
+    __slots__ = ("aws_request_id", "function_name", "function_version", "memory_limit_in_mb")
+
+    def __init__(self, function_name: str):
+        """ReplayContext class init."""
+        self.aws_request_id = ""
+        self.function_name = function_name
+        self.function_version = "$LATEST"
+        self.memory_limit_in_mb = 1024
+
+    def get_remaining_time_in_millis(self) -> int:
+        """Returns remaining execution time in ms, replayed events never time out."""
+        return 29000
+
+
+class ChunkResult(NamedTuple):
+    """Replay result of one chunk of lines."""
+
+    events: int
+    compared: int
+    mismatches: int
+    mismatch_examples: list[dict]
+    errors: int
+    error_examples: list[dict]
+    invalid_lines: int
+    handler_ns: int
+    cpu_s: float
+    latency_counts: list[int]
+
+
+# -----------------------------------------------------------------------------
+# reading
+# -----------------------------------------------------------------------------
+def open_events(path: Path):
+    """Opens JSONL file as text, gzip decompressed when it has gzip magic bytes."""
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == b"\x1f\x8b":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def read_chunks(
+    path: Path, chunk_size: int, limit: int | None = None
+) -> Iterator[list[tuple[int, str]]]:
+    """Yields chunks of (line number, line) of the non-empty lines, lazily.
+
+    Args:
+        path (Path): JSONL file, optionally gzip compressed
+        chunk_size (int): lines per chunk
+        limit (int | None): stop after this many lines
+    """
+    chunk = []
+    count = 0
+    with open_events(path) as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            chunk.append((line_no, line))
+            count += 1
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+            if limit is not None and count >= limit:
+                break
+    if chunk:
+        yield chunk
+
+
+# -----------------------------------------------------------------------------
+# comparison
+# -----------------------------------------------------------------------------
+def _short(value: object) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return text if len(text) <= MAX_DIFF_CHARS else f"{text[:MAX_DIFF_CHARS]}..."
+
+
+def _body(response: dict) -> object:
+    """Returns response body decoded from base64 and JSON where possible."""
+    body = response.get("body")
+    if response.get("isBase64Encoded") and isinstance(body, str):
+        try:
+            body = base64.b64decode(body)
+        except ValueError:
+            return body
+    try:
+        return json.loads(body) if isinstance(body, (str, bytes)) else body
+    except ValueError:
+        return body
+
+
+def diff_response(expected: dict, actual: object, ignored_headers: frozenset) -> dict:
+    """Returns field -> {"expected", "actual"} of every difference, empty when they match.
+
+    Status code and body (JSON bodies compared as values) must be equal, headers only the
+    ones of the recorded response without the ignored headers.
+    """
+    if not isinstance(actual, dict):
+        return {"response": {"expected": _short(expected), "actual": _short(actual)}}
+    differences = {}
+    if expected.get("statusCode") != actual.get("statusCode"):
+        differences["statusCode"] = {
+            "expected": expected.get("statusCode"),
+            "actual": actual.get("statusCode"),
+        }
+    expected_body, actual_body = _body(expected), _body(actual)
+    if expected_body != actual_body:
+        differences["body"] = {"expected": _short(expected_body), "actual": _short(actual_body)}
+    actual_headers = actual.get("headers") or {}
+    for name, value in (expected.get("headers") or {}).items():
+        if name not in ignored_headers and actual_headers.get(name) != value:
+            differences[f"headers.{name}"] = {
+                "expected": value,
+                "actual": actual_headers.get(name),
+            }
+    return differences
+
+
+# -----------------------------------------------------------------------------
+# worker
+# -----------------------------------------------------------------------------
+_worker: dict = {}
+
+
+def init_worker(handler: str, ignored_headers: tuple[str, ...], max_examples: int) -> None:
+    """Imports the handler in the worker process, the cold start of its container."""
+    logging.disable(logging.CRITICAL)
+    _worker.update(
+        handler=load_handler(handler),
+        context=ReplayContext(handler.rpartition(".")[0]),
+        ignored_headers=frozenset(ignored_headers),
+        max_examples=max_examples,
+    )
+
+
+def replay_chunk(chunk: list[tuple[int, str]]) -> ChunkResult:
+    """Replays one chunk of lines through the handler of this worker."""
+    handler: Callable[[dict, object], dict] = _worker["handler"]
+    context: ReplayContext = _worker["context"]
+    ignored_headers = _worker["ignored_headers"]
+    max_examples = _worker["max_examples"]
+    events = compared = mismatches = errors = invalid_lines = handler_ns = 0
+    mismatch_examples: list[dict] = []
+    error_examples: list[dict] = []
+    latency_counts = [0] * LATENCY_BUCKETS
+    cpu_started = time.process_time()
+    for line_no, line in chunk:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            invalid_lines += 1
+            continue
+        if not isinstance(record, dict):
+            invalid_lines += 1
+            continue
+        if "event" in record:
+            event, expected = record["event"], record.get("response")
+        else:
+            event, expected = record, None
+        context.aws_request_id = f"replay-{line_no}"
+        events += 1
+        started = time.perf_counter_ns()
+        try:
+            actual = handler(event, context)
+        except Exception as exc:
+            elapsed = time.perf_counter_ns() - started
+            errors += 1
+            if len(error_examples) < max_examples:
+                error_examples.append({"line": line_no, "error": repr(exc)})
+            actual = None
+        else:
+            elapsed = time.perf_counter_ns() - started
+        handler_ns += elapsed
+        latency_counts[min(max(elapsed // 1000, 1).bit_length() - 1, LATENCY_BUCKETS - 1)] += 1
+        if expected is None or actual is None:
+            continue
+        compared += 1
+        differences = diff_response(expected, actual, ignored_headers)
+        if differences:
+            mismatches += 1
+            if len(mismatch_examples) < max_examples:
+                mismatch_examples.append({"line": line_no, "differences": differences})
+    return ChunkResult(
+        events=events,
+        compared=compared,
+        mismatches=mismatches,
+        mismatch_examples=mismatch_examples,
+        errors=errors,
+        error_examples=error_examples,
+        invalid_lines=invalid_lines,
+        handler_ns=handler_ns,
+        cpu_s=time.process_time() - cpu_started,
+        latency_counts=latency_counts,
+    )
+
+
+# -----------------------------------------------------------------------------
+# replay
+# -----------------------------------------------------------------------------
+def latency_percentile_us(counts: list[int], percentile: float) -> int | None:
+    """Returns upper bound of the histogram bucket holding the percentile, in us."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = total * percentile / 100
+    seen = 0
+    for index, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return 2 ** (index + 1)
+    return 2**LATENCY_BUCKETS
+
+
+def replay(
+    path: Path,
+    handler: str = DEFAULT_HANDLER,
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    limit: int | None = None,
+    env: dict[str, str] | None = None,
+    ignored_headers: tuple[str, ...] = DEFAULT_IGNORED_HEADERS,
+    max_mismatches: int = DEFAULT_MAX_MISMATCHES,
+) -> dict:
+    """Replays the events of the JSONL file, returns the report.
+
+    Args:
+        path (Path): JSONL file of events or {"event", "response"} records, optionally gzip
+        handler (str): module.function, same as the handler in serverless.yml
+        workers (int | None): worker processes, default one per CPU
+        chunk_size (int): lines sent to a worker at once
+        limit (int | None): replay only the first limit lines
+        env (dict[str, str] | None): environment of the workers, on top of DEFAULT_ENV
+        ignored_headers (tuple[str, ...]): headers not compared
+        max_mismatches (int): mismatch and error examples kept in the report
+    Returns:
+        dict: totals, throughput, latency percentiles and mismatch examples
+    """
+    workers = workers or os.cpu_count() or 1
+    totals = {
+        "events": 0,
+        "compared": 0,
+        "mismatches": 0,
+        "errors": 0,
+        "invalid_lines": 0,
+        "handler_ns": 0,
+        "cpu_s": 0.0,
+    }
+    mismatch_examples: list[dict] = []
+    error_examples: list[dict] = []
+    latency_counts = [0] * LATENCY_BUCKETS
+
+    def merge(future: Future) -> None:
+        result: ChunkResult = future.result()
+        for key in totals:
+            totals[key] += getattr(result, key)
+        mismatch_examples.extend(result.mismatch_examples)
+        error_examples.extend(result.error_examples)
+        for index, count in enumerate(result.latency_counts):
+            latency_counts[index] += count
+
+    # workers are spawned and read the environment when importing the handler
+    overrides = {**DEFAULT_ENV, **(env or {})}
+    saved_env = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(handler, tuple(ignored_headers), max_mismatches),
+        ) as pool:
+            pending: set[Future] = set()
+            for chunk in read_chunks(path, chunk_size, limit):
+                if len(pending) >= workers * CHUNKS_PER_WORKER:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merge(future)
+                pending.add(pool.submit(replay_chunk, chunk))
+            for future in wait(pending).done:
+                merge(future)
+    finally:
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    wall_s = time.perf_counter() - started
+
+    events = totals["events"]
+    handler_s = totals["handler_ns"] / 1e9
+    return {
+        "file": str(path),
+        "handler": handler,
+        "workers": workers,
+        "events": events,
+        "compared": totals["compared"],
+        "mismatches": totals["mismatches"],
+        "errors": totals["errors"],
+        "invalid_lines": totals["invalid_lines"],
+        "wall_s": round(wall_s, 3),
+        "events_per_s": round(events / wall_s) if wall_s else None,
+        # events one core replays per second, only counting the time spent in the handler
+        "events_per_s_per_core": round(events / handler_s) if handler_s else None,
+        "cpu_us_per_event": round(totals["cpu_s"] / events * 1e6, 1) if events else None,
+        "handler_latency_us": {
+            "p50_max": latency_percentile_us(latency_counts, 50),
+            "p99_max": latency_percentile_us(latency_counts, 99),
+            "p999_max": latency_percentile_us(latency_counts, 99.9),
+        },
+        "mismatch_examples": sorted(mismatch_examples, key=lambda e: e["line"])[:max_mismatches],
+        "error_examples": sorted(error_examples, key=lambda e: e["line"])[:max_mismatches],
+    }
+
+
+def parse_env(value: str) -> tuple[str, str]:
+    """Parses NAME=VALUE of --env."""
+    name, separator, env_value = value.partition("=")
+    if not (name and separator):
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {value}")
+    return name, env_value
+
+
+def main() -> int:
+    """Replays the file, prints the report, exits 1 on mismatches or handler exceptions."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("events", type=Path, help="JSONL file, optionally gzip compressed")
+    parser.add_argument("--handler", default=DEFAULT_HANDLER, help="module.function")
+    parser.add_argument("--workers", type=int, help="worker processes, default: CPU count")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--limit", type=int, help="replay only the first N events")
+    parser.add_argument(
+        "--env", type=parse_env, action="append", default=[], help="NAME=VALUE for the workers"
+    )
+    parser.add_argument(
+        "--ignore-header",
+        action="append",
+        default=list(DEFAULT_IGNORED_HEADERS),
+        help="response header not compared, repeatable",
+    )
+    parser.add_argument("--max-mismatches", type=int, default=DEFAULT_MAX_MISMATCHES)
+    parser.add_argument("--output", type=Path, help="write JSON report to this file")
+    args = parser.parse_args()
+
+    try:
+        report = replay(
+            args.events,
+            handler=args.handler,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            limit=args.limit,
+            env=dict(args.env),
+            ignored_headers=tuple(args.ignore_header),
+            max_mismatches=args.max_mismatches,
+        )
+    except (OSError, EOFError, UnicodeDecodeError) as exc:
+        print(f"ERROR: cannot read {args.events}: {exc}", file=sys.stderr)
+        return 2
+    print(json.dumps(report, indent=4))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=4))
+    if report["mismatches"] or report["errors"]:
+        print(f"FAIL: {report['mismatches']} mismatches, {report['errors']} handler exceptions")
+        return 1
+    print(f"PASS: {report['events']} events replayed, {report['compared']} responses match")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,650 @@
+#!/usr/bin/env python3
+"""
+Reproducible, bytecode-precompiled deployment artifacts for services under services/envs.
+
+The Lambda task root (/var/task) is read-only, so a cold container compiles every .py file
+it imports to bytecode in memory before it can serve, again in every new container. This
+builder packages a service the way Lambda runs it and removes that work from the cold start:
+
+    1. reads runtime, architecture, handlers and PYTHONPATH from the service's serverless.yml
+    2. installs requirements.txt for the target runtime and architecture into a staging
+       directory (uv pip when uv is on PATH, else pip), or takes an installed --deps-dir
+    3. strips tests, docs, examples, type stubs, C sources, *.dist-info and stale __pycache__
+       from the dependencies
+    4. adds the handler packages (default <handler dir>/*.py, like the serverless patterns),
+       identical files mapped to the same path twice are added once
+    5. precompiles every .py file with unchecked hash based .pyc files for the target runtime,
+       which stay valid whatever time stamps the zip extraction gives the sources
+    6. writes a reproducible zip: sorted entries, fixed time stamps and permissions
+    7. imports every handler from the extracted zip and reports its median import time with
+       and without the precompiled bytecode, next to file counts and sizes
+
+Bytecode is only valid for the interpreter version that wrote it, so the builder must run on
+the target runtime (python3.11 for runtime: python3.11, `uv run` in the service does that).
+Builds are cached by a content hash of all inputs in $XDG_CACHE_HOME/abk_cloud/artifacts
+(default ~/.cache/abk_cloud/artifacts): an unchanged service is copied from the cache without
+installing its requirements again.
+
+With --requirements-in-layer the dependencies come from the shared Lambda layer built by
+layer_builder.py and the zip only has the service's own files, the requirements are only
+installed to import the handlers next to the extracted zip, where the layer would be.
+
+Usage:
+    python3 artifact_builder.py services/envs/common/abk-hello [--deps-dir DIR] [--sourceless]
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import py_compile
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+# bump when the artifact layout changes, it invalidates all cached builds
+BUILDER_VERSION = "1"
+LAMBDA_TASK_ROOT = "/var/task"
+# earliest time stamp a zip entry can have
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_FILE_MODE = 0o644 << 16
+DEFAULT_ARCHITECTURE = "x86_64"
+DEFAULT_IMPORT_RUNS = 5
+DEFAULT_CACHE_KEEP = 20
+INSTALL_TIMEOUT_S = 600
+# architecture -> (pip --platform, uv pip --python-platform)
+PLATFORMS = {
+    "x86_64": ("manylinux2014_x86_64", "x86_64-manylinux2014"),
+    "arm64": ("manylinux2014_aarch64", "aarch64-manylinux2014"),
+}
+# directory names stripped from the dependencies at any depth -> reason in the report
+STRIP_DIRS = {
+    "tests": "tests",
+    "test": "tests",
+    "docs": "docs",
+    "doc": "docs",
+    "examples": "examples",
+    "benchmarks": "benchmarks",
+    "__pycache__": "bytecode",
+}
+STRIP_DIR_SUFFIXES = (".dist-info", ".egg-info")
+# console scripts of pip install --target, nothing imports them
+STRIP_TOP_LEVEL_DIRS = {"bin"}
+STRIP_FILE_SUFFIXES = {
+    ".pyi": "sources",
+    ".pyx": "sources",
+    ".pxd": "sources",
+    ".c": "sources",
+    ".h": "sources",
+    ".cpp": "sources",
+    ".pyc": "bytecode",
+    ".md": "docs",
+    ".rst": "docs",
+}
+
+
+class ArtifactBuildError(Exception):
+    """Raised when the artifact cannot be built."""
+
+
+class ServiceConfig(NamedTuple):
+    """Settings of serverless.yml the artifact depends on."""
+
+    name: str
+    runtime: str
+    architecture: str
+    handlers: List[str]
+    pythonpath: List[str]
+
+
+# -----------------------------------------------------------------------------
+# service configuration
+# -----------------------------------------------------------------------------
+def _yaml_values(text: str, key: str) -> List[str]:
+    """Return values of all not commented `key: value` lines of the YAML text.
+
+    serverless.yml has CloudFormation tags (!Sub) a plain YAML loader rejects, and only a few
+    scalars are needed.
+    """
+    pattern = re.compile(rf"^\s*{re.escape(key)}:\s*[\"']?([^\"'\s#]+)", re.MULTILINE)
+    return pattern.findall(text)
+
+
+def read_service_config(service_dir: Path) -> ServiceConfig:
+    """Return name, runtime, architecture, handlers and PYTHONPATH of the serverless.yml.
+
+    The name is the serverless service name, the directory name when there is none.
+
+    Raises:
+        ArtifactBuildError: when serverless.yml is missing or has no python runtime or handler
+    """
+    serverless_yml = service_dir / "serverless.yml"
+    try:
+        text = serverless_yml.read_text()
+    except OSError as e:
+        raise ArtifactBuildError(f"cannot read {serverless_yml}: {e}") from e
+    runtimes = [value for value in _yaml_values(text, "runtime") if value.startswith("python")]
+    handlers = _yaml_values(text, "handler")
+    if not runtimes or not handlers:
+        raise ArtifactBuildError(f"{serverless_yml} needs a python runtime and a handler")
+    names = _yaml_values(text, "service")
+    architectures = _yaml_values(text, "architecture")
+    pythonpath = _yaml_values(text, "PYTHONPATH")
+    return ServiceConfig(
+        name=names[0] if names else service_dir.resolve().name,
+        runtime=runtimes[0],
+        architecture=architectures[0] if architectures else DEFAULT_ARCHITECTURE,
+        handlers=handlers,
+        pythonpath=pythonpath[0].split(":") if pythonpath else [],
+    )
+
+
+def handler_module(handler: str) -> str:
+    """Return module Lambda imports for the handler: src/pkg/mod.handler -> src.pkg.mod."""
+    return handler.rsplit(".", 1)[0].replace("/", ".")
+
+
+def check_runtime(runtime: str) -> None:
+    """Raise ArtifactBuildError unless this interpreter writes bytecode for the runtime."""
+    current = f"python{sys.version_info.major}.{sys.version_info.minor}"
+    if current != runtime:
+        raise ArtifactBuildError(
+            f"bytecode for runtime {runtime} must be compiled by {runtime}, not {current}"
+        )
+
+
+# -----------------------------------------------------------------------------
+# inputs
+# -----------------------------------------------------------------------------
+def sha256_file(path: Path) -> str:
+    """Return hex sha256 of the file content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def collect_sources(service_dir: Path, patterns: List[str]) -> Dict[str, Path]:
+    """Return archive path -> file of all files of the service matching the glob patterns."""
+    sources = {}
+    for pattern in patterns:
+        for path in sorted(service_dir.glob(pattern)):
+            if path.is_file() and "__pycache__" not in path.parts:
+                sources[path.relative_to(service_dir).as_posix()] = path
+    return sources
+
+
+def strip_reason(relative: Path) -> Optional[str]:
+    """Return why a dependency file is not packaged, None when it is."""
+    directories = relative.parts[:-1]
+    if directories and directories[0] in STRIP_TOP_LEVEL_DIRS:
+        return "scripts"
+    for directory in directories:
+        if directory.endswith(STRIP_DIR_SUFFIXES):
+            return "metadata"
+        if directory in STRIP_DIRS:
+            return STRIP_DIRS[directory]
+    return STRIP_FILE_SUFFIXES.get(relative.suffix)
+
+
+def collect_dependencies(
+    deps_dir: Path, keep_dist_info: bool
+) -> Tuple[Dict[str, Path], Dict[str, Dict[str, int]]]:
+    """Return archive path -> file of the installed dependencies and the stripped files.
+
+    Returns:
+        Tuple: packaged files, reason -> {"files": count, "bytes": size} of stripped files
+    """
+    files = {}
+    stripped: Dict[str, Dict[str, int]] = {}
+    for path in sorted(deps_dir.rglob("*")):
+        if not path.is_file():
+            continue
+        relative = path.relative_to(deps_dir)
+        reason = strip_reason(relative)
+        if reason == "metadata" and keep_dist_info:
+            reason = None
+        if reason is None:
+            files[relative.as_posix()] = path
+            continue
+        counts = stripped.setdefault(reason, {"files": 0, "bytes": 0})
+        counts["files"] += 1
+        counts["bytes"] += path.stat().st_size
+    return files, stripped
+
+
+def merge_files(*file_maps: Dict[str, Path]) -> Tuple[Dict[str, Path], Dict[str, int]]:
+    """Return all files by archive path, identical files mapped to the same path are added once.
+
+    Raises:
+        ArtifactBuildError: when two different files map to the same archive path
+    """
+    merged: Dict[str, Path] = {}
+    digests: Dict[str, str] = {}
+    deduplicated = {"files": 0, "bytes": 0}
+    for file_map in file_maps:
+        for arcname, path in file_map.items():
+            digest = sha256_file(path)
+            if arcname not in merged:
+                merged[arcname], digests[arcname] = path, digest
+            elif digests[arcname] == digest:
+                deduplicated["files"] += 1
+                deduplicated["bytes"] += path.stat().st_size
+            else:
+                raise ArtifactBuildError(f"{path} and {merged[arcname]} both map to {arcname}")
+    return merged, deduplicated
+
+
+def read_requirements(requirements: Optional[Path]) -> List[str]:
+    """Return requirement lines without comments, empty when there is no requirements file."""
+    if requirements is None or not requirements.is_file():
+        return []
+    lines = (line.split("#", 1)[0].strip() for line in requirements.read_text().splitlines())
+    return [line for line in lines if line]
+
+
+def install_requirements(
+    requirements: Path, target: Path, runtime: str, architecture: str
+) -> None:
+    """Install binary wheels of the requirements for the Lambda runtime into target.
+
+    Raises:
+        ArtifactBuildError: when the installer fails
+    """
+    python_version = runtime[len("python") :]
+    pip_platform, uv_platform = PLATFORMS[architecture]
+    if shutil.which("uv"):
+        command = [
+            "uv", "pip", "install", "--quiet",
+            "--target", str(target),
+            "--requirement", str(requirements),
+            "--python-version", python_version,
+            "--python-platform", uv_platform,
+            "--only-binary", ":all:",
+        ]
+    else:
+        command = [
+            sys.executable, "-m", "pip", "install", "--quiet", "--no-compile",
+            "--target", str(target),
+            "--requirement", str(requirements),
+            "--python-version", python_version,
+            "--platform", pip_platform,
+            "--implementation", "cp",
+            "--only-binary=:all:",
+        ]
+    try:
+        subprocess.run(
+            command, capture_output=True, text=True, timeout=INSTALL_TIMEOUT_S, check=True
+        )
+    except subprocess.CalledProcessError as e:
+        raise ArtifactBuildError(f"installing {requirements} failed: {e.stderr.strip()}") from e
+    except (OSError, subprocess.SubprocessError) as e:
+        raise ArtifactBuildError(f"installing {requirements} failed: {e}") from e
+
+
+def cache_key(
+    config: ServiceConfig,
+    sources: Dict[str, Path],
+    dependencies: Dict[str, str],
+    options: Dict[str, object],
+) -> str:
+    """Return content hash of everything the artifact is built from.
+
+    Args:
+        config: settings of serverless.yml
+        sources: archive path -> file of the service sources
+        dependencies: name -> sha256 of the requirements file or of every installed file
+        options: build options changing the artifact
+    """
+    digest = hashlib.sha256()
+    header = {
+        "builder": BUILDER_VERSION,
+        "python": sys.version,
+        "config": config._asdict(),
+        "options": options,
+    }
+    digest.update(json.dumps(header, sort_keys=True).encode())
+    for arcname, path in sorted(sources.items()):
+        digest.update(f"\0src\0{arcname}\0{sha256_file(path)}".encode())
+    for name, file_digest in sorted(dependencies.items()):
+        digest.update(f"\0dep\0{name}\0{file_digest}".encode())
+    return digest.hexdigest()
+
+
+# -----------------------------------------------------------------------------
+# staging and zip
+# -----------------------------------------------------------------------------
+def stage_files(
+    files: Dict[str, Path], staging: Path, sourceless: bool, task_root: str = LAMBDA_TASK_ROOT
+) -> List[str]:
+    """Copy files into staging and precompile the .py files, return files that do not compile.
+
+    Bytecode uses unchecked hash invalidation: the loader neither compares the source mtime
+    nor hashes the source, so the .pyc files are valid for any extraction time stamps. The
+    recorded file name is the path in task_root, the directory staging is extracted to, so
+    tracebacks show the deployed path.
+    With sourceless, module.pyc replaces module.py next to it and the source is dropped.
+    """
+    not_compiled = []
+    for arcname, path in files.items():
+        staged = staging / arcname
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, staged)
+        if staged.suffix != ".py":
+            continue
+        cfile = staged.with_suffix(".pyc") if sourceless else importlib.util.cache_from_source(
+            str(staged)
+        )
+        try:
+            py_compile.compile(
+                str(staged),
+                cfile=str(cfile),
+                dfile=f"{task_root}/{arcname}",
+                doraise=True,
+                invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+            )
+        except py_compile.PyCompileError:
+            # e.g. python 2 only modules some packages still ship, never imported
+            not_compiled.append(arcname)
+            continue
+        if sourceless:
+            staged.unlink()
+    return sorted(not_compiled)
+
+
+def write_zip(staging: Path, artifact: Path) -> None:
+    """Write staging as zip whose bytes only depend on the staged file names and contents."""
+    paths = sorted(path for path in staging.rglob("*") if path.is_file())
+    with zipfile.ZipFile(artifact, "w") as archive:
+        for path in paths:
+            info = zipfile.ZipInfo(path.relative_to(staging).as_posix(), ZIP_DATE_TIME)
+            info.create_system = 3
+            info.external_attr = ZIP_FILE_MODE
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, path.read_bytes(), compresslevel=9)
+
+
+def measure_import_us(
+    root: Path, module: str, pythonpath: List[str], extra_paths: Optional[List[Path]] = None
+) -> int:
+    """Return cumulative -X importtime of module in a fresh interpreter running in root.
+
+    extra_paths come after the artifact on sys.path, like /opt/python of the layers.
+
+    Raises:
+        ArtifactBuildError: when the module does not import from the artifact
+    """
+    paths = [root] + [root / entry for entry in pythonpath] + list(extra_paths or [])
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(str(path) for path in paths),
+        # like the read-only task root, nothing compiled during the import is kept
+        PYTHONDONTWRITEBYTECODE="1",
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=root,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise ArtifactBuildError(f"import {module} from the artifact failed:\n{result.stderr}")
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "self [us]" not in line:
+            _, cumulative, name = line[len("import time:") :].split("|")
+            if name.strip() == module:
+                return int(cumulative)
+    return 0
+
+
+def measure_imports(
+    artifact: Path,
+    config: ServiceConfig,
+    runs: int,
+    sourceless: bool,
+    extra_paths: Optional[List[Path]] = None,
+) -> Dict[str, Dict[str, Optional[int]]]:
+    """Return median import time of every handler module, with and without bytecode."""
+    if runs <= 0:
+        return {}
+    modules = sorted({handler_module(handler) for handler in config.handlers})
+    report: Dict[str, Dict[str, Optional[int]]] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        with zipfile.ZipFile(artifact) as archive:
+            archive.extractall(root)
+        for module in modules:
+            samples = [
+                measure_import_us(root, module, config.pythonpath, extra_paths)
+                for _ in range(runs)
+            ]
+            report[module] = {"median_us": int(statistics.median(samples))}
+        for pycache in list(root.rglob("__pycache__")):
+            shutil.rmtree(pycache)
+        for module in modules:
+            median_us = None
+            if not sourceless:
+                samples = [
+                    measure_import_us(root, module, config.pythonpath, extra_paths)
+                    for _ in range(runs)
+                ]
+                median_us = int(statistics.median(samples))
+            report[module]["without_bytecode_median_us"] = median_us
+    return report
+
+
+def largest_entries(staging: Path, count: int = 10) -> Dict[str, int]:
+    """Return bytes of the largest top-level entries of the staging directory."""
+    sizes: Dict[str, int] = {}
+    for path in staging.rglob("*"):
+        if path.is_file():
+            top_level = path.relative_to(staging).parts[0]
+            sizes[top_level] = sizes.get(top_level, 0) + path.stat().st_size
+    return dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True)[:count])
+
+
+# -----------------------------------------------------------------------------
+# cache
+# -----------------------------------------------------------------------------
+def default_cache_dir() -> Path:
+    """Return $XDG_CACHE_HOME/abk_cloud/artifacts, default ~/.cache/abk_cloud/artifacts."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(cache_home) / "abk_cloud" / "artifacts"
+
+
+def prune_cache(cache_dir: Path, keep: int) -> None:
+    """Remove all but the keep most recently used cached builds."""
+    artifacts = sorted(cache_dir.glob("*.zip"), key=lambda path: path.stat().st_mtime)
+    for artifact in artifacts[: max(len(artifacts) - keep, 0)]:
+        artifact.unlink(missing_ok=True)
+        artifact.with_suffix(".json").unlink(missing_ok=True)
+
+
+# -----------------------------------------------------------------------------
+# build
+# -----------------------------------------------------------------------------
+def build_artifact(
+    service_dir: Path,
+    output_dir: Optional[Path] = None,
+    deps_dir: Optional[Path] = None,
+    requirements: Optional[Path] = None,
+    include: Optional[List[str]] = None,
+    sourceless: bool = False,
+    keep_dist_info: bool = False,
+    requirements_in_layer: bool = False,
+    import_runs: int = DEFAULT_IMPORT_RUNS,
+    cache_dir: Optional[Path] = None,
+    cache_keep: int = DEFAULT_CACHE_KEEP,
+) -> Dict:
+    """Build <output_dir>/<service>.zip and its <service>.report.json, return the report.
+
+    Args:
+        service_dir: service directory with serverless.yml
+        output_dir: default <service_dir>/.build
+        deps_dir: installed dependencies, default install <service_dir>/requirements.txt
+        requirements: requirements file, default <service_dir>/requirements.txt
+        include: glob patterns of the service files, default <handler dir>/*.py
+        sourceless: package module.pyc instead of module.py, smaller but no source lines
+            in tracebacks
+        keep_dist_info: keep *.dist-info of the dependencies for importlib.metadata
+        requirements_in_layer: package only the service files, the dependencies are in the
+            shared layer and only used to import the handlers
+        import_runs: fresh interpreters per import time measurement, 0 skips it
+        cache_dir: build cache, None disables the cache
+        cache_keep: most recently used builds kept in the cache
+    Raises:
+        ArtifactBuildError: when the artifact cannot be built
+    """
+    started = time.monotonic()
+    config = read_service_config(service_dir)
+    check_runtime(config.runtime)
+    if config.architecture not in PLATFORMS:
+        raise ArtifactBuildError(f"unsupported architecture {config.architecture}")
+    output_dir = output_dir or service_dir / ".build"
+    artifact = output_dir / f"{config.name}.zip"
+    report_file = output_dir / f"{config.name}.report.json"
+    patterns = include or sorted(
+        {f"{handler.rsplit('/', 1)[0]}/*.py" for handler in config.handlers}
+    )
+    sources = collect_sources(service_dir, patterns)
+    if not sources:
+        raise ArtifactBuildError(f"no files of {service_dir} match {patterns}")
+
+    requirements = requirements or service_dir / "requirements.txt"
+    pins = read_requirements(requirements)
+    if deps_dir is not None:
+        dependencies = {
+            path.relative_to(deps_dir).as_posix(): sha256_file(path)
+            for path in deps_dir.rglob("*")
+            if path.is_file()
+        }
+    else:
+        dependencies = {"requirements": hashlib.sha256("\n".join(pins).encode()).hexdigest()}
+    options = {
+        "sourceless": sourceless,
+        "keep_dist_info": keep_dist_info,
+        "requirements_in_layer": requirements_in_layer,
+        "include": patterns,
+    }
+    key = cache_key(config, sources, dependencies, options)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    cached = cache_dir / f"{key}.zip" if cache_dir else None
+    if cached is not None and cached.is_file() and cached.with_suffix(".json").is_file():
+        shutil.copyfile(cached, artifact)
+        os.utime(cached)
+        report = json.loads(cached.with_suffix(".json").read_text())
+        report.update(cache="hit", build_s=round(time.monotonic() - started, 3))
+        report_file.write_text(json.dumps(report, indent=2))
+        return report
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dependency_files: Dict[str, Path] = {}
+        stripped: Dict[str, Dict[str, int]] = {}
+        needs_deps = not requirements_in_layer or import_runs > 0
+        if deps_dir is None and pins and needs_deps:
+            deps_dir = Path(tmp_dir) / "deps"
+            install_requirements(requirements, deps_dir, config.runtime, config.architecture)
+        if deps_dir is not None and not requirements_in_layer:
+            dependency_files, stripped = collect_dependencies(deps_dir, keep_dist_info)
+        files, deduplicated = merge_files(dependency_files, sources)
+
+        staging = Path(tmp_dir) / "staging"
+        staging.mkdir()
+        not_compiled = stage_files(files, staging, sourceless)
+        staged_files = [path for path in staging.rglob("*") if path.is_file()]
+        write_zip(staging, artifact)
+        report = {
+            "service": config.name,
+            "runtime": config.runtime,
+            "architecture": config.architecture,
+            "artifact": str(artifact),
+            "sha256": sha256_file(artifact),
+            "cache_key": key,
+            "cache": "miss" if cache_dir else "disabled",
+            "sourceless": sourceless,
+            "requirements_in_layer": requirements_in_layer,
+            "files": len(staged_files),
+            "pyc_files": sum(1 for path in staged_files if path.suffix == ".pyc"),
+            "not_compiled": not_compiled,
+            "uncompressed_bytes": sum(path.stat().st_size for path in staged_files),
+            "zip_bytes": artifact.stat().st_size,
+            "stripped": stripped,
+            "deduplicated": deduplicated,
+            "largest_bytes": largest_entries(staging),
+        }
+        layer_paths = [deps_dir] if requirements_in_layer and deps_dir is not None else []
+        report["import_time"] = measure_imports(
+            artifact, config, import_runs, sourceless, layer_paths
+        )
+    report["build_s"] = round(time.monotonic() - started, 3)
+    report_file.write_text(json.dumps(report, indent=2))
+
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(artifact, cache_dir / f"{key}.zip.tmp")
+        (cache_dir / f"{key}.json").write_text(json.dumps(report, indent=2))
+        os.replace(cache_dir / f"{key}.zip.tmp", cache_dir / f"{key}.zip")
+        prune_cache(cache_dir, cache_keep)
+    return report
+
+
+# -----------------------------------------------------------------------------
+# command line
+# -----------------------------------------------------------------------------
+def main() -> int:
+    """Build the artifact of one service and print its report."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("service_dir", type=Path, help="e.g. services/envs/common/abk-hello")
+    parser.add_argument("--output-dir", type=Path, help="default: <service_dir>/.build")
+    parser.add_argument("--deps-dir", type=Path, help="installed dependencies, skips installing")
+    parser.add_argument("--requirements", type=Path, help="default: <service_dir>/requirements.txt")
+    parser.add_argument(
+        "--include", action="append", help="glob of service files, default: <handler dir>/*.py"
+    )
+    parser.add_argument("--sourceless", action="store_true", help="package .pyc without .py")
+    parser.add_argument("--keep-dist-info", action="store_true", help="keep package metadata")
+    parser.add_argument(
+        "--requirements-in-layer",
+        action="store_true",
+        help="package only the service files, requirements come from the shared layer",
+    )
+    parser.add_argument("--import-runs", type=int, default=DEFAULT_IMPORT_RUNS)
+    parser.add_argument("--cache-dir", type=Path, default=default_cache_dir())
+    parser.add_argument("--no-cache", action="store_true", help="always build")
+    args = parser.parse_args()
+
+    try:
+        report = build_artifact(
+            args.service_dir,
+            output_dir=args.output_dir,
+            deps_dir=args.deps_dir,
+            requirements=args.requirements,
+            include=args.include,
+            sourceless=args.sourceless,
+            keep_dist_info=args.keep_dist_info,
+            requirements_in_layer=args.requirements_in_layer,
+            import_runs=args.import_runs,
+            cache_dir=None if args.no_cache else args.cache_dir,
+        )
+    except ArtifactBuildError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Content-hash deployment planner: which services under services/envs need a deploy.
+
+Every deployable service (a directory with publish.sh) gets a hash of its components:
+    source: all service files except tests, docs and build / dependency directories
+    lockfile: uv.lock (package-lock.json for node services)
+    serverless: serverless.yml
+    shared: inputs of every deployment, config.<env>.yml, common-lib.sh and services/tools
+    inputs: files outside the service it is built from, glob patterns relative to the service
+        in its deploy-inputs.txt (e.g. the shared dependency layer and all services' uv.lock)
+    layers: hashes of the sequential services whose SSM parameters serverless.yml references,
+        e.g. ${ssm:/abk-python-layer/...} of 000_abk-python-layer, a new layer version
+        redeploys the services using it
+The hashes of the last successful deployment of each service are kept in a manifest, a local
+file or an S3 object next to the deployment bucket state: deploy-003_services.sh uses
+s3://<abk_deployment_bucket>/abk-deploy-manifests/<env>-<region>.json (ABK_DEPLOY_MANIFEST
+overrides it). `plan` prints the services whose hash differs from the manifest, in deployment
+order. A sequential service ("NNN_" prefix) is deployed before all others because later
+services depend on it, so a changed sequential service also deploys every sequential service
+after it. `record` stores the planned hashes of the services that were deployed, hashes are
+taken from the plan because publish.sh regenerates files.
+
+A manifest which cannot be read plans every service, a deployment is never skipped because
+of a missing manifest.
+
+Usage:
+    python3 deploy_planner.py plan --env dev --region us-west-2 --manifest URI [--output plan.json]
+    python3 deploy_planner.py record --plan plan.json --manifest URI SERVICE_DIR...
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from artifact_builder import sha256_file  # noqa: E402
+
+
+DEFAULT_ENV = "dev"
+DEFAULT_REGION = "us-west-2"
+DEFAULT_SERVICES_DIR = "services/envs"
+MANIFEST_VERSION = 1
+AWS_CLI_TIMEOUT_S = 60
+LOCKFILES = ["uv.lock", "package-lock.json"]
+INPUTS_FILE = "deploy-inputs.txt"
+# generated or not deployed, never part of the source hash
+EXCLUDE_DIRS = {
+    ".build",
+    ".serverless",
+    ".venv",
+    "node_modules",
+    "__pycache__",
+    ".pytest_cache",
+    ".ruff_cache",
+    "tests",
+    "benchmarks",
+}
+EXCLUDE_SUFFIXES = (".md", ".pyc")
+EXCLUDE_FILES = {".coverage", "coverage.xml", ".envrc"}
+# first path segment of SSM parameters referenced in serverless.yml, e.g. abk-python-layer
+SSM_REFERENCE_RE = re.compile(r"\$\{ssm:/([^/}]+)/")
+
+
+class DeployPlanError(Exception):
+    """Raised when the manifest cannot be read or written."""
+
+
+class Service(NamedTuple):
+    """Deployable service directory."""
+
+    id: str  # path relative to the services directory, e.g. common/abk-hello
+    path: Path
+    sequential: bool
+
+
+# -----------------------------------------------------------------------------
+# services and hashes
+# -----------------------------------------------------------------------------
+def is_sequential(name: str) -> bool:
+    """Return True for services deployed first and in order: NNN_<name>."""
+    return len(name) > 4 and name[:3].isdigit() and name[3] == "_"
+
+
+def service_name(service: Service) -> str:
+    """Return name of the service without the NNN_ prefix of sequential services."""
+    name = service.path.name
+    return name[4:] if service.sequential else name
+
+
+def ssm_references(service: Service) -> Set[str]:
+    """Return first path segments of the SSM parameters serverless.yml references."""
+    serverless_yml = service.path / "serverless.yml"
+    if not serverless_yml.is_file():
+        return set()
+    return set(SSM_REFERENCE_RE.findall(serverless_yml.read_text()))
+
+
+def discover_services(services_dir: Path, env: str) -> List[Service]:
+    """Return deployable services in the order deploy-003_services.sh deploys them.
+
+    Sequential services of common and env first, then the others of common and env.
+    """
+    found = {True: [], False: []}
+    for env_dir in ("common", env):
+        directory = services_dir / env_dir
+        if not directory.is_dir():
+            continue
+        for path in sorted(directory.iterdir()):
+            if path.is_dir() and (path / "publish.sh").is_file():
+                service = Service(f"{env_dir}/{path.name}", path, is_sequential(path.name))
+                found[service.sequential].append(service)
+    return found[True] + found[False]
+
+
+def _hash_files(paths: List[Path], root: Path) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        # relpath, not relative_to: deploy-inputs.txt files can be outside of root
+        relative = Path(os.path.relpath(path, root)).as_posix()
+        digest.update(f"{relative}\0{sha256_file(path)}\0".encode())
+    return digest.hexdigest()
+
+
+def source_files(service_dir: Path) -> List[Path]:
+    """Return service files deployed or used by the deployment, without lockfiles."""
+    files = []
+    for directory, dir_names, file_names in os.walk(service_dir):
+        dir_names[:] = [name for name in dir_names if name not in EXCLUDE_DIRS]
+        for name in file_names:
+            if (
+                name in EXCLUDE_FILES
+                or name in LOCKFILES
+                or name == "serverless.yml"
+                or name.endswith(EXCLUDE_SUFFIXES)
+            ):
+                continue
+            files.append(Path(directory) / name)
+    return files
+
+
+def shared_files(root: Path, env: str) -> List[Path]:
+    """Return files every service deployment depends on."""
+    config = root / f"config.{env}.yml"
+    files = [config if config.is_file() else root / "config.yml", root / "common-lib.sh"]
+    tools_dir = root / "services" / "tools"
+    if tools_dir.is_dir():
+        files += [path for path in tools_dir.glob("*.py") if not path.name.startswith("test_")]
+    return [path for path in files if path.is_file()]
+
+
+def input_files(service_dir: Path) -> Optional[List[Path]]:
+    """Return files matching the glob patterns of deploy-inputs.txt, None without the file."""
+    inputs_file = service_dir / INPUTS_FILE
+    if not inputs_file.is_file():
+        return None
+    files = set()
+    for line in inputs_file.read_text().splitlines():
+        pattern = line.split("#", 1)[0].strip()
+        if pattern:
+            files.update(path for path in service_dir.glob(pattern) if path.is_file())
+    return sorted(files)
+
+
+def service_components(service: Service, shared_digest: str) -> Dict[str, str]:
+    """Return component -> hash of the service."""
+    lockfiles = [service.path / name for name in LOCKFILES if (service.path / name).is_file()]
+    serverless_yml = service.path / "serverless.yml"
+    components = {
+        "source": _hash_files(source_files(service.path), service.path),
+        "lockfile": _hash_files(lockfiles, service.path),
+        "serverless": _hash_files(
+            [serverless_yml] if serverless_yml.is_file() else [], service.path
+        ),
+        "shared": shared_digest,
+    }
+    inputs = input_files(service.path)
+    if inputs is not None:
+        components["inputs"] = _hash_files(inputs, service.path)
+    return components
+
+
+def combined_hash(components: Dict[str, str]) -> str:
+    """Return one hash of all components."""
+    return hashlib.sha256(json.dumps(components, sort_keys=True).encode()).hexdigest()
+
+
+# -----------------------------------------------------------------------------
+# plan
+# -----------------------------------------------------------------------------
+def plan_deployments(
+    services: List[Service],
+    shared_digest: str,
+    manifest: Optional[Dict],
+    deploy_all: bool = False,
+) -> List[Dict]:
+    """Return plan entry of every service in deployment order.
+
+    Args:
+        services: services in deployment order
+        shared_digest: hash of the shared files
+        manifest: last deployed hashes, None when unknown, which deploys every service
+        deploy_all: deploy every service
+    Returns:
+        List[Dict]: {"service", "path", "sequential", "hash", "components", "deploy", "reason"}
+    """
+    deployed = (manifest or {}).get("services", {})
+    components_of = {
+        service.id: service_components(service, shared_digest) for service in services
+    }
+    # sequential services publishing SSM parameters, e.g. the layer ARNs of abk-python-layer
+    publishers = {service_name(service): service for service in services if service.sequential}
+    layer_hashes = {
+        service.id: combined_hash(components_of[service.id]) for service in publishers.values()
+    }
+    entries = []
+    cascade_from = None
+    for service in services:
+        components = components_of[service.id]
+        layers = sorted(
+            publishers[name].id
+            for name in ssm_references(service)
+            if name in publishers and publishers[name] != service
+        )
+        if layers:
+            components["layers"] = hashlib.sha256(
+                "".join(f"{layer}\0{layer_hashes[layer]}\0" for layer in layers).encode()
+            ).hexdigest()
+        service_hash = combined_hash(components)
+        previous = deployed.get(service.id)
+        if deploy_all:
+            reason = "forced"
+        elif manifest is None:
+            reason = "manifest unavailable"
+        elif previous is None:
+            reason = "new"
+        elif previous.get("hash") != service_hash:
+            previous_components = previous.get("components", {})
+            changed = [
+                name for name, value in components.items() if previous_components.get(name) != value
+            ]
+            reason = f"changed: {', '.join(changed)}"
+        elif service.sequential and cascade_from:
+            reason = f"after {cascade_from}"
+        else:
+            reason = "unchanged"
+        deploy = reason != "unchanged"
+        if deploy and service.sequential and cascade_from is None:
+            cascade_from = service.id
+        entries.append(
+            {
+                "service": service.id,
+                "path": str(service.path),
+                "sequential": service.sequential,
+                "hash": service_hash,
+                "components": components,
+                "deploy": deploy,
+                "reason": reason,
+            }
+        )
+    return entries
+
+
+def record_deployments(manifest: Optional[Dict], plan: Dict, service_paths: List[str]) -> Dict:
+    """Return manifest with the planned hashes of the deployed services.
+
+    Raises:
+        DeployPlanError: when a service is not part of the plan
+    """
+    manifest = manifest or {}
+    services = dict(manifest.get("services", {}))
+    by_path = {entry["path"]: entry for entry in plan["services"]}
+    for service_path in service_paths:
+        entry = by_path.get(str(Path(service_path)))
+        if entry is None:
+            raise DeployPlanError(f"{service_path} is not part of the plan")
+        services[entry["service"]] = {
+            "hash": entry["hash"],
+            "components": entry["components"],
+            "deployed_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+    return {
+        "version": MANIFEST_VERSION,
+        "env": plan["env"],
+        "region": plan["region"],
+        "services": dict(sorted(services.items())),
+    }
+
+
+# -----------------------------------------------------------------------------
+# manifest storage, local file or s3://bucket/key
+# -----------------------------------------------------------------------------
+def _aws_s3_cp(source: str, destination: str, data: Optional[str] = None) -> str:
+    try:
+        result = subprocess.run(
+            ["aws", "s3", "cp", source, destination, "--only-show-errors"],
+            input=data,
+            capture_output=True,
+            text=True,
+            timeout=AWS_CLI_TIMEOUT_S,
+            check=False,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        raise DeployPlanError(f"aws s3 cp {source} {destination} failed: {e}") from e
+    if result.returncode != 0:
+        # missing key or a bucket not created by the first deployment yet
+        if any(text in result.stderr for text in ("404", "NoSuchKey", "NoSuchBucket")):
+            raise FileNotFoundError(source)
+        raise DeployPlanError(f"aws s3 cp {source} {destination} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def read_manifest(uri: str) -> Dict:
+    """Return manifest stored at uri, empty manifest when it does not exist yet.
+
+    Raises:
+        DeployPlanError: when the manifest cannot be read
+    """
+    try:
+        if uri.startswith("s3://"):
+            text = _aws_s3_cp(uri, "-")
+        else:
+            text = Path(uri).read_text()
+    except FileNotFoundError:
+        return {"version": MANIFEST_VERSION, "services": {}}
+    except OSError as e:
+        raise DeployPlanError(f"cannot read manifest {uri}: {e}") from e
+    try:
+        manifest = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise DeployPlanError(f"manifest {uri} is not JSON: {e}") from e
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise DeployPlanError(f"manifest {uri} has unsupported version {manifest.get('version')}")
+    return manifest
+
+
+def write_manifest(uri: str, manifest: Dict) -> None:
+    """Store manifest at uri, a local file is replaced atomically.
+
+    Raises:
+        DeployPlanError: when the manifest cannot be written
+    """
+    text = json.dumps(manifest, indent=2) + "\n"
+    if uri.startswith("s3://"):
+        try:
+            _aws_s3_cp("-", uri, data=text)
+        except FileNotFoundError as e:
+            raise DeployPlanError(f"cannot write manifest {uri}: bucket does not exist") from e
+        return
+    path = Path(uri)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=path.parent, delete=False) as f:
+            f.write(text)
+        os.replace(f.name, path)
+    except OSError as e:
+        raise DeployPlanError(f"cannot write manifest {uri}: {e}") from e
+
+
+# -----------------------------------------------------------------------------
+# command line
+# -----------------------------------------------------------------------------
+def plan_command(args: argparse.Namespace) -> int:
+    """Print the service directories to deploy, one per line, details on stderr."""
+    try:
+        manifest = read_manifest(args.manifest)
+    except DeployPlanError as e:
+        print(f"Warning: {e}, deploying all services", file=sys.stderr)
+        manifest = None
+    services = discover_services(Path(args.services_dir), args.env)
+    shared_digest = _hash_files(shared_files(Path(args.root), args.env), Path(args.root))
+    entries = plan_deployments(services, shared_digest, manifest, args.all)
+    if args.output:
+        plan = {"env": args.env, "region": args.region, "services": entries}
+        args.output.write_text(json.dumps(plan, indent=2) + "\n")
+    for entry in entries:
+        action = "deploy" if entry["deploy"] else "skip  "
+        print(f"{action} {entry['service']} ({entry['reason']})", file=sys.stderr)
+        if entry["deploy"]:
+            print(entry["path"])
+    return 0
+
+
+def record_command(args: argparse.Namespace) -> int:
+    """Store the planned hashes of the deployed services in the manifest."""
+    try:
+        plan = json.loads(args.plan.read_text())
+        manifest = read_manifest(args.manifest)
+        write_manifest(args.manifest, record_deployments(manifest, plan, args.service_dirs))
+    except (OSError, json.JSONDecodeError, DeployPlanError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def main() -> int:
+    """Plan deployments or record deployed services."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    plan_parser = commands.add_parser("plan", help="print service directories to deploy")
+    plan_parser.add_argument("--env", default=os.environ.get("ABK_DEPLOYMENT_ENV", DEFAULT_ENV))
+    plan_parser.add_argument(
+        "--region", default=os.environ.get("ABK_DEPLOYMENT_REGION", DEFAULT_REGION)
+    )
+    plan_parser.add_argument("--manifest", required=True, help="s3://bucket/key or file path")
+    plan_parser.add_argument("--services-dir", default=DEFAULT_SERVICES_DIR)
+    plan_parser.add_argument("--root", default=".", help="project root with config.<env>.yml")
+    plan_parser.add_argument("--output", type=Path, help="write plan with hashes for record")
+    plan_parser.add_argument("--all", action="store_true", help="deploy every service")
+    plan_parser.set_defaults(func=plan_command)
+    record_parser = commands.add_parser("record", help="store hashes of deployed services")
+    record_parser.add_argument("--plan", type=Path, required=True, help="plan --output file")
+    record_parser.add_argument("--manifest", required=True, help="s3://bucket/key or file path")
+    record_parser.add_argument("service_dirs", nargs="+", help="deployed service directories")
+    record_parser.set_defaults(func=record_command)
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+Shared dependency Lambda layers built from the uv.lock files of the python services.
+
+Without a layer every service vendors its own copy of jsonschema and its dependencies into
+its function zip, uploaded and built again per service. A service opts into the shared
+layer by referencing its layer parameter in serverless.yml:
+
+    functions:
+      <function>:
+        layers:
+        - ${ssm:/abk-python-layer/${self:provider.stage}/${self:service}}
+
+and packages only its own code (artifact_builder.py --requirements-in-layer). The builder:
+
+    1. finds the services of common and <env> using the layer, in deployment order
+    2. reads the runtime dependencies of each service from its uv.lock: everything the project
+       depends on transitively, without dev / debug dependency groups, with the environment
+       markers of the path they are reached through
+    3. groups the services into compatible sets: same runtime and architecture and no package
+       pinned to two different versions, a service joins the first set it is compatible with
+    4. builds one layer per set with artifact_builder: installs the union of the pins for the
+       Lambda platform, strips tests, docs and metadata, precompiles bytecode for /opt/python
+    5. writes layers.json for the abk-python-layer service: the serverless `layers` and one
+       SSM parameter per service holding the ARN of the layer version of its set
+
+Layers are cached by their lock hash, the hash of the pinned requirements of the set, runtime,
+architecture and builder version, in $XDG_CACHE_HOME/abk_cloud/layers: a layer is only
+installed again when a pin of its set changes. Paths in layers.json are relative to the
+working directory, run it from the layer service.
+
+Usage:
+    python3 layer_builder.py build --env dev [--output-dir .build] [--no-cache]
+    python3 layer_builder.py plan --env dev
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tomllib
+from pathlib import Path
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from artifact_builder import (  # noqa: E402
+    BUILDER_VERSION,
+    DEFAULT_CACHE_KEEP,
+    PLATFORMS,
+    ArtifactBuildError,
+    check_runtime,
+    collect_dependencies,
+    default_cache_dir,
+    install_requirements,
+    prune_cache,
+    read_service_config,
+    sha256_file,
+    stage_files,
+    write_zip,
+)
+from deploy_planner import DEFAULT_ENV, discover_services  # noqa: E402
+
+
+# bump when the layer layout changes, it invalidates all cached layers
+LAYER_BUILDER_VERSION = "1"
+LAYER_SERVICE = "abk-python-layer"
+# serverless.yml of a service using the layer references its parameter
+LAYER_REFERENCE = "${ssm:/" + LAYER_SERVICE + "/"
+# the python runtimes add /opt/python of the extracted layers to sys.path
+LAYER_ROOT = "/opt"
+LAYER_PYTHON_DIR = "python"
+# function and all its layers, unzipped
+LAMBDA_UNZIPPED_LIMIT_BYTES = 250 * 1024 * 1024
+DEFAULT_SERVICES_DIR = Path(__file__).resolve().parent.parent / "envs"
+DEFAULT_OUTPUT_DIR = Path(".build")
+
+
+class LayerBuildError(Exception):
+    """Raised when the layers cannot be planned or built."""
+
+
+class Pin(NamedTuple):
+    """Locked version of a runtime dependency and the marker it is installed under."""
+
+    version: str
+    marker: str  # empty when it is always installed
+
+
+class LayerService(NamedTuple):
+    """Service using the shared layer."""
+
+    id: str  # e.g. common/abk-hello
+    name: str  # serverless service name
+    runtime: str
+    architecture: str
+    pins: Dict[str, Pin]
+
+
+# -----------------------------------------------------------------------------
+# uv.lock
+# -----------------------------------------------------------------------------
+def _combine_markers(paths: Set[FrozenSet[str]]) -> str:
+    """Return marker of a package reached through paths, each a set of and-ed markers."""
+    if frozenset() in paths:
+        return ""
+    alternatives = sorted(" and ".join(f"({marker})" for marker in sorted(path)) for path in paths)
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return " or ".join(f"({alternative})" for alternative in alternatives)
+
+
+def read_lock_pins(lock_file: Path) -> Dict[str, Pin]:
+    """Return name -> pin of the runtime dependencies of the project locked in uv.lock.
+
+    Raises:
+        LayerBuildError: when uv.lock cannot be read or locks a package in several versions
+    """
+    try:
+        lock = tomllib.loads(lock_file.read_text())
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise LayerBuildError(f"cannot read {lock_file}: {e}") from e
+    packages: Dict[str, List[Dict]] = {}
+    for package in lock.get("package", []):
+        packages.setdefault(package["name"], []).append(package)
+    roots = [
+        package
+        for versions in packages.values()
+        for package in versions
+        if package.get("source", {}).get("editable") == "."
+        or package.get("source", {}).get("virtual") == "."
+    ]
+    if len(roots) != 1:
+        raise LayerBuildError(f"{lock_file} does not lock exactly one project")
+
+    def locked(dependency: Dict) -> Dict:
+        versions = packages.get(dependency["name"], [])
+        if "version" in dependency:
+            versions = [p for p in versions if p["version"] == dependency["version"]]
+        if len(versions) != 1:
+            raise LayerBuildError(
+                f"{lock_file} locks {dependency['name']} in {len(versions)} versions, "
+                "one layer needs one version"
+            )
+        return versions[0]
+
+    def requirements(package: Dict, extras: List[str]) -> List[Dict]:
+        dependencies = list(package.get("dependencies", []))
+        for extra in extras:
+            dependencies += package.get("optional-dependencies", {}).get(extra, [])
+        return dependencies
+
+    # (package name, extras, markers of the path) already walked, lock graphs can have cycles
+    seen: Set[Tuple[str, Tuple[str, ...], FrozenSet[str]]] = set()
+    reached: Dict[str, Set[FrozenSet[str]]] = {}
+    versions: Dict[str, str] = {}
+    pending = [(roots[0], (), frozenset())]
+    while pending:
+        package, extras, path = pending.pop()
+        for dependency in requirements(package, list(extras)):
+            target = locked(dependency)
+            marker = dependency.get("marker")
+            target_path = path | {marker} if marker else path
+            target_extras = tuple(sorted(dependency.get("extra", [])))
+            if versions.setdefault(target["name"], target["version"]) != target["version"]:
+                raise LayerBuildError(f"{lock_file} needs {target['name']} in several versions")
+            reached.setdefault(target["name"], set()).add(target_path)
+            if (target["name"], target_extras, target_path) not in seen:
+                seen.add((target["name"], target_extras, target_path))
+                pending.append((target, target_extras, target_path))
+    return {
+        name: Pin(versions[name], _combine_markers(paths)) for name, paths in reached.items()
+    }
+
+
+def requirement_lines(pins: Dict[str, Pin]) -> List[str]:
+    """Return sorted requirements.txt lines of the pins."""
+    return [
+        f"{name}=={pin.version}" + (f" ; {pin.marker}" if pin.marker else "")
+        for name, pin in sorted(pins.items())
+    ]
+
+
+def lock_hash(runtime: str, architecture: str, pins: Dict[str, Pin]) -> str:
+    """Return content hash of everything a layer is built from, its cache key."""
+    header = {
+        "builder": f"{LAYER_BUILDER_VERSION}.{BUILDER_VERSION}",
+        "python": sys.version,
+        "runtime": runtime,
+        "architecture": architecture,
+        "requirements": requirement_lines(pins),
+    }
+    return hashlib.sha256(json.dumps(header, sort_keys=True).encode()).hexdigest()
+
+
+# -----------------------------------------------------------------------------
+# services and compatible sets
+# -----------------------------------------------------------------------------
+def uses_layer(serverless_yml: Path) -> bool:
+    """Return True when a not commented line of serverless.yml references the layer."""
+    return any(
+        LAYER_REFERENCE in line.split("#", 1)[0] for line in serverless_yml.read_text().splitlines()
+    )
+
+
+def discover_layer_services(services_dir: Path, env: str) -> List[LayerService]:
+    """Return services of common and env using the layer, in deployment order.
+
+    Raises:
+        LayerBuildError: when such a service has no uv.lock or serverless.yml cannot be read
+    """
+    services = []
+    for service in discover_services(services_dir, env):
+        serverless_yml = service.path / "serverless.yml"
+        if not serverless_yml.is_file() or not uses_layer(serverless_yml):
+            continue
+        lock_file = service.path / "uv.lock"
+        if not lock_file.is_file():
+            raise LayerBuildError(f"{service.id} uses the shared layer but has no uv.lock")
+        try:
+            config = read_service_config(service.path)
+        except ArtifactBuildError as e:
+            raise LayerBuildError(str(e)) from e
+        services.append(
+            LayerService(
+                service.id, config.name, config.runtime, config.architecture,
+                read_lock_pins(lock_file),
+            )
+        )
+    return services
+
+
+def conflicts(pins: Dict[str, Pin], other: Dict[str, Pin]) -> List[str]:
+    """Return names of the packages pinned to different versions."""
+    return sorted(
+        name for name, pin in other.items() if name in pins and pins[name].version != pin.version
+    )
+
+
+def merge_pins(pins: Dict[str, Pin], other: Dict[str, Pin]) -> Dict[str, Pin]:
+    """Return union of compatible pins, a package is installed when either marker holds."""
+    merged = dict(pins)
+    for name, pin in other.items():
+        current = merged.get(name)
+        if current is None or current.marker == pin.marker:
+            merged[name] = pin
+        elif not current.marker or not pin.marker:
+            merged[name] = Pin(pin.version, "")
+        else:
+            merged[name] = Pin(pin.version, f"({current.marker}) or ({pin.marker})")
+    return merged
+
+
+def group_services(services: List[LayerService]) -> List[Dict]:
+    """Return compatible sets of the services, one layer each.
+
+    Returns:
+        List[Dict]: {"set": "deps<N>", "runtime", "architecture", "pins", "services"}
+    """
+    sets: List[Dict] = []
+    for service in services:
+        for layer_set in sets:
+            if (
+                layer_set["runtime"] == service.runtime
+                and layer_set["architecture"] == service.architecture
+                and not conflicts(layer_set["pins"], service.pins)
+            ):
+                layer_set["pins"] = merge_pins(layer_set["pins"], service.pins)
+                layer_set["services"].append(service)
+                break
+        else:
+            sets.append(
+                {
+                    "set": f"deps{len(sets) + 1}",
+                    "runtime": service.runtime,
+                    "architecture": service.architecture,
+                    "pins": dict(service.pins),
+                    "services": [service],
+                }
+            )
+    for layer_set in sets:
+        if not layer_set["pins"]:
+            ids = ", ".join(service.id for service in layer_set["services"])
+            raise LayerBuildError(f"{ids} have no runtime dependencies, remove the layer")
+    return sets
+
+
+# -----------------------------------------------------------------------------
+# layers and serverless configuration
+# -----------------------------------------------------------------------------
+def _logical_id(name: str) -> str:
+    """Return CloudFormation logical id part of a name: abk-hello -> AbkHello."""
+    return "".join(part[:1].upper() + part[1:] for part in re.split(r"[^A-Za-z0-9]+", name))
+
+
+def build_layer(
+    layer_set: Dict, artifact: Path, cache_dir: Optional[Path], cache_keep: int
+) -> Dict:
+    """Build the layer zip of the compatible set, return its report.
+
+    Raises:
+        LayerBuildError: when installing the requirements fails or the layer is too large
+    """
+    started = time.monotonic()
+    key = lock_hash(layer_set["runtime"], layer_set["architecture"], layer_set["pins"])
+    cached = cache_dir / f"{key}.zip" if cache_dir else None
+    if cached is not None and cached.is_file() and cached.with_suffix(".json").is_file():
+        shutil.copyfile(cached, artifact)
+        os.utime(cached)
+        report = json.loads(cached.with_suffix(".json").read_text())
+        report.update(cache="hit", build_s=round(time.monotonic() - started, 3))
+        return report
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        requirements = Path(tmp_dir) / "requirements.txt"
+        requirements.write_text("\n".join(requirement_lines(layer_set["pins"])) + "\n")
+        deps_dir = Path(tmp_dir) / "deps"
+        try:
+            install_requirements(
+                requirements, deps_dir, layer_set["runtime"], layer_set["architecture"]
+            )
+        except ArtifactBuildError as e:
+            raise LayerBuildError(f"layer {layer_set['set']}: {e}") from e
+        dependency_files, stripped = collect_dependencies(deps_dir, keep_dist_info=False)
+        files = {
+            f"{LAYER_PYTHON_DIR}/{arcname}": path for arcname, path in dependency_files.items()
+        }
+        staging = Path(tmp_dir) / "staging"
+        staging.mkdir()
+        not_compiled = stage_files(files, staging, sourceless=False, task_root=LAYER_ROOT)
+        staged_files = [path for path in staging.rglob("*") if path.is_file()]
+        uncompressed_bytes = sum(path.stat().st_size for path in staged_files)
+        if uncompressed_bytes > LAMBDA_UNZIPPED_LIMIT_BYTES:
+            raise LayerBuildError(
+                f"layer {layer_set['set']} has {uncompressed_bytes} bytes unzipped, "
+                f"Lambda allows {LAMBDA_UNZIPPED_LIMIT_BYTES}"
+            )
+        write_zip(staging, artifact)
+    report = {
+        "lock_hash": key,
+        "cache": "miss" if cache_dir else "disabled",
+        "requirements": requirement_lines(layer_set["pins"]),
+        "sha256": sha256_file(artifact),
+        "files": len(staged_files),
+        "pyc_files": sum(1 for path in staged_files if path.suffix == ".pyc"),
+        "not_compiled": not_compiled,
+        "uncompressed_bytes": uncompressed_bytes,
+        "zip_bytes": artifact.stat().st_size,
+        "stripped": stripped,
+        "build_s": round(time.monotonic() - started, 3),
+    }
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(artifact, cache_dir / f"{key}.zip.tmp")
+        (cache_dir / f"{key}.json").write_text(json.dumps(report, indent=2))
+        os.replace(cache_dir / f"{key}.zip.tmp", cache_dir / f"{key}.zip")
+        prune_cache(cache_dir, cache_keep)
+    return report
+
+
+def serverless_config(sets: List[Dict], env: str, artifacts: Dict[str, Path]) -> Dict:
+    """Return `layers` and `resources` of the layer service's serverless.yml.
+
+    Args:
+        sets: compatible sets of group_services
+        env: deployment environment, part of the layer and parameter names
+        artifacts: set -> layer zip
+    """
+    layers = {}
+    resources = {}
+    for layer_set in sets:
+        layers[layer_set["set"]] = {
+            "name": f"{LAYER_SERVICE}-{env}-{layer_set['set']}",
+            "description": "Runtime dependencies of "
+            + ", ".join(service.name for service in layer_set["services"]),
+            "package": {"artifact": Path(os.path.relpath(artifacts[layer_set["set"]])).as_posix()},
+            "compatibleRuntimes": [layer_set["runtime"]],
+            "compatibleArchitectures": [layer_set["architecture"]],
+            # functions deployed before keep working with the version they reference
+            "retain": True,
+        }
+        for service in layer_set["services"]:
+            resources[f"{_logical_id(service.name)}LayerParameter"] = {
+                "Type": "AWS::SSM::Parameter",
+                "Properties": {
+                    "Name": f"/{LAYER_SERVICE}/{env}/{service.name}",
+                    "Type": "String",
+                    "Description": f"Shared dependency layer version of {service.name}",
+                    # serverless names the layer resource <Set>LambdaLayer, Ref is its ARN
+                    "Value": {"Ref": f"{_logical_id(layer_set['set'])}LambdaLayer"},
+                },
+            }
+    return {"layers": layers, "resources": {"Resources": resources}}
+
+
+def plan_layers(services_dir: Path, env: str) -> List[Dict]:
+    """Return the compatible sets of the services of env using the layer."""
+    services = discover_layer_services(services_dir, env)
+    if not services:
+        raise LayerBuildError(f"no service of {services_dir} common or {env} uses the layer")
+    sets = group_services(services)
+    for layer_set in sets:
+        if layer_set["architecture"] not in PLATFORMS:
+            raise LayerBuildError(f"unsupported architecture {layer_set['architecture']}")
+    return sets
+
+
+def build_layers(
+    services_dir: Path,
+    env: str,
+    output_dir: Path = DEFAULT_OUTPUT_DIR,
+    cache_dir: Optional[Path] = None,
+    cache_keep: int = DEFAULT_CACHE_KEEP,
+) -> Dict:
+    """Build every layer of env, layers.json and layers.report.json, return the report.
+
+    Args:
+        services_dir: services/envs
+        env: deployment environment
+        output_dir: layer zips, layers.json and layers.report.json
+        cache_dir: layer cache, None disables the cache
+        cache_keep: most recently used layers kept in the cache
+    Raises:
+        LayerBuildError: when the layers cannot be built
+    """
+    started = time.monotonic()
+    sets = plan_layers(services_dir, env)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    artifacts = {}
+    layers = {}
+    for layer_set in sets:
+        try:
+            check_runtime(layer_set["runtime"])
+        except ArtifactBuildError as e:
+            raise LayerBuildError(str(e)) from e
+        artifacts[layer_set["set"]] = output_dir / f"{layer_set['set']}.zip"
+        report = build_layer(layer_set, artifacts[layer_set["set"]], cache_dir, cache_keep)
+        report.update(
+            runtime=layer_set["runtime"],
+            architecture=layer_set["architecture"],
+            artifact=str(artifacts[layer_set["set"]]),
+            services=[service.id for service in layer_set["services"]],
+        )
+        layers[layer_set["set"]] = report
+    (output_dir / "layers.json").write_text(
+        json.dumps(serverless_config(sets, env, artifacts), indent=2)
+    )
+    report = {
+        "env": env,
+        "layers": layers,
+        # every service but the first of a set no longer uploads the dependencies
+        "upload_bytes_saved": sum(
+            (len(layer["services"]) - 1) * layer["zip_bytes"] for layer in layers.values()
+        ),
+        "build_s": round(time.monotonic() - started, 3),
+    }
+    (output_dir / "layers.report.json").write_text(json.dumps(report, indent=2))
+    return report
+
+
+# -----------------------------------------------------------------------------
+# command line
+# -----------------------------------------------------------------------------
+def main() -> int:
+    """Plan or build the shared layers of one environment."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["build", "plan"])
+    parser.add_argument("--env", default=DEFAULT_ENV)
+    parser.add_argument("--services-dir", type=Path, default=DEFAULT_SERVICES_DIR)
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--cache-dir", type=Path, default=default_cache_dir().parent / "layers")
+    parser.add_argument("--no-cache", action="store_true", help="always build")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "plan":
+            report = [
+                {
+                    "set": layer_set["set"],
+                    "runtime": layer_set["runtime"],
+                    "architecture": layer_set["architecture"],
+                    "services": [service.id for service in layer_set["services"]],
+                    "requirements": requirement_lines(layer_set["pins"]),
+                }
+                for layer_set in plan_layers(args.services_dir, args.env)
+            ]
+        else:
+            report = build_layers(
+                args.services_dir,
+                args.env,
+                output_dir=args.output_dir,
+                cache_dir=None if args.no_cache else args.cache_dir,
+            )
+    except LayerBuildError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
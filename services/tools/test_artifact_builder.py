@@ -0,0 +1,261 @@
+"""
+Unit tests for artifact_builder.py, offline with a fake service and installed dependencies.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import artifact_builder  # noqa: E402
+from artifact_builder import ArtifactBuildError, build_artifact, strip_reason  # noqa: E402
+
+
+RUNTIME = f"python{sys.version_info.major}.{sys.version_info.minor}"
+SERVERLESS_YML = f"""
+service: hello
+provider:
+  name: aws
+  runtime: {RUNTIME}
+  iam:
+    role:
+      statements:
+      - Resource:
+        - !Sub arn:aws:logs:${{AWS::Region}}:${{AWS::AccountId}}:log-group:/aws/lambda/*
+  environment:
+    PYTHONPATH: src
+functions:
+  hello:
+    handler: src/hello/hello.handler
+  # hello-batch:
+  #   handler: src/hello/batch.handler
+"""
+
+
+def write_files(root: Path, files: dict) -> None:
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+@pytest.fixture
+def service(tmp_path):
+    """Service importing its own package through PYTHONPATH=src and one dependency."""
+    service_dir = tmp_path / "hello"
+    write_files(
+        service_dir,
+        {
+            "serverless.yml": SERVERLESS_YML,
+            "src/hello/__init__.py": "",
+            "src/hello/hello.py": (
+                "import dep_pkg\nfrom hello import util\n\n\n"
+                "def handler(event, context):\n    return util.greet(dep_pkg.VALUE)\n"
+            ),
+            "src/hello/util.py": "def greet(name):\n    return f'hello {name}'\n",
+            "tests/test_hello.py": "def test_hello():\n    pass\n",
+        },
+    )
+    return service_dir
+
+
+@pytest.fixture
+def deps_dir(tmp_path):
+    """Installed dependencies with everything the builder strips."""
+    path = tmp_path / "deps"
+    write_files(
+        path,
+        {
+            "dep_pkg/__init__.py": "VALUE = 'dep'\n",
+            "dep_pkg/data.json": "{}",
+            "dep_pkg/legacy.py": "print 'python 2 only'\n",
+            "dep_pkg/README.md": "# dep_pkg",
+            "dep_pkg/__init__.pyi": "VALUE: str\n",
+            "dep_pkg/tests/test_dep.py": "def test_dep():\n    pass\n",
+            "dep_pkg/__pycache__/__init__.cpython-39.pyc": "stale",
+            "dep_pkg-1.0.dist-info/METADATA": "Name: dep_pkg\n",
+            "bin/dep-cli": "#!/bin/sh\n",
+        },
+    )
+    return path
+
+
+def build(service, deps_dir, tmp_path, **kwargs):
+    kwargs.setdefault("import_runs", 0)
+    return build_artifact(service, tmp_path / "out", deps_dir=deps_dir, **kwargs)
+
+
+class TestBuildArtifact:
+    """Artifact contents, reproducibility and the report."""
+
+    def test_build__packages_handler_and_stripped_dependencies(self, service, deps_dir, tmp_path):
+        report = build(service, deps_dir, tmp_path)
+        names = zipfile.ZipFile(report["artifact"]).namelist()
+        assert names == sorted(names)
+        assert "src/hello/hello.py" in names
+        assert "dep_pkg/data.json" in names
+        assert not [name for name in names if name.startswith(("tests/", "bin/"))]
+        assert not [name for name in names if "dist-info" in name or name.endswith(".md")]
+        assert "dep_pkg/tests/test_dep.py" not in names
+        assert report["stripped"]["tests"]["files"] == 1
+        assert report["stripped"]["metadata"]["files"] == 1
+        assert Path(report["artifact"]).name == "hello.zip"
+
+    def test_build__precompiles_unchecked_hash_bytecode(self, service, deps_dir, tmp_path):
+        report = build(service, deps_dir, tmp_path)
+        archive = zipfile.ZipFile(report["artifact"])
+        tag = sys.implementation.cache_tag
+        pyc = archive.read(f"src/hello/__pycache__/hello.{tag}.pyc")
+        # flags of an unchecked hash based pyc: hash based, check_source off
+        assert int.from_bytes(pyc[4:8], "little") == 0b01
+        assert report["pyc_files"] == 4
+        assert report["not_compiled"] == ["dep_pkg/legacy.py"]
+
+    def test_build__is_reproducible(self, service, deps_dir, tmp_path):
+        first = build(service, deps_dir, tmp_path / "first")
+        os.utime(service / "src/hello/util.py", (0, 0))
+        second = build(service, deps_dir, tmp_path / "second")
+        assert first["sha256"] == second["sha256"]
+        info = zipfile.ZipFile(second["artifact"]).getinfo("src/hello/util.py")
+        assert info.date_time == artifact_builder.ZIP_DATE_TIME
+
+    def test_build__sourceless_replaces_sources(self, service, deps_dir, tmp_path):
+        report = build(service, deps_dir, tmp_path, sourceless=True)
+        names = zipfile.ZipFile(report["artifact"]).namelist()
+        assert "src/hello/hello.pyc" in names
+        assert "src/hello/hello.py" not in names
+        assert "dep_pkg/legacy.py" in names
+
+    def test_build__imports_handler_from_artifact(self, service, deps_dir, tmp_path):
+        report = build(service, deps_dir, tmp_path, import_runs=1)
+        import_time = report["import_time"]["src.hello.hello"]
+        assert import_time["median_us"] > 0
+        assert import_time["without_bytecode_median_us"] > 0
+
+    def test_build__missing_dependency_fails_import(self, service, tmp_path):
+        empty_deps = tmp_path / "empty"
+        empty_deps.mkdir()
+        with pytest.raises(ArtifactBuildError, match="import src.hello.hello"):
+            build(service, empty_deps, tmp_path, import_runs=1)
+
+    def test_build__requirements_in_layer_packages_service_only(self, service, deps_dir, tmp_path):
+        report = build(service, deps_dir, tmp_path, requirements_in_layer=True, import_runs=1)
+        names = zipfile.ZipFile(report["artifact"]).namelist()
+        assert not [name for name in names if not name.startswith("src/")]
+        # dep_pkg imports from the layer path next to the extracted zip
+        assert report["import_time"]["src.hello.hello"]["median_us"] > 0
+
+    def test_build__identical_files_are_added_once(self, service, deps_dir, tmp_path):
+        write_files(deps_dir, {"src/hello/util.py": (service / "src/hello/util.py").read_text()})
+        report = build(service, deps_dir, tmp_path)
+        assert report["deduplicated"]["files"] == 1
+
+    def test_build__conflicting_files_raise(self, service, deps_dir, tmp_path):
+        write_files(deps_dir, {"src/hello/util.py": "VALUE = 1\n"})
+        with pytest.raises(ArtifactBuildError, match="both map to src/hello/util.py"):
+            build(service, deps_dir, tmp_path)
+
+    def test_build__other_runtime_raises(self, service, deps_dir, tmp_path):
+        yml = service / "serverless.yml"
+        yml.write_text(yml.read_text().replace(RUNTIME, "python2.7"))
+        with pytest.raises(ArtifactBuildError, match="must be compiled by python2.7"):
+            build(service, deps_dir, tmp_path)
+
+    def test_read_service_config__skips_commented_handlers(self, service):
+        config = artifact_builder.read_service_config(service)
+        assert config.name == "hello"
+        assert config.handlers == ["src/hello/hello.handler"]
+        assert config.pythonpath == ["src"]
+        assert config.architecture == "x86_64"
+
+    @pytest.mark.parametrize(
+        "relative,expected",
+        [
+            ("pkg/module.py", None),
+            ("pkg/schemas/draft7.json", None),
+            ("pkg/tests/conftest.py", "tests"),
+            ("pkg-1.0.dist-info/RECORD", "metadata"),
+            ("pkg/py.pyi", "sources"),
+            ("bin/pkg", "scripts"),
+        ],
+    )
+    def test_strip_reason__by_path(self, relative, expected):
+        assert strip_reason(Path(relative)) == expected
+
+
+class TestBuildCache:
+    """Builds cached by the content hash of their inputs."""
+
+    def test_build__unchanged_inputs_hit_cache(self, service, deps_dir, tmp_path):
+        cache_dir = tmp_path / "cache"
+        first = build(service, deps_dir, tmp_path, cache_dir=cache_dir)
+        second = build(service, deps_dir, tmp_path, cache_dir=cache_dir)
+        assert (first["cache"], second["cache"]) == ("miss", "hit")
+        assert first["sha256"] == second["sha256"]
+        assert json.loads((tmp_path / "out/hello.report.json").read_text())["cache"] == "hit"
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda service, deps: (service / "src/hello/util.py").write_text("X = 1\n"),
+            lambda service, deps: (deps / "dep_pkg/__init__.py").write_text("VALUE = 'v2'\n"),
+        ],
+    )
+    def test_build__changed_inputs_miss_cache(self, service, deps_dir, tmp_path, change):
+        cache_dir = tmp_path / "cache"
+        first = build(service, deps_dir, tmp_path, cache_dir=cache_dir)
+        change(service, deps_dir)
+        second = build(service, deps_dir, tmp_path, cache_dir=cache_dir)
+        assert second["cache"] == "miss"
+        assert second["cache_key"] != first["cache_key"]
+
+    def test_build__cache_key_ignores_mtime(self, service, deps_dir, tmp_path):
+        cache_dir = tmp_path / "cache"
+        build(service, deps_dir, tmp_path, cache_dir=cache_dir)
+        os.utime(service / "src/hello/hello.py", (0, 0))
+        assert build(service, deps_dir, tmp_path, cache_dir=cache_dir)["cache"] == "hit"
+
+    def test_prune_cache__keeps_most_recent(self, tmp_path):
+        for index in range(3):
+            (tmp_path / f"{index}.zip").write_text("")
+            (tmp_path / f"{index}.json").write_text("")
+            os.utime(tmp_path / f"{index}.zip", (index, index))
+        artifact_builder.prune_cache(tmp_path, keep=2)
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "1.json",
+            "1.zip",
+            "2.json",
+            "2.zip",
+        ]
+
+
+class TestArtifactBuilderCli:
+    """Command line used by the service Makefiles."""
+
+    def test_main__prints_report(self, service, deps_dir, tmp_path):
+        result = subprocess.run(
+            [
+                sys.executable, artifact_builder.__file__, str(service),
+                "--deps-dir", str(deps_dir), "--import-runs", "0", "--no-cache",
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout)["cache"] == "disabled"
+        assert (service / ".build/hello.zip").is_file()
+
+    def test_main__build_error_exits_2(self, tmp_path):
+        result = subprocess.run(
+            [sys.executable, artifact_builder.__file__, str(tmp_path), "--no-cache"],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 2
+        assert result.stderr.startswith("ERROR: cannot read")
@@ -0,0 +1,217 @@
+"""
+Unit tests for deploy_planner.py with a fake project and local manifest files.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import deploy_planner  # noqa: E402
+from deploy_planner import (  # noqa: E402
+    DeployPlanError,
+    discover_services,
+    plan_deployments,
+    read_manifest,
+    record_deployments,
+)
+
+
+SERVICES = ["common/001_base", "common/abk-hello", "dev/002_db", "dev/api", "qa/qa-only"]
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Project root with config, common-lib.sh and services of common, dev and qa."""
+    (tmp_path / "config.dev.yml").write_text("services:\n  abk_deployment_bucket: bucket\n")
+    (tmp_path / "common-lib.sh").write_text("#!/bin/bash\n")
+    for service in SERVICES:
+        path = tmp_path / "services" / "envs" / service
+        (path / "src").mkdir(parents=True)
+        (path / "publish.sh").write_text("#!/bin/bash\n")
+        (path / "serverless.yml").write_text(f"service: {path.name}\n")
+        (path / "uv.lock").write_text("version = 1\n")
+        (path / "src" / "handler.py").write_text("def handler(event, context):\n    pass\n")
+    (tmp_path / "services" / "envs" / "common" / "no-publish").mkdir()
+    return tmp_path
+
+
+def plan(project, manifest, deploy_all=False):
+    services = discover_services(project / "services" / "envs", "dev")
+    shared = deploy_planner._hash_files(deploy_planner.shared_files(project, "dev"), project)
+    return plan_deployments(services, shared, manifest, deploy_all)
+
+
+def deployed(entries):
+    return [entry["service"] for entry in entries if entry["deploy"]]
+
+
+def manifest_of(entries):
+    plan_file = {"env": "dev", "region": "us-west-2", "services": entries}
+    return record_deployments(None, plan_file, [entry["path"] for entry in entries])
+
+
+class TestPlanDeployments:
+    """Change detection and deployment order."""
+
+    def test_discover_services__sequential_first(self, project):
+        services = discover_services(project / "services" / "envs", "dev")
+        assert [service.id for service in services] == [
+            "common/001_base",
+            "dev/002_db",
+            "common/abk-hello",
+            "dev/api",
+        ]
+        assert [service.sequential for service in services] == [True, True, False, False]
+
+    def test_plan__empty_manifest_deploys_all_as_new(self, project):
+        entries = plan(project, {"version": 1, "services": {}})
+        assert deployed(entries) == [
+            "common/001_base",
+            "dev/002_db",
+            "common/abk-hello",
+            "dev/api",
+        ]
+        assert {entry["reason"] for entry in entries} == {"new"}
+
+    def test_plan__unchanged_services_are_skipped(self, project):
+        manifest = manifest_of(plan(project, None))
+        assert deployed(plan(project, manifest)) == []
+
+    @pytest.mark.parametrize(
+        "file_name,component",
+        [("src/handler.py", "source"), ("uv.lock", "lockfile"), ("serverless.yml", "serverless")],
+    )
+    def test_plan__changed_component_deploys_service(self, project, file_name, component):
+        manifest = manifest_of(plan(project, None))
+        (project / "services/envs/dev/api" / file_name).write_text("changed\n")
+        entries = plan(project, manifest)
+        assert deployed(entries) == ["dev/api"]
+        assert entries[-1]["reason"] == f"changed: {component}"
+
+    def test_plan__changed_deploy_input_deploys_service(self, project):
+        (project / "services/envs/common/001_base/deploy-inputs.txt").write_text(
+            "# every service lockfile\n../../*/*/uv.lock\n"
+        )
+        manifest = manifest_of(plan(project, None))
+        (project / "services/envs/dev/api/uv.lock").write_text("changed\n")
+        entries = plan(project, manifest)
+        assert entries[0]["reason"] == "changed: inputs"
+        assert deployed(entries) == ["common/001_base", "dev/002_db", "dev/api"]
+
+    def test_plan__ignores_tests_docs_and_build_output(self, project):
+        manifest = manifest_of(plan(project, None))
+        service = project / "services/envs/dev/api"
+        for name in ["tests/test_api.py", "README.md", ".build/api.zip", "src/__pycache__/x.pyc"]:
+            (service / name).parent.mkdir(parents=True, exist_ok=True)
+            (service / name).write_text("x")
+        assert deployed(plan(project, manifest)) == []
+
+    def test_plan__shared_config_change_deploys_all(self, project):
+        manifest = manifest_of(plan(project, None))
+        (project / "config.dev.yml").write_text("services:\n  abk_log_level: debug\n")
+        entries = plan(project, manifest)
+        assert len(deployed(entries)) == 4
+        assert entries[0]["reason"] == "changed: shared"
+
+    def test_plan__changed_sequential_service_deploys_later_sequential(self, project):
+        manifest = manifest_of(plan(project, None))
+        (project / "services/envs/common/001_base/src/handler.py").write_text("changed\n")
+        entries = plan(project, manifest)
+        assert deployed(entries) == ["common/001_base", "dev/002_db"]
+        assert entries[1]["reason"] == "after common/001_base"
+
+    def test_plan__changed_layer_deploys_services_referencing_it(self, project):
+        (project / "services/envs/dev/api/serverless.yml").write_text(
+            "service: api\nlayers:\n  - ${ssm:/base/${self:provider.stage}/${self:service}}\n"
+        )
+        manifest = manifest_of(plan(project, None))
+        (project / "services/envs/common/001_base/src/handler.py").write_text("changed\n")
+        entries = plan(project, manifest)
+        assert deployed(entries) == ["common/001_base", "dev/002_db", "dev/api"]
+        assert entries[-1]["reason"] == "changed: layers"
+
+    def test_plan__missing_manifest_or_deploy_all_deploys_all(self, project):
+        manifest = manifest_of(plan(project, None))
+        assert len(deployed(plan(project, None))) == 4
+        assert {entry["reason"] for entry in plan(project, manifest, deploy_all=True)} == {
+            "forced"
+        }
+
+
+class TestManifest:
+    """Manifest storage and recording deployed services."""
+
+    def test_read_manifest__missing_file_is_empty(self, tmp_path):
+        assert read_manifest(str(tmp_path / "missing.json")) == {"version": 1, "services": {}}
+
+    def test_read_manifest__invalid_manifest_raises(self, tmp_path):
+        path = tmp_path / "manifest.json"
+        path.write_text("{")
+        with pytest.raises(DeployPlanError):
+            read_manifest(str(path))
+        path.write_text(json.dumps({"version": 99}))
+        with pytest.raises(DeployPlanError, match="unsupported version"):
+            read_manifest(str(path))
+
+    def test_record__keeps_services_not_deployed(self, project):
+        entries = plan(project, None)
+        plan_file = {"env": "dev", "region": "us-west-2", "services": entries}
+        first = record_deployments(None, plan_file, [entries[0]["path"]])
+        second = record_deployments(first, plan_file, [entries[3]["path"]])
+        assert sorted(second["services"]) == ["common/001_base", "dev/api"]
+
+    def test_record__unknown_service_raises(self, project):
+        plan_file = {"env": "dev", "region": "us-west-2", "services": plan(project, None)}
+        with pytest.raises(DeployPlanError, match="not part of the plan"):
+            record_deployments(None, plan_file, ["services/envs/dev/unknown"])
+
+    def test_read_manifest__s3_missing_key_is_empty(self, monkeypatch):
+        def missing(source, destination, data=None):
+            raise FileNotFoundError(source)
+
+        monkeypatch.setattr(deploy_planner, "_aws_s3_cp", missing)
+        assert read_manifest("s3://bucket/key.json")["services"] == {}
+
+
+class TestDeployPlannerCli:
+    """Command line used by deploy-003_services.sh."""
+
+    def run_cli(self, project, *args):
+        return subprocess.run(
+            [sys.executable, deploy_planner.__file__, *args],
+            capture_output=True,
+            text=True,
+            cwd=project,
+        )
+
+    def test_plan_and_record__skip_deployed_services(self, project):
+        plan_args = ["plan", "--env", "dev", "--manifest", "manifest.json", "--output", "plan.json"]
+        first = self.run_cli(project, *plan_args)
+        assert first.returncode == 0, first.stderr
+        assert first.stdout.splitlines() == [
+            "services/envs/common/001_base",
+            "services/envs/dev/002_db",
+            "services/envs/common/abk-hello",
+            "services/envs/dev/api",
+        ]
+
+        recorded = self.run_cli(
+            project, "record", "--plan", "plan.json", "--manifest", "manifest.json",
+            "services/envs/common/001_base", "services/envs/dev/002_db", "services/envs/dev/api",
+        )
+        assert recorded.returncode == 0, recorded.stderr
+        second = self.run_cli(project, *plan_args)
+        assert second.stdout.splitlines() == ["services/envs/common/abk-hello"]
+        assert "skip   dev/api (unchanged)" in second.stderr
+
+    def test_plan__unreadable_manifest_deploys_all(self, project):
+        (project / "manifest.json").write_text("{")
+        result = self.run_cli(project, "plan", "--env", "dev", "--manifest", "manifest.json")
+        assert result.returncode == 0
+        assert len(result.stdout.splitlines()) == 4
+        assert "deploying all services" in result.stderr
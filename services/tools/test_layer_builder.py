@@ -0,0 +1,246 @@
+"""
+Unit tests for layer_builder.py with fake services, uv.lock files and installer.
+"""
+
+import json
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import layer_builder  # noqa: E402
+from layer_builder import (  # noqa: E402
+    LayerBuildError,
+    Pin,
+    build_layers,
+    group_services,
+    plan_layers,
+    read_lock_pins,
+)
+
+
+RUNTIME = f"python{sys.version_info.major}.{sys.version_info.minor}"
+LAYER = "${ssm:/abk-python-layer/${self:provider.stage}/${self:service}}"
+
+
+def lock(project: str, dependencies: str, packages: dict) -> str:
+    """Return uv.lock of project with runtime dependencies and a dev dependency on pytest."""
+    text = (
+        f'version = 1\n\n[[package]]\nname = "{project}"\nversion = "0.1.0"\n'
+        f'source = {{ editable = "." }}\ndependencies = [{dependencies}]\n\n'
+        '[package.dev-dependencies]\ndev = [{ name = "pytest" }]\n'
+    )
+    for name, (version, package_dependencies) in {**packages, "pytest": ("8.4.0", "")}.items():
+        text += (
+            f'\n[[package]]\nname = "{name}"\nversion = "{version}"\n'
+            f'source = {{ registry = "https://pypi.org/simple" }}\n'
+            f"dependencies = [{package_dependencies}]\n"
+        )
+    return text
+
+
+JSONSCHEMA_LOCK = lock(
+    "abk-hello",
+    '{ name = "jsonschema" }',
+    {
+        "jsonschema": ("4.17.3", '{ name = "attrs" }, { name = "pyrsistent" }'),
+        "attrs": ("25.3.0", ""),
+        "pyrsistent": ("0.20.0", ""),
+    },
+)
+
+
+def write_service(services_dir: Path, service_id: str, uv_lock: str, layer: bool = True) -> Path:
+    path = services_dir / service_id
+    path.mkdir(parents=True)
+    (path / "publish.sh").write_text("#!/bin/bash\n")
+    (path / "uv.lock").write_text(uv_lock)
+    (path / "serverless.yml").write_text(
+        f"service: {path.name}\nprovider:\n  runtime: {RUNTIME}\nfunctions:\n"
+        f"  {path.name}:\n    handler: src/handler.handler\n"
+        + (f"    layers:\n    - {LAYER}\n" if layer else f"    # layers:\n    # - {LAYER}\n")
+    )
+    return path
+
+
+@pytest.fixture
+def services_dir(tmp_path):
+    """Two services sharing jsonschema, one not using the layer."""
+    path = tmp_path / "envs"
+    write_service(path, "common/abk-hello", JSONSCHEMA_LOCK)
+    write_service(path, "dev/abk-devices", JSONSCHEMA_LOCK.replace("abk-hello", "abk-devices"))
+    write_service(path, "dev/abk-vendored", JSONSCHEMA_LOCK, layer=False)
+    return path
+
+
+@pytest.fixture
+def fake_install(monkeypatch):
+    """Installer writing one module per requirement line, returns the installed lines."""
+    installed = []
+
+    def install(requirements, target, runtime, architecture):
+        for line in requirements.read_text().splitlines():
+            installed.append(line)
+            name = line.split("==")[0]
+            (target / name).mkdir(parents=True)
+            (target / name / "__init__.py").write_text(f"VERSION = {line!r}\n")
+            (target / name / "tests").mkdir()
+            (target / name / "tests" / "test_it.py").write_text("")
+
+    monkeypatch.setattr(layer_builder, "install_requirements", install)
+    return installed
+
+
+class TestReadLockPins:
+    """Runtime dependencies of a uv.lock."""
+
+    def test_read_lock_pins__transitive_runtime_dependencies(self, tmp_path):
+        (tmp_path / "uv.lock").write_text(JSONSCHEMA_LOCK)
+        assert read_lock_pins(tmp_path / "uv.lock") == {
+            "jsonschema": Pin("4.17.3", ""),
+            "attrs": Pin("25.3.0", ""),
+            "pyrsistent": Pin("0.20.0", ""),
+        }
+
+    def test_read_lock_pins__markers_and_extras(self, tmp_path):
+        (tmp_path / "uv.lock").write_text(
+            lock(
+                "svc",
+                '{ name = "requests", extra = ["socks"] }, '
+                "{ name = \"colorama\", marker = \"sys_platform == 'win32'\" }",
+                {
+                    "requests": ("2.32.3", ""),
+                    "colorama": ("0.4.6", '{ name = "six" }'),
+                    "six": ("1.17.0", ""),
+                    "pysocks": ("1.7.1", ""),
+                },
+            ).replace(
+                'version = "2.32.3"\n',
+                'version = "2.32.3"\noptional-dependencies = { socks = [{ name = "pysocks" }] }\n',
+            )
+        )
+        pins = read_lock_pins(tmp_path / "uv.lock")
+        assert pins["pysocks"] == Pin("1.7.1", "")
+        assert pins["colorama"] == Pin("0.4.6", "(sys_platform == 'win32')")
+        assert pins["six"] == Pin("1.17.0", "(sys_platform == 'win32')")
+        assert "pytest" not in pins
+
+    def test_read_lock_pins__forked_versions_raise(self, tmp_path):
+        text = JSONSCHEMA_LOCK + (
+            '\n[[package]]\nname = "attrs"\nversion = "22.1.0"\n'
+            'source = { registry = "https://pypi.org/simple" }\n'
+        )
+        (tmp_path / "uv.lock").write_text(text)
+        with pytest.raises(LayerBuildError, match="locks attrs in 2 versions"):
+            read_lock_pins(tmp_path / "uv.lock")
+
+
+class TestPlanLayers:
+    """Services using the layer grouped into compatible sets."""
+
+    def test_plan__compatible_services_share_one_layer(self, services_dir):
+        sets = plan_layers(services_dir, "dev")
+        assert len(sets) == 1
+        assert [service.id for service in sets[0]["services"]] == [
+            "common/abk-hello",
+            "dev/abk-devices",
+        ]
+
+    def test_plan__conflicting_pins_get_own_layer(self, services_dir):
+        lock_file = services_dir / "dev/abk-devices/uv.lock"
+        lock_file.write_text(lock_file.read_text().replace("25.3.0", "23.1.0"))
+        sets = plan_layers(services_dir, "dev")
+        assert [[service.id for service in layer_set["services"]] for layer_set in sets] == [
+            ["common/abk-hello"],
+            ["dev/abk-devices"],
+        ]
+
+    def test_group__other_architecture_gets_own_layer(self, services_dir):
+        services = layer_builder.discover_layer_services(services_dir, "dev")
+        services[1] = services[1]._replace(architecture="arm64")
+        assert [layer_set["set"] for layer_set in group_services(services)] == ["deps1", "deps2"]
+
+    def test_merge_pins__either_marker(self):
+        merged = layer_builder.merge_pins(
+            {"six": Pin("1.17.0", "sys_platform == 'win32'")},
+            {"six": Pin("1.17.0", "python_version < '3.12'")},
+        )
+        assert merged["six"].marker == "(sys_platform == 'win32') or (python_version < '3.12')"
+        assert layer_builder.merge_pins(merged, {"six": Pin("1.17.0", "")})["six"].marker == ""
+
+    def test_plan__service_without_lock_raises(self, services_dir):
+        (services_dir / "dev/abk-devices/uv.lock").unlink()
+        with pytest.raises(LayerBuildError, match="has no uv.lock"):
+            plan_layers(services_dir, "dev")
+
+
+class TestBuildLayers:
+    """Layer zips, serverless configuration and the lock hash cache."""
+
+    def test_build__layer_and_serverless_config(self, services_dir, tmp_path, fake_install):
+        report = build_layers(services_dir, "dev", output_dir=tmp_path / "out")
+        assert fake_install == ["attrs==25.3.0", "jsonschema==4.17.3", "pyrsistent==0.20.0"]
+        names = zipfile.ZipFile(tmp_path / "out/deps1.zip").namelist()
+        tag = sys.implementation.cache_tag
+        assert f"python/attrs/__pycache__/__init__.{tag}.pyc" in names
+        assert not [name for name in names if "/tests/" in name]
+        assert report["upload_bytes_saved"] == report["layers"]["deps1"]["zip_bytes"]
+
+        config = json.loads((tmp_path / "out/layers.json").read_text())
+        assert config["layers"]["deps1"]["name"] == "abk-python-layer-dev-deps1"
+        parameter = config["resources"]["Resources"]["AbkHelloLayerParameter"]["Properties"]
+        assert parameter["Name"] == "/abk-python-layer/dev/abk-hello"
+        assert parameter["Value"] == {"Ref": "Deps1LambdaLayer"}
+
+    def test_build__unchanged_pins_hit_cache(self, services_dir, tmp_path, fake_install):
+        cache_dir = tmp_path / "cache"
+        first = build_layers(services_dir, "dev", tmp_path / "out", cache_dir=cache_dir)
+        lock_file = services_dir / "dev/abk-devices/uv.lock"
+        # a changed dev dependency does not change the layer
+        lock_file.write_text(lock_file.read_text().replace("8.4.0", "8.4.1"))
+        second = build_layers(services_dir, "dev", tmp_path / "out", cache_dir=cache_dir)
+        assert (first["layers"]["deps1"]["cache"], second["layers"]["deps1"]["cache"]) == (
+            "miss",
+            "hit",
+        )
+        assert len(fake_install) == 3
+
+    def test_build__changed_pin_misses_cache(self, services_dir, tmp_path, fake_install):
+        cache_dir = tmp_path / "cache"
+        first = build_layers(services_dir, "dev", tmp_path / "out", cache_dir=cache_dir)
+        for service in ("common/abk-hello", "dev/abk-devices"):
+            lock_file = services_dir / service / "uv.lock"
+            lock_file.write_text(lock_file.read_text().replace("25.3.0", "25.4.0"))
+        second = build_layers(services_dir, "dev", tmp_path / "out", cache_dir=cache_dir)
+        assert second["layers"]["deps1"]["cache"] == "miss"
+        assert second["layers"]["deps1"]["lock_hash"] != first["layers"]["deps1"]["lock_hash"]
+
+
+class TestLayerBuilderCli:
+    """Command line used by the abk-python-layer service."""
+
+    def test_main__plan_prints_sets(self, services_dir):
+        result = subprocess.run(
+            [sys.executable, layer_builder.__file__, "plan", "--services-dir", str(services_dir)],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout)[0]["requirements"] == [
+            "attrs==25.3.0",
+            "jsonschema==4.17.3",
+            "pyrsistent==0.20.0",
+        ]
+
+    def test_main__no_layer_services_exits_2(self, tmp_path):
+        result = subprocess.run(
+            [sys.executable, layer_builder.__file__, "plan", "--services-dir", str(tmp_path)],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 2
+        assert result.stderr.startswith("ERROR: no service")
@@ -82,6 +82,12 @@ print_test_summary() {
 #------------------------------------------------------------------------------
 # Service validation functions
 #------------------------------------------------------------------------------
+# services without functions, e.g. 000_abk-python-layer, deploy no Lambda functions or APIs
+has_lambda_functions() {
+    local service_dir="$1"
+    grep -q '^functions:' "$service_dir/serverless.yml" 2>/dev/null
+}
+
 test_aws_connectivity_and_permissions() {
     local test_name="AWS connectivity and permissions"
     echo "-> ${FUNCNAME[0]}"
@@ -146,8 +152,8 @@ test_deployed_lambda_functions() {
             local service_name
             service_name=$(basename "$service_dir")
             
-            # Only check services with publish.sh
-            if [ -f "$service_dir/publish.sh" ]; then
+            # Only check services with publish.sh and Lambda functions
+            if [ -f "$service_dir/publish.sh" ] && has_lambda_functions "$service_dir"; then
                 # Get clean service name (strip leading digits)
                 local clean_service_name
                 clean_service_name=$(echo "$service_name" | sed 's/^[0-9_]*//g')
@@ -165,7 +171,7 @@ test_deployed_lambda_functions() {
                     services_without_lambdas+=("$service_name: no Lambda functions found")
                 fi
             else
-                echo "  ⚠️  Skipping service without publish.sh: $service_name"
+                echo "  ⚠️  Skipping service without publish.sh or functions: $service_name"
             fi
         done < <(find "$SERVICES_ENVS_DIR/common" -maxdepth 1 -type d ! -path "$SERVICES_ENVS_DIR/common" 2>/dev/null || true)
     fi
@@ -177,8 +183,8 @@ test_deployed_lambda_functions() {
             local service_name
             service_name=$(basename "$service_dir")
             
-            # Only check services with publish.sh
-            if [ -f "$service_dir/publish.sh" ]; then
+            # Only check services with publish.sh and Lambda functions
+            if [ -f "$service_dir/publish.sh" ] && has_lambda_functions "$service_dir"; then
                 # Get clean service name (strip leading digits)
                 local clean_service_name
                 clean_service_name=$(echo "$service_name" | sed 's/^[0-9_]*//g')
@@ -196,7 +202,7 @@ test_deployed_lambda_functions() {
                     services_without_lambdas+=("$service_name: no Lambda functions found")
                 fi
             else
-                echo "  ⚠️  Skipping service without publish.sh: $service_name"
+                echo "  ⚠️  Skipping service without publish.sh or functions: $service_name"
             fi
         done < <(find "$SERVICES_ENVS_DIR/$TEST_ENV" -maxdepth 1 -type d ! -path "$SERVICES_ENVS_DIR/$TEST_ENV" 2>/dev/null || true)
     fi
@@ -231,8 +237,8 @@ test_api_gateway_endpoints() {
             local service_name
             service_name=$(basename "$service_dir")
             
-            # Only check services with publish.sh
-            if [ -f "$service_dir/publish.sh" ]; then
+            # Only check services with publish.sh and Lambda functions
+            if [ -f "$service_dir/publish.sh" ] && has_lambda_functions "$service_dir"; then
                 # Get clean service name (strip leading digits)
                 local clean_service_name
                 clean_service_name=$(echo "$service_name" | sed 's/^[0-9_]*//g')
@@ -259,8 +265,8 @@ test_api_gateway_endpoints() {
             local service_name
             service_name=$(basename "$service_dir")
             
-            # Only check services with publish.sh
-            if [ -f "$service_dir/publish.sh" ]; then
+            # Only check services with publish.sh and Lambda functions
+            if [ -f "$service_dir/publish.sh" ] && has_lambda_functions "$service_dir"; then
                 # Get clean service name (strip leading digits)
                 local clean_service_name
                 clean_service_name=$(echo "$service_name" | sed 's/^[0-9_]*//g')
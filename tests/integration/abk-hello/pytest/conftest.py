@@ -6,12 +6,18 @@ for integration testing of the abk-hello service.
 """
 
 import os
-import json
+import sys
 import pytest
 import requests
+from pathlib import Path
 from typing import Dict, Optional, Any
 from urllib.parse import urljoin
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "common"))
+
+from api_discovery import discover_api_url  # noqa: E402
+from request_builders import build_invalid_test_data, build_valid_test_data  # noqa: E402
+
 
 @pytest.fixture(scope="session")
 def api_config():
@@ -20,41 +26,14 @@ def api_config():
     env = os.environ.get("ABK_DEPLOYMENT_ENV", "dev")
     region = os.environ.get("ABK_DEPLOYMENT_REGION", "us-west-2")
     
-    # Try to get API URL from environment variable first
-    api_url = os.environ.get("ABK_HELLO_API_URL")
-    
-    if not api_url:
-        # Try to discover API Gateway URL from AWS CLI if available
-        try:
-            import subprocess
-            
-            # Get service name from serverless.yml or use default
-            service_name = f"{env}-abk-hello"
-            
-            # Try to get API Gateway info
-            result = subprocess.run(
-                [
-                    "aws", "apigateway", "get-rest-apis", 
-                    "--region", region,
-                    "--query", f"items[?name=='{service_name}'].{{id:id,name:name}}",
-                    "--output", "json"
-                ],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                apis = json.loads(result.stdout)
-                if apis:
-                    api_id = apis[0]["id"]
-                    api_url = f"https://{api_id}.execute-api.{region}.amazonaws.com/{env}"
-                    print(f"Discovered API URL: {api_url}")
-        except (subprocess.SubprocessError, json.JSONDecodeError, ImportError, FileNotFoundError):
-            # Fall back to placeholder if discovery fails
-            print("Warning: Could not discover API Gateway URL, using placeholder")
-            api_url = f"https://your-api-id.execute-api.{region}.amazonaws.com/{env}"
-    
+    # ABK_HELLO_API_URL wins, else one cached get-rest-apis lookup shared by all test suites
+    api_url = discover_api_url("abk-hello", env, region)
+    if api_url:
+        print(f"Discovered API URL: {api_url}")
+    else:
+        print("Warning: Could not discover API Gateway URL, using placeholder")
+        api_url = f"https://your-api-id.execute-api.{region}.amazonaws.com/{env}"
+
     return {
         "base_url": api_url,
         "endpoint_url": urljoin(api_url, "/abk-hello"),
@@ -107,43 +86,13 @@ def api_client(api_config):
 @pytest.fixture
 def valid_test_data():
     """Provide valid test data for requests."""
-    import uuid
-    return {
-        "deviceUuid": str(uuid.uuid4()),
-        "txId": "test-transaction-12345"
-    }
+    return build_valid_test_data()
 
 
 @pytest.fixture
 def invalid_test_data():
     """Provide various invalid test data for negative testing."""
-    import uuid
-    
-    return {
-        "invalid_uuid": {
-            "deviceUuid": "not-a-valid-uuid",
-            "txId": "test-tx-123"
-        },
-        "missing_device_uuid": {
-            "txId": "test-tx-123"
-        },
-        "missing_tx_id": {
-            "deviceUuid": str(uuid.uuid4())
-        },
-        "empty_tx_id": {
-            "deviceUuid": str(uuid.uuid4()),
-            "txId": ""
-        },
-        "tx_id_too_long": {
-            "deviceUuid": str(uuid.uuid4()),
-            "txId": "x" * 37  # Exceeds 36 character limit
-        },
-        "extra_properties": {
-            "deviceUuid": str(uuid.uuid4()),
-            "txId": "test-tx-123",
-            "extraField": "should-be-rejected"
-        }
-    }
+    return build_invalid_test_data()
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+Async load generator and latency profiler for abk-hello endpoints.
+
+Sends a mix of valid and invalid GET / POST requests (built with request_builders.py,
+same data as the conftest.py fixtures) over pooled keep-alive HTTP/1.1 connections,
+one connection per concurrent worker. Works against the deployed API Gateway URL and
+against the local API (services/envs/common/abk-hello: make local_api).
+
+Load models:
+    --rps 0 (default): closed loop, every worker sends its next request when the
+        previous one finished, measures max throughput for the given concurrency
+    --rps N: open loop, requests are scheduled N per second, latency is measured from
+        the scheduled send time, so a saturated endpoint shows up in the percentiles
+        instead of silently lowering the request rate (coordinated omission)
+
+When the function runs with ABK_SERVER_TIMING=1, every response carries a Server-Timing
+header with the function's own duration and a cold / warm marker. The report then splits
+the latency into function time and time outside of the function (network, API Gateway,
+Lambda service and, in open loop, client queueing) and counts cold invocations.
+
+The JSON report has the same "summary" block as the pytest JSON report, so
+deploy-004_run-tests.sh picks up load_test_report.json for integration_test_summary.json.
+The load run counts as one test, which fails when an error rate or p99 limit is exceeded.
+
+Usage:
+    python load_generator.py --url "$ABK_HELLO_API_URL" --rps 50 --concurrency 10 \
+        --duration 30 --mix get_valid=70,post_valid=20,get_invalid=5,post_invalid=5
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import ssl
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from request_builders import build_invalid_test_data, build_valid_test_data
+
+
+DEFAULT_MIX = {"get_valid": 70, "post_valid": 20, "get_invalid": 5, "post_invalid": 5}
+DEFAULT_OUTPUT = "load_test_report.json"
+PERCENTILES = {"p50": 50.0, "p90": 90.0, "p99": 99.0, "p999": 99.9}
+MAX_OUTLIER_SAMPLES = 10
+
+
+# -----------------------------------------------------------------------------
+# latency histogram
+# -----------------------------------------------------------------------------
+class LatencyHistogram:
+    """HDR style histogram of latencies in microseconds.
+
+    Every power of two range is split into 2^(sub_bucket_bits - 1) equal buckets, so a
+    recorded value is off by less than 1 / 2^(sub_bucket_bits - 1) of itself (< 1% for
+    the default 8 bits) with memory independent of the number of recorded values.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 8):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts: Counter = Counter()
+        self.total_count = 0
+        self.min_us = 0
+        self.max_us = 0
+        self.sum_us = 0
+
+    def _shift(self, value_us: int) -> int:
+        return max(0, value_us.bit_length() - self.sub_bucket_bits)
+
+    def record(self, value_us: int) -> None:
+        """Record one latency."""
+        value_us = max(0, int(value_us))
+        shift = self._shift(value_us)
+        self.counts[(value_us >> shift) << shift] += 1
+        self.min_us = value_us if self.total_count == 0 else min(self.min_us, value_us)
+        self.max_us = max(self.max_us, value_us)
+        self.sum_us += value_us
+        self.total_count += 1
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add all values recorded by other histogram with the same sub_bucket_bits."""
+        if other.total_count == 0:
+            return
+        self.counts.update(other.counts)
+        self.min_us = other.min_us if self.total_count == 0 else min(self.min_us, other.min_us)
+        self.max_us = max(self.max_us, other.max_us)
+        self.sum_us += other.sum_us
+        self.total_count += other.total_count
+
+    def value_at_percentile(self, percentile: float) -> int:
+        """Return highest value of the bucket containing the percentile, in microseconds."""
+        if self.total_count == 0:
+            return 0
+        target = max(1, math.ceil(percentile / 100.0 * self.total_count))
+        cumulative = 0
+        for lowest in sorted(self.counts):
+            cumulative += self.counts[lowest]
+            if cumulative >= target:
+                return min(lowest + (1 << self._shift(lowest)) - 1, self.max_us)
+        return self.max_us
+
+    def to_ms_dict(self) -> Dict[str, float]:
+        """Return min, percentiles, max and mean in milliseconds."""
+        result = {"min": self.min_us / 1000.0}
+        for name, percentile in PERCENTILES.items():
+            result[name] = self.value_at_percentile(percentile) / 1000.0
+        result["max"] = self.max_us / 1000.0
+        result["mean"] = (
+            round(self.sum_us / self.total_count / 1000.0, 3) if self.total_count else 0.0
+        )
+        return result
+
+
+# -----------------------------------------------------------------------------
+# Server-Timing
+# -----------------------------------------------------------------------------
+class ServerTiming(NamedTuple):
+    """Server-Timing header of an abk-hello response."""
+
+    cold: Optional[bool]  # None when the header has no cold / warm marker
+    durations_ms: Dict[str, float]  # init (cold only), decode, validate, serialize, handler
+
+    @property
+    def handler_ms(self) -> Optional[float]:
+        """Duration of the handler, the function time of the request."""
+        return self.durations_ms.get("handler")
+
+
+def parse_server_timing(value: Optional[str]) -> Optional[ServerTiming]:
+    """Parse Server-Timing header value, None when the header is missing.
+
+    Example value: "init;dur=85.210, decode;dur=0.021, handler;dur=0.061, cold"
+    """
+    if not value:
+        return None
+    cold = None
+    durations_ms = {}
+    for entry in value.split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        if name in ("cold", "warm"):
+            cold = name == "cold"
+            continue
+        for param in params:
+            key, _, param_value = param.partition("=")
+            if key.strip() == "dur":
+                try:
+                    durations_ms[name] = float(param_value.strip().strip('"'))
+                except ValueError:
+                    pass
+    return ServerTiming(cold=cold, durations_ms=durations_ms)
+
+
+# -----------------------------------------------------------------------------
+# requests
+# -----------------------------------------------------------------------------
+class RequestSpec(NamedTuple):
+    """One HTTP request and the status code the endpoint must answer with."""
+
+    kind: str
+    method: str
+    target: str
+    body: bytes
+    expected_status: int
+
+
+def build_request(kind: str, path: str, seq: int, rng: random.Random) -> RequestSpec:
+    """Build request of the given kind: get_valid, post_valid, get_invalid or post_invalid."""
+    method, _, validity = kind.partition("_")
+    if validity == "valid":
+        data = build_valid_test_data(tx_id=f"load-{seq}")
+        expected_status = 200
+    else:
+        data = rng.choice(list(build_invalid_test_data().values()))
+        expected_status = 403
+    if method == "get":
+        return RequestSpec(kind, "GET", f"{path}?{urlencode(data)}", b"", expected_status)
+    return RequestSpec(kind, "POST", path, json.dumps(data).encode(), expected_status)
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Parse request mix like get_valid=70,post_valid=20,get_invalid=5,post_invalid=5."""
+    mix = {}
+    for item in value.split(","):
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX or not weight.strip().isdigit():
+            raise argparse.ArgumentTypeError(
+                f"invalid mix item '{item}', expected <kind>=<weight>, kind in {list(DEFAULT_MIX)}"
+            )
+        mix[kind] = int(weight)
+    if sum(mix.values()) == 0:
+        raise argparse.ArgumentTypeError("mix weights must not all be 0")
+    return mix
+
+
+# -----------------------------------------------------------------------------
+# keep-alive HTTP/1.1 connection
+# -----------------------------------------------------------------------------
+class KeepAliveConnection:
+    """HTTP/1.1 connection which is kept open and reused for the following requests."""
+
+    def __init__(self, url: str, timeout_s: float):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.ssl_context = ssl.create_default_context() if parts.scheme == "https" else None
+        self.port = parts.port or (443 if self.ssl_context else 80)
+        default_port = self.port == (443 if self.ssl_context else 80)
+        self.host_header = self.host if default_port else f"{self.host}:{self.port}"
+        self.timeout_s = timeout_s
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.opened = 0
+
+    async def _connect(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host,
+            self.port,
+            ssl=self.ssl_context,
+            server_hostname=self.host if self.ssl_context else None,
+        )
+        self.opened += 1
+
+    def close(self) -> None:
+        """Close the connection, the next request opens a new one."""
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def _read_response(self) -> Tuple[int, Dict[str, str], bytes]:
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split(b" ", 2)[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                body += await self.reader.readexactly(size)
+                await self.reader.readline()
+            body = bytes(body)
+        elif "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self.reader.read()
+            headers["connection"] = "close"
+        return status, headers, body
+
+    async def request(
+        self, method: str, target: str, body: bytes = b""
+    ) -> Tuple[int, Dict[str, str], bytes, bool]:
+        """Send request, return status, lower case headers, body and new connection flag.
+
+        A reused connection which the server closed meanwhile is reopened once.
+        """
+        for attempt in range(2):
+            new_connection = self.writer is None
+            if new_connection:
+                await self._connect()
+            head = (
+                f"{method} {target} HTTP/1.1\r\n"
+                f"Host: {self.host_header}\r\n"
+                "Connection: keep-alive\r\n"
+                "Accept: application/json\r\n"
+                "User-Agent: abk-hello-load-generator\r\n"
+            )
+            if body or method == "POST":
+                head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            try:
+                self.writer.write(head.encode("latin-1") + b"\r\n" + body)
+                await self.writer.drain()
+                status, headers, response_body = await asyncio.wait_for(
+                    self._read_response(), self.timeout_s
+                )
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if new_connection or attempt:
+                    raise
+                continue
+            except BaseException:
+                self.close()
+                raise
+            if headers.get("connection", "").lower() == "close":
+                self.close()
+            return status, headers, response_body, new_connection
+        raise ConnectionError("unreachable")
+
+
+# -----------------------------------------------------------------------------
+# load run
+# -----------------------------------------------------------------------------
+class LoadConfig(NamedTuple):
+    """Load run configuration."""
+
+    url: str
+    path: str = "/abk-hello"
+    rps: float = 0.0
+    concurrency: int = 10
+    duration_s: float = 10.0
+    mix: Dict[str, int] = DEFAULT_MIX
+    timeout_s: float = 10.0
+    cold_start_factor: float = 5.0
+    max_error_rate: float = 0.0
+    max_p99_ms: Optional[float] = None
+    seed: Optional[int] = None
+
+
+class Sample(NamedTuple):
+    """Result of one request."""
+
+    offset_s: float
+    latency_us: int
+    kind: str
+    status: int  # 0 for transport errors
+    ok: bool
+    new_connection: bool
+    server_timing: Optional[ServerTiming] = None
+
+
+async def run_load(config: LoadConfig) -> Dict:
+    """Run the load and return the JSON report."""
+    rng = random.Random(config.seed)
+    kinds = [kind for kind, weight in config.mix.items() if weight > 0]
+    weights = [config.mix[kind] for kind in kinds]
+    endpoint_path = urlsplit(config.url).path.rstrip("/") + config.path
+    samples: List[Sample] = []
+    connections: List[KeepAliveConnection] = []
+    sequence = itertools.count()
+    start = time.perf_counter()
+    deadline = start + config.duration_s
+
+    async def worker() -> None:
+        connection = KeepAliveConnection(config.url, config.timeout_s)
+        connections.append(connection)
+        try:
+            while True:
+                seq = next(sequence)
+                if config.rps > 0:
+                    scheduled = start + seq / config.rps
+                    if scheduled >= deadline:
+                        return
+                    await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                else:
+                    scheduled = time.perf_counter()
+                    if scheduled >= deadline:
+                        return
+                spec = build_request(rng.choices(kinds, weights)[0], endpoint_path, seq, rng)
+                server_timing = None
+                try:
+                    status, headers, _, new_connection = await connection.request(
+                        spec.method, spec.target, spec.body
+                    )
+                    server_timing = parse_server_timing(headers.get("server-timing"))
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    status, new_connection = 0, True
+                end = time.perf_counter()
+                samples.append(
+                    Sample(
+                        offset_s=scheduled - start,
+                        latency_us=int((end - scheduled) * 1e6),
+                        kind=spec.kind,
+                        status=status,
+                        ok=status == spec.expected_status,
+                        new_connection=new_connection,
+                        server_timing=server_timing,
+                    )
+                )
+        finally:
+            connection.close()
+
+    await asyncio.gather(*(worker() for _ in range(config.concurrency)))
+    elapsed_s = time.perf_counter() - start
+    return build_report(config, samples, elapsed_s, sum(c.opened for c in connections))
+
+
+def build_server_timing_report(samples: List[Sample]) -> Dict:
+    """Split latencies into function time and time outside of the function."""
+    function_histogram = LatencyHistogram()
+    outside_histogram = LatencyHistogram()
+    init_histogram = LatencyHistogram()
+    cold = warm = 0
+    for sample in samples:
+        timing = sample.server_timing
+        if timing is None or timing.handler_ms is None:
+            continue
+        function_us = int(timing.handler_ms * 1000)
+        function_histogram.record(function_us)
+        outside_histogram.record(sample.latency_us - function_us)
+        if "init" in timing.durations_ms:
+            init_histogram.record(int(timing.durations_ms["init"] * 1000))
+        cold += timing.cold is True
+        warm += timing.cold is False
+    return {
+        "responses_with_header": function_histogram.total_count,
+        "cold_invocations": cold,
+        "warm_invocations": warm,
+        "function_ms": function_histogram.to_ms_dict(),
+        "outside_function_ms": outside_histogram.to_ms_dict(),
+        "init_ms": init_histogram.to_ms_dict(),
+    }
+
+
+def build_report(
+    config: LoadConfig, samples: List[Sample], elapsed_s: float, connections_opened: int
+) -> Dict:
+    """Aggregate samples into the JSON report."""
+    histogram = LatencyHistogram()
+    kind_histograms: Dict[str, LatencyHistogram] = {}
+    kind_errors: Counter = Counter()
+    for sample in samples:
+        histogram.record(sample.latency_us)
+        kind_histograms.setdefault(sample.kind, LatencyHistogram()).record(sample.latency_us)
+        kind_errors[sample.kind] += not sample.ok
+
+    transport_errors = sum(1 for sample in samples if sample.status == 0)
+    unexpected_status = sum(1 for sample in samples if sample.status and not sample.ok)
+    error_rate = (transport_errors + unexpected_status) / len(samples) if samples else 1.0
+
+    outlier_threshold_us = config.cold_start_factor * histogram.value_at_percentile(50.0)
+    outliers = sorted(
+        (sample for sample in samples if sample.latency_us > outlier_threshold_us),
+        key=lambda sample: sample.latency_us,
+        reverse=True,
+    )
+
+    latency_ms = histogram.to_ms_dict()
+    checks = {
+        "requests_sent": {"limit": 1, "value": len(samples), "passed": len(samples) > 0},
+        "max_error_rate": {
+            "limit": config.max_error_rate,
+            "value": round(error_rate, 6),
+            "passed": error_rate <= config.max_error_rate,
+        },
+    }
+    if config.max_p99_ms is not None:
+        checks["max_p99_ms"] = {
+            "limit": config.max_p99_ms,
+            "value": latency_ms["p99"],
+            "passed": latency_ms["p99"] <= config.max_p99_ms,
+        }
+    passed = all(check["passed"] for check in checks.values())
+
+    return {
+        "summary": {
+            "passed": int(passed),
+            "failed": int(not passed),
+            "skipped": 0,
+            "total": 1,
+        },
+        "load": {
+            "url": config.url.rstrip("/") + config.path,
+            "config": {
+                "rps": config.rps,
+                "concurrency": config.concurrency,
+                "duration_s": config.duration_s,
+                "mix": config.mix,
+            },
+            "requests": len(samples),
+            "elapsed_s": round(elapsed_s, 3),
+            "throughput_rps": round(len(samples) / elapsed_s, 2) if elapsed_s else 0.0,
+            "connections_opened": connections_opened,
+            "latency_ms": latency_ms,
+            "errors": {
+                "transport": transport_errors,
+                "unexpected_status": unexpected_status,
+                "error_rate": round(error_rate, 6),
+            },
+            "status_codes": dict(Counter(str(sample.status) for sample in samples)),
+            "kinds": {
+                kind: {
+                    "requests": kind_histogram.total_count,
+                    "errors": kind_errors[kind],
+                    "p50_ms": kind_histogram.value_at_percentile(50.0) / 1000.0,
+                    "p99_ms": kind_histogram.value_at_percentile(99.0) / 1000.0,
+                }
+                for kind, kind_histogram in sorted(kind_histograms.items())
+            },
+            "cold_start_outliers": {
+                "threshold_ms": round(outlier_threshold_us / 1000.0, 3),
+                "count": len(outliers),
+                "samples": [
+                    {
+                        "offset_s": round(sample.offset_s, 3),
+                        "latency_ms": sample.latency_us / 1000.0,
+                        "kind": sample.kind,
+                        "status": sample.status,
+                        "new_connection": sample.new_connection,
+                        "cold": sample.server_timing.cold if sample.server_timing else None,
+                    }
+                    for sample in outliers[:MAX_OUTLIER_SAMPLES]
+                ],
+            },
+            "server_timing": build_server_timing_report(samples),
+            "checks": checks,
+        },
+    }
+
+
+def main() -> int:
+    """Run the load generator from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--url",
+        default=os.environ.get("ABK_HELLO_API_URL"),
+        help="API base URL including stage, default: $ABK_HELLO_API_URL",
+    )
+    parser.add_argument("--path", default="/abk-hello", help="endpoint path")
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=0.0,
+        help="requests per second, 0: closed loop",
+    )
+    parser.add_argument("--concurrency", type=int, default=10, help="workers / pooled connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="run time in seconds")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="request mix, e.g. get_valid=70,post_valid=20,get_invalid=5,post_invalid=5",
+    )
+    parser.add_argument("--timeout", type=float, default=10.0, help="request timeout in seconds")
+    parser.add_argument(
+        "--cold-start-factor",
+        type=float,
+        default=5.0,
+        help="outlier threshold as multiple of p50",
+    )
+    parser.add_argument("--max-error-rate", type=float, default=0.0, help="fail when exceeded")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="fail when exceeded")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the request mix")
+    parser.add_argument(
+        "--output",
+        default=DEFAULT_OUTPUT,
+        help="JSON report file, '-' for stdout only",
+    )
+    args = parser.parse_args()
+    if not args.url:
+        parser.error("--url or ABK_HELLO_API_URL is required")
+
+    config = LoadConfig(
+        url=args.url,
+        path=args.path,
+        rps=args.rps,
+        concurrency=args.concurrency,
+        duration_s=args.duration,
+        mix=args.mix,
+        timeout_s=args.timeout,
+        cold_start_factor=args.cold_start_factor,
+        max_error_rate=args.max_error_rate,
+        max_p99_ms=args.max_p99_ms,
+        seed=args.seed,
+    )
+    report = asyncio.run(run_load(config))
+    print(json.dumps(report, indent=2))
+    if args.output != "-":
+        with open(args.output, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    return 0 if report["summary"]["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Request data builders for abk-hello integration and load tests.
+
+Shared by the conftest.py fixtures and load_generator.py, so functional tests and
+load tests send the same valid and invalid requests.
+"""
+
+import uuid
+from typing import Any, Dict
+
+
+def build_valid_test_data(tx_id: str = "test-transaction-12345") -> Dict[str, str]:
+    """Build valid request data with a fresh device UUID."""
+    return {
+        "deviceUuid": str(uuid.uuid4()),
+        "txId": tx_id
+    }
+
+
+def build_invalid_test_data() -> Dict[str, Dict[str, Any]]:
+    """Build invalid request data, one entry per validation failure."""
+    return {
+        "invalid_uuid": {
+            "deviceUuid": "not-a-valid-uuid",
+            "txId": "test-tx-123"
+        },
+        "missing_device_uuid": {
+            "txId": "test-tx-123"
+        },
+        "missing_tx_id": {
+            "deviceUuid": str(uuid.uuid4())
+        },
+        "empty_tx_id": {
+            "deviceUuid": str(uuid.uuid4()),
+            "txId": ""
+        },
+        "tx_id_too_long": {
+            "deviceUuid": str(uuid.uuid4()),
+            "txId": "x" * 37  # Exceeds 36 character limit
+        },
+        "extra_properties": {
+            "deviceUuid": str(uuid.uuid4()),
+            "txId": "test-tx-123",
+            "extraField": "should-be-rejected"
+        }
+    }
@@ -58,20 +58,12 @@ discover_api_url() {
     
     PrintTrace "$TRACE_INFO" "Discovering API Gateway URL for service: $service_name"
     
-    # Try to get API Gateway info using AWS CLI
-    local api_info
-    if api_info=$(aws apigateway get-rest-apis \
-        --region "$region" \
-        --query "items[?name=='$service_name'].{id:id,name:name}" \
-        --output json 2>/dev/null); then
-        
-        local api_id
-        if api_id=$(echo "$api_info" | jq -r '.[0].id // empty' 2>/dev/null) && [ -n "$api_id" ] && [ "$api_id" != "null" ]; then
-            local api_url="https://${api_id}.execute-api.${region}.amazonaws.com/${env}"
-            PrintTrace "$TRACE_INFO" "Discovered API URL: $api_url"
-            echo "$api_url"
-            return 0
-        fi
+    # cached lookup shared with the test fixtures, see tests/integration/common/api_discovery.py
+    local api_url
+    if api_url=$(python3 "$TEST_DIR/../../common/api_discovery.py" url abk-hello --env "$env" --region "$region") && [ -n "$api_url" ]; then
+        PrintTrace "$TRACE_INFO" "Discovered API URL: $api_url"
+        echo "$api_url"
+        return 0
     fi
     
     PrintTrace "$TRACE_WARNING" "Could not discover API Gateway URL automatically"
@@ -115,6 +107,14 @@ install_test_dependencies() {
 }
 
 validate_aws_connectivity() {
+    # local API (services/envs/common/abk-hello: make local_api) needs no AWS credentials
+    case "${ABK_HELLO_API_URL:-}" in
+        http://127.0.0.1*|http://localhost*)
+            PrintTrace "$TRACE_INFO" "Local API URL $ABK_HELLO_API_URL, skipping AWS connectivity validation"
+            return 0
+            ;;
+    esac
+
     PrintTrace "$TRACE_INFO" "Validating AWS connectivity..."
     
     if ! aws sts get-caller-identity >/dev/null 2>&1; then
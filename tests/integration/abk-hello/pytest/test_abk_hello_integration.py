@@ -224,48 +224,115 @@ class TestAbkHelloPerformance:
     def test_response_time(self):
         """Test that API response time is within acceptable limits."""
         import time
-        
+        from load_generator import parse_server_timing
+
         params = {
             "deviceUuid": str(uuid.uuid4()),
             "txId": "performance-test"
         }
-        
+
         start_time = time.time()
         response = requests.get(self.api_endpoint, params=params)
         end_time = time.time()
-        
+
         response_time = end_time - start_time
-        
+
         assert response.status_code == 200
         # Response should be under 5 seconds (generous for cold start)
         assert response_time < 5.0, f"Response time {response_time:.2f}s exceeds 5s limit"
         print(f"Response time: {response_time:.2f}s")
 
+        # only sent when the function runs with ABK_SERVER_TIMING=1
+        server_timing = parse_server_timing(response.headers.get("Server-Timing"))
+        if server_timing is not None and server_timing.handler_ms is not None:
+            assert server_timing.handler_ms <= response_time * 1000
+            print(
+                f"Function: {server_timing.handler_ms:.3f}ms "
+                f"({'cold' if server_timing.cold else 'warm'}, "
+                f"init {server_timing.durations_ms.get('init', 0.0):.1f}ms), "
+                f"network + gateway: {response_time * 1000 - server_timing.handler_ms:.1f}ms"
+            )
+
     def test_warm_lambda_response_time(self):
-        """Test response time for warm Lambda (after initial call)."""
+        """Test response time for warm Lambda (after initial call).
+
+        With ABK_SERVER_TIMING=1 on the function the Server-Timing header tells whether the
+        request hit a warm container, requests answered by a cold container are repeated.
+        Without the header the call after the warm-up call is assumed to be warm.
+        """
         import time
-        
+        from load_generator import parse_server_timing
+
+        max_attempts = 3
         params = {
             "deviceUuid": str(uuid.uuid4()),
             "txId": "warm-up-call"
         }
-        
+
         # Warm up the Lambda
         requests.get(self.api_endpoint, params=params)
-        
+
         # Now test the warm Lambda response time
-        params["txId"] = "warm-lambda-test"
-        start_time = time.time()
-        response = requests.get(self.api_endpoint, params=params)
-        end_time = time.time()
-        
+        for attempt in range(max_attempts):
+            params["txId"] = f"warm-lambda-test-{attempt}"
+            start_time = time.time()
+            response = requests.get(self.api_endpoint, params=params)
+            end_time = time.time()
+            server_timing = parse_server_timing(response.headers.get("Server-Timing"))
+            if server_timing is None or not server_timing.cold:
+                break
+
         response_time = end_time - start_time
-        
+
         assert response.status_code == 200
+        if server_timing is None:
+            print("No Server-Timing header, assuming a warm container")
+        else:
+            assert server_timing.cold is False, (
+                f"No warm container answered in {max_attempts} attempts: "
+                f"{response.headers.get('Server-Timing')}"
+            )
+            print(
+                f"Warm function: {server_timing.handler_ms:.3f}ms, "
+                f"network + gateway: {response_time * 1000 - server_timing.handler_ms:.1f}ms"
+            )
         # Warm Lambda should respond much faster
         assert response_time < 1.0, f"Warm Lambda response time {response_time:.2f}s exceeds 1s"
         print(f"Warm Lambda response time: {response_time:.2f}s")
 
+    @pytest.mark.slow
+    @pytest.mark.skipif(
+        os.environ.get("ABK_LOAD_TEST") != "1", reason="load profile runs with ABK_LOAD_TEST=1"
+    )
+    def test_load_profile(self):
+        """Test latency percentiles and error rate under sustained load."""
+        import asyncio
+        from load_generator import DEFAULT_OUTPUT, LoadConfig, run_load
+
+        config = LoadConfig(
+            url=self.api_base_url,
+            rps=float(os.environ.get("ABK_LOAD_TEST_RPS", "20")),
+            concurrency=int(os.environ.get("ABK_LOAD_TEST_CONCURRENCY", "5")),
+            duration_s=float(os.environ.get("ABK_LOAD_TEST_DURATION", "10")),
+            max_error_rate=float(os.environ.get("ABK_LOAD_TEST_MAX_ERROR_RATE", "0.01")),
+            max_p99_ms=float(os.environ.get("ABK_LOAD_TEST_MAX_P99_MS", "1000")),
+        )
+        report = asyncio.run(run_load(config))
+
+        # picked up by deploy-004_run-tests.sh for integration_test_summary.json
+        report_path = os.path.join(os.path.dirname(__file__), DEFAULT_OUTPUT)
+        with open(report_path, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+        load = report["load"]
+        print(f"Load profile: {json.dumps(load['latency_ms'])}, {load['throughput_rps']} rps")
+        if load["server_timing"]["responses_with_header"]:
+            print(f"Server timing: {json.dumps(load['server_timing'])}")
+        failed_checks = {
+            name: check for name, check in load["checks"].items() if not check["passed"]
+        }
+        assert not failed_checks, f"Load checks failed: {failed_checks}"
+
 
 if __name__ == "__main__":
     # Allow running tests directly
@@ -6,12 +6,19 @@ API testing of the abk-hello service.
 """
 
 import os
+import sys
 import json
 import uuid
 import pytest
 import subprocess
+from pathlib import Path
 from typing import Dict, Any
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "common"))
+
+from api_discovery import discover_api_url  # noqa: E402
+from tavern_engine import DEFAULT_WORKERS, TavernRunner  # noqa: E402
+
 
 @pytest.fixture(scope="session")
 def tavern_global_cfg():
@@ -25,8 +32,8 @@ def tavern_global_cfg():
     env = os.environ.get("ABK_DEPLOYMENT_ENV", "dev")
     region = os.environ.get("ABK_DEPLOYMENT_REGION", "us-west-2")
     
-    # Get API URL from environment variable
-    api_url = os.environ.get("ABK_HELLO_API_URL")
+    # ABK_HELLO_API_URL wins, else one cached get-rest-apis lookup shared by all test suites
+    api_url = discover_api_url("abk-hello", env, region)
     
     if not api_url:
         # Fall back to placeholder if not set
@@ -91,6 +98,28 @@ def verify_api_accessibility_tavern(tavern_global_cfg):
         )
 
 
+@pytest.fixture(scope="session")
+def tavern_runner(request, tavern_global_cfg):
+    """
+    Provide runner executing the Tavern YAML test documents.
+
+    All selected documents are submitted to a pool of TAVERN_WORKERS threads (default 8)
+    when the first one runs; every test item then waits for its own result. Under
+    pytest-xdist the workers already run in parallel, so every document runs in its item.
+    """
+    workers = int(os.environ.get("TAVERN_WORKERS", DEFAULT_WORKERS))
+    if "PYTEST_XDIST_WORKER" in os.environ:
+        workers = 1
+    runner = TavernRunner(tavern_global_cfg["variables"], workers)
+    runner.submit(
+        item.callspec.params["tavern_case"]
+        for item in request.session.items
+        if "tavern_case" in getattr(getattr(item, "callspec", None), "params", {})
+    )
+    yield runner
+    runner.close()
+
+
 def pytest_configure(config):
     """Configure pytest with Tavern-specific markers."""
     config.addinivalue_line(
@@ -0,0 +1,297 @@
+"""
+Parallel, session-pooled execution engine for Tavern YAML test documents.
+
+Every YAML test document (one `test_name` with its `stages`) is an independent test
+case. Cases run concurrently on a bounded thread pool, the stages inside a case run in
+order. Every pool thread keeps one keep-alive requests.Session, so consecutive stages
+and cases reuse the TCP / TLS connection instead of connecting for every request.
+
+The `{variable}` placeholders of the stages are parsed once per YAML file into
+templates (literal parts and variable names). Rendering a stage is one pass over its
+fields with a dict lookup per placeholder, independent of the number of variables, and
+builds new dicts / lists, so the parsed specs are never modified. Compiled files are
+cached in memory and as marshal files in __pycache__, keyed by file mtime and size.
+"""
+
+import marshal
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import requests
+import yaml
+
+
+DEFAULT_WORKERS = 8
+REQUEST_TIMEOUT = 30
+CACHE_FORMAT_VERSION = 1
+PLACEHOLDER_RE = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# String with {variable} placeholders: (literals, names) with len(names) + 1 literals.
+# YAML never loads tuples, so a tuple in a compiled spec is always a template.
+Template = Tuple[Tuple[str, ...], Tuple[str, ...]]
+
+
+class TavernCase(NamedTuple):
+    """One YAML test document with compiled stages."""
+
+    case_id: str  # <yaml file name>::<test_name>, unique
+    file_name: str
+    test_name: str
+    stages: List[Any]  # compiled with compile_spec, render before use
+
+
+# -----------------------------------------------------------------------------
+# variable templates
+# -----------------------------------------------------------------------------
+def compile_template(value: str) -> Union[str, Template]:
+    """Parse the placeholders of value, strings without placeholders stay as they are."""
+    parts = PLACEHOLDER_RE.split(value)
+    if len(parts) == 1:
+        return value
+    return (tuple(parts[0::2]), tuple(parts[1::2]))
+
+
+def compile_spec(value: Any) -> Any:
+    """Compile every string in nested dicts and lists (keys included) into a template."""
+    if isinstance(value, str):
+        return compile_template(value)
+    if isinstance(value, dict):
+        return {compile_spec(key): compile_spec(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [compile_spec(item) for item in value]
+    return value
+
+
+def render(compiled: Any, variables: Dict[str, str]) -> Any:
+    """Render compiled spec, unknown placeholders are kept as they are.
+
+    Args:
+        compiled: output of compile_spec
+        variables: variable values, already converted to str
+    """
+    value_type = type(compiled)
+    if value_type is tuple:
+        literals, names = compiled
+        parts = [literals[0]]
+        for index, name in enumerate(names, 1):
+            parts.append(variables.get(name, f"{{{name}}}"))
+            parts.append(literals[index])
+        return "".join(parts)
+    if value_type is dict:
+        return {render(key, variables): render(item, variables) for key, item in compiled.items()}
+    if value_type is list:
+        return [render(item, variables) for item in compiled]
+    return compiled
+
+
+# -----------------------------------------------------------------------------
+# YAML loading
+# -----------------------------------------------------------------------------
+_COMPILED_FILES: Dict[Path, Tuple[Tuple[int, int], List[TavernCase]]] = {}
+
+
+def _compile_file(yaml_file: Path) -> List[TavernCase]:
+    with open(yaml_file, "r") as f:
+        test_docs = list(yaml.load_all(f, Loader=YAML_LOADER))
+    cases: List[TavernCase] = []
+    seen_ids = set()
+    for test_spec in test_docs:
+        if not test_spec or not test_spec.get("test_name"):
+            continue
+        case_id = f"{yaml_file.name}::{test_spec['test_name']}"
+        if case_id in seen_ids:
+            case_id = f"{case_id} [{len(cases)}]"
+        seen_ids.add(case_id)
+        cases.append(
+            TavernCase(
+                case_id=case_id,
+                file_name=yaml_file.name,
+                test_name=test_spec["test_name"],
+                stages=compile_spec(test_spec.get("stages", [])),
+            )
+        )
+    return cases
+
+
+def _read_cache(cache_file: Path, key: Tuple[int, int]) -> Optional[List[TavernCase]]:
+    try:
+        with open(cache_file, "rb") as f:
+            cached_key, cached_cases = marshal.loads(f.read())  # load(f) reads per object
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if cached_key != key:
+        return None
+    return [TavernCase(*case) for case in cached_cases]
+
+
+def _write_cache(cache_file: Path, key: Tuple[int, int], cases: List[TavernCase]) -> None:
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as f:
+            marshal.dump((key, [tuple(case) for case in cases]), f)
+        os.replace(tmp_file, cache_file)
+    except (OSError, ValueError):
+        pass  # cache is optional, e.g. read only checkout or YAML values marshal can't store
+
+
+def load_tavern_file(yaml_file: Path, cache_dir: Optional[Path] = None) -> List[TavernCase]:
+    """Return compiled test documents of the YAML file.
+
+    Compiled files are cached in memory and, when cache_dir is given, on disk. Both are
+    keyed by file mtime and size, so an edited file is parsed and compiled again.
+    """
+    stat = yaml_file.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _COMPILED_FILES.get(yaml_file)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    cache_file = None
+    if cache_dir is not None:
+        cache_name = f"{yaml_file.name}.tavern-{CACHE_FORMAT_VERSION}-{marshal.version}.marshal"
+        cache_file = cache_dir / cache_name
+    cases = _read_cache(cache_file, key) if cache_file is not None else None
+    if cases is None:
+        cases = _compile_file(yaml_file)
+        if cache_file is not None:
+            _write_cache(cache_file, key, cases)
+    _COMPILED_FILES[yaml_file] = (key, cases)
+    return cases
+
+
+def collect_tavern_cases(
+    test_dir: Path, pattern: str = "test_*.yaml", cache_dir: Optional[Path] = None
+) -> List[TavernCase]:
+    """Load every test document with a test_name from the YAML files matching pattern."""
+    cases: List[TavernCase] = []
+    for yaml_file in sorted(test_dir.glob(pattern)):
+        cases.extend(load_tavern_file(yaml_file, cache_dir))
+    return cases
+
+
+# -----------------------------------------------------------------------------
+# stage execution
+# -----------------------------------------------------------------------------
+def run_stage(session: requests.Session, stage: Dict[str, Any]) -> None:
+    """Send the rendered stage request and validate the response.
+
+    Raises AssertionError when the response does not match the expected one.
+    """
+    request_spec = stage.get("request", {})
+    response_spec = stage.get("response", {})
+
+    url = request_spec.get("url", "")
+    method = request_spec.get("method", "GET").upper()
+    headers = request_spec.get("headers", {})
+    params = request_spec.get("params", {})
+    json_data = request_spec.get("json", {})
+
+    response = session.request(
+        method=method,
+        url=url,
+        headers=headers,
+        params=params,
+        json=json_data if json_data else None,
+        timeout=REQUEST_TIMEOUT,
+    )
+
+    expected_status = response_spec.get("status_code")
+    if expected_status and response.status_code != expected_status:
+        raise AssertionError(
+            f"Expected status {expected_status}, got {response.status_code}. "
+            f"Response: {response.text}"
+        )
+
+    expected_headers = response_spec.get("headers", {})
+    for header_name, expected_value in expected_headers.items():
+        actual_value = response.headers.get(header_name)
+        if actual_value != expected_value:
+            raise AssertionError(
+                f"Expected header {header_name}={expected_value}, got {actual_value}"
+            )
+
+    expected_json = response_spec.get("json", {})
+    if expected_json:
+        try:
+            actual_json = response.json()
+        except ValueError as e:
+            raise AssertionError(f"Invalid JSON response: {e}")
+        for key, expected_value in expected_json.items():
+            if key not in actual_json:
+                raise AssertionError(f"Missing key '{key}' in response JSON")
+            actual_value = actual_json[key]
+            if actual_value != expected_value:
+                raise AssertionError(
+                    f"Expected JSON key '{key}'={expected_value}, got {actual_value}"
+                )
+
+
+# -----------------------------------------------------------------------------
+# runner
+# -----------------------------------------------------------------------------
+class TavernRunner:
+    """Runs test cases on a bounded pool of threads with one keep-alive session each."""
+
+    def __init__(self, variables: Dict[str, Any], workers: int = DEFAULT_WORKERS):
+        self.variables = {name: str(value) for name, value in variables.items()}
+        self.workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if self.workers > 1:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="tavern")
+        self._futures: Dict[str, Future] = {}
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._lock = threading.Lock()
+
+    def session(self) -> requests.Session:
+        """Return keep-alive session of the calling thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _run(self, case: TavernCase) -> float:
+        start = time.perf_counter()
+        session = self.session()
+        for compiled_stage in case.stages:
+            stage = render(compiled_stage, self.variables)
+            try:
+                run_stage(session, stage)
+            except AssertionError as e:
+                raise AssertionError(f"Stage '{stage.get('name', 'Unnamed stage')}': {e}") from e
+        return time.perf_counter() - start
+
+    def submit(self, cases: Iterable[TavernCase]) -> None:
+        """Start running cases in the background, in the given order."""
+        if self._executor is None:
+            return
+        for case in cases:
+            if case.case_id not in self._futures:
+                self._futures[case.case_id] = self._executor.submit(self._run, case)
+
+    def run(self, case: TavernCase) -> float:
+        """Return duration of the case in seconds, raise its AssertionError when it failed.
+
+        Waits for the background run started by submit(). A case which was not submitted
+        or whose result was already consumed (pytest rerun) runs in the calling thread.
+        """
+        future = self._futures.pop(case.case_id, None)
+        if future is None:
+            return self._run(case)
+        return future.result()
+
+    def close(self) -> None:
+        """Stop the pool and close all sessions."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        for session in self._sessions:
+            session.close()
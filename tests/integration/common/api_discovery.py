@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Cached API Gateway URL discovery for integration tests and deploy scripts.
+
+One paginated get-rest-apis call lists all REST APIs of a region; every API named
+`<env>-<service>` maps to https://<id>.execute-api.<region>.amazonaws.com/<env>.
+The mapping is cached on disk per env and region for ABK_API_DISCOVERY_TTL seconds
+(default 300), so test sessions and scripts started after each other share one lookup.
+A service missing from a cached mapping triggers one refresh (it may be deployed since).
+An already set <SERVICE>_API_URL environment variable (ABK_HELLO_API_URL for abk-hello)
+always wins.
+
+Backends, selected with ABK_API_DISCOVERY_BACKEND:
+    auto (default): boto3 if installed, else the AWS CLI
+    boto3: get_rest_apis paginator
+    aws-cli: one `aws apigateway get-rest-apis` subprocess, the CLI paginates itself
+    stub: reads get-rest-apis output ({"items": [{"id", "name"}]}) from the JSON file
+        ABK_API_DISCOVERY_STUB_FILE, for offline tests, never cached on disk
+
+Usage:
+    python3 api_discovery.py url abk-hello --env dev --region us-west-2
+    python3 api_discovery.py list --env dev --region us-west-2 [--format json|env|export]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DEFAULT_ENV = "dev"
+DEFAULT_REGION = "us-west-2"
+DEFAULT_TTL_S = 300
+AWS_CLI_TIMEOUT_S = 30
+BACKENDS = ["auto", "boto3", "aws-cli", "stub"]
+
+
+class ApiDiscoveryError(Exception):
+    """Raised when the REST APIs cannot be listed."""
+
+
+# -----------------------------------------------------------------------------
+# backends, each returns get-rest-apis items: [{"id": ..., "name": ...}]
+# -----------------------------------------------------------------------------
+def _list_rest_apis_boto3(region: str) -> List[Dict[str, str]]:
+    import boto3
+    import botocore.exceptions
+
+    try:
+        paginator = boto3.client("apigateway", region_name=region).get_paginator("get_rest_apis")
+        return [
+            {"id": item["id"], "name": item["name"]}
+            for page in paginator.paginate(PaginationConfig={"PageSize": 500})
+            for item in page.get("items", [])
+        ]
+    except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+        raise ApiDiscoveryError(f"boto3 get_rest_apis failed: {e}") from e
+
+
+def _list_rest_apis_aws_cli(region: str) -> List[Dict[str, str]]:
+    command = [
+        "aws", "apigateway", "get-rest-apis",
+        "--region", region,
+        "--query", "items[].{id:id,name:name}",
+        "--output", "json",
+    ]
+    try:
+        result = subprocess.run(
+            command, capture_output=True, text=True, timeout=AWS_CLI_TIMEOUT_S, check=True
+        )
+        return json.loads(result.stdout or "[]") or []
+    except (OSError, subprocess.SubprocessError, json.JSONDecodeError) as e:
+        raise ApiDiscoveryError(f"aws apigateway get-rest-apis failed: {e}") from e
+
+
+def _list_rest_apis_stub(region: str) -> List[Dict[str, str]]:
+    stub_file = os.environ.get("ABK_API_DISCOVERY_STUB_FILE")
+    if not stub_file:
+        raise ApiDiscoveryError("stub backend needs ABK_API_DISCOVERY_STUB_FILE")
+    try:
+        with open(stub_file, "r") as f:
+            return json.load(f).get("items", [])
+    except (OSError, json.JSONDecodeError) as e:
+        raise ApiDiscoveryError(f"cannot read stub file {stub_file}: {e}") from e
+
+
+def _resolve_backend(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown API discovery backend: {backend}, expected one of {BACKENDS}")
+    if backend != "auto":
+        return backend
+    try:
+        import boto3  # noqa: F401
+    except ImportError:
+        return "aws-cli"
+    return "boto3"
+
+
+_BACKENDS = {
+    "boto3": _list_rest_apis_boto3,
+    "aws-cli": _list_rest_apis_aws_cli,
+    "stub": _list_rest_apis_stub,
+}
+
+
+# -----------------------------------------------------------------------------
+# discovery
+# -----------------------------------------------------------------------------
+def api_url_env_var(service: str) -> str:
+    """Return environment variable overriding the service URL: abk-hello -> ABK_HELLO_API_URL."""
+    return f"{service.upper().replace('-', '_')}_API_URL"
+
+
+def default_cache_dir() -> Path:
+    """Return $XDG_CACHE_HOME/abk_cloud, default ~/.cache/abk_cloud."""
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "abk_cloud"
+
+
+class ApiDiscovery:
+    """Maps the services of one env and region to their API Gateway URLs."""
+
+    def __init__(
+        self,
+        env: str = DEFAULT_ENV,
+        region: str = DEFAULT_REGION,
+        backend: Optional[str] = None,
+        cache_dir: Optional[Path] = None,
+        ttl_s: Optional[float] = None,
+    ):
+        self.env = env
+        self.region = region
+        self.backend = _resolve_backend(
+            backend or os.environ.get("ABK_API_DISCOVERY_BACKEND", "auto")
+        )
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        if ttl_s is None:
+            ttl_s = float(os.environ.get("ABK_API_DISCOVERY_TTL", DEFAULT_TTL_S))
+        self.ttl_s = ttl_s
+        self._urls: Optional[Dict[str, str]] = None
+        self._from_cache = False
+
+    @property
+    def cache_file(self) -> Path:
+        """Return on disk cache file of this env and region."""
+        return self.cache_dir / f"api-urls-{self.env}-{self.region}.json"
+
+    def _use_disk_cache(self) -> bool:
+        return self.backend != "stub" and self.ttl_s > 0
+
+    def _read_cache(self) -> Optional[Dict[str, str]]:
+        try:
+            with open(self.cache_file, "r") as f:
+                cached = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if time.time() - cached.get("created", 0) > self.ttl_s:
+            return None
+        return cached.get("urls")
+
+    def _write_cache(self, urls: Dict[str, str]) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self.cache_dir, suffix=".tmp", delete=False
+            ) as f:
+                json.dump(
+                    {"created": time.time(), "env": self.env, "region": self.region, "urls": urls},
+                    f,
+                    indent=2,
+                )
+            os.replace(f.name, self.cache_file)
+        except OSError:
+            pass  # cache is optional, e.g. read only home directory in CI
+
+    def _fetch(self) -> Dict[str, str]:
+        prefix = f"{self.env}-"
+        urls = {}
+        for item in _BACKENDS[self.backend](self.region):
+            name = item.get("name") or ""
+            if name.startswith(prefix) and item.get("id"):
+                urls[name[len(prefix):]] = (
+                    f"https://{item['id']}.execute-api.{self.region}.amazonaws.com/{self.env}"
+                )
+        return urls
+
+    def urls(self, refresh: bool = False) -> Dict[str, str]:
+        """Return service name -> API URL for all services of the env.
+
+        Raises:
+            ApiDiscoveryError: when the REST APIs cannot be listed
+        """
+        if self._urls is not None and not refresh:
+            return self._urls
+        if not refresh and self._use_disk_cache():
+            cached = self._read_cache()
+            if cached is not None:
+                self._urls, self._from_cache = cached, True
+                return cached
+        self._urls, self._from_cache = self._fetch(), False
+        if self._use_disk_cache():
+            self._write_cache(self._urls)
+        return self._urls
+
+    def url(self, service: str) -> Optional[str]:
+        """Return API URL of the service, None when it is not deployed.
+
+        <SERVICE>_API_URL environment variable overrides the discovery.
+
+        Raises:
+            ApiDiscoveryError: when the REST APIs cannot be listed
+        """
+        override = os.environ.get(api_url_env_var(service))
+        if override:
+            return override
+        api_url = self.urls().get(service)
+        if api_url is None and self._from_cache:
+            api_url = self.urls(refresh=True).get(service)
+        return api_url
+
+
+def discover_api_url(
+    service: str, env: Optional[str] = None, region: Optional[str] = None
+) -> Optional[str]:
+    """Return API URL of the service or None, never raises.
+
+    env and region default to ABK_DEPLOYMENT_ENV and ABK_DEPLOYMENT_REGION.
+    """
+    env = env or os.environ.get("ABK_DEPLOYMENT_ENV", DEFAULT_ENV)
+    region = region or os.environ.get("ABK_DEPLOYMENT_REGION", DEFAULT_REGION)
+    try:
+        return ApiDiscovery(env, region).url(service)
+    except ApiDiscoveryError as e:
+        print(f"Warning: API discovery failed: {e}", file=sys.stderr)
+        return None
+
+
+# -----------------------------------------------------------------------------
+# command line
+# -----------------------------------------------------------------------------
+def main() -> int:
+    """Print the URL of one service or the URLs of all services."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["url", "list"], help="url of one service or list all")
+    parser.add_argument("service", nargs="?", help="service name without env, e.g. abk-hello")
+    parser.add_argument("--env", default=os.environ.get("ABK_DEPLOYMENT_ENV", DEFAULT_ENV))
+    parser.add_argument("--region", default=os.environ.get("ABK_DEPLOYMENT_REGION", DEFAULT_REGION))
+    parser.add_argument("--backend", choices=BACKENDS, default=None, help="default: auto")
+    parser.add_argument("--refresh", action="store_true", help="ignore the on disk cache")
+    parser.add_argument(
+        "--format",
+        choices=["json", "env", "export"],
+        default="json",
+        help="list output: JSON object, NAME=url lines or export NAME=\"url\" lines",
+    )
+    args = parser.parse_args()
+    if args.command == "url" and not args.service:
+        parser.error("url needs a service name")
+
+    discovery = ApiDiscovery(args.env, args.region, args.backend)
+    try:
+        if args.command == "url":
+            if args.refresh:
+                discovery.urls(refresh=True)
+            api_url = discovery.url(args.service)
+            if api_url is None:
+                print(f"{args.env}-{args.service} not found in {args.region}", file=sys.stderr)
+                return 1
+            print(api_url)
+            return 0
+        urls = discovery.urls(refresh=args.refresh)
+    except ApiDiscoveryError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+
+    if args.format == "json":
+        print(json.dumps(urls, indent=2, sort_keys=True))
+    else:
+        line_format = 'export {}="{}"' if args.format == "export" else "{}={}"
+        for service, api_url in sorted(urls.items()):
+            print(line_format.format(api_url_env_var(service), api_url))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Unit tests for api_discovery.py, offline with the stub backend and a counting fake backend.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import api_discovery  # noqa: E402
+from api_discovery import ApiDiscovery, ApiDiscoveryError, api_url_env_var  # noqa: E402
+
+
+REST_APIS = {
+    "items": [
+        {"id": "abc123", "name": "dev-abk-hello"},
+        {"id": "def456", "name": "dev-user-service"},
+        {"id": "ghi789", "name": "qa-abk-hello"},
+        {"id": "zzz000", "name": "unrelated"},
+    ]
+}
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    """Remove URL overrides and discovery settings of the calling shell."""
+    for name in list(os.environ):
+        if name.endswith("_API_URL") or name.startswith("ABK_API_DISCOVERY_"):
+            monkeypatch.delenv(name)
+
+
+@pytest.fixture
+def stub_file(tmp_path, monkeypatch):
+    """Stub backend listing REST_APIS."""
+    path = tmp_path / "rest_apis.json"
+    path.write_text(json.dumps(REST_APIS))
+    monkeypatch.setenv("ABK_API_DISCOVERY_STUB_FILE", str(path))
+    return path
+
+
+@pytest.fixture
+def fake_aws(monkeypatch):
+    """Replace the AWS CLI backend with a fake counting its calls."""
+    calls = []
+
+    def list_rest_apis(region):
+        calls.append(region)
+        return list(fake_aws_items)
+
+    fake_aws_items = list(REST_APIS["items"])
+    monkeypatch.setitem(api_discovery._BACKENDS, "aws-cli", list_rest_apis)
+    return calls, fake_aws_items
+
+
+class TestApiDiscovery:
+    """URL mapping, disk cache and overrides."""
+
+    def test_urls__maps_every_service_of_env(self, stub_file, tmp_path):
+        discovery = ApiDiscovery("dev", "us-west-2", "stub", cache_dir=tmp_path)
+        assert discovery.urls() == {
+            "abk-hello": "https://abc123.execute-api.us-west-2.amazonaws.com/dev",
+            "user-service": "https://def456.execute-api.us-west-2.amazonaws.com/dev",
+        }
+
+    def test_urls__stub_backend_never_writes_disk_cache(self, stub_file, tmp_path):
+        discovery = ApiDiscovery("qa", "us-west-2", "stub", cache_dir=tmp_path / "cache")
+        assert discovery.url("abk-hello") == "https://ghi789.execute-api.us-west-2.amazonaws.com/qa"
+        assert not discovery.cache_file.exists()
+
+    def test_urls__stub_backend_without_file_raises(self, tmp_path):
+        with pytest.raises(ApiDiscoveryError):
+            ApiDiscovery("dev", "us-west-2", "stub", cache_dir=tmp_path).urls()
+
+    def test_urls__one_backend_call_shared_through_disk_cache(self, fake_aws, tmp_path):
+        calls, _ = fake_aws
+        first = ApiDiscovery("dev", "us-west-2", "aws-cli", cache_dir=tmp_path, ttl_s=60)
+        second = ApiDiscovery("dev", "us-west-2", "aws-cli", cache_dir=tmp_path, ttl_s=60)
+        assert first.urls() == second.urls()
+        assert second.url("user-service").startswith("https://def456.")
+        assert calls == ["us-west-2"]
+        assert first.cache_file.name == "api-urls-dev-us-west-2.json"
+
+    def test_urls__cache_is_keyed_by_env_and_region(self, fake_aws, tmp_path):
+        calls, _ = fake_aws
+        ApiDiscovery("dev", "us-west-2", "aws-cli", cache_dir=tmp_path, ttl_s=60).urls()
+        ApiDiscovery("qa", "us-west-2", "aws-cli", cache_dir=tmp_path, ttl_s=60).urls()
+        ApiDiscovery("dev", "us-east-1", "aws-cli", cache_dir=tmp_path, ttl_s=60).urls()
+        assert calls == ["us-west-2", "us-west-2", "us-east-1"]
+
+    def test_urls__expired_cache_is_refreshed(self, fake_aws, tmp_path):
+        calls, _ = fake_aws
+        discovery = ApiDiscovery("dev", "us-west-2", "aws-cli", cache_dir=tmp_path, ttl_s=60)
+        discovery.urls()
+        cached = json.loads(discovery.cache_file.read_text())
+        cached["created"] = time.time() - 120
+        discovery.cache_file.write_text(json.dumps(cached))
+        ApiDiscovery("dev", "us-west-2", "aws-cli", cache_dir=tmp_path, ttl_s=60).urls()
+        assert len(calls) == 2
+
+    def test_urls__zero_ttl_disables_disk_cache(self, fake_aws, tmp_path):
+        calls, _ = fake_aws
+        ApiDiscovery("dev", "us-west-2", "aws-cli", cache_dir=tmp_path, ttl_s=0).urls()
+        ApiDiscovery("dev", "us-west-2", "aws-cli", cache_dir=tmp_path, ttl_s=0).urls()
+        assert len(calls) == 2
+        assert not list(tmp_path.iterdir())
+
+    def test_url__service_missing_from_cache_refreshes_once(self, fake_aws, tmp_path):
+        calls, items = fake_aws
+        ApiDiscovery("dev", "us-west-2", "aws-cli", cache_dir=tmp_path, ttl_s=60).urls()
+        items.append({"id": "new111", "name": "dev-new-service"})
+        discovery = ApiDiscovery("dev", "us-west-2", "aws-cli", cache_dir=tmp_path, ttl_s=60)
+        assert discovery.url("new-service").startswith("https://new111.")
+        assert discovery.url("not-deployed") is None
+        assert len(calls) == 2
+
+    def test_url__env_var_overrides_discovery(self, fake_aws, tmp_path, monkeypatch):
+        calls, _ = fake_aws
+        monkeypatch.setenv("ABK_HELLO_API_URL", "http://127.0.0.1:3000/dev")
+        discovery = ApiDiscovery("dev", "us-west-2", "aws-cli", cache_dir=tmp_path)
+        assert discovery.url("abk-hello") == "http://127.0.0.1:3000/dev"
+        assert calls == []
+
+    def test_api_url_env_var__converts_service_name(self):
+        assert api_url_env_var("abk-hello") == "ABK_HELLO_API_URL"
+
+    def test_init__unknown_backend_raises(self, tmp_path):
+        with pytest.raises(ValueError):
+            ApiDiscovery(backend="soap", cache_dir=tmp_path)
+
+    def test_discover_api_url__backend_error_returns_none(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("ABK_API_DISCOVERY_BACKEND", "stub")
+        assert api_discovery.discover_api_url("abk-hello", "dev", "us-west-2") is None
+
+
+class TestApiDiscoveryCli:
+    """Command line used by the shell scripts."""
+
+    def run_cli(self, *args):
+        return subprocess.run(
+            [sys.executable, api_discovery.__file__, *args, "--backend", "stub"],
+            capture_output=True,
+            text=True,
+            env={k: v for k, v in os.environ.items() if not k.endswith("_API_URL")},
+        )
+
+    def test_url__prints_url_only(self, stub_file):
+        result = self.run_cli("url", "abk-hello", "--env", "dev")
+        assert result.returncode == 0
+        assert result.stdout == "https://abc123.execute-api.us-west-2.amazonaws.com/dev\n"
+
+    def test_url__not_found_exits_1(self, stub_file):
+        result = self.run_cli("url", "not-deployed", "--env", "dev")
+        assert result.returncode == 1
+        assert result.stdout == ""
+
+    def test_list__env_format(self, stub_file):
+        result = self.run_cli("list", "--env", "dev", "--format", "env")
+        assert result.stdout.splitlines() == [
+            "ABK_HELLO_API_URL=https://abc123.execute-api.us-west-2.amazonaws.com/dev",
+            "USER_SERVICE_API_URL=https://def456.execute-api.us-west-2.amazonaws.com/dev",
+        ]
+
+    def test_list__backend_error_exits_2(self):
+        result = self.run_cli("list")
+        assert result.returncode == 2